@@ -48,8 +48,11 @@ class AdminAPICommand(commands.Command):
             audit.PostgresActionRecorder(self.pg_storage) if cfg.auth_enabled else audit.NoopActionRecorder()
         )
 
+        bulk_storage = self.pg_storage.workload(postgres.Workload.BULK_WRITE)
         layer0_repo = repositories.Layer0Repository(self.pg_storage, log)
-        refresh = table_stats.make_table_stats_refresh(layer0_repo)
+        refresh = table_stats.make_table_stats_refresh(
+            repositories.Layer0Repository(self.pg_storage.workload(postgres.Workload.BACKGROUND).replica(), log)
+        )
         self.table_stats_cache = cache.BackgroundCache(
             "table_stats",
             refresh,
@@ -64,7 +67,9 @@ class AdminAPICommand(commands.Command):
             layer0_repo=layer0_repo,
             layer1_repo=repositories.Layer1Repository(self.pg_storage, log),
             layer2_repo=repositories.Layer2Repository(self.pg_storage, log),
-            metadata_repo=repositories.MetadataRepository(self.pg_storage),
+            metadata_repo=repositories.MetadataRepository(self.pg_storage.workload(postgres.Workload.TAP).replica()),
+            bulk_layer0_repo=repositories.Layer0Repository(bulk_storage, log),
+            bulk_layer1_repo=repositories.Layer1Repository(bulk_storage, log),
             authenticator=authenticator,
             storage=self.pg_storage,
             clients=clients.Clients(cfg.clients.ads_token),
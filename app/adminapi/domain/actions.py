@@ -31,8 +31,11 @@ class Actions(adminapi.Actions):
         storage: postgres.PgStorage,
         clients: clients.Clients,
         table_stats_cache: cache.BackgroundCache[adminapi.TableStatsSnapshot],
+        bulk_layer0_repo: repositories.Layer0Repository | None = None,
+        bulk_layer1_repo: repositories.Layer1Repository | None = None,
     ):
         self.metadata_repo = metadata_repo
+        self.storage = storage
         self.source_manager = sources.SourceManager(common_repo)
         self.auth_manager = admin_auth.AuthManager(authenticator, storage)
         self.table_upload_manager = table_upload.TableUploadManager(
@@ -41,10 +44,11 @@ class Actions(adminapi.Actions):
             layer1_repo,
             clients,
             table_stats_cache,
+            bulk_layer0_repo=bulk_layer0_repo,
         )
         self.crossmatch_manager = crossmatch.CrossmatchManager(layer0_repo, layer1_repo, layer2_repo)
         self.pgc_manager = pgc.PgcManager(common_repo, layer0_repo)
-        self.layer1_writer = layer1_write.Layer1Writer(layer1_repo)
+        self.layer1_writer = layer1_write.Layer1Writer(bulk_layer1_repo or layer1_repo)
         self.catalog_manager = catalogs.CatalogManager(layer1_repo)
 
     def create_source(self, r: adminapi.CreateSourceRequest) -> adminapi.CreateSourceResponse:
@@ -95,6 +99,27 @@ class Actions(adminapi.Actions):
     def merge_pgcs(self, r: adminapi.MergePgcsRequest) -> adminapi.MergePgcsResponse:
         return self.pgc_manager.merge_pgcs(r)
 
+    def get_slow_queries(self, r: adminapi.GetSlowQueriesRequest) -> adminapi.GetSlowQueriesResponse:
+        entries = [
+            entry
+            for entry in self.storage.slow_queries()
+            if r.fingerprint is None or entry.fingerprint == r.fingerprint
+        ]
+        return adminapi.GetSlowQueriesResponse(
+            queries=[adminapi.SlowQuery.model_validate(entry, from_attributes=True) for entry in entries[: r.limit]]
+        )
+
+    def get_query_metrics(self, r: adminapi.GetQueryMetricsRequest) -> adminapi.GetQueryMetricsResponse:
+        return adminapi.GetQueryMetricsResponse(
+            queries=[
+                adminapi.QueryStats.model_validate(stats, from_attributes=True)
+                for stats in self.storage.query_stats()[: r.limit]
+            ],
+            pools=[
+                adminapi.PoolStats.model_validate(stats, from_attributes=True) for stats in self.storage.pool_stats()
+            ],
+        )
+
     def tap_sync(self, request: adminapi.TAPSyncRequest) -> adminapi.TAPSyncResponse:
         result = self.metadata_repo.query_with_metadata(
             request.query,
@@ -30,7 +30,13 @@ class _CatalogBearing(Protocol):
 
 
 def icrs_to_response(obj: model.ICRSCatalogObject) -> adminapi.Coordinates:
-    lon, lat, e_lon, e_lat = astronomy.equatorial_to_lonlat(obj.ra, obj.dec, obj.e_ra, obj.e_dec, "galactic")
+    if obj.glon is not None and obj.glat is not None:
+        # Objects read from layer 2 carry the galactic coordinates computed by its import.
+        lon, lat = obj.glon, obj.glat
+        e_lon = astronomy.to(obj.e_ra * u.Unit("deg"), "arcsec")
+        e_lat = astronomy.to(obj.e_dec * u.Unit("deg"), "arcsec")
+    else:
+        lon, lat, e_lon, e_lat = astronomy.equatorial_to_lonlat(obj.ra, obj.dec, obj.e_ra, obj.e_dec, "galactic")
 
     return adminapi.Coordinates(
         equatorial=adminapi.EquatorialCoordinates(
@@ -19,11 +19,13 @@ from app.data.repositories.common import ColumnSchemaInfo, TableSchemaInfo
 from app.data.repositories.layer0.common import RAWDATA_SCHEMA
 from app.lib import astronomy, concurrency
 from app.lib.storage import enums, mapping
+from app.lib.web import pagination
 from app.lib.web.errors import NotFoundError, RuleValidationError
 
 BIBCODE_REGEX = "^([0-9]{4}[A-Za-z.&]{5}[A-Za-z0-9.]{4}[AELPQ-Z0-9.][0-9.]{4}[A-Z])$"
 
 FORBIDDEN_COLUMN_NAMES = {repositories.INTERNAL_ID_COLUMN_NAME}
+RECORDS_CURSOR_KIND = "record"
 
 logger = structlog.stdlib.get_logger()
 
@@ -88,9 +90,12 @@ class TableUploadManager:
         layer1_repo: repositories.Layer1Repository,
         clients: clients.Clients,
         table_stats_cache: cache.BackgroundCache[adminapi.TableStatsSnapshot],
+        bulk_layer0_repo: repositories.Layer0Repository | None = None,
     ) -> None:
         self.common_repo = common_repo
         self.layer0_repo = layer0_repo
+        # Raw data uploads go through a separate pool so that they cannot starve interactive reads.
+        self.bulk_layer0_repo = bulk_layer0_repo or layer0_repo
         self.layer1_repo = layer1_repo
         self.clients = clients
         self.table_stats_cache = table_stats_cache
@@ -156,17 +161,17 @@ class TableUploadManager:
         data_df[repositories.INTERNAL_ID_COLUMN_NAME] = data_df.apply(_get_hash_func(r.table_name), axis=1)
         data_df = data_df.drop_duplicates(subset=repositories.INTERNAL_ID_COLUMN_NAME, keep="last")
 
-        with self.layer0_repo.with_tx():
+        with self.bulk_layer0_repo.with_tx():
             errgr = concurrency.ErrorGroup()
             errgr.run(
-                self.layer0_repo.insert_raw_data,
+                self.bulk_layer0_repo.insert_raw_data,
                 model.Layer0RawData(
                     table_name=r.table_name,
                     data=data_df,
                 ),
             )
             errgr.run(
-                self.layer0_repo.register_records,
+                self.bulk_layer0_repo.register_records,
                 r.table_name,
                 record_ids=data_df[repositories.INTERNAL_ID_COLUMN_NAME].tolist(),
             )
@@ -249,6 +254,10 @@ class TableUploadManager:
             has_pgc = False
 
         triage_filter = r.triage_status.value if r.triage_status is not None else None
+        after_id: str | None = None
+        if r.cursor is not None:
+            (after_id,) = pagination.decode_cursor(r.cursor, RECORDS_CURSOR_KIND, (str,))
+
         errgr = concurrency.ErrorGroup()
         records_task = errgr.run(
             self.layer0_repo.fetch_records,
@@ -259,6 +268,7 @@ class TableUploadManager:
             has_pgc=has_pgc,
             pgc_value=r.pgc,
             triage_status=triage_filter,
+            after_id=after_id,
         )
         schema_task = errgr.run(
             self.common_repo.get_schema,
@@ -383,7 +393,10 @@ class TableUploadManager:
             ),
             catalogs=catalog_schema,
         )
-        return adminapi.GetRecordsResponse(records=records_list, schema=record_schema)
+        next_cursor = None
+        if raw_records and len(raw_records) == r.page_size:
+            next_cursor = pagination.encode_cursor(RECORDS_CURSOR_KIND, [raw_records[-1].id])
+        return adminapi.GetRecordsResponse(records=records_list, schema=record_schema, next_cursor=next_cursor)
 
 
 def _bibliography_to_presentation(bib: model.Bibliography) -> adminapi.Bibliography:
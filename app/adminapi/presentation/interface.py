@@ -442,6 +442,62 @@ class GetCatalogsResponse(pydantic.BaseModel):
     catalogs: list[CatalogSchema]
 
 
+class GetSlowQueriesRequest(pydantic.BaseModel):
+    limit: int = pydantic.Field(default=100, ge=1)
+    fingerprint: str | None = None
+
+
+class SlowQuery(pydantic.BaseModel):
+    recorded_at: datetime.datetime
+    fingerprint: str
+    query: str
+    params_digest: str | None
+    num_rows: int
+    elapsed_seconds: float
+    workload: str
+    plan: str | None
+
+
+class GetSlowQueriesResponse(pydantic.BaseModel):
+    queries: list[SlowQuery]
+
+
+class GetQueryMetricsRequest(pydantic.BaseModel):
+    limit: int = pydantic.Field(default=100, ge=1)
+
+
+class QueryStats(pydantic.BaseModel):
+    fingerprint: str
+    query: str
+    count: int
+    total_seconds: float
+    p50_seconds: float
+    p95_seconds: float
+    p99_seconds: float
+    max_seconds: float
+    rows: int
+    bytes: int
+
+
+class PoolStats(pydantic.BaseModel):
+    workload: str
+    min_size: int
+    max_size: int
+    size: int
+    available: int
+    waiting: int
+    checkouts: int
+    checkout_errors: int
+    wait_seconds_total: float
+    saturation: float
+    warmup_seconds: float | None
+
+
+class GetQueryMetricsResponse(pydantic.BaseModel):
+    queries: list[QueryStats]
+    pools: list[PoolStats]
+
+
 def postgres_type_to_datatype(pg_type: str) -> DatatypeEnum:
     normalized = pg_type.lower().strip()
     if normalized in {"text", "character varying", "character", "char", "user-defined"}:
@@ -524,6 +580,14 @@ class Actions(abc.ABC):
     def merge_pgcs(self, r: MergePgcsRequest) -> MergePgcsResponse:
         pass
 
+    @abc.abstractmethod
+    def get_slow_queries(self, r: GetSlowQueriesRequest) -> GetSlowQueriesResponse:
+        pass
+
+    @abc.abstractmethod
+    def get_query_metrics(self, r: GetQueryMetricsRequest) -> GetQueryMetricsResponse:
+        pass
+
     @abc.abstractmethod
     def tap_sync(self, request: tap.TAPSyncRequest) -> tap.TAPSyncResponse:
         pass
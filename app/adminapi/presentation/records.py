@@ -19,10 +19,20 @@ class GetRecordsRequest(pydantic.BaseModel):
     table_name: str
     page: int = 0
     page_size: int = 25
+    cursor: str | None = pydantic.Field(
+        default=None,
+        description="Continuation token from next_cursor of the previous page. Cannot be combined with page",
+    )
     pgc: int | None = None
     upload_status: UploadStatus | None = None
     triage_status: CrossmatchTriageStatus | None = None
 
+    @pydantic.model_validator(mode="after")
+    def check_cursor_and_page(self) -> "GetRecordsRequest":
+        if self.cursor is not None and self.page != 0:
+            raise ValueError("page and cursor cannot be specified together")
+        return self
+
     @pydantic.model_validator(mode="after")
     def check_exclusive_pgc_filter(self) -> "GetRecordsRequest":
         if self.pgc is not None:
@@ -147,3 +157,7 @@ class RecordSchema(pydantic.BaseModel):
 class GetRecordsResponse(pydantic.BaseModel):
     records: list[Record]
     schema_: RecordSchema = pydantic.Field(..., alias="schema")
+    next_cursor: str | None = pydantic.Field(
+        default=None,
+        description="Token to pass as cursor to get the next page. Absent when the page is not full",
+    )
@@ -132,6 +132,18 @@ class API:
         response = self.actions.merge_pgcs(request)
         return server.APIOkResponse(data=response)
 
+    def get_slow_queries(
+        self, request: Annotated[interface.GetSlowQueriesRequest, fastapi.Query()]
+    ) -> server.APIOkResponse[interface.GetSlowQueriesResponse]:
+        response = self.actions.get_slow_queries(request)
+        return server.APIOkResponse(data=response)
+
+    def get_query_metrics(
+        self, request: Annotated[interface.GetQueryMetricsRequest, fastapi.Query()]
+    ) -> server.APIOkResponse[interface.GetQueryMetricsResponse]:
+        response = self.actions.get_query_metrics(request)
+        return server.APIOkResponse(data=response)
+
     def tap_sync(
         self,
         request: fastapi.Request,
@@ -411,6 +423,26 @@ For every column that has unit metadata in the database, the request must includ
                 allowed_roles=admin_only,
                 audit_action=True,
             ),
+            server.Route(
+                "/v1/admin/slow-queries",
+                http.HTTPMethod.GET,
+                api.get_slow_queries,
+                "List recent slow queries",
+                """Returns the most recent queries of this server process that exceeded the slow-query
+threshold, newest first. Queries are normalized and identified by a fingerprint, parameters are only
+reported as a digest. Queries over the explain threshold include their `EXPLAIN (ANALYZE, BUFFERS)` plan.""",
+                allowed_roles=admin_only,
+            ),
+            server.Route(
+                "/v1/admin/query-metrics",
+                http.HTTPMethod.GET,
+                api.get_query_metrics,
+                "Get per-query latency metrics",
+                """Returns latency statistics of this server process per query fingerprint, the fingerprints with the
+largest total time first. Latency quantiles are estimated from histogram buckets and result sizes in bytes are
+estimated from a sample of rows. Also includes the state of every connection pool of the storage.""",
+                allowed_roles=admin_only,
+            ),
             server.Route(
                 "/v1/tap/sync",
                 http.HTTPMethod.GET,
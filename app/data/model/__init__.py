@@ -10,7 +10,13 @@ from app.data.model.interface import (
     get_object,
 )
 from app.data.model.kinematics import KinematicsLineWidthCatalogObject
-from app.data.model.layer2 import Layer2CatalogObject, Layer2Object
+from app.data.model.layer2 import (
+    DesignationMatch,
+    DesignationSuggestion,
+    Layer2CatalogObject,
+    Layer2Object,
+    StoredApex,
+)
 from app.data.model.nature import NatureCatalogObject
 from app.data.model.note import NoteCatalogObject
 from app.data.model.photometry import PhotometryIsophotalCatalogObject, PhotometryTotalCatalogObject
@@ -53,8 +59,11 @@ __all__ = [
     "NatureRecord",
     "RedshiftRecord",
     "Record",
+    "DesignationMatch",
+    "DesignationSuggestion",
     "Layer2CatalogObject",
     "Layer2Object",
+    "StoredApex",
     "TableRecord",
     "RawCatalog",
     "RUNTIME_RAW_CATALOGS",
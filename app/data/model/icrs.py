@@ -11,11 +11,20 @@ class ICRSCatalogObject(interface.CatalogObject):
         dec: float,
         e_ra: float,
         e_dec: float,
+        glon: float | None = None,
+        glat: float | None = None,
+        sgl: float | None = None,
+        sgb: float | None = None,
     ) -> None:
         self.ra = ra
         self.dec = dec
         self.e_ra = e_ra
         self.e_dec = e_dec
+        # Galactic and supergalactic coordinates precomputed by the layer 2 import, if known.
+        self.glon = glon
+        self.glat = glat
+        self.sgl = sgl
+        self.sgb = sgb
 
     def catalog(self) -> interface.RawCatalog:
         return interface.RawCatalog.ICRS
@@ -34,7 +43,7 @@ class ICRSCatalogObject(interface.CatalogObject):
 
     @classmethod
     def layer2_keys(cls) -> list[str]:
-        return ["ra", "e_ra", "dec", "e_dec"]
+        return ["ra", "e_ra", "dec", "e_dec", "glon", "glat", "sgl", "sgb"]
 
     def layer2_data(self) -> dict[str, Any]:
         return {
@@ -42,8 +51,21 @@ class ICRSCatalogObject(interface.CatalogObject):
             "dec": self.dec,
             "e_ra": self.e_ra,
             "e_dec": self.e_dec,
+            "glon": self.glon,
+            "glat": self.glat,
+            "sgl": self.sgl,
+            "sgb": self.sgb,
         }
 
     @classmethod
     def from_layer2(cls, data: dict[str, Any]) -> Self:
-        return cls(ra=data["ra"], e_ra=data["e_ra"], dec=data["dec"], e_dec=data["e_dec"])
+        return cls(
+            ra=data["ra"],
+            e_ra=data["e_ra"],
+            dec=data["dec"],
+            e_dec=data["e_dec"],
+            glon=data.get("glon"),
+            glat=data.get("glat"),
+            sgl=data.get("sgl"),
+            sgb=data.get("sgb"),
+        )
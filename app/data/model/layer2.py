@@ -1,4 +1,6 @@
-from dataclasses import dataclass
+import datetime
+from dataclasses import dataclass, field
+from typing import Any
 
 from app.data.model import interface
 
@@ -7,11 +9,28 @@ from app.data.model import interface
 class Layer2CatalogObject:
     pgc: int
     data: list[interface.CatalogObject]
+    # Sort key of the object in an ordered search, used to continue the search after it.
+    sort_key: list[Any] | None = field(default=None, compare=False)
 
     def get[T](self, t: type[T]) -> T | None:
         return interface.get_object(self.data, t)
 
 
+@dataclass
+class DesignationMatch:
+    pgc: int
+    design: str
+    # Trigram similarity of the normalized designations, 1 for exact matches.
+    similarity: float
+    exact: bool
+
+
+@dataclass
+class DesignationSuggestion:
+    pgc: int
+    design: str
+
+
 @dataclass
 class DesignationCatalog:
     name: str
@@ -23,6 +42,11 @@ class ICRSCatalog:
     e_ra: float
     dec: float
     e_dec: float
+    # Galactic and supergalactic coordinates precomputed by the layer 2 import, if known.
+    glon: float | None = None
+    glat: float | None = None
+    sgl: float | None = None
+    sgb: float | None = None
 
 
 @dataclass
@@ -31,6 +55,35 @@ class RedshiftCatalog:
     e_cz: float
 
 
+@dataclass
+class ApexVelocity:
+    """
+    Velocity of an object with respect to a configured apex as precomputed by the layer 2 import, in km/s.
+    """
+
+    v: float
+    e_v: float
+
+
+@dataclass
+class StoredApex:
+    """
+    Parameters that the velocities of an apex in layer 2 were computed with, in the order of
+    `ApexConfig.parameters`, and the last update times of the ICRS and the redshift catalogs reflected in them.
+    """
+
+    parameters: tuple[float, ...]
+    icrs_updated_at: datetime.datetime
+    redshift_updated_at: datetime.datetime
+
+    @property
+    def updated_at(self) -> datetime.datetime:
+        """
+        Time up to which changes of the objects are reflected in both catalogs the velocities are computed from.
+        """
+        return min(self.icrs_updated_at, self.redshift_updated_at)
+
+
 @dataclass
 class NatureCatalog:
     type_name: str
@@ -1,10 +1,12 @@
 from app.data.repositories.common import CommonRepository
 from app.data.repositories.layer0 import INTERNAL_ID_COLUMN_NAME, Layer0Repository
 from app.data.repositories.layer1 import Layer1Repository
-from app.data.repositories.layer2 import Layer2Repository
-from app.data.repositories.metadata import MetadataRepository
+from app.data.repositories.layer2 import AsyncLayer2Repository, Layer2Repository
+from app.data.repositories.metadata import AsyncMetadataRepository, MetadataRepository
 
 __all__ = [
+    "AsyncLayer2Repository",
+    "AsyncMetadataRepository",
     "CommonRepository",
     "Layer0Repository",
     "INTERNAL_ID_COLUMN_NAME",
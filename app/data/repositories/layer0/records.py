@@ -2,6 +2,8 @@ import json
 from collections.abc import Sequence
 from typing import Any
 
+from psycopg import sql
+
 from app.data import model, template
 from app.data.repositories.common import touch_pgcs
 from app.data.repositories.layer0.common import metadata_to_candidates
@@ -32,12 +34,10 @@ class Layer0RecordRepository(postgres.TransactionalPGRepository):
 
         table_id = table_id_row["id"]
 
-        query = (
-            "INSERT INTO layer0.records (id, table_id) VALUES (%s, %s) "
-            "ON CONFLICT (id) DO UPDATE SET table_id = EXCLUDED.table_id"
-        )
         rows = [[record_id, table_id] for record_id in record_ids]
-        self._storage.execute_batch(query, rows)
+        self._storage.bulk_upsert(
+            "layer0.records", ["id", "table_id"], rows, conflict_keys=["id"], update_columns=["table_id"]
+        )
 
     def get_processed_records(
         self,
@@ -114,19 +114,17 @@ class Layer0RecordRepository(postgres.TransactionalPGRepository):
     def set_crossmatch_results(self, rows: list[tuple[str, enums.RecordTriageStatus, list[int]]]) -> None:
         if not rows:
             return
-        query = (
-            "INSERT INTO layer0.crossmatch (record_id, triage_status, metadata) "
-            "VALUES (%s, %s, %s) "
-            "ON CONFLICT (record_id) DO UPDATE SET "
-            "triage_status = EXCLUDED.triage_status, metadata = EXCLUDED.metadata"
-        )
         db_rows = [
             (record_id, triage.value, json.dumps(_candidates_to_metadata(candidates)))
             for record_id, triage, candidates in rows
         ]
-        with self.with_tx():
-            with self._storage.get_connection().cursor() as cursor:
-                cursor.executemany(query, db_rows)
+        self._storage.bulk_upsert(
+            "layer0.crossmatch",
+            ["record_id", "triage_status", "metadata"],
+            db_rows,
+            conflict_keys=["record_id"],
+            update_columns=["triage_status", "metadata"],
+        )
 
     def assign_record_pgcs(self, record_ids: list[str]) -> None:
         if not record_ids:
@@ -207,42 +205,45 @@ class Layer0RecordRepository(postgres.TransactionalPGRepository):
                     pgcs_to_insert[row["record_id"]] = pgc_id
 
             if pgcs_to_insert:
-                update_query = (
-                    "UPDATE layer0.records SET pgc = v.pgc "
-                    "FROM (VALUES (%s, %s)) AS v(record_id, pgc) "
-                    "WHERE layer0.records.id = v.record_id AND layer0.records.pgc IS NULL"
-                )
                 rows = [[record_id, pgc_id] for record_id, pgc_id in pgcs_to_insert.items()]
-                self._storage.execute_batch(update_query, rows)
+                self._storage.bulk_update(
+                    "layer0.records", ["id", "pgc"], rows, keys=["id"], condition=sql.SQL("t.pgc IS NULL")
+                )
                 touch_pgcs(self._storage, list(set(pgcs_to_insert.values())))
 
     def upsert_pgc(self, pgcs: dict[str, int | None]) -> None:
-        pgcs_to_insert: dict[str, int] = {}
-
         new_records = [record_id for record_id, pgc in pgcs.items() if pgc is None]
 
-        if new_records:
-            minted = self._mint_pgc_ids(len(new_records))
-            for record_id, pgc_id in zip(new_records, minted, strict=True):
-                pgcs_to_insert[record_id] = pgc_id
+        with self.with_tx(pipeline=True):
+            pgcs_to_insert: dict[str, int] = {}
+
+            if new_records:
+                minted = self._mint_pgc_ids(len(new_records))
+                for record_id, pgc_id in zip(new_records, minted, strict=True):
+                    pgcs_to_insert[record_id] = pgc_id
 
-        for record_id, pgc in pgcs.items():
-            if pgc is not None:
-                pgcs_to_insert[record_id] = pgc
+            for record_id, pgc in pgcs.items():
+                if pgc is not None:
+                    pgcs_to_insert[record_id] = pgc
 
-        if pgcs_to_insert:
-            previous_rows = self._storage.query(
-                "SELECT pgc FROM layer0.records WHERE id = ANY(%s) AND pgc IS NOT NULL",
-                params=[list(pgcs_to_insert.keys())],
+            if not pgcs_to_insert:
+                return
+
+            # The objects the records pointed to are touched before the update, so that no statement has to wait
+            # for the result of another one.
+            self._storage.exec(
+                """
+                UPDATE common.pgc SET modification_time = NOW()
+                WHERE id = ANY(%s) OR id IN (SELECT pgc FROM layer0.records WHERE id = ANY(%s) AND pgc IS NOT NULL)
+                """,
+                params=[list(set(pgcs_to_insert.values())), list(pgcs_to_insert.keys())],
             )
-            previous_pgcs = {int(row["pgc"]) for row in previous_rows}
             update_query = (
                 "UPDATE layer0.records SET pgc = v.pgc FROM (VALUES (%s, %s)) AS v(record_id, pgc) "
                 "WHERE layer0.records.id = v.record_id"
             )
             rows = [[record_id, pgc_id] for record_id, pgc_id in pgcs_to_insert.items()]
             self._storage.execute_batch(update_query, rows)
-            touch_pgcs(self._storage, list(previous_pgcs | set(pgcs_to_insert.values())))
 
     def _mint_pgc_ids(self, count: int) -> list[int]:
         rows = self._storage.query(
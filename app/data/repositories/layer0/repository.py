@@ -1,4 +1,4 @@
-from collections.abc import Sequence
+from collections.abc import Iterator, Sequence
 
 import structlog
 from astropy import table
@@ -55,6 +55,16 @@ class Layer0Repository(postgres.TransactionalPGRepository):
             row_offset,
         )
 
+    def iter_raw_data(
+        self,
+        table_name: str,
+        columns: list[str] | None = None,
+        order_column: str | None = None,
+        order_direction: str = "asc",
+        batch_rows: int = postgres.DEFAULT_STREAM_BATCH_ROWS,
+    ) -> Iterator[model.Layer0RawData]:
+        return self.table_repo.iter_raw_data(table_name, columns, order_column, order_direction, batch_rows)
+
     def fetch_records(
         self,
         table_name: str,
@@ -64,9 +74,10 @@ class Layer0Repository(postgres.TransactionalPGRepository):
         has_pgc: bool | None = None,
         pgc_value: int | None = None,
         triage_status: str | None = None,
+        after_id: str | None = None,
     ) -> list[model.TableRecord]:
         return self.table_repo.fetch_records(
-            table_name, limit, row_offset, order_direction, has_pgc, pgc_value, triage_status
+            table_name, limit, row_offset, order_direction, has_pgc, pgc_value, triage_status, after_id
         )
 
     def fetch_metadata(self, table_name: str) -> model.Layer0TableMeta:
@@ -1,5 +1,6 @@
 import datetime
 import json
+from collections.abc import Iterable, Iterator
 from dataclasses import dataclass
 from datetime import date
 from typing import Any
@@ -32,6 +33,15 @@ def _row_to_serializable_dict(row: Any, drop: list[str]) -> dict[str, Any]:
     return out
 
 
+def _frame_from_batches(batches: Iterable[list[Any]]) -> pandas.DataFrame:
+    frames = [pandas.DataFrame(batch) for batch in batches]
+    if not frames:
+        return pandas.DataFrame()
+    if len(frames) == 1:
+        return frames[0]
+    return pandas.concat(frames, ignore_index=True)
+
+
 def _build_raw_table_select(
     table_name: str,
     columns: list[str] | None = None,
@@ -101,6 +111,21 @@ def _build_raw_table_select(
     return sql.Composed(parts), params
 
 
+def _column_params(column_description: model.ColumnDescription) -> dict[str, Any]:
+    column_params = {
+        "description": column_description.description,
+        "data_type": column_description.data_type,
+    }
+
+    if column_description.unit is not None:
+        column_params["unit"] = column_description.unit.to_string()
+
+    if column_description.ucd is not None:
+        column_params["ucd"] = column_description.ucd
+
+    return column_params
+
+
 @dataclass
 class QuantityMock:
     values: pandas.Series
@@ -132,7 +157,8 @@ class Layer0TableRepository(postgres.TransactionalPGRepository):
 
             fields.append((column_descr.name, column_descr.data_type, constraint))
 
-        with self.with_tx():
+        # Only the registry insert waits for its result, the remaining statements are sent in one round trip.
+        with self.with_tx(pipeline=True):
             row = self._storage.query_one(
                 template.INSERT_TABLE_REGISTRY_ITEM,
                 params=[data.bibliography_id, data.table_name, data.datatype],
@@ -153,8 +179,14 @@ class Layer0TableRepository(postgres.TransactionalPGRepository):
                     params=[RAWDATA_SCHEMA, data.table_name, json.dumps({"description": data.description})],
                 )
 
-            for column_descr in data.column_descriptions:
-                self.update_column_metadata(data.table_name, column_descr)
+            self._storage.execute_batch(
+                "SELECT meta.setparams(%s, %s, %s, %s::json)",
+                [
+                    [RAWDATA_SCHEMA, data.table_name, column_descr.name, json.dumps(_column_params(column_descr))]
+                    for column_descr in data.column_descriptions
+                ],
+            )
+            self._storage.exec("UPDATE layer0.tables SET modification_dt = now() WHERE id = %s", params=[table_id])
 
         return model.Layer0CreationResponse(table_id, True)
 
@@ -164,15 +196,6 @@ class Layer0TableRepository(postgres.TransactionalPGRepository):
             return
 
         fields = list(data.data.columns)
-        field_identifiers = sql.SQL(",").join([sql.Identifier(f) for f in fields])
-        placeholders = sql.SQL(",").join([sql.Placeholder()] * len(fields))
-        query = sql.SQL("INSERT INTO {}.{} ({}) VALUES ({}) ON CONFLICT DO NOTHING").format(
-            sql.Identifier(RAWDATA_SCHEMA),
-            sql.Identifier(data.table_name),
-            field_identifiers,
-            placeholders,
-        )
-        query_str = self._storage.query_str(query)
 
         rows: list[list[Any]] = []
         for row in data.data.to_dict(orient="records"):
@@ -184,7 +207,7 @@ class Layer0TableRepository(postgres.TransactionalPGRepository):
                 row_values.append(value)
             rows.append(row_values)
 
-        self._storage.execute_batch(query_str, rows)
+        self._storage.bulk_upsert(f"{RAWDATA_SCHEMA}.{data.table_name}", fields, rows)
 
     def fetch_table(
         self,
@@ -213,8 +236,7 @@ class Layer0TableRepository(postgres.TransactionalPGRepository):
             order_direction=order_direction,
             limit=limit,
         )
-        rows = self._storage.query(query, params=params)
-        df = pandas.DataFrame(rows)
+        df = _frame_from_batches(self._storage.stream(query, params=params))
         tbl = table.Table()
         if len(df) == 0:
             return tbl
@@ -275,8 +297,27 @@ class Layer0TableRepository(postgres.TransactionalPGRepository):
             record_id=record_id,
             row_offset=row_offset,
         )
-        rows = self._storage.query(query, params=params)
-        return model.Layer0RawData(table_name, pandas.DataFrame(rows))
+        return model.Layer0RawData(table_name, _frame_from_batches(self._storage.stream(query, params=params)))
+
+    def iter_raw_data(
+        self,
+        table_name: str,
+        columns: list[str] | None = None,
+        order_column: str | None = None,
+        order_direction: str = "asc",
+        batch_rows: int = postgres.DEFAULT_STREAM_BATCH_ROWS,
+    ) -> Iterator[model.Layer0RawData]:
+        """
+        Yields the raw table in chunks of at most `batch_rows` rows read through a single server-side cursor.
+        """
+        query, params = _build_raw_table_select(
+            table_name,
+            columns=columns,
+            order_column=order_column,
+            order_direction=order_direction,
+        )
+        for batch in self._storage.stream(query, params=params, batch_rows=batch_rows):
+            yield model.Layer0RawData(table_name, pandas.DataFrame(batch))
 
     def fetch_records(
         self,
@@ -287,7 +328,12 @@ class Layer0TableRepository(postgres.TransactionalPGRepository):
         has_pgc: bool | None = None,
         pgc_value: int | None = None,
         triage_status: str | None = None,
+        after_id: str | None = None,
     ) -> list[model.TableRecord]:
+        """
+        :param after_id: Internal id of the last record of the previous page. Records are then read from the one
+            following it in the requested order using the primary key instead of skipping `row_offset` rows.
+        """
         where_parts: list[str] = []
         if has_pgc is True:
             where_parts.append("o.pgc IS NOT NULL")
@@ -305,8 +351,6 @@ class Layer0TableRepository(postgres.TransactionalPGRepository):
 
         if triage_status == "unprocessed":
             where_parts.append("NOT EXISTS (SELECT 1 FROM layer0.crossmatch c WHERE c.record_id = o.id)")
-            params.append(limit)
-            params.append(row_offset)
             parts: list[sql.Composable] = [
                 sql.SQL(
                     "SELECT r.*, o.pgc "
@@ -323,8 +367,6 @@ class Layer0TableRepository(postgres.TransactionalPGRepository):
         elif triage_status in ("pending", "resolved"):
             where_parts.append("c.triage_status = %s")
             params.append(triage_status)
-            params.append(limit)
-            params.append(row_offset)
             parts = [
                 sql.SQL(
                     "SELECT r.*, o.pgc, c.triage_status, c.metadata AS crossmatch_metadata "
@@ -340,8 +382,6 @@ class Layer0TableRepository(postgres.TransactionalPGRepository):
             ]
             params.insert(0, table_name)
         else:
-            params.append(limit)
-            params.append(row_offset)
             parts = [
                 sql.SQL(
                     "SELECT r.*, o.pgc, c.triage_status, c.metadata AS crossmatch_metadata "
@@ -357,6 +397,12 @@ class Layer0TableRepository(postgres.TransactionalPGRepository):
             ]
             params.insert(0, table_name)
 
+        if after_id is not None:
+            where_parts.append(f"r.{INTERNAL_ID_COLUMN_NAME} {'<' if order_direction == 'desc' else '>'} %s")
+            params.append(after_id)
+        params.append(limit)
+        params.append(row_offset)
+
         if where_parts:
             parts.append(sql.SQL(" WHERE "))
             parts.append(sql.SQL(" AND ").join([sql.SQL(w) for w in where_parts]))
@@ -452,17 +498,7 @@ class Layer0TableRepository(postgres.TransactionalPGRepository):
 
     def update_column_metadata(self, table_name: str, column_description: model.ColumnDescription) -> None:
         table_id, _ = self._get_table_id(table_name)
-
-        column_params = {
-            "description": column_description.description,
-            "data_type": column_description.data_type,
-        }
-
-        if column_description.unit is not None:
-            column_params["unit"] = column_description.unit.to_string()
-
-        if column_description.ucd is not None:
-            column_params["ucd"] = column_description.ucd
+        column_params = _column_params(column_description)
 
         modification_query = "UPDATE layer0.tables SET modification_dt = now() WHERE id = %s"
 
@@ -1,10 +1,10 @@
 import datetime
 from typing import Any
 
+import numpy as np
 import structlog
 from astropy import table
 from astropy import units as u
-from psycopg import sql
 
 from app.data import model
 from app.data.repositories.common import get_column_units as query_column_units
@@ -53,26 +53,10 @@ class Layer1Repository(postgres.TransactionalPGRepository):
         if conflict_keys is None:
             conflict_keys = ["record_id"]
         all_columns = ["record_id"] + columns
-        schema, relation = table.split(".", maxsplit=1)
-        table_ident = sql.SQL("{}.{}").format(sql.Identifier(schema), sql.Identifier(relation))
-        column_idents = sql.SQL(", ").join(sql.Identifier(c) for c in all_columns)
-        placeholders = sql.SQL(", ").join(sql.Placeholder() for _ in all_columns)
-        conflict_idents = sql.SQL(", ").join(sql.Identifier(c) for c in conflict_keys)
         update_columns = [c for c in all_columns if c not in conflict_keys]
-        if update_columns:
-            on_conflict_set = sql.SQL(", ").join(
-                sql.SQL("{} = EXCLUDED.{}").format(sql.Identifier(c), sql.Identifier(c)) for c in update_columns
-            )
-            conflict_action = sql.SQL("ON CONFLICT ({}) DO UPDATE SET {}").format(conflict_idents, on_conflict_set)
-        else:
-            conflict_action = sql.SQL("ON CONFLICT ({}) DO NOTHING").format(conflict_idents)
-        query = sql.SQL("INSERT INTO {} ({}) VALUES ({}) {}").format(
-            table_ident, column_idents, placeholders, conflict_action
-        )
-        query_str = self._storage.query_str(query)
         rows = [[rid] + vals for rid, vals in zip(ids, data, strict=True)]
         with self.with_tx():
-            self._storage.execute_batch(query_str, rows)
+            self._storage.bulk_upsert(table, all_columns, rows, conflict_keys, update_columns)
             pgc_rows = self._storage.query(
                 "SELECT DISTINCT pgc FROM layer0.records WHERE id = ANY(%s) AND pgc IS NOT NULL",
                 params=[ids],
@@ -87,7 +71,7 @@ class Layer1Repository(postgres.TransactionalPGRepository):
         limit: int,
         offset: int,
         extra_joins: str = "",
-    ) -> list[dict[str, Any]]:
+    ) -> dict[str, np.ndarray]:
         query = f"""SELECT o.pgc, {select_columns}
         FROM {layer1_table} AS l1
         JOIN layer0.records AS o ON l1.record_id = o.id
@@ -102,19 +86,19 @@ class Layer1Repository(postgres.TransactionalPGRepository):
             LIMIT %s
         )
         ORDER BY o.pgc ASC"""
-        return self._storage.query(query, params=[dt, offset, limit])
+        return self._storage.query_columns(query, params=[dt, offset, limit])
 
     def get_new_nature_records(self, dt: datetime.datetime, limit: int, offset: int) -> table.QTable:
-        rows = self._query_new_pgc_records("nature.data", "l1.type_name", dt, limit, offset)
+        cols = self._query_new_pgc_records("nature.data", "l1.type_name", dt, limit, offset)
         return table.QTable(
             {
-                "pgc": [int(r["pgc"]) for r in rows],
-                "type_name": [r["type_name"] for r in rows],
+                "pgc": cols["pgc"].astype(np.int64),
+                "type_name": cols["type_name"].tolist(),
             }
         )
 
     def get_new_icrs_records(self, dt: datetime.datetime, limit: int, offset: int) -> table.QTable:
-        rows = self._query_new_pgc_records(
+        cols = self._query_new_pgc_records(
             "icrs.data",
             "l1.ra, l1.e_ra, l1.dec, l1.e_dec, t.datatype",
             dt,
@@ -125,17 +109,17 @@ class Layer1Repository(postgres.TransactionalPGRepository):
         units = self.get_column_units(model.RawCatalog.ICRS)
         return table.QTable(
             {
-                "pgc": [int(r["pgc"]) for r in rows],
-                "ra": u.Quantity([float(r["ra"]) for r in rows], u.Unit(units["ra"])),
-                "e_ra": u.Quantity([float(r["e_ra"]) for r in rows], u.Unit(units["e_ra"])),
-                "dec": u.Quantity([float(r["dec"]) for r in rows], u.Unit(units["dec"])),
-                "e_dec": u.Quantity([float(r["e_dec"]) for r in rows], u.Unit(units["e_dec"])),
-                "datatype": [r["datatype"].value for r in rows],
+                "pgc": cols["pgc"].astype(np.int64),
+                "ra": u.Quantity(cols["ra"].astype(np.float64), u.Unit(units["ra"])),
+                "e_ra": u.Quantity(cols["e_ra"].astype(np.float64), u.Unit(units["e_ra"])),
+                "dec": u.Quantity(cols["dec"].astype(np.float64), u.Unit(units["dec"])),
+                "e_dec": u.Quantity(cols["e_dec"].astype(np.float64), u.Unit(units["e_dec"])),
+                "datatype": [datatype.value for datatype in cols["datatype"]],
             }
         )
 
     def get_new_redshift_records(self, dt: datetime.datetime, limit: int, offset: int) -> table.QTable:
-        rows = self._query_new_pgc_records(
+        cols = self._query_new_pgc_records(
             "cz.data",
             "l1.cz, l1.e_cz, t.datatype",
             dt,
@@ -148,22 +132,19 @@ class Layer1Repository(postgres.TransactionalPGRepository):
         default_e_cz = float(DEFAULT_E_CZ.to_value(e_cz_unit))
         return table.QTable(
             {
-                "pgc": [int(r["pgc"]) for r in rows],
-                "cz": u.Quantity([float(r["cz"]) for r in rows], u.Unit(units["cz"])),
-                "e_cz": u.Quantity(
-                    [float(r["e_cz"]) if r["e_cz"] is not None else default_e_cz for r in rows],
-                    e_cz_unit,
-                ),
-                "datatype": [r["datatype"].value for r in rows],
+                "pgc": cols["pgc"].astype(np.int64),
+                "cz": u.Quantity(cols["cz"].astype(np.float64), u.Unit(units["cz"])),
+                "e_cz": u.Quantity(np.ma.filled(cols["e_cz"].astype(np.float64), default_e_cz), e_cz_unit),
+                "datatype": [datatype.value for datatype in cols["datatype"]],
             }
         )
 
     def get_new_designation_records(self, dt: datetime.datetime, limit: int, offset: int) -> table.QTable:
-        rows = self._query_new_pgc_records("designation.data", "l1.design", dt, limit, offset)
+        cols = self._query_new_pgc_records("designation.data", "l1.design", dt, limit, offset)
         return table.QTable(
             {
-                "pgc": [int(r["pgc"]) for r in rows],
-                "design": [r["design"] for r in rows],
+                "pgc": cols["pgc"].astype(np.int64),
+                "design": cols["design"].tolist(),
             }
         )
 
@@ -1,37 +1,57 @@
+from app.data.repositories.layer2.async_repository import AsyncLayer2Repository
 from app.data.repositories.layer2.filters import (
     AndFilter,
     DesignationCloseFilter,
     DesignationEqualsFilter,
     DesignationLikeFilter,
     Filter,
+    GalacticRangeFilter,
+    ICRSAngularDistanceOrdering,
     ICRSCoordinatesInRadiusFilter,
+    ICRSCoordinatesInSearchRadiusFilter,
+    ICRSCoordinatesInZoneRadiusFilter,
     ICRSDistanceOrdering,
+    ICRSNearestFilter,
+    ICRSNearestOrdering,
     Ordering,
     OrFilter,
     PGCOneOfFilter,
+    PGCOrdering,
+    SearchCenterDistanceOrdering,
 )
 from app.data.repositories.layer2.params import (
     CombinedSearchParams,
     DesignationSearchParams,
+    ICRSConeSearchParams,
     ICRSSearchParams,
     SearchParams,
 )
 from app.data.repositories.layer2.repository import Layer2Repository
 
 __all__ = [
+    "AsyncLayer2Repository",
     "Layer2Repository",
     "SearchParams",
     "ICRSSearchParams",
+    "ICRSConeSearchParams",
     "DesignationSearchParams",
     "DesignationLikeFilter",
     "CombinedSearchParams",
     "Filter",
     "ICRSCoordinatesInRadiusFilter",
+    "ICRSCoordinatesInSearchRadiusFilter",
+    "ICRSCoordinatesInZoneRadiusFilter",
     "ICRSDistanceOrdering",
+    "ICRSNearestFilter",
+    "ICRSNearestOrdering",
+    "ICRSAngularDistanceOrdering",
+    "GalacticRangeFilter",
     "Ordering",
     "DesignationEqualsFilter",
     "DesignationCloseFilter",
     "PGCOneOfFilter",
+    "PGCOrdering",
+    "SearchCenterDistanceOrdering",
     "AndFilter",
     "OrFilter",
 ]
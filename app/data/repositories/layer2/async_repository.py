@@ -0,0 +1,238 @@
+import asyncio
+import datetime
+import time
+from collections.abc import Mapping, Sequence
+from typing import Any
+
+import numpy as np
+import structlog
+
+from app.data import model
+from app.data.model import Layer2Object
+from app.data.model import layer2 as layer2_model
+from app.data.repositories.layer2 import filters as repofilters
+from app.data.repositories.layer2 import params, planner, queries, stats
+from app.lib.storage import postgres
+
+
+class AsyncLayer2Repository(postgres.AsyncTransactionalPGRepository):
+    """
+    Read-only asyncio variant of `Layer2Repository` used by the data API.
+    """
+
+    def __init__(
+        self,
+        storage: postgres.AsyncPgStorage,
+        logger: structlog.stdlib.BoundLogger,
+        single_statement_pgc_query: bool = False,
+    ) -> None:
+        self._logger = logger
+        self._storage = storage
+        self._single_statement_pgc_query = single_statement_pgc_query
+        self._table_stats: stats.TableStats | None = None
+        self._table_stats_loaded_at = 0.0
+
+    async def get_last_update_time(self, catalog: model.RawCatalog) -> datetime.datetime:
+        row = await self._storage.query_one(
+            "SELECT dt FROM layer2.last_update WHERE catalog = %s", params=[catalog.value]
+        )
+        return row["dt"]
+
+    async def get_latest_update_time(self) -> datetime.datetime:
+        row = await self._storage.query_one("SELECT max(dt) AS dt FROM layer2.last_update")
+        return row["dt"]
+
+    async def get_table_stats(self) -> stats.TableStats:
+        """
+        Returns the sizes of layer 2 tables that Postgres keeps for its planner, reloaded every
+        `stats.TABLE_STATS_TTL_SECONDS`.
+        """
+        now = time.monotonic()
+        if self._table_stats is None or now - self._table_stats_loaded_at > stats.TABLE_STATS_TTL_SECONDS:
+            records = await self._storage.query(stats.TABLE_STATS_QUERY)
+            self._table_stats = stats.TableStats(
+                {record["table_name"]: float(record["reltuples"]) for record in records}
+            )
+            self._table_stats_loaded_at = now
+        return self._table_stats
+
+    async def get_icrs_positions(self) -> dict[str, np.ndarray]:
+        return await self._storage.query_columns("SELECT pgc, ra, dec FROM layer2.icrs", read_only=True)
+
+    async def get_designation_keys(self, modified_after: datetime.datetime | None = None) -> dict[str, np.ndarray]:
+        """
+        Returns the normalized designations of all objects, or only of the objects whose PGC number was modified
+        after `modified_after`.
+        """
+        if modified_after is None:
+            return await self._storage.query_columns(
+                "SELECT pgc, design, key FROM layer2.designation_keys", read_only=True
+            )
+        return await self._storage.query_columns(
+            """
+            SELECT dk.pgc, dk.design, dk.key
+            FROM common.pgc AS p
+              JOIN layer2.designation_keys AS dk ON (dk.pgc = p.id)
+            WHERE p.modification_time > %s
+            """,
+            params=[modified_after],
+            read_only=True,
+        )
+
+    async def get_modified_pgcs(self, modified_after: datetime.datetime) -> np.ndarray:
+        columns = await self._storage.query_columns(
+            "SELECT id FROM common.pgc WHERE modification_time > %s", params=[modified_after], read_only=True
+        )
+        return columns["id"]
+
+    async def get_apex_velocities(
+        self, pgcs: list[int], apexes: Mapping[str, Sequence[float]]
+    ) -> dict[int, dict[str, layer2_model.ApexVelocity]]:
+        """
+        Returns the stored velocities of the objects with respect to the apexes given by their parameters in the
+        order of `ApexConfig.parameters`. Apexes whose stored parameters differ, or whose velocities do not yet
+        reflect the last import of positions or redshifts, are left out.
+        """
+        if not pgcs or not apexes:
+            return {}
+
+        records = await self._storage.query(
+            queries.APEX_VELOCITIES_QUERY, params=queries.apex_velocities_params(apexes, pgcs)
+        )
+        return queries.apex_velocities_from_rows(records)
+
+    async def query_catalogs_batch(
+        self,
+        catalogs: list[model.RawCatalog],
+        search_types: Mapping[str, repofilters.Filter],
+        search_params: Mapping[str, params.SearchParams],
+        limit: int,
+        offset: int,
+        ordering: repofilters.Ordering | None = None,
+        after: Sequence[Any] | None = None,
+    ) -> dict[str, list[model.Layer2CatalogObject]]:
+        plan = planner.plan(search_types, search_params, await self.get_table_stats())
+        self._logger.debug("layer2 query plan", **plan.describe())
+        query, query_params = queries.construct_batch_query(
+            catalogs, search_types, search_params, limit, offset, ordering=ordering, after=after, plan=plan
+        )
+
+        records = await self._storage.query(query, params=query_params)
+
+        return queries.group_batch_records(records)
+
+    async def query_catalogs_per_record(
+        self,
+        catalogs: list[model.RawCatalog],
+        search_filter: repofilters.Filter,
+        search_params: Mapping[str, params.SearchParams],
+        limit: int,
+        ordering: repofilters.Ordering,
+    ) -> dict[str, list[model.Layer2CatalogObject]]:
+        """
+        Runs the search for every entry of `search_params` with one statement and returns at most `limit` objects
+        for each entry in the order of `ordering`. Entries without matches are absent from the result.
+        """
+        if not search_params:
+            return {}
+
+        query, query_params = queries.construct_per_record_query(
+            catalogs, search_filter, search_params, limit, ordering
+        )
+        records = await self._storage.query(query, params=query_params)
+
+        result = queries.group_batch_records(records)
+        for objects in result.values():
+            objects.sort(key=lambda obj: obj.sort_key or [])
+        return result
+
+    async def resolve_designations(
+        self, names: list[str], fuzzy: bool, max_fuzzy_matches: int
+    ) -> dict[str, list[model.DesignationMatch]]:
+        """
+        Looks up all names with one statement by their normalized designations. Names without an exact match get up
+        to `max_fuzzy_matches` most similar designations if `fuzzy` is set. An object matched through several of its
+        designations is listed once with the best of them.
+        """
+        if not names:
+            return {}
+
+        records = await self._storage.query(
+            queries.RESOLVE_DESIGNATIONS_QUERY, params=[names, max_fuzzy_matches, fuzzy]
+        )
+
+        result: dict[str, dict[int, model.DesignationMatch]] = {}
+        for record in records:
+            matches = result.setdefault(record["name"], {})
+            current = matches.get(record["pgc"])
+            if current is None or record["similarity"] > current.similarity:
+                matches[record["pgc"]] = model.DesignationMatch(
+                    pgc=record["pgc"],
+                    design=record["design"],
+                    similarity=float(record["similarity"]),
+                    exact=record["exact"],
+                )
+
+        return {
+            name: sorted(matches.values(), key=lambda match: (-match.similarity, match.pgc))
+            for name, matches in result.items()
+        }
+
+    async def suggest_designations(self, key: str, limit: int) -> list[model.DesignationSuggestion]:
+        """
+        Returns up to `limit` objects with a designation whose normalized key starts with `key`, shortest first.
+        """
+        records = await self._storage.query(queries.SUGGEST_DESIGNATIONS_QUERY, params=[key, limit])
+        return [model.DesignationSuggestion(pgc=record["pgc"], design=record["design"]) for record in records]
+
+    async def _query_catalog(self, catalog: model.RawCatalog, pgcs: list[int]) -> Mapping[int, Any]:
+        reader = queries.PGC_CATALOG_READERS[catalog]
+        return reader.from_columns(await self._storage.query_columns(reader.query, params=[pgcs]))
+
+    async def query_pgc(
+        self,
+        catalogs: list[model.RawCatalog],
+        pgc_numbers: list[int],
+        limit: int,
+        offset: int = 0,
+        after: int | None = None,
+    ) -> list[Layer2Object]:
+        if not catalogs or not pgc_numbers:
+            return []
+
+        pgcs_page = queries.pgc_page(pgc_numbers, limit, offset, after)
+        if not pgcs_page:
+            return []
+
+        catalogs = [catalog for catalog in catalogs if catalog in queries.PGC_CATALOG_READERS]
+        if self._single_statement_pgc_query:
+            records = await self._storage.query(queries.construct_pgc_query(catalogs), params=[sorted(set(pgcs_page))])
+            maps = queries.catalog_maps_from_rows(catalogs, records)
+        else:
+            async with asyncio.TaskGroup() as tg:
+                tasks = {catalog: tg.create_task(self._query_catalog(catalog, pgcs_page)) for catalog in catalogs}
+            maps = {catalog: task.result() for catalog, task in tasks.items()}
+
+        return [queries.layer2_object_from_maps(pgc, maps) for pgc in pgcs_page]
+
+    async def query_catalogs(
+        self,
+        catalogs: list[model.RawCatalog],
+        filters: repofilters.Filter,
+        search_params: params.SearchParams,
+        limit: int,
+        offset: int,
+        ordering: repofilters.Ordering | None = None,
+        after: Sequence[Any] | None = None,
+    ) -> list[model.Layer2CatalogObject]:
+        res = await self.query_catalogs_batch(
+            catalogs,
+            {search_params.name(): filters},
+            {"obj": search_params},
+            limit,
+            offset,
+            ordering=ordering,
+            after=after,
+        )
+
+        return res.get("obj", [])
@@ -1,15 +1,26 @@
 import abc
 import math
+from collections.abc import Mapping
 from typing import Any, final
 
 from astropy import units as u
 
+from app.data.repositories.layer2.stats import TableStats
 from app.lib import astronomy
 
 # Because postgis is a geography extension we have to do some trickery to convert degrees on the celestial sphere
 # efficiently to Earth's coordinates. This is just an Earth's radius.
 _SPHERE_RADIUS_M = 6371008.7714
 
+# Right ascension ranges of a cone that crosses ra = 0 are looked up again one turn higher and lower.
+_RA_SHIFTS = (0, 360, -360)
+
+# Share of rows matched by every character of a substring pattern, the constant Postgres uses for LIKE without
+# statistics on the pattern.
+_FIXED_CHAR_SELECTIVITY = 0.2
+# Share of designations assumed to be within a small edit distance of a name.
+_CLOSE_NAME_SELECTIVITY = 1e-4
+
 
 class Filter(abc.ABC):
     @abc.abstractmethod
@@ -26,6 +37,25 @@ class Filter(abc.ABC):
     def driving_table(self) -> str | None:
         return None
 
+    # Tables the condition refers to. They are joined even if their catalogs are not requested.
+    def tables(self) -> list[str]:
+        table = self.driving_table()
+        return [table] if table is not None else []
+
+    # Filters that must all hold for this one to hold, which the planner weighs against each other.
+    def conjuncts(self) -> list["Filter"]:
+        return [self]
+
+    # Relation with a `pgc` column that lists every object this filter can match, for the first phase of a
+    # two-phase plan.
+    def candidate_source(self) -> str | None:
+        return self.driving_table()
+
+    # Expected number of matching objects for one entry of the search parameters. None means the filter does not
+    # restrict the objects to a set whose size is known.
+    def estimate_rows(self, search_params: Mapping[str, Any], stats: TableStats) -> float | None:
+        return None
+
 
 @final
 class PGCOneOfFilter(Filter):
@@ -42,6 +72,12 @@ class PGCOneOfFilter(Filter):
     def get_params(self):
         return self._pgcs
 
+    def candidate_source(self) -> str | None:
+        return "common.pgc AS pgc_list(pgc)"
+
+    def estimate_rows(self, search_params: Mapping[str, Any], stats: TableStats) -> float | None:
+        return float(len(self._pgcs))
+
 
 @final
 class AndFilter(Filter):
@@ -72,6 +108,16 @@ class AndFilter(Filter):
 
         return None
 
+    def tables(self) -> list[str]:
+        return list(dict.fromkeys(table for f in self._filters for table in f.tables()))
+
+    def conjuncts(self) -> list[Filter]:
+        return [conjunct for f in self._filters for conjunct in f.conjuncts()]
+
+    def estimate_rows(self, search_params: Mapping[str, Any], stats: TableStats) -> float | None:
+        estimates = [rows for f in self._filters if (rows := f.estimate_rows(search_params, stats)) is not None]
+        return min(estimates, default=None)
+
 
 @final
 class OrFilter(Filter):
@@ -99,6 +145,15 @@ class OrFilter(Filter):
 
         return None
 
+    def tables(self) -> list[str]:
+        return list(dict.fromkeys(table for f in self._filters for table in f.tables()))
+
+    def estimate_rows(self, search_params: Mapping[str, Any], stats: TableStats) -> float | None:
+        estimates = [f.estimate_rows(search_params, stats) for f in self._filters]
+        if not estimates or None in estimates:
+            return None
+        return sum(rows for rows in estimates if rows is not None)
+
 
 @final
 class DesignationEqualsFilter(Filter):
@@ -118,6 +173,9 @@ class DesignationEqualsFilter(Filter):
     def driving_table(self) -> str | None:
         return "layer2.designation"
 
+    def estimate_rows(self, search_params: Mapping[str, Any], stats: TableStats) -> float | None:
+        return 1.0
+
 
 @final
 class DesignationCloseFilter(Filter):
@@ -137,6 +195,9 @@ class DesignationCloseFilter(Filter):
     def driving_table(self) -> str | None:
         return "layer2.designation"
 
+    def estimate_rows(self, search_params: Mapping[str, Any], stats: TableStats) -> float | None:
+        return max(stats.table_rows("layer2.designation") * _CLOSE_NAME_SELECTIVITY, 1.0)
+
 
 @final
 class DesignationLikeFilter(Filter):
@@ -153,6 +214,10 @@ class DesignationLikeFilter(Filter):
     def driving_table(self) -> str | None:
         return "layer2.designations"
 
+    def estimate_rows(self, search_params: Mapping[str, Any], stats: TableStats) -> float | None:
+        design = str(search_params.get("design", ""))
+        return max(stats.table_rows("layer2.designations") * _FIXED_CHAR_SELECTIVITY ** len(design), 1.0)
+
 
 @final
 class ICRSCoordinatesInRadiusFilter(Filter):
@@ -161,7 +226,8 @@ class ICRSCoordinatesInRadiusFilter(Filter):
         return "coordinates_in_radius"
 
     def __init__(self, radius: u.Quantity):
-        self._radius_m = math.radians(astronomy.to(radius, "deg")) * _SPHERE_RADIUS_M
+        self._radius = astronomy.to(radius, "deg")
+        self._radius_m = math.radians(self._radius) * _SPHERE_RADIUS_M
 
     def get_query(self):
         return """
@@ -179,8 +245,194 @@ class ICRSCoordinatesInRadiusFilter(Filter):
     def driving_table(self) -> str | None:
         return "layer2.icrs"
 
+    def estimate_rows(self, search_params: Mapping[str, Any], stats: TableStats) -> float | None:
+        return stats.cone_rows(self._radius)
+
+
+@final
+class ICRSCoordinatesInZoneRadiusFilter(Filter):
+    """
+    Cone search over the declination zones of `layer2.icrs`: btree range scans on `(zone, ra)` select the
+    candidates, which are then refined by the exact great-circle distance. Unlike `ICRSCoordinatesInRadiusFilter`
+    it does not depend on the geography expression index. The right ascension range is repeated shifted by a full
+    turn for cones that cross ra = 0.
+    """
+
+    @classmethod
+    def name(cls) -> str:
+        return "coordinates_in_zone_radius"
+
+    def __init__(self, radius: u.Quantity):
+        self._radius = astronomy.to(radius, "deg")
+
+    def get_query(self):
+        ra = "(sp.params->>'ra')::float"
+        dec = "(sp.params->>'dec')::float"
+        half_width = f"layer2.ra_half_width({dec}, %s)"
+        ra_ranges = " OR ".join(
+            f"layer2.icrs.ra BETWEEN {ra} - {half_width} + {shift} AND {ra} + {half_width} + {shift}"
+            for shift in _RA_SHIFTS
+        )
+        return f"""
+        layer2.icrs.zone = ANY(layer2.sky_zones({dec}, %s))
+        AND ({ra_ranges})
+        AND layer2.angular_distance({ra}, {dec}, layer2.icrs.ra, layer2.icrs.dec) <= %s
+        """
+
+    def get_params(self):
+        return [self._radius] * (2 + 2 * len(_RA_SHIFTS))
+
+    def driving_table(self) -> str | None:
+        return "layer2.icrs"
+
+    def estimate_rows(self, search_params: Mapping[str, Any], stats: TableStats) -> float | None:
+        return stats.cone_rows(self._radius)
+
+
+@final
+class ICRSCoordinatesInSearchRadiusFilter(Filter):
+    """
+    Cone search with the radius taken from the search parameters, for batches where every entry has its own.
+    """
+
+    @classmethod
+    def name(cls) -> str:
+        return "coordinates_in_search_radius"
+
+    def get_query(self):
+        return """
+        ST_DWithin(
+            ST_MakePoint((sp.params->>'ra')::float, (sp.params->>'dec')::float)::geography,
+            ST_MakePoint(layer2.icrs.ra, layer2.icrs.dec)::geography,
+            radians((sp.params->>'radius')::float) * %s,
+            false
+        )
+        """
+
+    def get_params(self):
+        return [_SPHERE_RADIUS_M]
+
+    def driving_table(self) -> str | None:
+        return "layer2.icrs"
+
+    def estimate_rows(self, search_params: Mapping[str, Any], stats: TableStats) -> float | None:
+        radius = search_params.get("radius")
+        return stats.cone_rows(float(radius)) if radius is not None else None
+
+
+@final
+class ICRSNearestFilter(Filter):
+    """
+    Objects with coordinates, within `radius` of the centre if it is given, for nearest neighbour searches. The
+    centre is a constant rather than a search parameter, so that together with `ICRSNearestOrdering` the geography
+    index both bounds the scan by the radius and returns objects in order of distance.
+    """
+
+    @classmethod
+    def name(cls) -> str:
+        return "coordinates_nearest"
+
+    def __init__(self, ra: u.Quantity, dec: u.Quantity, radius: u.Quantity | None = None) -> None:
+        self._ra = astronomy.to(ra, "deg")
+        self._dec = astronomy.to(dec, "deg")
+        self._radius = astronomy.to(radius, "deg") if radius is not None else None
+
+    def get_query(self):
+        if self._radius is None:
+            return "layer2.icrs.pgc IS NOT NULL"
+        return """
+        ST_DWithin(
+            ST_MakePoint(layer2.icrs.ra, layer2.icrs.dec)::geography,
+            ST_MakePoint(%s, %s)::geography,
+            %s,
+            false
+        )
+        """
+
+    def get_params(self):
+        if self._radius is None:
+            return []
+        return [self._ra, self._dec, math.radians(self._radius) * _SPHERE_RADIUS_M]
+
+    def driving_table(self) -> str | None:
+        return "layer2.icrs"
+
+    def estimate_rows(self, search_params: Mapping[str, Any], stats: TableStats) -> float | None:
+        if self._radius is None:
+            return stats.table_rows("layer2.icrs")
+        return stats.cone_rows(self._radius)
+
+
+@final
+class GalacticRangeFilter(Filter):
+    """
+    Objects whose galactic coordinates, precomputed by the layer 2 ICRS import, fall within the given bounds. The
+    longitude range wraps around zero when `lon_min` is greater than `lon_max`.
+    """
+
+    @classmethod
+    def name(cls) -> str:
+        return "galactic_range"
+
+    def __init__(
+        self,
+        lat_min: u.Quantity | None = None,
+        lat_max: u.Quantity | None = None,
+        lon_min: u.Quantity | None = None,
+        lon_max: u.Quantity | None = None,
+    ) -> None:
+        self._lat_min = astronomy.to(lat_min, "deg") if lat_min is not None else None
+        self._lat_max = astronomy.to(lat_max, "deg") if lat_max is not None else None
+        self._lon_min = astronomy.to(lon_min, "deg") if lon_min is not None else None
+        self._lon_max = astronomy.to(lon_max, "deg") if lon_max is not None else None
+
+    def _conditions(self) -> list[tuple[str, list[Any]]]:
+        conditions: list[tuple[str, list[Any]]] = []
+        if self._lat_min is not None:
+            conditions.append(("layer2.icrs.glat >= %s", [self._lat_min]))
+        if self._lat_max is not None:
+            conditions.append(("layer2.icrs.glat <= %s", [self._lat_max]))
+        if self._lon_min is not None and self._lon_max is not None and self._lon_min > self._lon_max:
+            conditions.append(("(layer2.icrs.glon >= %s OR layer2.icrs.glon <= %s)", [self._lon_min, self._lon_max]))
+        else:
+            if self._lon_min is not None:
+                conditions.append(("layer2.icrs.glon >= %s", [self._lon_min]))
+            if self._lon_max is not None:
+                conditions.append(("layer2.icrs.glon <= %s", [self._lon_max]))
+        return conditions or [("layer2.icrs.glat IS NOT NULL", [])]
+
+    def get_query(self):
+        return " AND ".join(condition for condition, _ in self._conditions())
+
+    def get_params(self):
+        return [param for _, params in self._conditions() for param in params]
+
+    def driving_table(self) -> str | None:
+        return "layer2.icrs"
+
+    def estimate_rows(self, search_params: Mapping[str, Any], stats: TableStats) -> float | None:
+        lat_min = math.radians(self._lat_min if self._lat_min is not None else -90.0)
+        lat_max = math.radians(self._lat_max if self._lat_max is not None else 90.0)
+        lon_min = self._lon_min if self._lon_min is not None else 0.0
+        lon_max = self._lon_max if self._lon_max is not None else 360.0
+        lon_span = (lon_max - lon_min) % 360.0 if lon_min > lon_max else lon_max - lon_min
+
+        # A band of latitude covers (sin b2 - sin b1) / 2 of the sphere.
+        share = max(math.sin(lat_max) - math.sin(lat_min), 0.0) / 2 * min(lon_span, 360.0) / 360.0
+        return stats.table_rows("layer2.icrs") * share
+
 
 class Ordering(abc.ABC):
+    """
+    Sort key of a search. `get_query` lists the key expressions separated by commas and has to end with `pgc` so
+    that the order is total and the key of the last row of a page can be used to continue from it.
+    """
+
+    @classmethod
+    @abc.abstractmethod
+    def name(cls) -> str:
+        pass
+
     @abc.abstractmethod
     def get_query(self) -> str:
         pass
@@ -189,9 +441,33 @@ class Ordering(abc.ABC):
     def get_params(self) -> list[Any]:
         pass
 
+    @abc.abstractmethod
+    def key_types(self) -> tuple[type, ...]:
+        pass
+
+
+@final
+class PGCOrdering(Ordering):
+    @classmethod
+    def name(cls) -> str:
+        return "pgc"
+
+    def get_query(self) -> str:
+        return "pgc"
+
+    def get_params(self) -> list[Any]:
+        return []
+
+    def key_types(self) -> tuple[type, ...]:
+        return (int,)
+
 
 @final
 class ICRSDistanceOrdering(Ordering):
+    @classmethod
+    def name(cls) -> str:
+        return "icrs_distance"
+
     def __init__(self, ra: u.Quantity, dec: u.Quantity) -> None:
         self._ra = astronomy.to(ra, "deg")
         self._dec = astronomy.to(dec, "deg")
@@ -205,3 +481,80 @@ class ICRSDistanceOrdering(Ordering):
 
     def get_params(self) -> list[Any]:
         return [self._ra, self._dec]
+
+    def key_types(self) -> tuple[type, ...]:
+        return (float, int)
+
+
+@final
+class ICRSNearestOrdering(Ordering):
+    """
+    Orders by the `<->` distance to the centre, which the geography GiST index of `layer2.icrs` returns in order. A
+    search with a limit then reads only as many objects from the index as it returns instead of sorting all matches.
+    """
+
+    @classmethod
+    def name(cls) -> str:
+        return "icrs_nearest"
+
+    def __init__(self, ra: u.Quantity, dec: u.Quantity) -> None:
+        self._ra = astronomy.to(ra, "deg")
+        self._dec = astronomy.to(dec, "deg")
+
+    def get_query(self) -> str:
+        return "ST_MakePoint(layer2.icrs.ra, layer2.icrs.dec)::geography <-> ST_MakePoint(%s, %s)::geography, pgc"
+
+    def get_params(self) -> list[Any]:
+        return [self._ra, self._dec]
+
+    def key_types(self) -> tuple[type, ...]:
+        return (float, int)
+
+
+@final
+class ICRSAngularDistanceOrdering(Ordering):
+    """
+    Orders by the great-circle distance computed the same way as by `ICRSCoordinatesInZoneRadiusFilter`.
+    """
+
+    @classmethod
+    def name(cls) -> str:
+        return "icrs_angular_distance"
+
+    def __init__(self, ra: u.Quantity, dec: u.Quantity) -> None:
+        self._ra = astronomy.to(ra, "deg")
+        self._dec = astronomy.to(dec, "deg")
+
+    def get_query(self) -> str:
+        return "layer2.angular_distance(%s, %s, layer2.icrs.ra, layer2.icrs.dec), pgc"
+
+    def get_params(self) -> list[Any]:
+        return [self._ra, self._dec]
+
+    def key_types(self) -> tuple[type, ...]:
+        return (float, int)
+
+
+@final
+class SearchCenterDistanceOrdering(Ordering):
+    """
+    Orders by the distance from the coordinates in the search parameters, for batches where every entry has its own
+    centre.
+    """
+
+    @classmethod
+    def name(cls) -> str:
+        return "search_center_distance"
+
+    def get_query(self) -> str:
+        return """ST_Distance(
+            ST_MakePoint((sp.params->>'ra')::float, (sp.params->>'dec')::float)::geography,
+            ST_MakePoint(layer2.icrs.ra, layer2.icrs.dec)::geography,
+            false
+        ), pgc"""
+
+    def get_params(self) -> list[Any]:
+        return []
+
+    def key_types(self) -> tuple[type, ...]:
+        return (float, int)
@@ -68,3 +68,22 @@ class CombinedSearchParams(SearchParams):
             res.update(p.get_params())
 
         return res
+
+
+@final
+class ICRSConeSearchParams(SearchParams):
+    """
+    Centre and radius of a cone in degrees. Takes plain numbers rather than quantities because batches build one
+    for each of many thousands of entries.
+    """
+
+    def __init__(self, ra: float, dec: float, radius: float):
+        self._ra = ra
+        self._dec = dec
+        self._radius = radius
+
+    def name(self) -> str:
+        return "icrs_cone"
+
+    def get_params(self) -> dict[str, Any]:
+        return {"ra": self._ra, "dec": self._dec, "radius": self._radius}
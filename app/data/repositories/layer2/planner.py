@@ -0,0 +1,86 @@
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Any
+
+from app.data.repositories.layer2 import filters as repofilters
+from app.data.repositories.layer2 import params
+from app.data.repositories.layer2.stats import TableStats
+
+
+@dataclass(frozen=True)
+class QueryPlan:
+    """
+    How `construct_batch_query` joins the layer 2 tables.
+
+    With `candidates` set, the plan runs in two phases: the objects matching `candidates` are found first, and the
+    catalogs are then read only for them by PGC number, where the whole filter is checked. Otherwise one join is
+    driven by `driving_table`, or all tables are combined with FULL JOIN if it is None.
+    """
+
+    driving_table: str | None
+    # Tables the filters refer to, joined in addition to the tables of the requested catalogs.
+    tables: tuple[str, ...] = ()
+    candidates: repofilters.Filter | None = None
+    # Estimated number of objects matched by the filter the plan is driven by, if known.
+    estimated_rows: float | None = None
+    # Estimates of every conjunct of the filter that restricts the objects, by its kind.
+    estimates: tuple[tuple[str, float], ...] = ()
+
+    @property
+    def two_phase(self) -> bool:
+        return self.candidates is not None
+
+    def describe(self) -> dict[str, Any]:
+        return {
+            "strategy": "two_phase" if self.two_phase else "single_phase",
+            "driving_table": self.driving_table,
+            "candidates": self.candidates.candidate_source() if self.candidates is not None else None,
+            "estimated_rows": self.estimated_rows,
+            "estimates": [{"filter": kind, "rows": rows} for kind, rows in self.estimates],
+        }
+
+
+def plan(
+    search_types: Mapping[str, repofilters.Filter],
+    search_params: Mapping[str, params.SearchParams],
+    stats: TableStats,
+) -> QueryPlan:
+    """
+    Chooses how to join the tables for a search. The conjuncts of the filter are weighed by the number of objects
+    they are expected to match over all entries of `search_params`, and the most selective one drives the query.
+    When other conjuncts are strict on different tables, the query runs in two phases so that the other tables are
+    only read for the candidates of the most selective conjunct.
+
+    Searches that mix several search types keep the static choice of `Filter.driving_table`.
+    """
+    tables = tuple(dict.fromkeys(table for f in search_types.values() for table in f.tables()))
+    if len(search_types) != 1:
+        driving_tables = {search_filter.driving_table() for search_filter in search_types.values()}
+        return QueryPlan(driving_table=driving_tables.pop() if len(driving_tables) == 1 else None, tables=tables)
+
+    (search_filter,) = search_types.values()
+    entries = [sparams.get_params() for sparams in search_params.values()]
+
+    restrictive: list[tuple[repofilters.Filter, float]] = []
+    for conjunct in search_filter.conjuncts():
+        estimates = [conjunct.estimate_rows(entry, stats) for entry in entries]
+        if estimates and None not in estimates:
+            restrictive.append((conjunct, sum(rows for rows in estimates if rows is not None)))
+
+    if not restrictive:
+        return QueryPlan(driving_table=search_filter.driving_table(), tables=tables)
+
+    best, best_rows = min(restrictive, key=lambda item: item[1])
+    estimates = tuple((type(conjunct).__name__, rows) for conjunct, rows in restrictive)
+    other_tables = {
+        table for conjunct, _ in restrictive if conjunct is not best and (table := conjunct.driving_table()) is not None
+    } - {best.driving_table()}
+
+    # A lone conjunct needs no second phase, driving the join from its table already reads only its matches.
+    if len(restrictive) > 1 and best.candidate_source() is not None and (best.driving_table() is None or other_tables):
+        return QueryPlan(
+            driving_table=None, tables=tables, candidates=best, estimated_rows=best_rows, estimates=estimates
+        )
+
+    driving_table = best.driving_table() or search_filter.driving_table()
+    return QueryPlan(driving_table=driving_table, tables=tables, estimated_rows=best_rows, estimates=estimates)
@@ -0,0 +1,629 @@
+import bisect
+import json
+from collections.abc import Callable, Mapping, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+from psycopg import rows
+
+from app.data import model
+from app.data.model import Layer2Object
+from app.data.model import layer2 as layer2_model
+from app.data.repositories.layer2 import filters as repofilters
+from app.data.repositories.layer2 import params, planner, stats
+from app.lib import containers
+
+# SQL construction and row decoding shared by the sync and async layer 2 repositories.
+
+
+def construct_batch_query(
+    catalogs: list[model.RawCatalog],
+    search_types: Mapping[str, repofilters.Filter],
+    search_params: Mapping[str, params.SearchParams],
+    limit: int,
+    offset: int,
+    ordering: repofilters.Ordering | None = None,
+    after: Sequence[Any] | None = None,
+    plan: planner.QueryPlan | None = None,
+) -> tuple[str, list[Any]]:
+    """
+    :param after: Sort key of the last row of the previous page. Rows up to and including it are skipped with a
+        condition on the sort key instead of being read and discarded as with `offset`. Requires `ordering`.
+    :param plan: How to join the tables, planned without table statistics if not given.
+    """
+    if after is not None and ordering is None:
+        raise ValueError("after requires an ordering")
+
+    if not search_params:
+        return "SELECT NULL as record_id, NULL as pgc WHERE FALSE", []
+
+    if plan is None:
+        plan = planner.plan(search_types, search_params, stats.TableStats())
+
+    query = """
+        WITH search_params AS (
+            SELECT * FROM (
+                VALUES
+                    {values}
+            ) AS t(record_id, search_type, params)
+        ){candidates}
+        SELECT sp.record_id, pgc, {columns}{sort_key}
+        FROM search_params sp
+        CROSS JOIN {joined_tables}
+        WHERE {conditions}
+        {order_by}
+        LIMIT %s OFFSET %s
+    """
+
+    values_lines = []
+    query_params = []
+
+    for record_id, sparams in search_params.items():
+        values_lines.append("(%s, %s, %s::jsonb)")
+        query_params.extend([record_id, sparams.name(), json.dumps(sparams.get_params())])
+
+    columns, table_names = _catalog_columns(catalogs)
+    table_names = list(dict.fromkeys([*table_names, *plan.tables]))
+
+    # The first phase of a two-phase plan collects the objects matched by its most selective filter, and the
+    # catalogs are then joined only onto them.
+    candidates = ""
+    candidate_condition = ""
+    if plan.candidates is not None:
+        (search_type,) = search_types
+        candidates = f""",
+        candidates AS MATERIALIZED (
+            SELECT DISTINCT sp.record_id, pgc
+            FROM search_params sp
+            CROSS JOIN {plan.candidates.candidate_source()}
+            WHERE sp.search_type = '{search_type}' AND {plan.candidates.get_query()}
+        )"""
+        query_params.extend(plan.candidates.get_params())
+        candidate_condition = "candidates.record_id = sp.record_id AND "
+        joined_tables = _join_tables(table_names, "candidates")
+    else:
+        # This is to avoid using FULL JOINs as this is very slow for cases
+        # where we only want to select from one table, e.g. only coordinate cone search
+        joined_tables = _join_tables(table_names, plan.driving_table)
+
+    sort_key = ""
+    if ordering is not None:
+        sort_key = f', json_build_array({ordering.get_query()}) AS "sort_key"'
+        query_params.extend(ordering.get_params())
+
+    condition_statements = []
+
+    for search_type, search_filter in search_types.items():
+        condition_statements.append(f"(sp.search_type = '{search_type}' AND {search_filter.get_query()})")
+        query_params.extend(search_filter.get_params())
+
+    conditions = candidate_condition + "(" + " OR ".join(condition_statements) + ")"
+    if after is not None and ordering is not None:
+        conditions = f"({conditions}) AND ({ordering.get_query()}) > ({', '.join(['%s'] * len(after))})"
+        query_params.extend(ordering.get_params())
+        query_params.extend(after)
+
+    if ordering is not None:
+        query_params.extend(ordering.get_params())
+
+    query_params.extend([limit, offset])
+
+    return query.format(
+        values=",".join(values_lines),
+        candidates=candidates,
+        columns=",".join(columns),
+        joined_tables=joined_tables,
+        sort_key=sort_key,
+        conditions=conditions,
+        order_by=f"ORDER BY {ordering.get_query()}" if ordering is not None else "",
+    ), query_params
+
+
+def construct_per_record_query(
+    catalogs: list[model.RawCatalog],
+    search_filter: repofilters.Filter,
+    search_params: Mapping[str, params.SearchParams],
+    limit: int,
+    ordering: repofilters.Ordering,
+) -> tuple[str, list[Any]]:
+    """
+    Runs the same search for every entry of `search_params` and keeps at most `limit` rows for each of them, unlike
+    `construct_batch_query` that limits the rows of all entries together. The entries are passed as two array
+    parameters, so the statement does not grow with their number.
+
+    Rows of one entry are adjacent in the result but not ordered, sort them by `sort_key`.
+    """
+    query = """
+        SELECT sp.record_id, m.*
+        FROM unnest(%s::text[], %s::jsonb[]) AS sp(record_id, params)
+        CROSS JOIN LATERAL (
+            SELECT pgc, {columns}, json_build_array({order_by}) AS "sort_key"
+            FROM {joined_tables}
+            WHERE {condition}
+            ORDER BY {order_by}
+            LIMIT %s
+        ) AS m
+    """
+
+    columns, table_names = _catalog_columns(catalogs)
+    query_params: list[Any] = [
+        list(search_params.keys()),
+        [json.dumps(sparams.get_params()) for sparams in search_params.values()],
+        *ordering.get_params(),
+        *search_filter.get_params(),
+        *ordering.get_params(),
+        limit,
+    ]
+
+    return query.format(
+        columns=",".join(columns),
+        joined_tables=_join_tables(table_names, search_filter.driving_table()),
+        condition=search_filter.get_query(),
+        order_by=ordering.get_query(),
+    ), query_params
+
+
+def _catalog_columns(catalogs: list[model.RawCatalog]) -> tuple[list[str], list[str]]:
+    columns = []
+    table_names = []
+
+    for catalog in catalogs:
+        object_cls = model.get_catalog_object_type(catalog)
+
+        table_names.append(object_cls.layer2_table())
+        columns.extend(
+            [
+                f'{object_cls.layer2_table()}.{column} AS "{catalog.value}|{column}"'
+                for column in object_cls.layer2_keys()
+            ]
+        )
+        columns.append(
+            f"CASE WHEN {object_cls.layer2_table()}.pgc IS NOT NULL "
+            f'THEN true ELSE false END AS "{catalog.value}|_present"'
+        )
+
+    return columns, table_names
+
+
+def _join_tables(table_names: list[str], driving_table: str | None) -> str:
+    if driving_table is not None:
+        other_tables = [table_name for table_name in table_names if table_name != driving_table]
+        return " LEFT JOIN ".join([driving_table] + [f"{table_name} USING (pgc)" for table_name in other_tables])
+
+    return " FULL JOIN ".join([f"{table_names[0]}"] + [f"{table_name} USING (pgc)" for table_name in table_names[1:]])
+
+
+def group_batch_records(records: list[rows.DictRow]) -> dict[str, list[model.Layer2CatalogObject]]:
+    records_by_id = containers.group_by(records, key_func=lambda obj: str(obj["record_id"]))
+
+    result: dict[str, list[model.Layer2CatalogObject]] = {}
+
+    for record_id, id_records in records_by_id.items():
+        if record_id not in result:
+            result[record_id] = []
+
+        result[record_id].extend(group_by_pgc(id_records))
+
+    return result
+
+
+def group_by_pgc(objects: list[rows.DictRow]) -> list[model.Layer2CatalogObject]:
+    objects_by_pgc = containers.group_by(objects, key_func=lambda obj: int(obj["pgc"]))
+    result = []
+
+    for pgc, pgc_objects in objects_by_pgc.items():
+        layer2_obj = model.Layer2CatalogObject(pgc, [])
+
+        # TODO: what if for each pgc there are multiple rows? For example, if
+        # the catalog does not have a UNIQUE constraint on pgc.
+        obj = pgc_objects[0]
+        if "record_id" in obj:
+            obj.pop("record_id")
+        if "pgc" in obj:
+            obj.pop("pgc")
+        if "sort_key" in obj:
+            layer2_obj.sort_key = obj.pop("sort_key")
+
+        res: dict[model.RawCatalog, dict[str, Any]] = {}
+        presence_flags: dict[model.RawCatalog, bool] = {}
+
+        for key, value in obj.items():
+            catalog_name, column = key.split("|")
+            catalog = model.RawCatalog(catalog_name)
+
+            if column == "_present":
+                presence_flags[catalog] = bool(value)
+            else:
+                if catalog not in res:
+                    res[catalog] = {}
+                res[catalog][column] = value
+
+        for catalog, data in res.items():
+            object_cls = model.get_catalog_object_type(catalog)
+
+            if presence_flags.get(catalog, False):
+                layer2_obj.data.append(object_cls.from_layer2(data))
+
+        result.append(layer2_obj)
+
+    return result
+
+
+# Column arrays as returned by `PgStorage.query_columns`. Masked entries are NULLs and `tolist()` reads them as None.
+type Columns = Mapping[str, np.ndarray]
+
+
+def _present(cols: Columns, *names: str) -> np.ndarray:
+    """
+    Boolean mask of rows where all of the given columns are not NULL.
+    """
+    present = np.ones(len(cols["pgc"]), dtype=bool)
+    for name in names:
+        present &= ~np.ma.getmaskarray(cols[name])
+    return present
+
+
+def _optional_floats(values: np.ndarray) -> list[float | None]:
+    """
+    Values of a nullable numeric column with NULLs as None.
+    """
+    missing = np.ma.getmaskarray(values).tolist()
+    return [
+        None if is_missing else float(value)
+        for value, is_missing in zip(np.ma.getdata(values).tolist(), missing, strict=True)
+    ]
+
+
+def _designations_from_columns(cols: Columns) -> dict[int, layer2_model.DesignationCatalog]:
+    return {
+        pgc: layer2_model.DesignationCatalog(name=str(design))
+        for pgc, design in zip(cols["pgc"].tolist(), cols["design"].tolist(), strict=True)
+    }
+
+
+def _icrs_from_columns(cols: Columns) -> dict[int, layer2_model.ICRSCatalog]:
+    present = _present(cols, "ra", "e_ra", "dec", "e_dec")
+    pgcs = cols["pgc"][present].tolist()
+    ra, e_ra, dec, e_dec = (
+        np.asarray(cols[name], dtype=np.float64)[present].tolist() for name in ("ra", "e_ra", "dec", "e_dec")
+    )
+    glon, glat, sgl, sgb = (_optional_floats(cols[name][present]) for name in ("glon", "glat", "sgl", "sgb"))
+    return {
+        pgc: layer2_model.ICRSCatalog(
+            ra=ra[i], e_ra=e_ra[i], dec=dec[i], e_dec=e_dec[i], glon=glon[i], glat=glat[i], sgl=sgl[i], sgb=sgb[i]
+        )
+        for i, pgc in enumerate(pgcs)
+    }
+
+
+def _redshift_from_columns(cols: Columns) -> dict[int, layer2_model.RedshiftCatalog]:
+    present = _present(cols, "cz", "e_cz")
+    pgcs = cols["pgc"][present].tolist()
+    cz, e_cz = (np.asarray(cols[name], dtype=np.float64)[present].tolist() for name in ("cz", "e_cz"))
+    return {pgc: layer2_model.RedshiftCatalog(cz=cz[i], e_cz=e_cz[i]) for i, pgc in enumerate(pgcs)}
+
+
+def _nature_from_columns(cols: Columns) -> dict[int, layer2_model.NatureCatalog]:
+    present = _present(cols, "type_name")
+    return {
+        pgc: layer2_model.NatureCatalog(type_name=str(type_name))
+        for pgc, type_name in zip(cols["pgc"][present].tolist(), cols["type_name"][present].tolist(), strict=True)
+    }
+
+
+def _sources_from_columns(cols: Columns) -> list[layer2_model.Source]:
+    return [
+        source_from_row({"code": code, "year": year, "author": author, "title": title})
+        for code, year, author, title in zip(
+            cols["code"].tolist(),
+            cols["year"].tolist(),
+            cols["author"].tolist(),
+            cols["title"].tolist(),
+            strict=True,
+        )
+    ]
+
+
+def _additional_designations_from_columns(
+    cols: Columns,
+) -> dict[int, layer2_model.AdditionalDesignationsCatalog]:
+    result: dict[int, list[layer2_model.AdditionalDesignation]] = {}
+    for pgc, design, source in zip(
+        cols["pgc"].tolist(), cols["design"].tolist(), _sources_from_columns(cols), strict=True
+    ):
+        ad = layer2_model.AdditionalDesignation(name=str(design) if design is not None else "", source=source)
+        result.setdefault(pgc, []).append(ad)
+    return {pgc: layer2_model.AdditionalDesignationsCatalog(names=names) for pgc, names in result.items()}
+
+
+def _notes_from_columns(cols: Columns) -> dict[int, layer2_model.NotesCatalog]:
+    result: dict[int, list[layer2_model.NoteEntry]] = {}
+    for pgc, note, source in zip(cols["pgc"].tolist(), cols["note"].tolist(), _sources_from_columns(cols), strict=True):
+        entry = layer2_model.NoteEntry(note=str(note) if note is not None else "", source=source)
+        result.setdefault(pgc, []).append(entry)
+    return {pgc: layer2_model.NotesCatalog(notes=notes) for pgc, notes in result.items()}
+
+
+def _enum_text(value: Any) -> str:
+    """
+    Label of a Postgres enum value. Enum types that are not registered with the storage have no binary loader,
+    so the columns read in binary mode hold the raw bytes of the label.
+    """
+    if isinstance(value, bytes | memoryview):
+        return bytes(value).decode()
+    return str(value)
+
+
+def _photometry_total_from_columns(cols: Columns) -> dict[int, layer2_model.PhotometryTotalCatalog]:
+    result: dict[int, list[layer2_model.PhotometryTotalMeasurement]] = {}
+    for pgc, band, magsys, method, wavelength, mag, e_mag in zip(
+        cols["pgc"].tolist(),
+        cols["band"].tolist(),
+        cols["magsys"].tolist(),
+        cols["method"].tolist(),
+        np.asarray(cols["wavelength"], dtype=np.float64).tolist(),
+        np.asarray(cols["mag"], dtype=np.float64).tolist(),
+        cols["e_mag"].tolist(),
+        strict=True,
+    ):
+        measurement = layer2_model.PhotometryTotalMeasurement(
+            band=str(band),
+            magsys=_enum_text(magsys) if magsys is not None else None,
+            method=_enum_text(method),
+            wavelength=wavelength,
+            mag=mag,
+            e_mag=float(e_mag) if e_mag is not None else None,
+        )
+        result.setdefault(pgc, []).append(measurement)
+    return {pgc: layer2_model.PhotometryTotalCatalog(measurements=measurements) for pgc, measurements in result.items()}
+
+
+@dataclass
+class PGCCatalogReader:
+    table: str
+    columns: tuple[str, ...]
+    from_columns: Callable[[Columns], Mapping[int, Any]]
+    # Order of the rows of one object, for catalogs that may have several rows per PGC.
+    order_by: tuple[str, ...] = ()
+
+    @property
+    def query(self) -> str:
+        order_by = ", ".join(("pgc", *self.order_by))
+        return f"SELECT pgc, {', '.join(self.columns)} FROM {self.table} WHERE pgc = ANY(%s) ORDER BY {order_by}"
+
+
+PGC_CATALOG_READERS: dict[model.RawCatalog, PGCCatalogReader] = {
+    model.RawCatalog.DESIGNATION: PGCCatalogReader(
+        "layer2.designation",
+        ("design",),
+        _designations_from_columns,
+    ),
+    model.RawCatalog.ADDITIONAL_DESIGNATIONS: PGCCatalogReader(
+        "layer2.designations",
+        ("design", "code", "year", "author", "title"),
+        _additional_designations_from_columns,
+        order_by=("design",),
+    ),
+    model.RawCatalog.ICRS: PGCCatalogReader(
+        "layer2.icrs",
+        ("ra", "e_ra", "dec", "e_dec", "glon", "glat", "sgl", "sgb"),
+        _icrs_from_columns,
+    ),
+    model.RawCatalog.REDSHIFT: PGCCatalogReader(
+        "layer2.cz",
+        ("cz", "e_cz"),
+        _redshift_from_columns,
+    ),
+    model.RawCatalog.NATURE: PGCCatalogReader(
+        "layer2.nature",
+        ("type_name",),
+        _nature_from_columns,
+    ),
+    model.RawCatalog.NOTE: PGCCatalogReader(
+        "layer2.notes",
+        ("note", "code", "year", "author", "title"),
+        _notes_from_columns,
+    ),
+    model.RawCatalog.PHOTOMETRY__TOTAL: PGCCatalogReader(
+        "layer2.photometry_total",
+        ("band", "magsys", "method", "wavelength", "mag", "e_mag"),
+        _photometry_total_from_columns,
+        order_by=("wavelength",),
+    ),
+}
+
+
+def construct_pgc_query(catalogs: list[model.RawCatalog]) -> str:
+    """
+    Single statement that fetches the given catalogs for a list of PGC numbers passed as its only parameter.
+    Each catalog is aggregated into a JSON array of its rows per object, so all catalogs come from one snapshot
+    and one connection.
+    """
+    subselects = []
+    for catalog in catalogs:
+        reader = PGC_CATALOG_READERS[catalog]
+        fields = ", ".join(f"'{column}', t.{column}" for column in reader.columns)
+        order_by = f" ORDER BY {', '.join(f't.{column}' for column in reader.order_by)}" if reader.order_by else ""
+        subselects.append(
+            f"(SELECT json_agg(json_build_object({fields}){order_by}) FROM {reader.table} AS t "
+            f'WHERE t.pgc = p.pgc) AS "{catalog.value}"'
+        )
+
+    return f"SELECT p.pgc, {', '.join(subselects)} FROM unnest(%s::bigint[]) AS p(pgc) ORDER BY p.pgc"
+
+
+def _columns_from_records(names: Sequence[str], records: Sequence[Mapping[str, Any]]) -> dict[str, np.ndarray]:
+    """
+    Column arrays with the same layout as `PgStorage.query_columns` returns: numbers as numeric arrays,
+    everything else as object arrays, NULLs masked.
+    """
+    result: dict[str, np.ndarray] = {}
+    for name in names:
+        values = [record.get(name) for record in records]
+        mask = [value is None for value in values]
+        present = [value for value in values if value is not None]
+
+        if present and all(isinstance(value, int | float) and not isinstance(value, bool) for value in present):
+            dtype = np.float64 if any(isinstance(value, float) for value in present) else np.int64
+            array = np.array([0 if value is None else value for value in values], dtype=dtype)
+        else:
+            array = np.empty(len(values), dtype=object)
+            for i, value in enumerate(values):
+                array[i] = value
+
+        result[name] = np.ma.MaskedArray(array, mask=mask) if any(mask) else array
+    return result
+
+
+def catalog_maps_from_rows(
+    catalogs: list[model.RawCatalog], records: Sequence[Mapping[str, Any]]
+) -> dict[model.RawCatalog, Mapping[int, Any]]:
+    """
+    Decodes the result of `construct_pgc_query` with the same per-catalog decoders as the one query per
+    catalog path.
+    """
+    maps: dict[model.RawCatalog, Mapping[int, Any]] = {}
+    for catalog in catalogs:
+        reader = PGC_CATALOG_READERS[catalog]
+        catalog_records = [
+            {"pgc": record["pgc"], **entry} for record in records for entry in record[catalog.value] or []
+        ]
+        maps[catalog] = reader.from_columns(_columns_from_records(("pgc", *reader.columns), catalog_records))
+    return maps
+
+
+def pgc_page(pgc_numbers: list[int], limit: int, offset: int, after: int | None = None) -> list[int]:
+    pgcs = sorted(pgc_numbers)
+    if after is not None:
+        offset = bisect.bisect_right(pgcs, after)
+    return pgcs[offset : offset + limit]
+
+
+def layer2_object_from_maps(pgc: int, maps: Mapping[model.RawCatalog, Mapping[int, Any]]) -> Layer2Object:
+    def get(catalog: model.RawCatalog) -> Any:
+        catalog_map = maps.get(catalog)
+        return catalog_map.get(pgc) if catalog_map is not None else None
+
+    return Layer2Object(
+        pgc=pgc,
+        catalogs=layer2_model.Catalogs(
+            designation=get(model.RawCatalog.DESIGNATION),
+            additional_designations=get(model.RawCatalog.ADDITIONAL_DESIGNATIONS),
+            icrs=get(model.RawCatalog.ICRS),
+            redshift=get(model.RawCatalog.REDSHIFT),
+            nature=get(model.RawCatalog.NATURE),
+            notes=get(model.RawCatalog.NOTE),
+            photometry_total=get(model.RawCatalog.PHOTOMETRY__TOTAL),
+        ),
+    )
+
+
+def source_from_row(row: Mapping[str, Any]) -> layer2_model.Source:
+    author_val = row.get("author")
+    authors = author_val if isinstance(author_val, list) else [str(author_val)] if author_val is not None else []
+    return layer2_model.Source(
+        bibcode=str(row["code"]) if row.get("code") is not None else "",
+        title=str(row["title"]) if row.get("title") is not None else "",
+        authors=authors,
+        year=int(row["year"]) if row.get("year") is not None else 0,
+    )
+
+
+# Exact matches of the normalized names, and for the names without any, the most similar designations by trigrams.
+# `%%` is the trigram similarity operator, which the trigram index on the key serves.
+RESOLVE_DESIGNATIONS_QUERY = """
+WITH input AS (
+    SELECT DISTINCT name, layer2.designation_key(name) AS key
+    FROM unnest(%s::text[]) AS name
+),
+exact AS (
+    SELECT i.name, dk.pgc, dk.design
+    FROM input AS i
+    JOIN layer2.designation_keys AS dk ON dk.key = i.key
+)
+SELECT name, pgc, design, 1.0::real AS similarity, true AS exact
+FROM exact
+UNION ALL
+SELECT i.name, f.pgc, f.design, f.similarity, false
+FROM input AS i
+CROSS JOIN LATERAL (
+    SELECT dk.pgc, dk.design, similarity(dk.key, i.key) AS similarity
+    FROM layer2.designation_keys AS dk
+    WHERE dk.key %% i.key
+    ORDER BY similarity DESC, dk.pgc
+    LIMIT %s
+) AS f
+WHERE %s AND NOT EXISTS (SELECT 1 FROM exact AS e WHERE e.name = i.name)
+"""
+
+# Designations whose normalized key starts with the given one, shortest keys first and each object once. `^@` is
+# served by the btree on the key because it compares with the "C" collation.
+SUGGEST_DESIGNATIONS_QUERY = """
+SELECT pgc, design
+FROM (
+    SELECT DISTINCT ON (pgc) pgc, design, key
+    FROM layer2.designation_keys
+    WHERE key ^@ %s
+    ORDER BY pgc, octet_length(key), key
+) AS matches
+ORDER BY octet_length(key), key, pgc
+LIMIT %s
+"""
+
+# Parameters of the apexes as stored in `layer2.apexes`, in the order of `ApexConfig.parameters`.
+APEX_PARAMETER_COLUMNS = ("lon", "e_lon", "lat", "e_lat", "vel", "e_vel")
+
+# Positions and redshifts the velocities with respect to the apexes are computed from, for the objects that have
+# both. The second variant only reads the objects whose PGC number was modified after the given time.
+VELOCITY_INPUTS_QUERY = """
+SELECT i.pgc, i.ra, i.e_ra, i.dec, i.e_dec, i.glon, i.glat, c.cz, c.e_cz
+FROM layer2.icrs AS i
+  JOIN layer2.cz AS c ON (c.pgc = i.pgc)
+WHERE i.pgc > %s
+ORDER BY i.pgc
+LIMIT %s
+"""
+
+MODIFIED_VELOCITY_INPUTS_QUERY = """
+SELECT i.pgc, i.ra, i.e_ra, i.dec, i.e_dec, i.glon, i.glat, c.cz, c.e_cz
+FROM common.pgc AS p
+  JOIN layer2.icrs AS i ON (i.pgc = p.id)
+  JOIN layer2.cz AS c ON (c.pgc = p.id)
+WHERE p.modification_time > %s AND p.id > %s
+ORDER BY p.id
+LIMIT %s
+"""
+
+# Stored velocities of the given objects for the apexes whose stored parameters are the ones passed in, and only
+# if neither the ICRS nor the redshift catalog has been imported again since the apex was brought up to date.
+APEX_VELOCITIES_QUERY = """
+SELECT v.pgc, v.apex, v.v, v.e_v
+FROM unnest(%s::text[], %s::float8[], %s::float8[], %s::float8[], %s::float8[], %s::float8[], %s::float8[])
+    AS c(apex, lon, e_lon, lat, e_lat, vel, e_vel)
+  JOIN layer2.apexes AS a ON (
+    a.apex = c.apex
+    AND (a.lon, a.e_lon, a.lat, a.e_lat, a.vel, a.e_vel) = (c.lon, c.e_lon, c.lat, c.e_lat, c.vel, c.e_vel)
+  )
+  JOIN layer2.apex_velocities AS v ON (v.apex = a.apex)
+WHERE v.pgc = ANY(%s)
+  AND a.icrs_updated_at >= (SELECT dt FROM layer2.last_update WHERE catalog = 'icrs')
+  AND a.redshift_updated_at >= (SELECT dt FROM layer2.last_update WHERE catalog = 'redshift')
+"""
+
+
+def apex_velocities_params(apexes: Mapping[str, Sequence[float]], pgcs: Sequence[int]) -> list[Any]:
+    """
+    Parameters of `APEX_VELOCITIES_QUERY` for apexes given by their parameters in the order of the stored columns.
+    """
+    parameters = [list(column) for column in zip(*apexes.values(), strict=True)] or [[]] * 6
+    return [list(apexes), *parameters, list(pgcs)]
+
+
+def apex_velocities_from_rows(records: Sequence[Mapping[str, Any]]) -> dict[int, dict[str, layer2_model.ApexVelocity]]:
+    result: dict[int, dict[str, layer2_model.ApexVelocity]] = {}
+    for record in records:
+        result.setdefault(int(record["pgc"]), {})[str(record["apex"])] = layer2_model.ApexVelocity(
+            v=float(record["v"]), e_v=float(record["e_v"])
+        )
+    return result
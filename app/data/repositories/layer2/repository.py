@@ -1,20 +1,19 @@
 import datetime
-import json
-from collections.abc import Mapping
+import time
+from collections.abc import Mapping, Sequence
 from typing import Any
 
+import numpy as np
 import structlog
 from astropy import table
 from astropy import units as u
-from psycopg import rows, sql
 
 from app.data import model
 from app.data.model import Layer2CatalogObject, Layer2Object
-from app.data.model import layer2 as layer2_model
 from app.data.repositories.common import get_column_units as query_column_units
 from app.data.repositories.layer2 import filters as repofilters
-from app.data.repositories.layer2 import params
-from app.lib import concurrency, containers
+from app.data.repositories.layer2 import params, planner, queries, stats
+from app.lib import concurrency
 from app.lib.storage import postgres
 
 catalogs = [
@@ -23,11 +22,26 @@ catalogs = [
     model.RawCatalog.REDSHIFT,
 ]
 
+# Row of `layer2.last_update` updated whenever objects are removed from layer 2.
+REMOVAL_LAST_UPDATE = "removal"
+
 
 class Layer2Repository(postgres.TransactionalPGRepository):
-    def __init__(self, storage: postgres.PgStorage, logger: structlog.stdlib.BoundLogger) -> None:
+    def __init__(
+        self,
+        storage: postgres.PgStorage,
+        logger: structlog.stdlib.BoundLogger,
+        single_statement_pgc_query: bool = False,
+    ) -> None:
+        """
+        :param single_statement_pgc_query: Make `query_pgc` fetch all catalogs with one statement instead of one
+            query per catalog.
+        """
         self._logger = logger
         self._storage = storage
+        self._single_statement_pgc_query = single_statement_pgc_query
+        self._table_stats: stats.TableStats | None = None
+        self._table_stats_loaded_at = 0.0
 
     def get_last_update_time(self, catalog: model.RawCatalog) -> datetime.datetime:
         return self._storage.query_one("SELECT dt FROM layer2.last_update WHERE catalog = %s", params=[catalog.value])[
@@ -40,6 +54,20 @@ class Layer2Repository(postgres.TransactionalPGRepository):
             params=[dt, catalog.value],
         )
 
+    def get_table_stats(self) -> stats.TableStats:
+        """
+        Returns the sizes of layer 2 tables that Postgres keeps for its planner, reloaded every
+        `stats.TABLE_STATS_TTL_SECONDS`.
+        """
+        now = time.monotonic()
+        if self._table_stats is None or now - self._table_stats_loaded_at > stats.TABLE_STATS_TTL_SECONDS:
+            records = self._storage.query(stats.TABLE_STATS_QUERY)
+            self._table_stats = stats.TableStats(
+                {record["table_name"]: float(record["reltuples"]) for record in records}
+            )
+            self._table_stats_loaded_at = now
+        return self._table_stats
+
     def get_column_units(self, schema: str, table: str) -> dict[str, str]:
         return query_column_units(self._storage, schema, table)
 
@@ -72,6 +100,11 @@ class Layer2Repository(postgres.TransactionalPGRepository):
             query = f"DELETE FROM {layer2_table} WHERE pgc = ANY(%s)"
             self._storage.exec(query, params=[pgcs])
 
+        self._storage.exec(
+            "UPDATE layer2.last_update SET dt = %s WHERE catalog = %s",
+            params=[datetime.datetime.now(tz=datetime.UTC), REMOVAL_LAST_UPDATE],
+        )
+
     def save(self, table_name: str, data: table.QTable) -> None:
         if len(data) == 0:
             return
@@ -86,117 +119,102 @@ class Layer2Repository(postgres.TransactionalPGRepository):
             if target_unit is not None and work[col].unit is not None:
                 work[col] = work[col].to(u.Unit(target_unit))
 
-        all_columns = ["pgc", *columns]
-        column_idents = sql.SQL(", ").join(sql.Identifier(c) for c in all_columns)
-        table_ident = sql.SQL("{}.{}").format(sql.Identifier(schema), sql.Identifier(relation))
-        on_conflict = sql.SQL(", ").join(
-            sql.SQL("{} = EXCLUDED.{}").format(sql.Identifier(c), sql.Identifier(c)) for c in all_columns
-        )
-
         pgcs = [int(pgc) for pgc in work["pgc"]]
         col_values = [_column_as_list(work[col]) for col in columns]
+        rows = zip(pgcs, *col_values, strict=True)
 
-        with self.with_tx():
-            with self._storage.get_connection().cursor() as cur:
-                cur.execute(
-                    sql.SQL("CREATE TEMP TABLE save_staging (LIKE {} INCLUDING DEFAULTS) ON COMMIT DROP").format(
-                        table_ident
-                    )
-                )
-                with cur.copy(sql.SQL("COPY save_staging ({}) FROM STDIN").format(column_idents)) as copy:
-                    for i, pgc in enumerate(pgcs):
-                        copy.write_row((pgc, *[vals[i] for vals in col_values]))
-                cur.execute(
-                    sql.SQL(
-                        "INSERT INTO {} ({}) SELECT {} FROM save_staging ON CONFLICT (pgc) DO UPDATE SET {}"
-                    ).format(table_ident, column_idents, column_idents, on_conflict)
-                )
+        self._storage.bulk_upsert(table_name, ["pgc", *columns], rows, conflict_keys=["pgc"], update_columns=columns)
 
-    def _construct_batch_query(
-        self,
-        catalogs: list[model.RawCatalog],
-        search_types: Mapping[str, repofilters.Filter],
-        search_params: Mapping[str, params.SearchParams],
-        limit: int,
-        offset: int,
-        ordering: repofilters.Ordering | None = None,
-    ) -> tuple[str, list[Any]]:
-        if not search_params:
-            return "SELECT NULL as record_id, NULL as pgc WHERE FALSE", []
-
-        query = """
-            WITH search_params AS (
-                SELECT * FROM (
-                    VALUES 
-                        {values}
-                ) AS t(record_id, search_type, params)
-            ) 
-            SELECT sp.record_id, pgc, {columns}
-            FROM search_params sp
-            CROSS JOIN {joined_tables}
-            WHERE {conditions}
-            {order_by}
-            LIMIT %s OFFSET %s
+    def replace_designation_keys(self, data: table.QTable) -> None:
         """
+        Replaces the normalized designations of the objects in `data` with the designations listed for them. The
+        objects must already be saved to `layer2.designation`. Keys are computed by the database.
+        """
+        if len(data) == 0:
+            return
 
-        values_lines = []
-        params = []
-
-        for record_id, sparams in search_params.items():
-            values_lines.append("(%s, %s, %s::jsonb)")
-            params.extend([record_id, sparams.name(), json.dumps(sparams.get_params())])
-
-        columns = []
-        table_names = []
-
-        for catalog in catalogs:
-            object_cls = model.get_catalog_object_type(catalog)
+        pgcs = sorted({int(pgc) for pgc in data["pgc"]})
+        rows = sorted({(int(pgc), str(design)) for pgc, design in zip(data["pgc"], data["design"], strict=True)})
 
-            table_names.append(object_cls.layer2_table())
-            columns.extend(
-                [
-                    f'{object_cls.layer2_table()}.{column} AS "{catalog.value}|{column}"'
-                    for column in object_cls.layer2_keys()
-                ]
-            )
-            columns.append(
-                f"CASE WHEN {object_cls.layer2_table()}.pgc IS NOT NULL "
-                f'THEN true ELSE false END AS "{catalog.value}|_present"'
+        with self.with_tx():
+            self._storage.exec("DELETE FROM layer2.designation_keys WHERE pgc = ANY(%s)", params=[pgcs])
+            self._storage.bulk_upsert(
+                "layer2.designation_keys", ["pgc", "design"], rows, conflict_keys=["pgc", "design"]
             )
 
-        # This is to avoid using FULL JOINs as this is very slow for cases
-        # where we only want to select from one table, e.g. only coordinate cone search
-        driving_tables = {search_filter.driving_table() for search_filter in search_types.values()}
-        driving_table = driving_tables.pop() if len(driving_tables) == 1 else None
-
-        if driving_table is not None:
-            other_tables = [table_name for table_name in table_names if table_name != driving_table]
-            joined_tables = " LEFT JOIN ".join(
-                [driving_table] + [f"{table_name} USING (pgc)" for table_name in other_tables]
-            )
-        else:
-            joined_tables = " FULL JOIN ".join(
-                [f"{table_names[0]}"] + [f"{table_name} USING (pgc)" for table_name in table_names[1:]]
+    def get_apexes(self) -> dict[str, model.StoredApex]:
+        records = self._storage.query(
+            "SELECT apex, lon, e_lon, lat, e_lat, vel, e_vel, icrs_updated_at, redshift_updated_at FROM layer2.apexes"
+        )
+        return {
+            record["apex"]: model.StoredApex(
+                parameters=tuple(float(record[column]) for column in queries.APEX_PARAMETER_COLUMNS),
+                icrs_updated_at=record["icrs_updated_at"],
+                redshift_updated_at=record["redshift_updated_at"],
             )
+            for record in records
+        }
+
+    def save_apex(
+        self,
+        apex: str,
+        parameters: Sequence[float],
+        icrs_updated_at: datetime.datetime,
+        redshift_updated_at: datetime.datetime,
+    ) -> None:
+        """
+        Records the parameters the velocities of `apex` are computed with, in the order of the columns of
+        `layer2.apexes`, and the last update times of the ICRS and the redshift catalogs reflected in them.
+        """
+        columns = ["apex", *queries.APEX_PARAMETER_COLUMNS, "icrs_updated_at", "redshift_updated_at"]
+        self._storage.bulk_upsert(
+            "layer2.apexes",
+            columns,
+            [(apex, *parameters, icrs_updated_at, redshift_updated_at)],
+            conflict_keys=["apex"],
+            update_columns=columns[1:],
+        )
 
-        condition_statements = []
+    def remove_apexes(self, apexes: list[str]) -> None:
+        """
+        Removes the apexes together with their velocities.
+        """
+        if not apexes:
+            return
 
-        for search_type, search_filter in search_types.items():
-            condition_statements.append(f"(sp.search_type = '{search_type}' AND {search_filter.get_query()})")
-            params.extend(search_filter.get_params())
+        self._storage.exec("DELETE FROM layer2.apexes WHERE apex = ANY(%s)", params=[apexes])
 
-        if ordering is not None:
-            params.extend(ordering.get_params())
+    def get_velocity_inputs(
+        self, modified_after: datetime.datetime | None, limit: int, offset: int
+    ) -> dict[str, np.ndarray]:
+        """
+        Returns positions and redshifts of the objects that have both, ordered by PGC number and starting after
+        `offset`. With `modified_after` set, only of the objects whose PGC number was modified after that time.
+        """
+        if modified_after is None:
+            return self._storage.query_columns(queries.VELOCITY_INPUTS_QUERY, params=[offset, limit])
+        return self._storage.query_columns(
+            queries.MODIFIED_VELOCITY_INPUTS_QUERY, params=[modified_after, offset, limit]
+        )
 
-        params.extend([limit, offset])
+    def save_apex_velocities(self, apex: str, data: table.QTable) -> None:
+        if len(data) == 0:
+            return
 
-        return query.format(
-            values=",".join(values_lines),
-            columns=",".join(columns),
-            joined_tables=joined_tables,
-            conditions=" OR ".join(condition_statements),
-            order_by=f"ORDER BY {ordering.get_query()}" if ordering is not None else "",
-        ), params
+        rows = zip(
+            [int(pgc) for pgc in data["pgc"]],
+            [apex] * len(data),
+            _column_as_list(data["v"].to(u.Unit("km/s"))),
+            _column_as_list(data["e_v"].to(u.Unit("km/s"))),
+            strict=True,
+        )
+        self._storage.bulk_upsert(
+            "layer2.apex_velocities",
+            ["pgc", "apex", "v", "e_v"],
+            rows,
+            conflict_keys=["pgc", "apex"],
+            update_columns=["v", "e_v"],
+        )
 
     def query_catalogs_batch(
         self,
@@ -206,175 +224,21 @@ class Layer2Repository(postgres.TransactionalPGRepository):
         limit: int,
         offset: int,
         ordering: repofilters.Ordering | None = None,
+        after: Sequence[Any] | None = None,
     ) -> dict[str, list[model.Layer2CatalogObject]]:
-        query, params = self._construct_batch_query(
-            catalogs, search_types, search_params, limit, offset, ordering=ordering
+        plan = planner.plan(search_types, search_params, self.get_table_stats())
+        self._logger.debug("layer2 query plan", **plan.describe())
+        query, query_params = queries.construct_batch_query(
+            catalogs, search_types, search_params, limit, offset, ordering=ordering, after=after, plan=plan
         )
 
-        records = self._storage.query(query, params=params)
-
-        records_by_id = containers.group_by(records, key_func=lambda obj: str(obj["record_id"]))
+        records = self._storage.query(query, params=query_params)
 
-        result: dict[str, list[model.Layer2CatalogObject]] = {}
+        return queries.group_batch_records(records)
 
-        for record_id, records in records_by_id.items():
-            if record_id not in result:
-                result[record_id] = []
-
-            result[record_id].extend(self._group_by_pgc(records))
-
-        return result
-
-    def _group_by_pgc(self, objects: list[rows.DictRow]) -> list[model.Layer2CatalogObject]:
-        objects_by_pgc = containers.group_by(objects, key_func=lambda obj: int(obj["pgc"]))
-        result = []
-
-        for pgc, pgc_objects in objects_by_pgc.items():
-            layer2_obj = model.Layer2CatalogObject(pgc, [])
-
-            # TODO: what if for each pgc there are multiple rows? For example, if
-            # the catalog does not have a UNIQUE constraint on pgc.
-            obj = pgc_objects[0]
-            if "record_id" in obj:
-                obj.pop("record_id")
-            if "pgc" in obj:
-                obj.pop("pgc")
-
-            res: dict[model.RawCatalog, dict[str, Any]] = {}
-            presence_flags: dict[model.RawCatalog, bool] = {}
-
-            for key, value in obj.items():
-                catalog_name, column = key.split("|")
-                catalog = model.RawCatalog(catalog_name)
-
-                if column == "_present":
-                    presence_flags[catalog] = bool(value)
-                else:
-                    if catalog not in res:
-                        res[catalog] = {}
-                    res[catalog][column] = value
-
-            for catalog, data in res.items():
-                object_cls = model.get_catalog_object_type(catalog)
-
-                if presence_flags.get(catalog, False):
-                    layer2_obj.data.append(object_cls.from_layer2(data))
-
-            result.append(layer2_obj)
-
-        return result
-
-    def _query_designations(self, pgcs: list[int]) -> dict[int, layer2_model.DesignationCatalog]:
-        if not pgcs:
-            return {}
-        rows = self._storage.query(
-            "SELECT pgc, design FROM layer2.designation WHERE pgc = ANY(%s) ORDER BY pgc",
-            params=[pgcs],
-        )
-        return {int(row["pgc"]): layer2_model.DesignationCatalog(name=str(row["design"])) for row in rows}
-
-    def _query_icrs(self, pgcs: list[int]) -> dict[int, layer2_model.ICRSCatalog]:
-        if not pgcs:
-            return {}
-        rows = self._storage.query(
-            "SELECT pgc, ra, e_ra, dec, e_dec FROM layer2.icrs WHERE pgc = ANY(%s) ORDER BY pgc",
-            params=[pgcs],
-        )
-        result: dict[int, layer2_model.ICRSCatalog] = {}
-        for row in rows:
-            if all(row.get(k) is not None for k in ("ra", "e_ra", "dec", "e_dec")):
-                result[int(row["pgc"])] = layer2_model.ICRSCatalog(
-                    ra=float(row["ra"]),
-                    e_ra=float(row["e_ra"]),
-                    dec=float(row["dec"]),
-                    e_dec=float(row["e_dec"]),
-                )
-        return result
-
-    def _query_redshift(self, pgcs: list[int]) -> dict[int, layer2_model.RedshiftCatalog]:
-        if not pgcs:
-            return {}
-        rows = self._storage.query(
-            "SELECT pgc, cz, e_cz FROM layer2.cz WHERE pgc = ANY(%s) ORDER BY pgc",
-            params=[pgcs],
-        )
-        return {
-            int(row["pgc"]): layer2_model.RedshiftCatalog(cz=float(row["cz"]), e_cz=float(row["e_cz"]))
-            for row in rows
-            if row.get("cz") is not None and row.get("e_cz") is not None
-        }
-
-    def _query_nature(self, pgcs: list[int]) -> dict[int, layer2_model.NatureCatalog]:
-        if not pgcs:
-            return {}
-        rows = self._storage.query(
-            "SELECT pgc, type_name FROM layer2.nature WHERE pgc = ANY(%s) ORDER BY pgc",
-            params=[pgcs],
-        )
-        return {
-            int(row["pgc"]): layer2_model.NatureCatalog(type_name=str(row["type_name"]))
-            for row in rows
-            if row.get("type_name") is not None
-        }
-
-    def _query_additional_designations(self, pgcs: list[int]) -> dict[int, layer2_model.AdditionalDesignationsCatalog]:
-        if not pgcs:
-            return {}
-        rows = self._storage.query(
-            "SELECT pgc, design, code, year, author, title FROM layer2.designations "
-            "WHERE pgc = ANY(%s) ORDER BY pgc, design",
-            params=[pgcs],
-        )
-        result: dict[int, list[layer2_model.AdditionalDesignation]] = {}
-        for row in rows:
-            pgc = int(row["pgc"])
-            ad = layer2_model.AdditionalDesignation(
-                name=str(row["design"]) if row.get("design") is not None else "",
-                source=_source_from_row(row),
-            )
-            result.setdefault(pgc, []).append(ad)
-        return {pgc: layer2_model.AdditionalDesignationsCatalog(names=names) for pgc, names in result.items()}
-
-    def _query_notes(self, pgcs: list[int]) -> dict[int, layer2_model.NotesCatalog]:
-        if not pgcs:
-            return {}
-        rows = self._storage.query(
-            "SELECT pgc, note, code, year, author, title FROM layer2.notes WHERE pgc = ANY(%s) ORDER BY pgc",
-            params=[pgcs],
-        )
-        result: dict[int, list[layer2_model.NoteEntry]] = {}
-        for row in rows:
-            pgc = int(row["pgc"])
-            note = layer2_model.NoteEntry(
-                note=str(row["note"]) if row.get("note") is not None else "",
-                source=_source_from_row(row),
-            )
-            result.setdefault(pgc, []).append(note)
-        return {pgc: layer2_model.NotesCatalog(notes=notes) for pgc, notes in result.items()}
-
-    def _query_photometry_total(self, pgcs: list[int]) -> dict[int, layer2_model.PhotometryTotalCatalog]:
-        if not pgcs:
-            return {}
-        rows = self._storage.query(
-            "SELECT pgc, band, magsys, method, wavelength, mag, e_mag FROM layer2.photometry_total "
-            "WHERE pgc = ANY(%s) ORDER BY pgc, wavelength",
-            params=[pgcs],
-        )
-        result: dict[int, list[layer2_model.PhotometryTotalMeasurement]] = {}
-        for row in rows:
-            pgc = int(row["pgc"])
-            measurement = layer2_model.PhotometryTotalMeasurement(
-                band=str(row["band"]),
-                magsys=str(row["magsys"]) if row.get("magsys") is not None else None,
-                method=str(row["method"]),
-                wavelength=float(row["wavelength"]),
-                mag=float(row["mag"]),
-                e_mag=float(row["e_mag"]) if row.get("e_mag") is not None else None,
-            )
-            result.setdefault(pgc, []).append(measurement)
-        return {
-            pgc: layer2_model.PhotometryTotalCatalog(measurements=measurements) for pgc, measurements in result.items()
-        }
+    def _query_catalog(self, catalog: model.RawCatalog, pgcs: list[int]) -> Mapping[int, Any]:
+        reader = queries.PGC_CATALOG_READERS[catalog]
+        return reader.from_columns(self._storage.query_columns(reader.query, params=[pgcs]))
 
     def query_pgc(
         self,
@@ -382,101 +246,26 @@ class Layer2Repository(postgres.TransactionalPGRepository):
         pgc_numbers: list[int],
         limit: int,
         offset: int = 0,
+        after: int | None = None,
     ) -> list[Layer2Object]:
         if not catalogs or not pgc_numbers:
             return []
 
-        pgcs_page = sorted(pgc_numbers)[offset : offset + limit]
+        pgcs_page = queries.pgc_page(pgc_numbers, limit, offset, after)
         if not pgcs_page:
             return []
 
-        errgr = concurrency.ErrorGroup()
-        designation_task: concurrency.TaskResult[dict[int, layer2_model.DesignationCatalog]] | None = None
-        additional_designations_task: (
-            concurrency.TaskResult[dict[int, layer2_model.AdditionalDesignationsCatalog]] | None
-        ) = None
-        icrs_task: concurrency.TaskResult[dict[int, layer2_model.ICRSCatalog]] | None = None
-        redshift_task: concurrency.TaskResult[dict[int, layer2_model.RedshiftCatalog]] | None = None
-        nature_task: concurrency.TaskResult[dict[int, layer2_model.NatureCatalog]] | None = None
-        notes_task: concurrency.TaskResult[dict[int, layer2_model.NotesCatalog]] | None = None
-        photometry_total_task: concurrency.TaskResult[dict[int, layer2_model.PhotometryTotalCatalog]] | None = None
-
-        if model.RawCatalog.DESIGNATION in catalogs:
-            designation_task = errgr.run(self._query_designations, pgcs_page)
-        if model.RawCatalog.ADDITIONAL_DESIGNATIONS in catalogs:
-            additional_designations_task = errgr.run(self._query_additional_designations, pgcs_page)
-        if model.RawCatalog.ICRS in catalogs:
-            icrs_task = errgr.run(self._query_icrs, pgcs_page)
-        if model.RawCatalog.REDSHIFT in catalogs:
-            redshift_task = errgr.run(self._query_redshift, pgcs_page)
-        if model.RawCatalog.NATURE in catalogs:
-            nature_task = errgr.run(self._query_nature, pgcs_page)
-        if model.RawCatalog.NOTE in catalogs:
-            notes_task = errgr.run(self._query_notes, pgcs_page)
-        if model.RawCatalog.PHOTOMETRY__TOTAL in catalogs:
-            photometry_total_task = errgr.run(self._query_photometry_total, pgcs_page)
-
-        errgr.wait()
-
-        designation_map = designation_task.result() if designation_task is not None else {}
-        additional_designations_map = (
-            additional_designations_task.result() if additional_designations_task is not None else {}
-        )
-        icrs_map = icrs_task.result() if icrs_task is not None else {}
-        redshift_map = redshift_task.result() if redshift_task is not None else {}
-        nature_map = nature_task.result() if nature_task is not None else {}
-        notes_map = notes_task.result() if notes_task is not None else {}
-        photometry_total_map = photometry_total_task.result() if photometry_total_task is not None else {}
-
-        return [
-            self._layer2_object_from_maps(
-                pgc,
-                catalogs,
-                designation_map,
-                additional_designations_map,
-                icrs_map,
-                redshift_map,
-                nature_map,
-                notes_map,
-                photometry_total_map,
-            )
-            for pgc in pgcs_page
-        ]
+        catalogs = [catalog for catalog in catalogs if catalog in queries.PGC_CATALOG_READERS]
+        if self._single_statement_pgc_query:
+            records = self._storage.query(queries.construct_pgc_query(catalogs), params=[sorted(set(pgcs_page))])
+            maps = queries.catalog_maps_from_rows(catalogs, records)
+        else:
+            errgr = concurrency.ErrorGroup()
+            tasks = {catalog: errgr.run(self._query_catalog, catalog, pgcs_page) for catalog in catalogs}
+            errgr.wait()
+            maps = {catalog: task.result() for catalog, task in tasks.items()}
 
-    def _layer2_object_from_maps(
-        self,
-        pgc: int,
-        catalogs: list[model.RawCatalog],
-        designation_map: dict[int, layer2_model.DesignationCatalog],
-        additional_designations_map: dict[int, layer2_model.AdditionalDesignationsCatalog],
-        icrs_map: dict[int, layer2_model.ICRSCatalog],
-        redshift_map: dict[int, layer2_model.RedshiftCatalog],
-        nature_map: dict[int, layer2_model.NatureCatalog],
-        notes_map: dict[int, layer2_model.NotesCatalog],
-        photometry_total_map: dict[int, layer2_model.PhotometryTotalCatalog],
-    ) -> Layer2Object:
-        designation = designation_map.get(pgc) if model.RawCatalog.DESIGNATION in catalogs else None
-        additional_designations = (
-            additional_designations_map.get(pgc) if model.RawCatalog.ADDITIONAL_DESIGNATIONS in catalogs else None
-        )
-        icrs = icrs_map.get(pgc) if model.RawCatalog.ICRS in catalogs else None
-        redshift = redshift_map.get(pgc) if model.RawCatalog.REDSHIFT in catalogs else None
-        nature = nature_map.get(pgc) if model.RawCatalog.NATURE in catalogs else None
-        notes = notes_map.get(pgc) if model.RawCatalog.NOTE in catalogs else None
-        photometry_total = photometry_total_map.get(pgc) if model.RawCatalog.PHOTOMETRY__TOTAL in catalogs else None
-
-        return Layer2Object(
-            pgc=pgc,
-            catalogs=layer2_model.Catalogs(
-                designation=designation,
-                additional_designations=additional_designations,
-                icrs=icrs,
-                redshift=redshift,
-                nature=nature,
-                notes=notes,
-                photometry_total=photometry_total,
-            ),
-        )
+        return [queries.layer2_object_from_maps(pgc, maps) for pgc in pgcs_page]
 
     def query_catalogs_pgc(
         self,
@@ -531,7 +320,7 @@ class Layer2Repository(postgres.TransactionalPGRepository):
 
         objects = self._storage.query(query, params=params)
 
-        return self._group_by_pgc(objects)
+        return queries.group_by_pgc(objects)
 
     def query_catalogs(
         self,
@@ -541,6 +330,7 @@ class Layer2Repository(postgres.TransactionalPGRepository):
         limit: int,
         offset: int,
         ordering: repofilters.Ordering | None = None,
+        after: Sequence[Any] | None = None,
     ) -> list[model.Layer2CatalogObject]:
         res = self.query_catalogs_batch(
             catalogs,
@@ -549,6 +339,7 @@ class Layer2Repository(postgres.TransactionalPGRepository):
             limit,
             offset,
             ordering=ordering,
+            after=after,
         )
 
         if "obj" not in res:
@@ -557,17 +348,6 @@ class Layer2Repository(postgres.TransactionalPGRepository):
         return res["obj"]
 
 
-def _source_from_row(row: Mapping[str, Any]) -> layer2_model.Source:
-    author_val = row.get("author")
-    authors = author_val if isinstance(author_val, list) else [str(author_val)] if author_val is not None else []
-    return layer2_model.Source(
-        bibcode=str(row["code"]) if row.get("code") is not None else "",
-        title=str(row["title"]) if row.get("title") is not None else "",
-        authors=authors,
-        year=int(row["year"]) if row.get("year") is not None else 0,
-    )
-
-
 def _column_as_list(col: Any) -> list[Any]:
     if getattr(col, "unit", None) is not None:
         return col.value.tolist()
@@ -0,0 +1,40 @@
+import math
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+
+# Row count assumed for a table without statistics, for example one that has never been analyzed.
+DEFAULT_TABLE_ROWS = 1_000_000.0
+
+# Table sizes change only with imports, so they are reread rarely.
+TABLE_STATS_TTL_SECONDS = 600.0
+
+# Estimated number of rows of every layer 2 table as kept by Postgres for its own planner. `reltuples` is negative
+# for tables that have never been vacuumed or analyzed.
+TABLE_STATS_QUERY = """
+SELECT n.nspname || '.' || c.relname AS table_name, c.reltuples
+FROM pg_class AS c
+  JOIN pg_namespace AS n ON (n.oid = c.relnamespace)
+WHERE n.nspname = 'layer2' AND c.relkind IN ('r', 'p')
+"""
+
+
+@dataclass(frozen=True)
+class TableStats:
+    """
+    Sizes of layer 2 tables used to estimate how many objects a filter matches.
+    """
+
+    rows: Mapping[str, float] = field(default_factory=dict)
+
+    def table_rows(self, table: str) -> float:
+        rows = self.rows.get(table)
+        if rows is None or rows < 0:
+            return DEFAULT_TABLE_ROWS
+        return rows
+
+    def cone_rows(self, radius_deg: float) -> float:
+        """
+        Objects expected within a cone if `layer2.icrs` were spread evenly over the sky. A cap of angular radius r
+        covers (1 - cos r) / 2 of the sphere.
+        """
+        return self.table_rows("layer2.icrs") * (1 - math.cos(math.radians(min(radius_deg, 180.0)))) / 2
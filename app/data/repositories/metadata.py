@@ -58,15 +58,85 @@ class QueryWithMetadataResult:
     rows: list[list[Any]]
 
 
-def _infer_column_sample(column: str, rows: list[dict[str, Any]]) -> object | None:
-    for row in rows:
-        value = row[column]
-        if value is not None:
-            return value
-    return None
+_TAP_SYNC_QUERY_TIMEOUT_SECONDS = 20
 
 
-_TAP_SYNC_QUERY_TIMEOUT_SECONDS = 20
+def _wrap_tap_query(query: str, max_rows: int) -> str:
+    stripped = query.strip().rstrip(";")
+    return f"SELECT * FROM ({stripped}\n) AS _tap_sync\nLIMIT {max_rows}"
+
+
+class _QueryResultBuilder:
+    """
+    Collects streamed batches into row lists so that only one batch of dict rows is alive at a time.
+    """
+
+    def __init__(self) -> None:
+        self._col_names: list[str] = []
+        self._samples: dict[str, object] = {}
+        self._rows: list[list[Any]] = []
+
+    def add(self, batch: list[dict[str, Any]]) -> None:
+        if not batch:
+            return
+        if not self._col_names:
+            self._col_names = list(batch[0].keys())
+        for row in batch:
+            values = [row[name] for name in self._col_names]
+            if len(self._samples) < len(self._col_names):
+                for name, value in zip(self._col_names, values, strict=True):
+                    if value is not None:
+                        self._samples.setdefault(name, value)
+            self._rows.append(values)
+
+    def result(self) -> QueryWithMetadataResult:
+        columns = [
+            QueryColumnMetadata(column_name=name, sample_value=self._samples.get(name)) for name in self._col_names
+        ]
+        return QueryWithMetadataResult(columns=columns, rows=self._rows)
+
+
+_TABLES_QUERY = """
+    SELECT schema_name, table_name, param
+    FROM meta.table_info
+    WHERE schema_name = ANY(%s)
+    ORDER BY schema_name, table_name
+"""
+
+_COLUMNS_QUERY = """
+    SELECT c.table_schema AS schema_name,
+           c.table_name,
+           c.column_name,
+           c.data_type::text AS data_type,
+           ci.param
+    FROM information_schema.columns c
+    INNER JOIN meta.column_info ci
+      ON ci.schema_name = c.table_schema
+     AND ci.table_name = c.table_name
+     AND ci.column_name = c.column_name
+    WHERE c.table_schema = ANY(%s)
+    ORDER BY c.table_schema, c.table_name, c.ordinal_position
+"""
+
+
+def _tables_from_rows(
+    table_rows: list[dict[str, Any]],
+    column_rows: list[dict[str, Any]],
+) -> list[MetadataTableDetail]:
+    columns_by_table: dict[tuple[str, str], list[MetadataColumnDetail]] = {}
+    for row in column_rows:
+        key = (row["schema_name"], row["table_name"])
+        columns_by_table.setdefault(key, []).append(_column_detail_from_row(row))
+
+    return [
+        MetadataTableDetail(
+            schema_name=row["schema_name"],
+            table_name=row["table_name"],
+            description=_description_from_param(row.get("param")),
+            columns=columns_by_table.get((row["schema_name"], row["table_name"]), []),
+        )
+        for row in table_rows
+    ]
 
 
 @final
@@ -81,22 +151,14 @@ class MetadataRepository(pg_storage.TransactionalPGRepository):
         *,
         timeout_seconds: float = _TAP_SYNC_QUERY_TIMEOUT_SECONDS,
     ) -> QueryWithMetadataResult:
-        stripped = query.strip().rstrip(";")
-        wrapped = f"SELECT * FROM ({stripped}\n) AS _tap_sync\nLIMIT {max_rows}"
-        dict_rows: list[dict[str, Any]] = self._storage.query(
-            wrapped,
+        builder = _QueryResultBuilder()
+        for batch in self._storage.stream(
+            _wrap_tap_query(query, max_rows),
             timeout_seconds=timeout_seconds,
             read_only=True,
-        )
-        if not dict_rows:
-            return QueryWithMetadataResult(columns=[], rows=[])
-        col_names = list(dict_rows[0].keys())
-        columns = [
-            QueryColumnMetadata(column_name=name, sample_value=_infer_column_sample(name, dict_rows))
-            for name in col_names
-        ]
-        result_rows = [[row[name] for name in col_names] for row in dict_rows]
-        return QueryWithMetadataResult(columns=columns, rows=result_rows)
+        ):
+            builder.add(batch)
+        return builder.result()
 
     def list_tables_with_columns(
         self,
@@ -107,44 +169,41 @@ class MetadataRepository(pg_storage.TransactionalPGRepository):
         if not schemas:
             return []
 
-        table_rows = self._storage.query(
-            """
-            SELECT schema_name, table_name, param
-            FROM meta.table_info
-            WHERE schema_name = ANY(%s)
-            ORDER BY schema_name, table_name
-            """,
-            params=[list(schemas)],
-        )
-        columns_by_table: dict[tuple[str, str], list[MetadataColumnDetail]] = {}
-        if include_columns:
-            column_rows = self._storage.query(
-                """
-                SELECT c.table_schema AS schema_name,
-                       c.table_name,
-                       c.column_name,
-                       c.data_type::text AS data_type,
-                       ci.param
-                FROM information_schema.columns c
-                INNER JOIN meta.column_info ci
-                  ON ci.schema_name = c.table_schema
-                 AND ci.table_name = c.table_name
-                 AND ci.column_name = c.column_name
-                WHERE c.table_schema = ANY(%s)
-                ORDER BY c.table_schema, c.table_name, c.ordinal_position
-                """,
-                params=[list(schemas)],
-            )
-            for row in column_rows:
-                key = (row["schema_name"], row["table_name"])
-                columns_by_table.setdefault(key, []).append(_column_detail_from_row(row))
-
-        return [
-            MetadataTableDetail(
-                schema_name=row["schema_name"],
-                table_name=row["table_name"],
-                description=_description_from_param(row.get("param")),
-                columns=columns_by_table.get((row["schema_name"], row["table_name"]), []),
-            )
-            for row in table_rows
-        ]
+        table_rows = self._storage.query(_TABLES_QUERY, params=[list(schemas)])
+        column_rows = self._storage.query(_COLUMNS_QUERY, params=[list(schemas)]) if include_columns else []
+        return _tables_from_rows(table_rows, column_rows)
+
+
+@final
+class AsyncMetadataRepository(pg_storage.AsyncTransactionalPGRepository):
+    def __init__(self, storage: pg_storage.AsyncPgStorage) -> None:
+        super().__init__(storage)
+
+    async def query_with_metadata(
+        self,
+        query: str,
+        max_rows: int,
+        *,
+        timeout_seconds: float = _TAP_SYNC_QUERY_TIMEOUT_SECONDS,
+    ) -> QueryWithMetadataResult:
+        builder = _QueryResultBuilder()
+        async for batch in self._storage.stream(
+            _wrap_tap_query(query, max_rows),
+            timeout_seconds=timeout_seconds,
+            read_only=True,
+        ):
+            builder.add(batch)
+        return builder.result()
+
+    async def list_tables_with_columns(
+        self,
+        schemas: Sequence[str],
+        *,
+        include_columns: bool,
+    ) -> list[MetadataTableDetail]:
+        if not schemas:
+            return []
+
+        table_rows = await self._storage.query(_TABLES_QUERY, params=[list(schemas)])
+        column_rows = await self._storage.query(_COLUMNS_QUERY, params=[list(schemas)]) if include_columns else []
+        return _tables_from_rows(table_rows, column_rows)
@@ -13,6 +13,10 @@ class ICRS:
     E_RA = "e_ra"
     DEC = "dec"
     E_DEC = "e_dec"
+    GLON = "glon"
+    GLAT = "glat"
+    SGL = "sgl"
+    SGB = "sgb"
 
 
 class Redshift:
@@ -21,6 +25,13 @@ class Redshift:
     E_CZ = "e_cz"
 
 
+class ApexVelocity:
+    PGC = Common.PGC
+    APEX = "apex"
+    V = "v"
+    E_V = "e_v"
+
+
 class Nature:
     PGC = Common.PGC
     TYPE_NAME = "type_name"
@@ -1,6 +1,10 @@
+import asyncio
+import contextlib
+from collections.abc import AsyncGenerator, Callable, Coroutine, Sequence
 from pathlib import Path
 from typing import Any, final
 
+import fastapi
 import pydantic
 import pydantic_settings as settings
 import structlog
@@ -33,19 +37,43 @@ class DataAPICommand(commands.Command):
         tracing.setup_tracing("dataapi", self.config.tracing)
 
         self.pg_auth = postgres.PgStorage(self.config.storage.auth, log)
-        self.pg_main = postgres.PgStorage(self.config.storage.main, log, data_enums.PG_ENUM_REGISTRY)
+        self.pg_main = postgres.AsyncPgStorage(self.config.storage.main, log, data_enums.PG_ENUM_REGISTRY)
 
         authenticator: auth.Authenticator = (
             auth.PostgresAuthenticator(self.pg_auth) if self.config.auth_enabled else auth.NoopAuthenticator()
         )
 
         self.pg_auth.connect()
-        self.pg_main.connect()
+
+        layer2_repo = repositories.AsyncLayer2Repository(
+            self.pg_main.replica(), log, single_statement_pgc_query=self.config.single_statement_pgc_query
+        )
+        cache: domain.ObjectCache | None = None
+        background: list[Callable[[], Coroutine[None, None, None]]] = []
+        if self.config.object_cache.enabled:
+            cache = domain.ObjectCache(self.config.object_cache.max_entries)
+            watcher = domain.LastUpdateWatcher(cache, layer2_repo, self.config.object_cache.poll_interval_seconds, log)
+            background.append(watcher.run)
+        snapshot: domain.ICRSSnapshot | None = None
+        if self.config.icrs_snapshot.enabled:
+            snapshot = domain.ICRSSnapshot(layer2_repo, self.config.icrs_snapshot.poll_interval_seconds, log)
+            background.append(snapshot.run)
+        designations: domain.DesignationSnapshot | None = None
+        if self.config.designation_snapshot.enabled:
+            designations = domain.DesignationSnapshot(
+                layer2_repo, self.config.designation_snapshot.poll_interval_seconds, log
+            )
+            background.append(designations.run)
 
         actions = domain.Actions(
-            layer2_repo=repositories.Layer2Repository(self.pg_main, log),
+            layer2_repo=layer2_repo,
             catalog_cfg=self.config.catalogs,
-            metadata_repo=repositories.MetadataRepository(self.pg_main),
+            metadata_repo=repositories.AsyncMetadataRepository(self.pg_main.workload(postgres.Workload.TAP).replica()),
+            storage=self.pg_main,
+            cache=cache,
+            snapshot=snapshot,
+            designations=designations,
+            stored_velocities=self.config.stored_velocities,
         )
 
         self.app = presentation.Server(
@@ -54,6 +82,8 @@ class DataAPICommand(commands.Command):
             log,
             authenticator,
             auth_enabled=self.config.auth_enabled,
+            lifespan=storage_lifespan(self.pg_main, background=background),
+            fast_json=self.config.fast_json,
         )
 
     def run(self):
@@ -62,8 +92,32 @@ class DataAPICommand(commands.Command):
     def cleanup(self):
         if self.pg_auth:
             self.pg_auth.disconnect()
-        if self.pg_main:
-            self.pg_main.disconnect()
+
+
+def storage_lifespan(
+    *storages: postgres.AsyncPgStorage,
+    background: Sequence[Callable[[], Coroutine[None, None, None]]] = (),
+) -> server.Lifespan:
+    """
+    Opens async storages on the event loop that serves the requests and closes them on shutdown. Background
+    coroutines are started once the storages are open and cancelled before they are closed.
+    """
+
+    @contextlib.asynccontextmanager
+    async def lifespan(_app: fastapi.FastAPI) -> AsyncGenerator[None]:
+        for storage in storages:
+            await storage.connect()
+        tasks = [asyncio.create_task(run()) for run in background]
+        try:
+            yield
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for storage in storages:
+                await storage.disconnect()
+
+    return lifespan
 
 
 class StorageConfig(pydantic.BaseModel):
@@ -76,6 +130,21 @@ class Config(config.ConfigSettings):
     storage: StorageConfig
     catalogs: responders.CatalogConfig
     auth_enabled: bool = True
+    # Fetch all catalogs of a PGC query with one statement instead of one query per catalog.
+    single_statement_pgc_query: bool = False
+    # Serve objects of PGC queries from an in-memory cache invalidated after layer 2 changes.
+    object_cache: domain.ObjectCacheConfig = pydantic.Field(default_factory=domain.ObjectCacheConfig)
+    # Answer cone searches from an in-memory copy of layer2.icrs instead of PostGIS.
+    icrs_snapshot: domain.ICRSSnapshotConfig = pydantic.Field(default_factory=domain.ICRSSnapshotConfig)
+    # Answer designation autocompletion from an in-memory index of layer2.designation_keys. Nothing is suggested
+    # while it is disabled or loading.
+    designation_snapshot: domain.DesignationSnapshotConfig = pydantic.Field(
+        default_factory=domain.DesignationSnapshotConfig
+    )
+    # Serve velocities with respect to the apexes precomputed by layer2-import-velocity instead of computing them.
+    stored_velocities: bool = False
+    # Render the object queries and TAP results to JSON without validating them against the response models again.
+    fast_json: bool = False
     tracing: TracingConfig = pydantic.Field(
         default_factory=lambda: TracingConfig(endpoint="localhost:4317", enabled=False)
     )
@@ -1,5 +1,17 @@
 from app.dataapi.domain.actions import Actions
+from app.dataapi.domain.designation_index import DesignationIndex, DesignationSnapshot, DesignationSnapshotConfig
+from app.dataapi.domain.icrs_snapshot import ICRSSnapshot, ICRSSnapshotConfig, SkyIndex
+from app.dataapi.domain.object_cache import LastUpdateWatcher, ObjectCache, ObjectCacheConfig
 
 __all__ = [
     "Actions",
+    "DesignationIndex",
+    "DesignationSnapshot",
+    "DesignationSnapshotConfig",
+    "ICRSSnapshot",
+    "ICRSSnapshotConfig",
+    "LastUpdateWatcher",
+    "ObjectCache",
+    "ObjectCacheConfig",
+    "SkyIndex",
 ]
@@ -1,9 +1,11 @@
+from collections.abc import AsyncIterator
 from typing import final
 
 from app.data import model, repositories
 from app.dataapi import presentation as dataapi
 from app.dataapi import responders
-from app.dataapi.domain import parameterized_query
+from app.dataapi.domain import designation_index, icrs_snapshot, object_cache, parameterized_query
+from app.lib.storage import postgres
 from app.lib.tap import types as tap_types
 
 ENABLED_CATALOGS = [
@@ -39,23 +41,69 @@ def _json_cell(value: object) -> object:
 class Actions(dataapi.Actions):
     def __init__(
         self,
-        layer2_repo: repositories.Layer2Repository,
+        layer2_repo: repositories.AsyncLayer2Repository,
         catalog_cfg: responders.CatalogConfig,
-        metadata_repo: repositories.MetadataRepository,
+        metadata_repo: repositories.AsyncMetadataRepository,
+        storage: postgres.AsyncPgStorage,
+        cache: object_cache.ObjectCache | None = None,
+        snapshot: icrs_snapshot.ICRSSnapshot | None = None,
+        designations: designation_index.DesignationSnapshot | None = None,
+        stored_velocities: bool = False,
     ) -> None:
+        self.storage = storage
+        self.designations = designations
+        self.cache = cache
         self.layer2_repo = layer2_repo
         self.catalog_cfg = catalog_cfg
         self.metadata_repo = metadata_repo
         self.parameterized_query_manager = parameterized_query.ParameterizedQueryManager(
-            layer2_repo, ENABLED_CATALOGS, catalog_cfg
+            layer2_repo, ENABLED_CATALOGS, catalog_cfg, cache, snapshot, stored_velocities=stored_velocities
         )
 
-    def query_simple(self, query: dataapi.QuerySimpleRequest) -> dataapi.QuerySimpleResponse:
-        return self.parameterized_query_manager.query_simple(query)
+    async def query_simple(self, query: dataapi.QuerySimpleRequest) -> dataapi.QuerySimpleResponse:
+        return await self.parameterized_query_manager.query_simple(query)
 
-    def tap_tables(self, request: dataapi.ListTAPTablesRequest) -> dataapi.ListTAPTablesResponse:
+    async def query_batch(self, request: dataapi.QueryBatchRequest) -> AsyncIterator[dataapi.QueryBatchResult]:
+        return await self.parameterized_query_manager.query_batch(request)
+
+    async def resolve(self, request: dataapi.ResolveRequest) -> dataapi.ResolveResponse:
+        matches = await self.layer2_repo.resolve_designations(request.names, request.fuzzy, request.max_fuzzy_matches)
+        return dataapi.ResolveResponse(
+            results=[
+                dataapi.ResolvedName(
+                    name=name,
+                    matches=[
+                        dataapi.DesignationMatch(
+                            pgc=match.pgc,
+                            design=match.design,
+                            match=dataapi.MatchKind.EXACT if match.exact else dataapi.MatchKind.FUZZY,
+                            similarity=match.similarity,
+                        )
+                        for match in matches.get(name, [])
+                    ],
+                )
+                for name in dict.fromkeys(request.names)
+            ]
+        )
+
+    async def suggest_designations(
+        self, request: dataapi.SuggestDesignationsRequest
+    ) -> dataapi.SuggestDesignationsResponse:
+        # Prefix scans are too slow to serve autocompletion from the database, so nothing is suggested until the
+        # index is loaded.
+        index = self.designations.index if self.designations is not None else None
+        suggestions = index.suggest(request.prefix, request.limit) if index is not None else []
+
+        return dataapi.SuggestDesignationsResponse(
+            suggestions=[
+                dataapi.DesignationSuggestion(pgc=suggestion.pgc, design=suggestion.design)
+                for suggestion in suggestions
+            ]
+        )
+
+    async def tap_tables(self, request: dataapi.ListTAPTablesRequest) -> dataapi.ListTAPTablesResponse:
         include_columns = request.detail == dataapi.Detail.MAX
-        tables = self.metadata_repo.list_tables_with_columns(
+        tables = await self.metadata_repo.list_tables_with_columns(
             sorted(METADATA_ALLOWED_SCHEMAS),
             include_columns=include_columns,
         )
@@ -88,8 +136,8 @@ class Actions(dataapi.Actions):
             ]
         )
 
-    def tap_sync(self, request: dataapi.TAPSyncRequest) -> dataapi.TAPSyncResponse:
-        result = self.metadata_repo.query_with_metadata(request.query, request.maxrec)
+    async def tap_sync(self, request: dataapi.TAPSyncRequest) -> dataapi.TAPSyncResponse:
+        result = await self.metadata_repo.query_with_metadata(request.query, request.maxrec)
         columns: list[dataapi.TAPVOTableColumn] = []
         for col in result.columns:
             datatype = tap_types.python_to_tap_datatype(col.sample_value)
@@ -106,3 +154,17 @@ class Actions(dataapi.Actions):
                 table=dataapi.TAPVOTableTable(columns=columns, data=data),
             )
         )
+
+    def get_query_metrics(self, r: dataapi.GetQueryMetricsRequest) -> dataapi.GetQueryMetricsResponse:
+        return dataapi.GetQueryMetricsResponse(
+            queries=[
+                dataapi.QueryStats.model_validate(stats, from_attributes=True)
+                for stats in self.storage.query_stats()[: r.limit]
+            ],
+            pools=[
+                dataapi.PoolStats.model_validate(stats, from_attributes=True) for stats in self.storage.pool_stats()
+            ],
+            object_cache=dataapi.ObjectCacheStats.model_validate(self.cache.stats(), from_attributes=True)
+            if self.cache is not None
+            else None,
+        )
@@ -0,0 +1,243 @@
+import asyncio
+import bisect
+import datetime
+import re
+import string
+import time
+
+import numpy as np
+import pydantic
+import structlog
+
+from app.data import model, repositories
+
+_WHITESPACE = re.compile(r"\s+", re.ASCII)
+_LEADING_ZEROS = re.compile(r"^([A-Z]+)0+([0-9])")
+_TRAILING_ZEROS = re.compile(r"^([A-Z]+)0+$")
+# Upper case conversion of `upper(... COLLATE "C")`, which only touches ASCII letters.
+_ASCII_UPPER = str.maketrans(string.ascii_lowercase, string.ascii_uppercase)
+# Never occurs in UTF-8, so every key that starts with a prefix sorts before the prefix followed by it.
+_PREFIX_END = b"\xff"
+
+
+class DesignationSnapshotConfig(pydantic.BaseModel):
+    enabled: bool = True
+    # How often `layer2.last_update` of the designation catalog is polled for a new import.
+    poll_interval_seconds: float = pydantic.Field(default=60.0, gt=0)
+
+
+def designation_key(design: str) -> str:
+    """
+    Normalizes a designation in the same way as `layer2.designation_key` in the database.
+    """
+    key = _WHITESPACE.sub("", design).translate(_ASCII_UPPER)
+    return _LEADING_ZEROS.sub(r"\1\2", key)
+
+
+def prefix_key(prefix: str) -> str:
+    """
+    Normalizes the beginning of a designation. Zeros typed after the catalog prefix are dropped even when no other
+    digit follows yet, so that "NGC 0" already matches every NGC object.
+    """
+    return _TRAILING_ZEROS.sub(r"\1", designation_key(prefix))
+
+
+class StringTable:
+    """
+    Immutable sequence of byte strings stored back to back in one buffer with their offsets.
+    """
+
+    def __init__(self, data: bytes, offsets: np.ndarray) -> None:
+        self.data = data
+        self.offsets = offsets
+
+    @classmethod
+    def from_strings(cls, values: list[bytes]) -> "StringTable":
+        offsets = np.zeros(len(values) + 1, dtype=np.int64)
+        np.cumsum(np.fromiter(map(len, values), dtype=np.int64, count=len(values)), out=offsets[1:])
+        return cls(b"".join(values), offsets)
+
+    @classmethod
+    def concat(cls, first: "StringTable", second: "StringTable") -> "StringTable":
+        return cls(first.data + second.data, np.concatenate((first.offsets, second.offsets[1:] + first.offsets[-1])))
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> bytes:
+        return self.data[self.offsets[i] : self.offsets[i + 1]]
+
+    def lengths(self, start: int, end: int) -> np.ndarray:
+        return np.diff(self.offsets[start : end + 1])
+
+    def take(self, indices: np.ndarray) -> "StringTable":
+        """
+        Returns a table of the strings at `indices`, gathering their bytes without splitting the buffer up.
+        """
+        starts = self.offsets[indices]
+        lengths = self.offsets[indices + 1] - starts
+        offsets = np.zeros(len(indices) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        positions = np.repeat(starts - offsets[:-1], lengths) + np.arange(offsets[-1])
+        return StringTable(np.frombuffer(self.data, dtype=np.uint8)[positions].tobytes(), offsets)
+
+
+class DesignationIndex:
+    """
+    Read-only index of normalized designations for prefix search in memory. Keys are sorted bytewise like the "C"
+    collation of `layer2.designation_keys.key`, so the keys with a given prefix are one contiguous range found by two
+    binary searches. Keys, designations and PGC numbers are kept in flat arrays rather than in Python objects.
+    """
+
+    def __init__(self, keys: StringTable, designs: StringTable, pgc: np.ndarray) -> None:
+        # Sorted by key and then by PGC number.
+        self.keys = keys
+        self.designs = designs
+        self.pgc = pgc
+
+    @classmethod
+    def build(cls, pgc: np.ndarray, design: np.ndarray, key: np.ndarray) -> "DesignationIndex":
+        encoded = [str(value).encode() for value in key]
+        pgc = np.asarray(pgc, dtype=np.int64)
+        order = np.array(sorted(range(len(encoded)), key=lambda i: (encoded[i], pgc[i])), dtype=np.int64)
+        return cls(
+            StringTable.from_strings(encoded).take(order),
+            StringTable.from_strings([str(value).encode() for value in design]).take(order),
+            pgc[order],
+        )
+
+    def __len__(self) -> int:
+        return len(self.pgc)
+
+    def updated(
+        self, modified_pgcs: np.ndarray, pgc: np.ndarray, design: np.ndarray, key: np.ndarray
+    ) -> "DesignationIndex":
+        """
+        Returns a new index where the designations of `modified_pgcs` are replaced by the given ones. The kept part
+        stays sorted, so only the new designations are sorted and merged into it.
+        """
+        # Objects modified between reading `modified_pgcs` and their designations are replaced as well.
+        replaced = np.concatenate((np.asarray(modified_pgcs, dtype=np.int64), np.asarray(pgc, dtype=np.int64)))
+        kept = np.flatnonzero(~np.isin(self.pgc, replaced))
+        added = DesignationIndex.build(pgc, design, key)
+        keys, pgcs = self.keys.take(kept), self.pgc[kept]
+
+        search = range(len(keys))
+        positions = [
+            bisect.bisect_left(search, (added.keys[i], added.pgc[i]), key=lambda j: (keys[j], pgcs[j]))
+            for i in range(len(added))
+        ]
+        order = np.insert(np.arange(len(kept)), positions, np.arange(len(kept), len(kept) + len(added)))
+
+        return DesignationIndex(
+            StringTable.concat(keys, added.keys).take(order),
+            StringTable.concat(self.designs.take(kept), added.designs).take(order),
+            np.concatenate((pgcs, added.pgc))[order],
+        )
+
+    def _range(self, prefix: bytes) -> tuple[int, int]:
+        search = range(len(self))
+        start = bisect.bisect_left(search, prefix, key=self.keys.__getitem__)
+        end = bisect.bisect_left(search, prefix + _PREFIX_END, lo=start, key=self.keys.__getitem__)
+        return start, end
+
+    def _shortest(self, start: int, end: int, n: int) -> np.ndarray:
+        """
+        Returns positions of the `n` shortest keys in the range, ties broken by key order and then by PGC
+        number.
+        """
+        lengths = self.keys.lengths(start, end)
+        if n < len(lengths):
+            selected = np.flatnonzero(lengths <= np.partition(lengths, n - 1)[n - 1])
+        else:
+            selected = np.arange(len(lengths))
+        return start + selected[np.lexsort((selected, lengths[selected]))][:n]
+
+    def suggest(self, prefix: str, limit: int) -> list[model.DesignationSuggestion]:
+        """
+        Returns up to `limit` objects with a designation whose key starts with the normalized `prefix`. Shorter keys
+        come first, so a complete designation precedes the longer ones it is a prefix of. An object with several
+        matching designations is listed once with the shortest of them.
+        """
+        key = prefix_key(prefix)
+        if not key:
+            return []
+
+        start, end = self._range(key.encode())
+        if start == end:
+            return []
+
+        # Some of the shortest keys may belong to the same objects, so the candidates grow until enough are unique.
+        n = limit
+        while True:
+            suggestions: dict[int, model.DesignationSuggestion] = {}
+            positions = self._shortest(start, end, n)
+            for position in positions:
+                pgc = int(self.pgc[position])
+                if pgc not in suggestions:
+                    suggestions[pgc] = model.DesignationSuggestion(pgc=pgc, design=self.designs[int(position)].decode())
+                    if len(suggestions) == limit:
+                        return list(suggestions.values())
+            if len(positions) == end - start:
+                return list(suggestions.values())
+            n *= 2
+
+
+class DesignationSnapshot:
+    """
+    Keeps a `DesignationIndex` of `layer2.designation_keys`. After the first full load, each new import of the
+    designation catalog only refetches the designations of the objects modified since the previous one. `index` is
+    None until the first snapshot is loaded, so callers fall back to the database meanwhile.
+    """
+
+    def __init__(
+        self,
+        layer2_repo: repositories.AsyncLayer2Repository,
+        poll_interval_seconds: float,
+        logger: structlog.stdlib.BoundLogger,
+    ) -> None:
+        self.layer2_repo = layer2_repo
+        self.poll_interval_seconds = poll_interval_seconds
+        self.log = logger
+        self.index: DesignationIndex | None = None
+        self._version: datetime.datetime | None = None
+
+    async def load(self) -> None:
+        started = time.perf_counter()
+        columns = await self.layer2_repo.get_designation_keys()
+        # Sorting millions of keys takes long enough to stall other requests, so it runs off the event loop.
+        self.index = await asyncio.to_thread(DesignationIndex.build, columns["pgc"], columns["design"], columns["key"])
+        self.log.info(
+            "loaded designation snapshot", designations=len(self.index), duration_seconds=time.perf_counter() - started
+        )
+
+    async def update(self, index: DesignationIndex, modified_after: datetime.datetime) -> None:
+        started = time.perf_counter()
+        modified = await self.layer2_repo.get_modified_pgcs(modified_after)
+        columns = await self.layer2_repo.get_designation_keys(modified_after)
+        self.index = await asyncio.to_thread(index.updated, modified, columns["pgc"], columns["design"], columns["key"])
+        self.log.info(
+            "updated designation snapshot",
+            modified_objects=len(modified),
+            designations=len(self.index),
+            duration_seconds=time.perf_counter() - started,
+        )
+
+    async def poll(self) -> None:
+        version = await self.layer2_repo.get_last_update_time(model.RawCatalog.DESIGNATION)
+        if self.index is not None and version == self._version:
+            return
+
+        if self.index is None or self._version is None:
+            await self.load()
+        else:
+            await self.update(self.index, self._version)
+        self._version = version
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.poll()
+            except Exception:
+                self.log.exception("failed to refresh designation snapshot")
+            await asyncio.sleep(self.poll_interval_seconds)
@@ -0,0 +1,171 @@
+import asyncio
+import datetime
+import math
+import time
+
+import numpy as np
+import pydantic
+import structlog
+
+from app.data import model, repositories
+
+# Same zones as `layer2.sky_zone` in the database.
+ZONE_HEIGHT_DEG = 0.1
+_N_ZONES = math.floor(180 / ZONE_HEIGHT_DEG) + 1
+_FULL_SKY_DEG = 180.0
+# Smallest radius tried by `SkyIndex.nearest` before it starts doubling.
+_MIN_NEAREST_RADIUS_DEG = 1 / 60
+
+
+class ICRSSnapshotConfig(pydantic.BaseModel):
+    enabled: bool = False
+    # How often `layer2.last_update` of the ICRS catalog is polled for a new import.
+    poll_interval_seconds: float = pydantic.Field(default=60.0, gt=0)
+
+
+def _zones(dec: np.ndarray) -> np.ndarray:
+    return np.floor((dec + 90) / ZONE_HEIGHT_DEG).astype(np.int64)
+
+
+def _zone(dec: float) -> int:
+    return math.floor((dec + 90) / ZONE_HEIGHT_DEG)
+
+
+def _unit_vectors(ra: np.ndarray, dec: np.ndarray) -> np.ndarray:
+    ra_rad = np.radians(ra)
+    dec_rad = np.radians(dec)
+    cos_dec = np.cos(dec_rad)
+    return np.column_stack((cos_dec * np.cos(ra_rad), cos_dec * np.sin(ra_rad), np.sin(dec_rad)))
+
+
+def _ra_half_width(dec: float, radius: float) -> float:
+    """
+    Half of the right ascension range covered by a cone, as `layer2.ra_half_width` computes it.
+    """
+    if abs(dec) + radius >= 90:
+        return _FULL_SKY_DEG
+    return math.degrees(
+        math.atan(
+            math.sin(math.radians(radius))
+            / math.sqrt(abs(math.cos(math.radians(dec - radius)) * math.cos(math.radians(dec + radius))))
+        )
+    )
+
+
+class SkyIndex:
+    """
+    Read-only index of object positions for cone and nearest neighbour searches in memory. Positions are sorted by
+    declination zone and right ascension, so the candidates of a cone are a few contiguous slices found by binary
+    search, which are then refined by the exact angular distance computed from unit vectors.
+    """
+
+    def __init__(self, pgc: np.ndarray, ra: np.ndarray, dec: np.ndarray) -> None:
+        zone = _zones(np.asarray(dec, dtype=np.float64))
+        order = np.lexsort((ra, zone))
+        self._pgc = np.asarray(pgc, dtype=np.int64)[order]
+        self._ra = np.asarray(ra, dtype=np.float64)[order]
+        self._xyz = _unit_vectors(self._ra, np.asarray(dec, dtype=np.float64)[order])
+        self._zone_starts = np.searchsorted(zone[order], np.arange(_N_ZONES + 1))
+
+    def __len__(self) -> int:
+        return len(self._pgc)
+
+    def _candidates(self, ra: float, dec: float, radius: float) -> np.ndarray:
+        first, last = _zone(max(dec - radius, -90.0)), _zone(min(dec + radius, 90.0))
+        half_width = _ra_half_width(dec, radius)
+        if half_width >= _FULL_SKY_DEG:
+            ra_ranges = [(0.0, 360.0)]
+        else:
+            low, high = ra - half_width, ra + half_width
+            ra_ranges = [(max(low, 0.0), min(high, 360.0))]
+            if low < 0:
+                ra_ranges.append((low + 360, 360.0))
+            if high > 360:
+                ra_ranges.append((0.0, high - 360))
+
+        slices: list[np.ndarray] = []
+        for zone in range(first, last + 1):
+            start, end = self._zone_starts[zone], self._zone_starts[zone + 1]
+            zone_ra = self._ra[start:end]
+            for low, high in ra_ranges:
+                left = start + np.searchsorted(zone_ra, low, side="left")
+                right = start + np.searchsorted(zone_ra, high, side="right")
+                if left < right:
+                    slices.append(np.arange(left, right))
+
+        if not slices:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(slices))
+
+    def cone(self, ra: float, dec: float, radius: float) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns PGC numbers of the objects within `radius` degrees of the centre and their distances in degrees,
+        ordered by distance and then by PGC number.
+        """
+        candidates = self._candidates(ra, dec, radius)
+        center = _unit_vectors(np.array([ra]), np.array([dec]))[0]
+        chord = np.linalg.norm(self._xyz[candidates] - center, axis=1)
+        distances = np.degrees(2 * np.arcsin(np.minimum(chord / 2, 1.0)))
+
+        inside = distances <= radius
+        pgcs, distances = self._pgc[candidates][inside], distances[inside]
+        order = np.lexsort((pgcs, distances))
+        return pgcs[order], distances[order]
+
+    def nearest(self, ra: float, dec: float, n: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the `n` objects closest to the centre in the same form as `cone`. The search radius starts from the
+        one expected to hold `n` objects if they were spread evenly and doubles until enough objects are found.
+        """
+        if n <= 0 or len(self) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        # A cap of radius r radians covers about pi * r^2 of the 4 * pi steradians of the sky.
+        radius = max(math.degrees(math.sqrt(4 * n / len(self))), _MIN_NEAREST_RADIUS_DEG)
+        while True:
+            pgcs, distances = self.cone(ra, dec, radius)
+            if len(pgcs) >= n or radius >= _FULL_SKY_DEG:
+                return pgcs[:n], distances[:n]
+            radius = min(radius * 2, _FULL_SKY_DEG)
+
+
+class ICRSSnapshot:
+    """
+    Keeps a `SkyIndex` of `layer2.icrs` and rebuilds it whenever the ICRS catalog is imported into layer 2 again.
+    `index` is None until the first snapshot is loaded, so callers fall back to the database meanwhile.
+    """
+
+    def __init__(
+        self,
+        layer2_repo: repositories.AsyncLayer2Repository,
+        poll_interval_seconds: float,
+        logger: structlog.stdlib.BoundLogger,
+    ) -> None:
+        self.layer2_repo = layer2_repo
+        self.poll_interval_seconds = poll_interval_seconds
+        self.log = logger
+        self.index: SkyIndex | None = None
+        self._version: datetime.datetime | None = None
+
+    async def load(self) -> None:
+        started = time.perf_counter()
+        columns = await self.layer2_repo.get_icrs_positions()
+        # Sorting millions of positions takes long enough to stall other requests, so it runs off the event loop.
+        self.index = await asyncio.to_thread(SkyIndex, columns["pgc"], columns["ra"], columns["dec"])
+        self.log.info("loaded ICRS snapshot", objects=len(self.index), duration_seconds=time.perf_counter() - started)
+
+    async def poll(self) -> None:
+        version = await self.layer2_repo.get_last_update_time(model.RawCatalog.ICRS)
+        if self.index is not None and version == self._version:
+            return
+
+        await self.load()
+        self._version = version
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.poll()
+            except Exception:
+                self.log.exception("failed to refresh ICRS snapshot")
+            await asyncio.sleep(self.poll_interval_seconds)
@@ -0,0 +1,128 @@
+import asyncio
+import collections
+import dataclasses
+import datetime
+from collections.abc import Hashable, Iterable
+
+import pydantic
+import structlog
+
+from app.data import repositories
+from app.dataapi import presentation as dataapi
+
+
+class ObjectCacheConfig(pydantic.BaseModel):
+    enabled: bool = False
+    max_entries: int = pydantic.Field(default=20000, ge=1)
+    # How often `layer2.last_update` is polled for finished layer 2 imports.
+    poll_interval_seconds: float = pydantic.Field(default=10.0, gt=0)
+
+
+@dataclasses.dataclass
+class ObjectCacheStats:
+    size: int
+    max_entries: int
+    hits: int
+    misses: int
+    evictions: int
+    invalidations: int
+
+
+type CacheKey = tuple[Hashable, int]
+
+
+class ObjectCache:
+    """
+    Bounded LRU cache of objects that are already converted to the response model, keyed by the kind of query,
+    the requested catalogs and the PGC number. Objects are only ever replaced as a whole by invalidating the cache
+    after layer 2 changes.
+
+    `generation` changes on every invalidation. A caller reads it before querying the database and passes it to
+    `put` so that objects read before an invalidation are not stored after it.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self.generation = 0
+        self._objects: collections.OrderedDict[CacheKey, dataapi.PGCObject] = collections.OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def get(self, scope: Hashable, pgc: int) -> dataapi.PGCObject | None:
+        key = (scope, pgc)
+        obj = self._objects.get(key)
+        if obj is None:
+            self._misses += 1
+            return None
+
+        self._objects.move_to_end(key)
+        self._hits += 1
+        return obj
+
+    def put(self, scope: Hashable, objects: Iterable[dataapi.PGCObject], generation: int) -> None:
+        if generation != self.generation:
+            return
+
+        for obj in objects:
+            self._objects[(scope, obj.pgc)] = obj
+            self._objects.move_to_end((scope, obj.pgc))
+
+        while len(self._objects) > self.max_entries:
+            self._objects.popitem(last=False)
+            self._evictions += 1
+
+    def invalidate(self) -> None:
+        self._objects.clear()
+        self.generation += 1
+        self._invalidations += 1
+
+    def stats(self) -> ObjectCacheStats:
+        return ObjectCacheStats(
+            size=len(self._objects),
+            max_entries=self.max_entries,
+            hits=self._hits,
+            misses=self._misses,
+            evictions=self._evictions,
+            invalidations=self._invalidations,
+        )
+
+
+class LastUpdateWatcher:
+    """
+    Invalidates the cache whenever layer 2 changes. Imports write `layer2.last_update` after all objects of a
+    catalog are saved and removals of objects write its `removal` row, so the latest timestamp in it is a version
+    of the whole layer 2.
+    """
+
+    def __init__(
+        self,
+        cache: ObjectCache,
+        layer2_repo: repositories.AsyncLayer2Repository,
+        poll_interval_seconds: float,
+        logger: structlog.stdlib.BoundLogger,
+    ) -> None:
+        self.cache = cache
+        self.layer2_repo = layer2_repo
+        self.poll_interval_seconds = poll_interval_seconds
+        self.log = logger
+        self._version: datetime.datetime | None = None
+
+    async def poll(self) -> None:
+        version = await self.layer2_repo.get_latest_update_time()
+        if self._version is not None and version == self._version:
+            return
+
+        if self._version is not None:
+            self.log.info("layer 2 changed, invalidating object cache", previous=self._version, current=version)
+        self.cache.invalidate()
+        self._version = version
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.poll()
+            except Exception:
+                self.log.exception("failed to poll layer 2 update time")
+            await asyncio.sleep(self.poll_interval_seconds)
@@ -1,10 +1,20 @@
+import asyncio
+import itertools
+from collections.abc import AsyncIterator, Mapping
+
+import numpy as np
 from astropy import coordinates as coords
+from astropy import units as u
 
 from app.data import model, repositories
+from app.data.model import layer2 as model_layer2
 from app.data.repositories import layer2
+from app.data.repositories.layer2 import queries as layer2_queries
 from app.dataapi import presentation as dataapi
 from app.dataapi import responders
+from app.dataapi.domain import icrs_snapshot, object_cache
 from app.lib import astronomy
+from app.lib.web import pagination
 from app.lib.web.errors import RuleValidationError
 
 CATALOGS_FOR_PGC_QUERY = [
@@ -17,6 +27,14 @@ CATALOGS_FOR_PGC_QUERY = [
     model.RawCatalog.PHOTOMETRY__TOTAL,
 ]
 
+# Cursor kind of cone searches answered from the in-memory snapshot, whose sort key is the distance in degrees rather
+# than the geography distance of `layer2.ICRSDistanceOrdering`.
+SNAPSHOT_CURSOR_KIND = "icrs_snapshot_distance"
+
+# Entries of a batch query searched with one statement. Large enough to amortise the round trip, small enough for the
+# first results to be streamed while the rest are being searched.
+BATCH_CHUNK_SIZE = 2000
+
 
 def resolve_query_catalogs(
     catalog_names: list[str] | None,
@@ -45,42 +63,89 @@ def resolve_query_catalogs(
     return result
 
 
+def _search_center(query: dataapi.QuerySimpleRequest) -> coords.SkyCoord | None:
+    if query.ra is not None and query.dec is not None:
+        equinox = astronomy.parse_coordinate_epoch(query.eq_epoch)
+        coord = coords.SkyCoord(ra=query.ra, dec=query.dec, frame=coords.FK5(equinox=equinox))
+        return coord.transform_to("icrs")
+    if query.glon is not None and query.glat is not None:
+        return coords.SkyCoord(l=query.glon, b=query.glat, frame="galactic").transform_to("icrs")
+    if query.sgl is not None and query.sgb is not None:
+        return coords.SkyCoord(sgl=query.sgl, sgb=query.sgb, frame="supergalactic").transform_to("icrs")
+    return None
+
+
+def _galactic_range(query: dataapi.QuerySimpleRequest) -> layer2.GalacticRangeFilter | None:
+    bounds = (query.glat_min, query.glat_max, query.glon_min, query.glon_max)
+    if all(bound is None for bound in bounds):
+        return None
+    return layer2.GalacticRangeFilter(*bounds)
+
+
 class ParameterizedQueryManager:
     def __init__(
         self,
-        layer2_repo: repositories.Layer2Repository,
+        layer2_repo: repositories.AsyncLayer2Repository,
         enabled_catalogs: list[model.RawCatalog],
         catalog_cfg: responders.CatalogConfig,
+        cache: object_cache.ObjectCache | None = None,
+        snapshot: icrs_snapshot.ICRSSnapshot | None = None,
+        stored_velocities: bool = False,
     ) -> None:
+        """
+        :param stored_velocities: Serve velocities with respect to the apexes that the layer 2 import precomputed
+            for the configured apexes instead of computing them for every response.
+        """
         self.layer2_repo = layer2_repo
         self.enabled_catalogs = enabled_catalogs
         self.catalog_config = catalog_cfg
+        self.cache = cache
+        self.snapshot = snapshot
+        self.stored_velocities = stored_velocities
+
+    async def _stored_velocities(
+        self, catalogs: list[model.RawCatalog], pgcs: list[int]
+    ) -> dict[int, dict[str, model_layer2.ApexVelocity]] | None:
+        """
+        Reads the precomputed velocities of the objects if they are enabled and the catalogs they are computed from
+        are requested. Objects without them get velocities computed by the responder.
+        """
+        if not self.stored_velocities or not pgcs:
+            return None
+        if model.RawCatalog.ICRS not in catalogs or model.RawCatalog.REDSHIFT not in catalogs:
+            return None
+        apexes = {key: apex.parameters() for key, apex in self.catalog_config.velocity.apexes.items()}
+        return await self.layer2_repo.get_apex_velocities(pgcs, apexes)
 
     def _build_filters_and_params(
         self, query: dataapi.QuerySimpleRequest
-    ) -> tuple[layer2.Filter, layer2.SearchParams, layer2.Ordering | None]:
+    ) -> tuple[layer2.Filter, layer2.SearchParams, layer2.Ordering]:
         filters = []
         search_params = []
-        ordering: layer2.Ordering | None = None
+        ordering: layer2.Ordering = layer2.PGCOrdering()
 
         if query.pgcs is not None:
             filters.append(layer2.PGCOneOfFilter(query.pgcs))
 
-        if query.radius is not None:
-            icrs: coords.SkyCoord | None = None
-            if query.ra is not None and query.dec is not None:
-                equinox = astronomy.parse_coordinate_epoch(query.eq_epoch)
-                coord = coords.SkyCoord(ra=query.ra, dec=query.dec, frame=coords.FK5(equinox=equinox))
-                icrs = coord.transform_to("icrs")
-            elif query.glon is not None and query.glat is not None:
-                icrs = coords.SkyCoord(l=query.glon, b=query.glat, frame="galactic").transform_to("icrs")
-            elif query.sgl is not None and query.sgb is not None:
-                icrs = coords.SkyCoord(sgl=query.sgl, sgb=query.sgb, frame="supergalactic").transform_to("icrs")
-
+        if query.nearest is not None:
+            icrs = _search_center(query)
             if icrs is not None:
-                filters.append(layer2.ICRSCoordinatesInRadiusFilter(query.radius))
                 search_params.append(layer2.ICRSSearchParams(icrs.ra, icrs.dec))
-                ordering = layer2.ICRSDistanceOrdering(icrs.ra, icrs.dec)
+                filters.append(layer2.ICRSNearestFilter(icrs.ra, icrs.dec, query.radius))
+                ordering = layer2.ICRSNearestOrdering(icrs.ra, icrs.dec)
+        elif query.radius is not None:
+            icrs = _search_center(query)
+            if icrs is not None:
+                search_params.append(layer2.ICRSSearchParams(icrs.ra, icrs.dec))
+                if query.cone_index == dataapi.ConeSearchIndex.SKY_ZONE:
+                    filters.append(layer2.ICRSCoordinatesInZoneRadiusFilter(query.radius))
+                    ordering = layer2.ICRSAngularDistanceOrdering(icrs.ra, icrs.dec)
+                else:
+                    filters.append(layer2.ICRSCoordinatesInRadiusFilter(query.radius))
+                    ordering = layer2.ICRSDistanceOrdering(icrs.ra, icrs.dec)
+
+        if (galactic_range := _galactic_range(query)) is not None:
+            filters.append(galactic_range)
 
         if query.name is not None:
             filters.append(layer2.DesignationLikeFilter())
@@ -88,28 +153,248 @@ class ParameterizedQueryManager:
 
         return layer2.AndFilter(filters), layer2.CombinedSearchParams(search_params), ordering
 
-    def query_simple(self, query: dataapi.QuerySimpleRequest) -> dataapi.QuerySimpleResponse:
+    async def query_simple(self, query: dataapi.QuerySimpleRequest) -> dataapi.QuerySimpleResponse:
         responder = responders.StructuredResponder(self.catalog_config)
         offset = query.page * query.page_size
         if query.pgcs:
             catalogs = resolve_query_catalogs(query.catalogs, CATALOGS_FOR_PGC_QUERY)
-            objects = self.layer2_repo.query_pgc(
-                catalogs,
-                query.pgcs,
-                query.page_size,
-                offset,
-            )
-            return responder.build_response(objects)
+            after: int | None = None
+            if query.cursor is not None:
+                (after,) = pagination.decode_cursor(query.cursor, layer2.PGCOrdering.name(), (int,))
+
+            page = layer2_queries.pgc_page(query.pgcs, query.page_size, offset, after)
+            if self.cache is not None:
+                response = responder.response(await self._hydrate(responder, catalogs, page))
+            else:
+                objects = await self.layer2_repo.query_pgc(
+                    catalogs,
+                    query.pgcs,
+                    query.page_size,
+                    offset,
+                    after=after,
+                )
+                stored = await self._stored_velocities(catalogs, [obj.pgc for obj in objects])
+                response = responder.build_response(objects, stored)
+
+            if page and page[-1] < max(query.pgcs):
+                response.next_cursor = pagination.encode_cursor(layer2.PGCOrdering.name(), [page[-1]])
+            return response
 
         catalogs = resolve_query_catalogs(query.catalogs, self.enabled_catalogs)
+        index = self.snapshot.index if self.snapshot is not None else None
+        if index is not None and query.name is None and _galactic_range(query) is None:
+            center = _search_center(query)
+            if center is not None and query.nearest is not None:
+                return await self._query_nearest_snapshot(
+                    responder, index, catalogs, center, query.nearest, query.radius
+                )
+            if center is not None and query.radius is not None:
+                return await self._query_cone_snapshot(responder, index, catalogs, center, query.radius, query, offset)
+
         filters, search_params, ordering = self._build_filters_and_params(query)
+        search_after = None
+        if query.cursor is not None:
+            search_after = pagination.decode_cursor(query.cursor, ordering.name(), ordering.key_types())
+        generation = self.cache.generation if self.cache is not None else 0
 
-        objects = self.layer2_repo.query_catalogs(
+        # Nearest neighbour searches return all of their objects at once, so they are never continued.
+        limit, offset = (query.nearest, 0) if query.nearest is not None else (query.page_size, offset)
+        objects = await self.layer2_repo.query_catalogs(
             catalogs,
             filters,
             search_params,
-            query.page_size,
+            limit,
             offset,
             ordering=ordering,
+            after=search_after,
         )
-        return responder.build_response_from_catalog(objects)
+        if self.cache is None:
+            stored = await self._stored_velocities(catalogs, [obj.pgc for obj in objects])
+            response = responder.build_response_from_catalog(objects, stored)
+        else:
+            response = responder.response(
+                await self._build_cached(responder, self.cache, catalogs, objects, generation)
+            )
+
+        # The query limits rows rather than objects, so a page may hold fewer objects than requested even when
+        # more follow. The cursor is therefore returned for every non-empty page.
+        if query.nearest is None and objects and objects[-1].sort_key is not None:
+            response.next_cursor = pagination.encode_cursor(ordering.name(), objects[-1].sort_key)
+        return response
+
+    async def query_batch(self, request: dataapi.QueryBatchRequest) -> AsyncIterator[dataapi.QueryBatchResult]:
+        """
+        Checks the request and returns the results of its entries in request order. The entries are searched in
+        chunks with one statement per kind of search and chunk, and the next chunk is fetched while the results of
+        the previous one are consumed.
+        """
+        catalogs = resolve_query_catalogs(request.catalogs, self.enabled_catalogs)
+        return self._query_batch(catalogs, request.entries, request.limit)
+
+    async def _query_batch(
+        self,
+        catalogs: list[model.RawCatalog],
+        entries: list[dataapi.QueryBatchEntry],
+        limit: int,
+    ) -> AsyncIterator[dataapi.QueryBatchResult]:
+        responder = responders.StructuredResponder(self.catalog_config)
+        chunks = list(itertools.batched(entries, BATCH_CHUNK_SIZE, strict=False))
+        if not chunks:
+            return
+
+        pending = asyncio.create_task(self._fetch_batch_chunk(catalogs, chunks[0], limit))
+        try:
+            for i, chunk in enumerate(chunks):
+                generation, objects_by_id, stored = await pending
+                if i + 1 < len(chunks):
+                    pending = asyncio.create_task(self._fetch_batch_chunk(catalogs, chunks[i + 1], limit))
+
+                for entry in chunk:
+                    objects = objects_by_id.get(entry.id, [])
+                    if self.cache is not None:
+                        pgc_objects = await self._build_cached(
+                            responder, self.cache, catalogs, objects, generation, stored
+                        )
+                    else:
+                        pgc_objects = responder.build_objects_from_catalog(objects, stored)
+                    yield dataapi.QueryBatchResult(id=entry.id, objects=pgc_objects)
+        finally:
+            pending.cancel()
+
+    async def _fetch_batch_chunk(
+        self,
+        catalogs: list[model.RawCatalog],
+        entries: tuple[dataapi.QueryBatchEntry, ...],
+        limit: int,
+    ) -> tuple[int, dict[str, list[model.Layer2CatalogObject]], dict[int, dict[str, model_layer2.ApexVelocity]] | None]:
+        """
+        Searches the entries of a chunk and reads the stored velocities of all objects found for them at once.
+        """
+        generation = self.cache.generation if self.cache is not None else 0
+
+        cones: dict[str, layer2.SearchParams] = {}
+        names: dict[str, layer2.SearchParams] = {}
+        for entry in entries:
+            if entry.name is not None:
+                names[entry.id] = layer2.DesignationSearchParams(entry.name)
+            elif entry.ra is not None and entry.dec is not None and entry.radius is not None:
+                cones[entry.id] = layer2.ICRSConeSearchParams(entry.ra, entry.dec, entry.radius)
+
+        async with asyncio.TaskGroup() as tg:
+            cone_task = tg.create_task(
+                self.layer2_repo.query_catalogs_per_record(
+                    catalogs,
+                    layer2.ICRSCoordinatesInSearchRadiusFilter(),
+                    cones,
+                    limit,
+                    layer2.SearchCenterDistanceOrdering(),
+                )
+            )
+            name_task = tg.create_task(
+                self.layer2_repo.query_catalogs_per_record(
+                    catalogs, layer2.DesignationLikeFilter(), names, limit, layer2.PGCOrdering()
+                )
+            )
+
+        objects_by_id = cone_task.result() | name_task.result()
+        pgcs = sorted({obj.pgc for objects in objects_by_id.values() for obj in objects})
+        return generation, objects_by_id, await self._stored_velocities(catalogs, pgcs)
+
+    async def _build_cached(
+        self,
+        responder: responders.StructuredResponder,
+        cache: object_cache.ObjectCache,
+        catalogs: list[model.RawCatalog],
+        objects: list[model.Layer2CatalogObject],
+        generation: int,
+        stored: Mapping[int, Mapping[str, model_layer2.ApexVelocity]] | None = None,
+    ) -> list[dataapi.PGCObject]:
+        """
+        Builds the objects that are not cached yet. Their stored velocities are read unless they are passed in
+        already.
+        """
+        scope = ("search", frozenset(catalogs))
+        cached = [cache.get(scope, obj.pgc) for obj in objects]
+        missing = [obj for obj, hit in zip(objects, cached, strict=True) if hit is None]
+        if stored is None:
+            stored = await self._stored_velocities(catalogs, [obj.pgc for obj in missing])
+        built = iter(responder.build_objects_from_catalog(missing, stored))
+        pgc_objects = [hit if hit is not None else next(built) for hit in cached]
+        cache.put(scope, pgc_objects, generation)
+        return pgc_objects
+
+    async def _query_cone_snapshot(
+        self,
+        responder: responders.StructuredResponder,
+        index: icrs_snapshot.SkyIndex,
+        catalogs: list[model.RawCatalog],
+        center: coords.SkyCoord,
+        radius: u.Quantity,
+        query: dataapi.QuerySimpleRequest,
+        offset: int,
+    ) -> dataapi.QuerySimpleResponse:
+        """
+        Answers a cone search from the in-memory snapshot of positions and reads only the objects of the page from
+        the database. Objects are ordered by distance like the database search, but the cursor keeps the distance
+        in degrees, so it is of its own kind.
+        """
+        pgcs, distances = index.cone(center.ra.deg, center.dec.deg, astronomy.to(radius, "deg"))
+        start = offset
+        if query.cursor is not None:
+            after_distance, after_pgc = pagination.decode_cursor(query.cursor, SNAPSHOT_CURSOR_KIND, (float, int))
+            before = (distances < after_distance) | ((distances == after_distance) & (pgcs <= after_pgc))
+            start = int(np.count_nonzero(before))
+
+        end = start + query.page_size
+        page = [int(pgc) for pgc in pgcs[start:end]]
+        response = responder.response(await self._hydrate(responder, catalogs, page))
+        if page and end < len(pgcs):
+            response.next_cursor = pagination.encode_cursor(SNAPSHOT_CURSOR_KIND, [float(distances[end - 1]), page[-1]])
+        return response
+
+    async def _query_nearest_snapshot(
+        self,
+        responder: responders.StructuredResponder,
+        index: icrs_snapshot.SkyIndex,
+        catalogs: list[model.RawCatalog],
+        center: coords.SkyCoord,
+        n: int,
+        radius: u.Quantity | None,
+    ) -> dataapi.QuerySimpleResponse:
+        """
+        Answers a nearest neighbour search from the in-memory snapshot and reads only the found objects from the
+        database.
+        """
+        pgcs, distances = index.nearest(center.ra.deg, center.dec.deg, n)
+        if radius is not None:
+            pgcs = pgcs[distances <= astronomy.to(radius, "deg")]
+
+        return responder.response(await self._hydrate(responder, catalogs, [int(pgc) for pgc in pgcs]))
+
+    async def _hydrate(
+        self,
+        responder: responders.StructuredResponder,
+        catalogs: list[model.RawCatalog],
+        pgcs: list[int],
+    ) -> list[dataapi.PGCObject]:
+        """
+        Reads the objects with the given PGC numbers, from the cache where possible, in the order of `pgcs`.
+        """
+        if self.cache is None:
+            objects = await self.layer2_repo.query_pgc(catalogs, pgcs, len(pgcs))
+            stored = await self._stored_velocities(catalogs, pgcs)
+            by_pgc = {obj.pgc: obj for obj in responder.build_objects(objects, stored)}
+            return [by_pgc[pgc] for pgc in pgcs if pgc in by_pgc]
+
+        scope = ("pgc", frozenset(catalogs))
+        generation = self.cache.generation
+        cached = {pgc: obj for pgc in pgcs if (obj := self.cache.get(scope, pgc)) is not None}
+
+        missing = [pgc for pgc in pgcs if pgc not in cached]
+        if missing:
+            objects = await self.layer2_repo.query_pgc(catalogs, missing, len(missing))
+            built = responder.build_objects(objects, await self._stored_velocities(catalogs, missing))
+            self.cache.put(scope, built, generation)
+            cached.update((obj.pgc, obj) for obj in built)
+
+        return [cached[pgc] for pgc in pgcs if pgc in cached]
@@ -1,5 +1,6 @@
 import abc
-from collections.abc import Callable
+import enum
+from collections.abc import AsyncIterator, Callable
 from typing import Annotated, Any
 
 import pydantic
@@ -161,6 +162,14 @@ class Schema(pydantic.BaseModel):
     units: Units
 
 
+MAX_NEAREST_OBJECTS = 1000
+
+
+class ConeSearchIndex(enum.StrEnum):
+    GEOGRAPHY = "geography"
+    SKY_ZONE = "sky_zone"
+
+
 class QuerySimpleRequest(pydantic.BaseModel):
     model_config = pydantic.ConfigDict(arbitrary_types_allowed=True)
 
@@ -240,6 +249,57 @@ class QuerySimpleRequest(pydantic.BaseModel):
         default=None,
         description="Supergalactic latitude of the center of the search area in degrees [-90, 90]",
     )
+    glon_min: (
+        Annotated[
+            u.Quantity,
+            BeforeValidator(_as_deg),
+            AfterValidator(_in_range(0, 360)),
+            WithJsonSchema({"type": "number"}),
+        ]
+        | None
+    ) = pydantic.Field(
+        default=None,
+        description=(
+            "Lower bound of galactic longitude in degrees [0, 360]. "
+            "If greater than glon_max, the range wraps around zero"
+        ),
+    )
+    glon_max: (
+        Annotated[
+            u.Quantity,
+            BeforeValidator(_as_deg),
+            AfterValidator(_in_range(0, 360)),
+            WithJsonSchema({"type": "number"}),
+        ]
+        | None
+    ) = pydantic.Field(
+        default=None,
+        description="Upper bound of galactic longitude in degrees [0, 360]",
+    )
+    glat_min: (
+        Annotated[
+            u.Quantity,
+            BeforeValidator(_as_deg),
+            AfterValidator(_in_range(-90, 90)),
+            WithJsonSchema({"type": "number"}),
+        ]
+        | None
+    ) = pydantic.Field(
+        default=None,
+        description="Lower bound of galactic latitude in degrees [-90, 90]",
+    )
+    glat_max: (
+        Annotated[
+            u.Quantity,
+            BeforeValidator(_as_deg),
+            AfterValidator(_in_range(-90, 90)),
+            WithJsonSchema({"type": "number"}),
+        ]
+        | None
+    ) = pydantic.Field(
+        default=None,
+        description="Upper bound of galactic latitude in degrees [-90, 90]",
+    )
     radius: (
         Annotated[
             u.Quantity,
@@ -256,6 +316,22 @@ class QuerySimpleRequest(pydantic.BaseModel):
         default="J2000",
         description="Equinox of equatorial query coordinates (e.g. J2000, B1950)",
     )
+    cone_index: ConeSearchIndex = pydantic.Field(
+        default=ConeSearchIndex.GEOGRAPHY,
+        description=(
+            "Index used for the search by coordinates: the geography index or the btree over declination zones. "
+            "Both return the same objects"
+        ),
+    )
+    nearest: int | None = pydantic.Field(
+        default=None,
+        ge=1,
+        le=MAX_NEAREST_OBJECTS,
+        description=(
+            "Return this many objects closest to the center instead of a page, nearest first. "
+            "With radius, only objects within it are returned"
+        ),
+    )
     name: str | None = pydantic.Field(
         default=None,
         description="Name of the object",
@@ -266,7 +342,11 @@ class QuerySimpleRequest(pydantic.BaseModel):
     )
     page: int = pydantic.Field(
         default=0,
-        description="0-based page number",
+        description="0-based page number. Kept for compatibility, prefer cursor for anything past the first pages",
+    )
+    cursor: str | None = pydantic.Field(
+        default=None,
+        description="Continuation token from next_cursor of the previous page. Cannot be combined with page",
     )
     catalogs: list[str] | None = pydantic.Field(
         default=None,
@@ -306,6 +386,21 @@ class QuerySimpleRequest(pydantic.BaseModel):
                 "When radius is specified, at least one coordinate set must be specified: "
                 "equatorial (ra/dec), galactic (glon/glat), or supergalactic (sgl/sgb)"
             )
+        if self.glat_min is not None and self.glat_max is not None and self.glat_min > self.glat_max:
+            raise ValueError("glat_min must not be greater than glat_max")
+        if self.nearest is not None and sum(systems) == 0:
+            raise ValueError(
+                "When nearest is specified, at least one coordinate set must be specified: "
+                "equatorial (ra/dec), galactic (glon/glat), or supergalactic (sgl/sgb)"
+            )
+        return self
+
+    @pydantic.model_validator(mode="after")
+    def _cursor_exclusive_with_page(self) -> "QuerySimpleRequest":
+        if self.cursor is not None and self.page != 0:
+            raise ValueError("page and cursor cannot be specified together")
+        if self.nearest is not None and (self.cursor is not None or self.page != 0):
+            raise ValueError("nearest returns all of its objects at once and cannot be paginated")
         return self
 
     @pydantic.model_validator(mode="after")
@@ -318,7 +413,12 @@ class QuerySimpleRequest(pydantic.BaseModel):
                 self.glat,
                 self.sgl,
                 self.sgb,
+                self.glon_min,
+                self.glon_max,
+                self.glat_min,
+                self.glat_max,
                 self.radius,
+                self.nearest,
                 self.name,
             ]
             if any(f is not None for f in filters):
@@ -329,17 +429,179 @@ class QuerySimpleRequest(pydantic.BaseModel):
 class QuerySimpleResponse(pydantic.BaseModel):
     objects: list[PGCObject]
     schema_: Schema = pydantic.Field(alias="schema")
+    next_cursor: str | None = pydantic.Field(
+        default=None,
+        description="Token to pass as cursor to get the next page. Absent when there are no more objects",
+    )
+
+
+MAX_BATCH_ENTRIES = 50_000
+
+
+class QueryBatchEntry(pydantic.BaseModel):
+    id: str = pydantic.Field(description="Identifier of the entry, repeated in its result")
+    ra: float | None = pydantic.Field(
+        default=None, ge=0, le=360, description="Right ascension of the cone centre in degrees (ICRS)"
+    )
+    dec: float | None = pydantic.Field(
+        default=None, ge=-90, le=90, description="Declination of the cone centre in degrees (ICRS)"
+    )
+    radius: float | None = pydantic.Field(default=None, gt=0, description="Radius of the cone in degrees")
+    name: str | None = pydantic.Field(default=None, description="Name of the object")
+
+    @pydantic.model_validator(mode="after")
+    def _cone_or_name(self) -> "QueryBatchEntry":
+        cone = [self.ra, self.dec, self.radius]
+        if self.name is not None:
+            if any(v is not None for v in cone):
+                raise ValueError("An entry is either a cone (ra, dec, radius) or a name, not both")
+        elif any(v is None for v in cone):
+            raise ValueError("An entry needs either all of ra, dec and radius or a name")
+        return self
+
+
+class QueryBatchRequest(pydantic.BaseModel):
+    entries: list[QueryBatchEntry] = pydantic.Field(min_length=1, max_length=MAX_BATCH_ENTRIES)
+    limit: int = pydantic.Field(default=10, ge=1, le=100, description="Maximum number of objects for each entry")
+    catalogs: list[str] | None = pydantic.Field(
+        default=None,
+        description=(
+            "Catalogs to include in the response (e.g. designation, icrs, redshift, nature). "
+            "If omitted, default set of catalogs is returned."
+        ),
+    )
+
+    @pydantic.model_validator(mode="after")
+    def _unique_ids(self) -> "QueryBatchRequest":
+        if len({entry.id for entry in self.entries}) != len(self.entries):
+            raise ValueError("Entry ids must be unique")
+        return self
+
+
+class QueryBatchResult(pydantic.BaseModel):
+    id: str
+    objects: list[PGCObject]
+
+
+MAX_RESOLVE_NAMES = 10_000
+
+
+class ResolveRequest(pydantic.BaseModel):
+    names: list[str] = pydantic.Field(min_length=1, max_length=MAX_RESOLVE_NAMES, description="Names to resolve")
+    fuzzy: bool = pydantic.Field(
+        default=True, description="Look for similar designations for the names that have no exact match"
+    )
+    max_fuzzy_matches: int = pydantic.Field(
+        default=5, ge=1, le=50, description="Maximum number of similar designations for each name"
+    )
+
+
+class MatchKind(enum.StrEnum):
+    EXACT = "exact"
+    FUZZY = "fuzzy"
+
+
+class DesignationMatch(pydantic.BaseModel):
+    pgc: int
+    design: str = pydantic.Field(description="Designation of the object that matched the name")
+    match: MatchKind
+    similarity: float = pydantic.Field(description="Trigram similarity of the normalized names, 1 for exact matches")
+
+
+class ResolvedName(pydantic.BaseModel):
+    name: str
+    matches: list[DesignationMatch]
+
+
+class ResolveResponse(pydantic.BaseModel):
+    results: list[ResolvedName]
+
+
+class SuggestDesignationsRequest(pydantic.BaseModel):
+    prefix: str = pydantic.Field(min_length=1, max_length=100, description="Beginning of the designation")
+    limit: int = pydantic.Field(default=10, ge=1, le=100, description="Maximum number of suggestions")
+
+
+class DesignationSuggestion(pydantic.BaseModel):
+    pgc: int
+    design: str = pydantic.Field(description="Designation of the object that starts with the prefix")
+
+
+class SuggestDesignationsResponse(pydantic.BaseModel):
+    suggestions: list[DesignationSuggestion]
+
+
+class GetQueryMetricsRequest(pydantic.BaseModel):
+    limit: int = pydantic.Field(default=100, ge=1)
+
+
+class QueryStats(pydantic.BaseModel):
+    fingerprint: str
+    query: str
+    count: int
+    total_seconds: float
+    p50_seconds: float
+    p95_seconds: float
+    p99_seconds: float
+    max_seconds: float
+    rows: int
+    bytes: int
+
+
+class PoolStats(pydantic.BaseModel):
+    workload: str
+    min_size: int
+    max_size: int
+    size: int
+    available: int
+    waiting: int
+    checkouts: int
+    checkout_errors: int
+    wait_seconds_total: float
+    saturation: float
+    warmup_seconds: float | None
+
+
+class ObjectCacheStats(pydantic.BaseModel):
+    size: int
+    max_entries: int
+    hits: int
+    misses: int
+    evictions: int
+    invalidations: int
+
+
+class GetQueryMetricsResponse(pydantic.BaseModel):
+    queries: list[QueryStats]
+    pools: list[PoolStats]
+    object_cache: ObjectCacheStats | None = None
 
 
 class Actions(abc.ABC):
     @abc.abstractmethod
-    def query_simple(self, query: QuerySimpleRequest) -> QuerySimpleResponse:
+    async def query_simple(self, query: QuerySimpleRequest) -> QuerySimpleResponse:
+        pass
+
+    @abc.abstractmethod
+    async def query_batch(self, request: QueryBatchRequest) -> AsyncIterator[QueryBatchResult]:
+        pass
+
+    @abc.abstractmethod
+    async def resolve(self, request: ResolveRequest) -> ResolveResponse:
+        pass
+
+    @abc.abstractmethod
+    async def suggest_designations(self, request: SuggestDesignationsRequest) -> SuggestDesignationsResponse:
+        pass
+
+    @abc.abstractmethod
+    async def tap_tables(self, request: tap.ListTAPTablesRequest) -> tap.ListTAPTablesResponse:
         pass
 
     @abc.abstractmethod
-    def tap_tables(self, request: tap.ListTAPTablesRequest) -> tap.ListTAPTablesResponse:
+    async def tap_sync(self, request: tap.TAPSyncRequest) -> tap.TAPSyncResponse:
         pass
 
     @abc.abstractmethod
-    def tap_sync(self, request: tap.TAPSyncRequest) -> tap.TAPSyncResponse:
+    def get_query_metrics(self, r: GetQueryMetricsRequest) -> GetQueryMetricsResponse:
         pass
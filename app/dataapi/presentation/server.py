@@ -1,8 +1,10 @@
 import http
+from collections.abc import AsyncIterator
 from typing import Annotated
 
 import fastapi
 import structlog
+from fastapi import responses
 
 from app.dataapi.presentation import interface, tap
 from app.lib import auth
@@ -15,27 +17,54 @@ class API:
     def __init__(self, actions: interface.Actions) -> None:
         self.actions = actions
 
-    def query_simple(
+    async def query_simple(
         self, request: Annotated[interface.QuerySimpleRequest, fastapi.Query()]
     ) -> server.APIOkResponse[interface.QuerySimpleResponse]:
-        response = self.actions.query_simple(request)
+        response = await self.actions.query_simple(request)
 
         return server.APIOkResponse(data=response)
 
-    def tap_tables(
+    async def query_batch(self, request: interface.QueryBatchRequest) -> responses.StreamingResponse:
+        results = await self.actions.query_batch(request)
+
+        async def lines() -> AsyncIterator[str]:
+            async for result in results:
+                yield result.model_dump_json(exclude_none=True) + "\n"
+
+        return responses.StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    async def resolve(self, request: interface.ResolveRequest) -> server.APIOkResponse[interface.ResolveResponse]:
+        response = await self.actions.resolve(request)
+
+        return server.APIOkResponse(data=response)
+
+    async def suggest_designations(
+        self, request: Annotated[interface.SuggestDesignationsRequest, fastapi.Query()]
+    ) -> server.APIOkResponse[interface.SuggestDesignationsResponse]:
+        response = await self.actions.suggest_designations(request)
+
+        return server.APIOkResponse(data=response)
+
+    async def tap_tables(
         self,
         request: Annotated[tap.ListTAPTablesRequest, fastapi.Query()],
     ) -> server.APIOkResponse[tap.ListTAPTablesResponse]:
-        response = self.actions.tap_tables(request)
+        response = await self.actions.tap_tables(request)
         return server.APIOkResponse(data=response)
 
-    def tap_sync(
+    async def tap_sync(
         self,
         request: fastapi.Request,
         tap_request: Annotated[tap.TAPSyncRequest, fastapi.Query()],
     ) -> server.APIOkResponse[tap.TAPSyncResponse]:
         _ = request
-        response = self.actions.tap_sync(tap_request)
+        response = await self.actions.tap_sync(tap_request)
+        return server.APIOkResponse(data=response)
+
+    async def get_query_metrics(
+        self, request: Annotated[interface.GetQueryMetricsRequest, fastapi.Query()]
+    ) -> server.APIOkResponse[interface.GetQueryMetricsResponse]:
+        response = self.actions.get_query_metrics(request)
         return server.APIOkResponse(data=response)
 
 
@@ -47,6 +76,8 @@ class Server(server.WebServer):
         logger: structlog.stdlib.BoundLogger,
         authenticator: auth.Authenticator,
         auth_enabled: bool = True,
+        lifespan: server.Lifespan | None = None,
+        fast_json: bool = False,
     ) -> None:
         api = API(actions)
 
@@ -68,8 +99,52 @@ supergalactic (sgl/sgb) coordinates with radius. Only one coordinate system may
 For equatorial coordinates, eq_epoch sets the equinox (default J2000); non-J2000 coordinates
 are precessed to ICRS. Galactic and supergalactic coordinates are converted to ICRS before searching.
 When coordinates are specified, results are sorted by increasing distance to the search center.
+- With nearest=N and a position, the N objects closest to it are returned at once, optionally limited to radius.
+The page parameters do not apply to this mode.
+- glon_min/glon_max/glat_min/glat_max restrict objects to a range of galactic coordinates, for example
+glat_min=20 for objects well above the plane of the Milky Way. A longitude range with glon_min > glon_max
+wraps around zero.
 - Use the catalogs query parameter to limit which catalogs are returned (e.g. catalogs=icrs&catalogs=designation).
 - The answer is paginated to improve performance.""",
+                fast_json=fast_json,
+            ),
+            server.Route(
+                "/v1/query/batch",
+                http.HTTPMethod.POST,
+                api.query_batch,
+                "Query objects for many positions or names at once",
+                """Searches every entry of the request either in a cone given by its centre and radius or by name, like
+`/v1/query/simple` does for one position or name, and returns up to `limit` objects for each entry. Objects found in
+a cone are ordered by distance from its centre, objects found by name by PGC number.
+
+The response is streamed as newline-delimited JSON with one line per entry in request order. Each line holds the id
+of the entry and its objects: `{"id": "...", "objects": [...]}`. Entries without matches have an empty list of
+objects. Units of the values are the same as in `/v1/query/simple`.""",
+                log_request_body=False,
+            ),
+            server.Route(
+                "/v1/resolve",
+                http.HTTPMethod.POST,
+                api.resolve,
+                "Resolve object names to PGC numbers",
+                """Maps each of the names to the objects that have it as one of their designations. Names are compared
+after folding case and whitespace and dropping leading zeros of the number, so `NGC4486`, `ngc 4486` and `NGC 04486`
+are the same name.
+
+For names without an exact match, the designations most similar to the name are returned as fuzzy matches with their
+trigram similarity. Results are listed in the order of the names, each name once.""",
+                log_request_body=False,
+            ),
+            server.Route(
+                "/v1/designations/suggest",
+                http.HTTPMethod.GET,
+                api.suggest_designations,
+                "Suggest designations that start with a prefix",
+                """Returns objects that have a designation starting with the prefix, for autocompletion of object names.
+The prefix is normalized like the names of `/v1/resolve`, so `ngc 44` suggests `NGC 4472` and `NGC 4486`.
+
+Shorter designations come first, so a complete designation is listed before the longer ones that start with it. Each
+object is listed once with its shortest matching designation.""",
             ),
             server.Route(
                 "/v1/tap/tables",
@@ -84,7 +159,19 @@ When coordinates are specified, results are sorted by increasing distance to the
                 "Execute an arbitrary SQL query (TAP /sync).",
                 "Runs a read-only SQL query against whitelisted schemas and returns a VOTable-like JSON payload.",
                 rate_limit="60/minute",
+                fast_json=fast_json,
+            ),
+            server.Route(
+                "/v1/admin/query-metrics",
+                http.HTTPMethod.GET,
+                api.get_query_metrics,
+                "Get per-query latency metrics",
+                """Returns latency statistics of this server process per query fingerprint, the fingerprints with the
+largest total time first. Latency quantiles are estimated from histogram buckets and result sizes in bytes are
+estimated from a sample of rows. Also includes the state of every connection pool of the storage and the counters of
+the object cache when it is enabled.""",
+                allowed_roles=[auth.Role.ADMIN],
             ),
         ]
 
-        super().__init__(routes, config, logger, authenticator, auth_enabled=auth_enabled)
+        super().__init__(routes, config, logger, authenticator, auth_enabled=auth_enabled, lifespan=lifespan)
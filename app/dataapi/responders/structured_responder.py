@@ -1,5 +1,7 @@
+from collections.abc import Mapping, Sequence
 from typing import Any
 
+import numpy as np
 from astropy import units as u
 
 from app.data import model
@@ -7,6 +9,7 @@ from app.data.model import layer2
 from app.dataapi import presentation as dataapi
 from app.dataapi.responders import interface
 from app.lib import astronomy, config
+from app.lib.astronomy import apex
 
 DATA_SCHEMA = dataapi.Schema(
     units=dataapi.Units(
@@ -40,39 +43,62 @@ VELOCITY_SCHEMA = dataapi.AbsoluteVelocityUnits(
 )
 
 
-class ValueWithUncertainty(config.BaseConfigSettings):
-    value: float
-    error: float
-
-
-class ApexConfig(config.BaseConfigSettings):
-    lon: ValueWithUncertainty
-    lat: ValueWithUncertainty
-    vel: ValueWithUncertainty
-
-
-class VelocityCatalogConfig(config.BaseConfigSettings):
-    apexes: dict[str, ApexConfig]
-
-
 class CatalogConfig(config.BaseConfigSettings):
-    velocity: VelocityCatalogConfig
+    velocity: apex.VelocityCatalogConfig
 
 
 class StructuredResponder(interface.ObjectResponder):
     def __init__(self, cfg: CatalogConfig) -> None:
         self.config = cfg
 
-    def _coordinates_from_icrs(self, ra: float, dec: float, e_ra: float, e_dec: float) -> dataapi.Coordinates:
-        eq_e_ra = astronomy.to(e_ra * u.Unit("deg"), "arcsec")
-        eq_e_dec = astronomy.to(e_dec * u.Unit("deg"), "arcsec")
-        lon, lat, e_lon, e_lat = astronomy.equatorial_to_lonlat(ra, dec, e_ra, e_dec, "galactic")
-        sg_lon, sg_lat, sg_e_lon, sg_e_lat = astronomy.equatorial_to_lonlat(ra, dec, e_ra, e_dec, "supergalactic")
-        return dataapi.Coordinates(
-            equatorial=dataapi.EquatorialCoordinates(ra=ra, dec=dec, e_ra=eq_e_ra, e_dec=eq_e_dec),
-            galactic=dataapi.GalacticCoordinates(lon=lon, lat=lat, e_lon=e_lon, e_lat=e_lat),
-            supergalactic=dataapi.SupergalacticCoordinates(lon=sg_lon, lat=sg_lat, e_lon=sg_e_lon, e_lat=sg_e_lat),
+    def _page_coordinates(
+        self, positions: Sequence[model.ICRSCatalogObject | layer2.ICRSCatalog | None]
+    ) -> list[dataapi.Coordinates | None]:
+        """
+        Builds coordinates of a whole page from the ICRS positions and the galactic and supergalactic coordinates
+        stored with them. Objects without a position get None.
+        """
+        present = [icrs for icrs in positions if icrs is not None]
+        if not present:
+            return [None] * len(positions)
+
+        # Frames that are not stored become NaN.
+        ra, dec, e_ra, e_dec, lon, lat, sg_lon, sg_lat = np.array(
+            [(icrs.ra, icrs.dec, icrs.e_ra, icrs.e_dec, icrs.glon, icrs.glat, icrs.sgl, icrs.sgb) for icrs in present],
+            dtype=float,
+        ).T
+        # Positions saved before the layer 2 import stored the frames are converted in one vectorized pass.
+        missing = np.isnan(lon) | np.isnan(lat) | np.isnan(sg_lon) | np.isnan(sg_lat)
+        if missing.any():
+            lon[missing], lat[missing] = astronomy.equatorial_to_lonlat_many(ra[missing], dec[missing], "galactic")
+            sg_lon[missing], sg_lat[missing] = astronomy.equatorial_to_lonlat_many(
+                ra[missing], dec[missing], "supergalactic"
+            )
+        # As in `astronomy.equatorial_to_lonlat`, the errors are assumed to be the same in every frame.
+        e_lon = (e_ra * u.Unit("deg")).to_value(u.Unit("arcsec"))
+        e_lat = (e_dec * u.Unit("deg")).to_value(u.Unit("arcsec"))
+
+        converted = iter(
+            dataapi.Coordinates(
+                equatorial=dataapi.EquatorialCoordinates(ra=values[0], dec=values[1], e_ra=values[6], e_dec=values[7]),
+                galactic=dataapi.GalacticCoordinates(lon=values[2], lat=values[3], e_lon=values[6], e_lat=values[7]),
+                supergalactic=dataapi.SupergalacticCoordinates(
+                    lon=values[4], lat=values[5], e_lon=values[6], e_lat=values[7]
+                ),
+            )
+            for values in zip(
+                ra.tolist(),
+                dec.tolist(),
+                lon.tolist(),
+                lat.tolist(),
+                sg_lon.tolist(),
+                sg_lat.tolist(),
+                e_lon.tolist(),
+                e_lat.tolist(),
+                strict=True,
+            )
         )
+        return [next(converted) if position is not None else None for position in positions]
 
     def _redshift_from_cz(self, cz: float, e_cz: float) -> dataapi.Redshift:
         return dataapi.Redshift(
@@ -80,153 +106,216 @@ class StructuredResponder(interface.ObjectResponder):
             e_z=astronomy.heliocentric_cz_to_z(e_cz * u.Unit("km/s")),
         )
 
-    def _velocities_from_apexes(
+    def _page_velocities(
         self,
-        lon: float,
-        lat: float,
-        e_lon: float,
-        e_lat: float,
-        cz: float,
-        e_cz: float,
+        coordinates: Sequence[dataapi.Coordinates | None],
+        redshifts: Sequence[tuple[float, float] | None],
         catalog_schema: dataapi.Schema,
-    ) -> dict[str, dataapi.AbsoluteVelocity]:
-        velocities: dict[str, dataapi.AbsoluteVelocity] = {}
-        for key, apex in self.config.velocity.apexes.items():
-            vel_wr_apex, vel_wr_apex_err = astronomy.velocity_wr_apex(
-                vel=cz * u.Unit("km/s"),
-                lon=lon * u.Unit("deg"),
-                lat=lat * u.Unit("deg"),
-                vel_apex=apex.vel.value * u.Unit("km/s"),
-                lon_apex=apex.lon.value * u.Unit("deg"),
-                lat_apex=apex.lat.value * u.Unit("deg"),
-                vel_err=e_cz * u.Unit("km/s"),
-                lon_err=e_lon * u.Unit("arcsec"),
-                lat_err=e_lat * u.Unit("arcsec"),
-                vel_apex_err=apex.vel.error * u.Unit("km/s"),
-                lon_apex_err=apex.lon.error * u.Unit("deg"),
-                lat_apex_err=apex.lat.error * u.Unit("deg"),
-            )
+        stored: Sequence[Mapping[str, layer2.ApexVelocity] | None] | None = None,
+    ) -> list[dict[str, dataapi.AbsoluteVelocity] | None]:
+        """
+        Returns velocities with respect to every configured apex for the objects of a page that have both
+        coordinates and redshift. Velocities precomputed by the layer 2 import are served as they are if `stored`
+        holds all apexes of an object; the others are computed for all objects and apexes in one vectorized pass.
+        """
+        apexes = self.config.velocity.apexes
+        stored = stored if stored is not None else [None] * len(coordinates)
+        result: list[dict[str, dataapi.AbsoluteVelocity] | None] = [None] * len(coordinates)
+        missing: list[int] = []
+        for i, (coordinate, redshift, obj_stored) in enumerate(zip(coordinates, redshifts, stored, strict=True)):
+            if coordinate is None or redshift is None:
+                continue
+            if obj_stored is not None and all(key in obj_stored for key in apexes):
+                result[i] = {
+                    key: dataapi.AbsoluteVelocity(v=obj_stored[key].v, e_v=obj_stored[key].e_v) for key in apexes
+                }
+            else:
+                missing.append(i)
+
+        if any(velocity is not None for velocity in result) or missing:
+            for key in apexes:
+                catalog_schema.units.velocity[key] = VELOCITY_SCHEMA
+
+        if not missing or not apexes:
+            for i in missing:
+                result[i] = {}
+            return result
+
+        rows = [(coordinates[i], redshifts[i]) for i in missing]
+        lon, lat, e_lon, e_lat, cz, e_cz = np.array(
+            [
+                (coordinate.galactic.lon, coordinate.galactic.lat, coordinate.galactic.e_lon, coordinate.galactic.e_lat)
+                + redshift
+                for coordinate, redshift in rows
+                if coordinate is not None and redshift is not None
+            ],
+            dtype=float,
+        ).T
+        velocity, velocity_err = apex.velocities_wr_apexes(
+            cz,
+            e_cz,
+            lon,
+            lat,
+            (e_lon * u.Unit("arcsec")).to_value(u.Unit("deg")),
+            (e_lat * u.Unit("arcsec")).to_value(u.Unit("deg")),
+            apexes,
+        )
 
-            schema = VELOCITY_SCHEMA
-            catalog_schema.units.velocity[key] = schema
-            velocities[key] = dataapi.AbsoluteVelocity(
-                v=vel_wr_apex.to(u.Unit(schema.v)).value,
-                e_v=vel_wr_apex_err.to(u.Unit(schema.e_v)).value,
-            )
-        return velocities
-
-    def build_response_from_catalog(self, objects: list[layer2.Layer2CatalogObject]) -> Any:
-        catalog_schema = DATA_SCHEMA
-        pgc_objects = []
-
-        for obj in objects:
-            catalogs = dataapi.Catalogs()
-
-            if (designation := obj.get(model.DesignationCatalogObject)) is not None:
-                catalogs.designation = dataapi.Designation(name=designation.designation)
-
-            icrs = obj.get(model.ICRSCatalogObject)
-            if icrs is not None:
-                catalogs.coordinates = self._coordinates_from_icrs(icrs.ra, icrs.dec, icrs.e_ra, icrs.e_dec)
-
-            redshift = obj.get(model.RedshiftCatalogObject)
-            if redshift is not None:
-                catalogs.redshift = self._redshift_from_cz(redshift.cz, redshift.e_cz)
-
-            if (nature := obj.get(model.NatureCatalogObject)) is not None:
-                catalogs.nature = dataapi.Nature(type_name=nature.type_name)
-
-            if icrs is not None and redshift is not None and catalogs.coordinates is not None:
-                gal = catalogs.coordinates.galactic
-                catalogs.velocity = self._velocities_from_apexes(
-                    gal.lon,
-                    gal.lat,
-                    gal.e_lon,
-                    gal.e_lat,
-                    redshift.cz,
-                    redshift.e_cz,
-                    catalog_schema,
-                )
+        # Velocities come out in km/s, the unit of the schema.
+        keys = list(apexes)
+        columns = [
+            list(zip(values.tolist(), errors.tolist(), strict=True))
+            for values, errors in zip(velocity, velocity_err, strict=True)
+        ]
+        for i, values in zip(missing, zip(*columns, strict=True), strict=True):
+            result[i] = {
+                key: dataapi.AbsoluteVelocity(v=v, e_v=e_v) for key, (v, e_v) in zip(keys, values, strict=True)
+            }
+        return result
+
+    def response(self, objects: list[dataapi.PGCObject]) -> dataapi.QuerySimpleResponse:
+        return dataapi.QuerySimpleResponse(objects=objects, schema=DATA_SCHEMA)
+
+    def build_response_from_catalog(
+        self,
+        objects: list[layer2.Layer2CatalogObject],
+        stored_velocities: Mapping[int, Mapping[str, layer2.ApexVelocity]] | None = None,
+    ) -> Any:
+        return self.response(self.build_objects_from_catalog(objects, stored_velocities))
 
-            pgc_objects.append(dataapi.PGCObject(pgc=obj.pgc, catalogs=catalogs))
-
-        return dataapi.QuerySimpleResponse(objects=pgc_objects, schema=catalog_schema)
-
-    def build_response(self, objects: list[layer2.Layer2Object]) -> Any:
-        catalog_schema = DATA_SCHEMA
-        pgc_objects = []
-
-        for obj in objects:
-            catalogs = dataapi.Catalogs()
-
-            if obj.catalogs.designation is not None:
-                catalogs.designation = dataapi.Designation(name=obj.catalogs.designation.name)
-
-            if obj.catalogs.additional_designations is not None:
-                catalogs.additional_designations = [
-                    dataapi.AdditionalDesignation(
-                        name=ad.name,
-                        source=dataapi.Source(
-                            bibcode=ad.source.bibcode,
-                            title=ad.source.title,
-                            authors=ad.source.authors,
-                            year=ad.source.year,
-                        ),
-                    )
-                    for ad in obj.catalogs.additional_designations.names
-                ]
-
-            icrs = obj.catalogs.icrs
-            if icrs is not None:
-                catalogs.coordinates = self._coordinates_from_icrs(icrs.ra, icrs.dec, icrs.e_ra, icrs.e_dec)
-
-            if obj.catalogs.redshift is not None:
-                redshift = obj.catalogs.redshift
-                catalogs.redshift = self._redshift_from_cz(redshift.cz, redshift.e_cz)
-
-            if obj.catalogs.nature is not None:
-                catalogs.nature = dataapi.Nature(type_name=obj.catalogs.nature.type_name)
-
-            if obj.catalogs.notes is not None:
-                catalogs.notes = [
-                    dataapi.NoteEntry(
-                        note=note.note,
-                        source=dataapi.Source(
-                            bibcode=note.source.bibcode,
-                            title=note.source.title,
-                            authors=note.source.authors,
-                            year=note.source.year,
-                        ),
-                    )
-                    for note in obj.catalogs.notes.notes
-                ]
-
-            if obj.catalogs.photometry_total is not None:
-                catalogs.photometry_total = [
-                    dataapi.PhotometryTotalMeasurement(
-                        band=measurement.band,
-                        magsys=measurement.magsys,
-                        method=measurement.method,
-                        wavelength=measurement.wavelength,
-                        mag=measurement.mag,
-                        e_mag=measurement.e_mag,
-                    )
-                    for measurement in obj.catalogs.photometry_total.measurements
-                ]
-
-            if icrs is not None and obj.catalogs.redshift is not None and catalogs.coordinates is not None:
-                redshift = obj.catalogs.redshift
-                gal = catalogs.coordinates.galactic
-                catalogs.velocity = self._velocities_from_apexes(
-                    gal.lon,
-                    gal.lat,
-                    gal.e_lon,
-                    gal.e_lat,
-                    redshift.cz,
-                    redshift.e_cz,
-                    catalog_schema,
+    def build_objects_from_catalog(
+        self,
+        objects: list[layer2.Layer2CatalogObject],
+        stored_velocities: Mapping[int, Mapping[str, layer2.ApexVelocity]] | None = None,
+    ) -> list[dataapi.PGCObject]:
+        coordinates = self._page_coordinates([obj.get(model.ICRSCatalogObject) for obj in objects])
+        redshifts = [
+            (redshift.cz, redshift.e_cz) if (redshift := obj.get(model.RedshiftCatalogObject)) is not None else None
+            for obj in objects
+        ]
+        stored = [stored_velocities.get(obj.pgc) for obj in objects] if stored_velocities is not None else None
+        velocities = self._page_velocities(coordinates, redshifts, DATA_SCHEMA, stored)
+        return [
+            self._build_object_from_catalog(obj, obj_coordinates, velocity)
+            for obj, obj_coordinates, velocity in zip(objects, coordinates, velocities, strict=True)
+        ]
+
+    def build_object_from_catalog(self, obj: layer2.Layer2CatalogObject) -> dataapi.PGCObject:
+        (built,) = self.build_objects_from_catalog([obj])
+        return built
+
+    def _build_object_from_catalog(
+        self,
+        obj: layer2.Layer2CatalogObject,
+        coordinates: dataapi.Coordinates | None,
+        velocity: dict[str, dataapi.AbsoluteVelocity] | None,
+    ) -> dataapi.PGCObject:
+        catalogs = dataapi.Catalogs()
+
+        if (designation := obj.get(model.DesignationCatalogObject)) is not None:
+            catalogs.designation = dataapi.Designation(name=designation.designation)
+
+        catalogs.coordinates = coordinates
+
+        redshift = obj.get(model.RedshiftCatalogObject)
+        if redshift is not None:
+            catalogs.redshift = self._redshift_from_cz(redshift.cz, redshift.e_cz)
+
+        if (nature := obj.get(model.NatureCatalogObject)) is not None:
+            catalogs.nature = dataapi.Nature(type_name=nature.type_name)
+
+        catalogs.velocity = velocity
+
+        return dataapi.PGCObject(pgc=obj.pgc, catalogs=catalogs)
+
+    def build_response(
+        self,
+        objects: list[layer2.Layer2Object],
+        stored_velocities: Mapping[int, Mapping[str, layer2.ApexVelocity]] | None = None,
+    ) -> Any:
+        return self.response(self.build_objects(objects, stored_velocities))
+
+    def build_objects(
+        self,
+        objects: list[layer2.Layer2Object],
+        stored_velocities: Mapping[int, Mapping[str, layer2.ApexVelocity]] | None = None,
+    ) -> list[dataapi.PGCObject]:
+        coordinates = self._page_coordinates([obj.catalogs.icrs for obj in objects])
+        redshifts = [
+            (redshift.cz, redshift.e_cz) if (redshift := obj.catalogs.redshift) is not None else None for obj in objects
+        ]
+        stored = [stored_velocities.get(obj.pgc) for obj in objects] if stored_velocities is not None else None
+        velocities = self._page_velocities(coordinates, redshifts, DATA_SCHEMA, stored)
+        return [
+            self._build_object(obj, obj_coordinates, velocity)
+            for obj, obj_coordinates, velocity in zip(objects, coordinates, velocities, strict=True)
+        ]
+
+    def build_object(self, obj: layer2.Layer2Object) -> dataapi.PGCObject:
+        (built,) = self.build_objects([obj])
+        return built
+
+    def _build_object(
+        self,
+        obj: layer2.Layer2Object,
+        coordinates: dataapi.Coordinates | None,
+        velocity: dict[str, dataapi.AbsoluteVelocity] | None,
+    ) -> dataapi.PGCObject:
+        catalogs = dataapi.Catalogs()
+
+        if obj.catalogs.designation is not None:
+            catalogs.designation = dataapi.Designation(name=obj.catalogs.designation.name)
+
+        if obj.catalogs.additional_designations is not None:
+            catalogs.additional_designations = [
+                dataapi.AdditionalDesignation(
+                    name=ad.name,
+                    source=dataapi.Source(
+                        bibcode=ad.source.bibcode,
+                        title=ad.source.title,
+                        authors=ad.source.authors,
+                        year=ad.source.year,
+                    ),
+                )
+                for ad in obj.catalogs.additional_designations.names
+            ]
+
+        catalogs.coordinates = coordinates
+
+        if obj.catalogs.redshift is not None:
+            redshift = obj.catalogs.redshift
+            catalogs.redshift = self._redshift_from_cz(redshift.cz, redshift.e_cz)
+
+        if obj.catalogs.nature is not None:
+            catalogs.nature = dataapi.Nature(type_name=obj.catalogs.nature.type_name)
+
+        if obj.catalogs.notes is not None:
+            catalogs.notes = [
+                dataapi.NoteEntry(
+                    note=note.note,
+                    source=dataapi.Source(
+                        bibcode=note.source.bibcode,
+                        title=note.source.title,
+                        authors=note.source.authors,
+                        year=note.source.year,
+                    ),
+                )
+                for note in obj.catalogs.notes.notes
+            ]
+
+        if obj.catalogs.photometry_total is not None:
+            catalogs.photometry_total = [
+                dataapi.PhotometryTotalMeasurement(
+                    band=measurement.band,
+                    magsys=measurement.magsys,
+                    method=measurement.method,
+                    wavelength=measurement.wavelength,
+                    mag=measurement.mag,
+                    e_mag=measurement.e_mag,
                 )
+                for measurement in obj.catalogs.photometry_total.measurements
+            ]
 
-            pgc_objects.append(dataapi.PGCObject(pgc=obj.pgc, catalogs=catalogs))
+        catalogs.velocity = velocity
 
-        return dataapi.QuerySimpleResponse(objects=pgc_objects, schema=catalog_schema)
+        return dataapi.PGCObject(pgc=obj.pgc, catalogs=catalogs)
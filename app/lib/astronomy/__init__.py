@@ -1,6 +1,8 @@
+import functools
 import warnings
 from typing import Literal
 
+import numpy as np
 from astropy import constants
 from astropy import coordinates as coords
 from astropy import units as u
@@ -55,6 +57,35 @@ def equatorial_to_lonlat(
     return lon, lat, e_lon, e_lat
 
 
+@functools.cache
+def _rotation_from_icrs(frame: CoordinateFrame) -> np.ndarray:
+    """
+    Matrix that turns ICRS unit vectors into unit vectors of `frame`. Both frames are fixed rotations of ICRS in
+    astropy, so the matrix is found once by transforming the ICRS axes.
+    """
+    axes = coords.SkyCoord(ra=[0.0, 90.0, 0.0] * u.Unit("deg"), dec=[0.0, 0.0, 90.0] * u.Unit("deg"))
+    return axes.transform_to(frame).cartesian.xyz.value
+
+
+def equatorial_to_lonlat_many(
+    ra: np.ndarray,
+    dec: np.ndarray,
+    frame: CoordinateFrame,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Converts arrays of ICRS coordinates in degrees to longitudes and latitudes of `frame` in degrees with one
+    matrix product instead of a `SkyCoord` transformation per object.
+    """
+    ra_rad, dec_rad = np.radians(ra), np.radians(dec)
+    icrs = np.stack((np.cos(dec_rad) * np.cos(ra_rad), np.cos(dec_rad) * np.sin(ra_rad), np.sin(dec_rad)))
+    x, y, z = _rotation_from_icrs(frame) @ icrs
+    lon = np.degrees(np.arctan2(y, x)) % 360.0
+    # Tiny negative longitudes wrap to exactly 360 degrees.
+    lon[lon >= 360.0] -= 360.0
+    lat = np.degrees(np.arctan2(z, np.hypot(x, y)))
+    return lon, lat
+
+
 def velocity_wr_apex(
     vel: u.Quantity[u.Unit("km/s")],
     lon: u.Quantity[u.Unit("deg")],
@@ -112,3 +143,54 @@ def velocity_wr_apex(
     )
 
     return u.Quantity(result.nominal_value, unit="km/s"), u.Quantity(result.std_dev, unit="km/s")
+
+
+def velocity_wr_apex_many(
+    vel: np.ndarray,
+    lon: np.ndarray,
+    lat: np.ndarray,
+    vel_apex: np.ndarray,
+    lon_apex: np.ndarray,
+    lat_apex: np.ndarray,
+    vel_err: np.ndarray | float = 0.0,
+    lon_err: np.ndarray | float = 0.0,
+    lat_err: np.ndarray | float = 0.0,
+    vel_apex_err: np.ndarray | float = 0.0,
+    lon_apex_err: np.ndarray | float = 0.0,
+    lat_apex_err: np.ndarray | float = 0.0,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Computes velocities of many objects with respect to many apexes at once, like `velocity_wr_apex`. All arguments
+    are broadcast against each other, so objects of shape (n,) and apexes of shape (k, 1) give results of shape
+    (k, n).
+
+    Velocities are in km/s and angles in degrees. Uncertainties are propagated to first order with the analytic
+    partial derivatives, which is what `uncertainties` does for independent variables.
+
+    Returns:
+        A tuple containing (velocity, velocity_uncertainty) in km/s.
+    """
+    lon, lat = np.radians(lon), np.radians(lat)
+    lon_apex, lat_apex = np.radians(lon_apex), np.radians(lat_apex)
+
+    sin_lat, cos_lat = np.sin(lat), np.cos(lat)
+    sin_lat_apex, cos_lat_apex = np.sin(lat_apex), np.cos(lat_apex)
+    sin_dlon, cos_dlon = np.sin(lon - lon_apex), np.cos(lon - lon_apex)
+
+    cos_angle = sin_lat * sin_lat_apex + cos_lat * cos_lat_apex * cos_dlon
+    result = vel - vel_apex * cos_angle
+
+    d_lat = -vel_apex * (cos_lat * sin_lat_apex - sin_lat * cos_lat_apex * cos_dlon)
+    d_lat_apex = -vel_apex * (sin_lat * cos_lat_apex - cos_lat * sin_lat_apex * cos_dlon)
+    # The derivative with respect to the longitude of the apex is the opposite of this one.
+    d_lon = vel_apex * cos_lat * cos_lat_apex * sin_dlon
+
+    variance = (
+        np.square(vel_err)
+        + np.square(cos_angle * vel_apex_err)
+        + np.square(d_lon * np.radians(lon_err))
+        + np.square(d_lon * np.radians(lon_apex_err))
+        + np.square(d_lat * np.radians(lat_err))
+        + np.square(d_lat_apex * np.radians(lat_apex_err))
+    )
+    return result, np.sqrt(variance)
@@ -0,0 +1,64 @@
+from collections.abc import Mapping
+
+import numpy as np
+
+from app.lib import astronomy, config
+
+
+class ValueWithUncertainty(config.BaseConfigSettings):
+    value: float
+    error: float
+
+
+class ApexConfig(config.BaseConfigSettings):
+    lon: ValueWithUncertainty
+    lat: ValueWithUncertainty
+    vel: ValueWithUncertainty
+
+    def parameters(self) -> tuple[float, float, float, float, float, float]:
+        """
+        Galactic longitude and latitude of the apex in degrees and its velocity in km/s, each followed by its error.
+        """
+        return (self.lon.value, self.lon.error, self.lat.value, self.lat.error, self.vel.value, self.vel.error)
+
+
+class VelocityCatalogConfig(config.BaseConfigSettings):
+    apexes: dict[str, ApexConfig]
+
+
+def velocities_wr_apexes(
+    cz: np.ndarray,
+    e_cz: np.ndarray,
+    lon: np.ndarray,
+    lat: np.ndarray,
+    e_lon: np.ndarray,
+    e_lat: np.ndarray,
+    apexes: Mapping[str, ApexConfig],
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Velocities of n objects with respect to every apex in one vectorized pass. Velocities are in km/s and galactic
+    coordinates with their errors in degrees.
+
+    Returns:
+        A tuple of (velocity, velocity_uncertainty) of shape (k, n) in km/s with rows in the order of `apexes`.
+    """
+    if not apexes:
+        return np.empty((0, len(cz))), np.empty((0, len(cz)))
+
+    lon_apex, lon_apex_err, lat_apex, lat_apex_err, vel_apex, vel_apex_err = np.array(
+        [apex.parameters() for apex in apexes.values()], dtype=float
+    ).T[:, :, np.newaxis]
+    return astronomy.velocity_wr_apex_many(
+        vel=cz,
+        lon=lon,
+        lat=lat,
+        vel_apex=vel_apex,
+        lon_apex=lon_apex,
+        lat_apex=lat_apex,
+        vel_err=e_cz,
+        lon_err=e_lon,
+        lat_err=e_lat,
+        vel_apex_err=vel_apex_err,
+        lon_apex_err=lon_apex_err,
+        lat_apex_err=lat_apex_err,
+    )
@@ -32,7 +32,7 @@ class PostgresActionRecorder(postgres.TransactionalPGRepository, interface.Actio
         request: dict[str, object] | None,
     ) -> None:
         resolved_run_id = run_id(user_id, method, action_description) if action_description is not None else None
-        with self.with_tx():
+        with self.with_tx(pipeline=True):
             if resolved_run_id is not None and action_description is not None:
                 self._storage.exec(
                     """
@@ -1,9 +1,31 @@
-from app.lib.storage.postgres.config import PgStorageConfig
-from app.lib.storage.postgres.postgres_storage import PgStorage
-from app.lib.storage.postgres.transactional import TransactionalPGRepository
+from app.lib.storage.postgres.async_postgres_storage import AsyncPgStorage
+from app.lib.storage.postgres.config import (
+    PgStorageConfig,
+    PoolConfig,
+    QueryMetricsConfig,
+    ReplicaConfig,
+    SlowQueryConfig,
+    Workload,
+)
+from app.lib.storage.postgres.metrics import QueryStats
+from app.lib.storage.postgres.pool import PoolStats
+from app.lib.storage.postgres.postgres_storage import DEFAULT_STREAM_BATCH_ROWS, PgStorage
+from app.lib.storage.postgres.querylog import SlowQuery
+from app.lib.storage.postgres.transactional import AsyncTransactionalPGRepository, TransactionalPGRepository
 
 __all__ = [
+    "DEFAULT_STREAM_BATCH_ROWS",
+    "AsyncPgStorage",
+    "AsyncTransactionalPGRepository",
     "PgStorage",
     "PgStorageConfig",
+    "PoolConfig",
+    "PoolStats",
+    "QueryMetricsConfig",
+    "QueryStats",
+    "ReplicaConfig",
+    "SlowQuery",
+    "SlowQueryConfig",
     "TransactionalPGRepository",
+    "Workload",
 ]
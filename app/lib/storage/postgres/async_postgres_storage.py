@@ -0,0 +1,512 @@
+import contextvars
+import copy
+import logging
+import time
+import uuid
+from collections.abc import AsyncIterator, Awaitable, Callable, Sequence
+from typing import Any
+
+import numpy as np
+import psycopg
+import structlog
+from psycopg import pq, rows, sql
+from psycopg.types import enum
+from psycopg_pool import AsyncConnectionPool
+
+from app.lib.storage.postgres import columns, config, metrics, pool, querylog, replicas, typeinfo
+from app.lib.storage.postgres.postgres_storage import DEFAULT_DUMPERS, DEFAULT_STREAM_BATCH_ROWS
+
+log: structlog.stdlib.BoundLogger = structlog.get_logger()
+
+
+class AsyncPgStorage:
+    """
+    Asyncio counterpart of `PgStorage`. Transaction connections are tracked per task through a
+    context variable. The pool is bound to the event loop `connect()` is awaited in.
+    """
+
+    def __init__(
+        self,
+        cfg: config.PgStorageConfig,
+        logger: structlog.stdlib.BoundLogger,
+        enum_registry: Sequence[tuple[type[enum.Enum], str]] = (),
+    ) -> None:
+        self._config = cfg
+        self._pools: dict[config.Workload, AsyncConnectionPool] = {}
+        self._workload = config.Workload.INTERACTIVE
+        self._logger = logger
+        self._conn: contextvars.ContextVar[psycopg.AsyncConnection | None] = contextvars.ContextVar(
+            f"async_pg_storage_conn_{id(self)}", default=None
+        )
+        self._enum_registry: list[tuple[type[enum.Enum], str]] = list(enum_registry)
+        self._extra_enums: list[tuple[type[enum.Enum], str]] = []
+        self._enum_infos = typeinfo.EnumInfoCache()
+        self._warmups: dict[str, pool.Warmup] = {}
+        self._slow_queries = querylog.SlowQueryLog(cfg.slow_queries)
+        self._query_metrics = metrics.QueryMetrics(cfg.query_metrics)
+        self._replicas: replicas.ReplicaSet[AsyncConnectionPool] = replicas.ReplicaSet(
+            cfg.replica_max_lag_seconds, cfg.replica_check_interval_seconds
+        )
+        self._prefer_replica = False
+
+    def _configurer(self, name: str, min_size: int) -> Callable[[psycopg.AsyncConnection], Awaitable[None]]:
+        warmup = self._warmups[name] = pool.Warmup(name, min_size)
+
+        async def configure(conn: psycopg.AsyncConnection) -> None:
+            await self._configure_connection(conn)
+            warmup.connection_added()
+
+        return configure
+
+    async def _configure_connection(self, conn: psycopg.AsyncConnection) -> None:
+        for python_type, dumper in DEFAULT_DUMPERS:
+            conn.adapters.register_dumper(python_type, dumper)
+        for enum_type, pg_type in self._enum_registry + self._extra_enums:
+            type_info = self._enum_infos.get(pg_type)
+            if type_info is None:
+                type_info = await enum.EnumInfo.fetch(conn, pg_type)
+                if type_info is None:
+                    raise RuntimeError(f"Unable to find enum {pg_type} in DB")
+                self._enum_infos.put(pg_type, type_info)
+            enum.register_enum(
+                type_info,
+                conn,
+                enum_type,
+                mapping={m: m.value for m in enum_type},
+            )
+
+    async def connect(self) -> None:
+        self._logger.debug("connecting to Postgres", endpoint=self._config.endpoint, port=self._config.port)
+        for workload, pool_cfg in self._config.get_pool_configs().items():
+            idle_check = pool.idle_check(pool_cfg)
+            p = AsyncConnectionPool(
+                self._config.get_dsn(),
+                open=False,
+                kwargs={"row_factory": rows.dict_row, "autocommit": True},
+                configure=self._configurer(workload.value, pool_cfg.min_size),
+                check=idle_check.check_async if idle_check is not None else None,
+                reset=idle_check.reset_async if idle_check is not None else None,
+                **pool.pool_kwargs(workload.value, pool_cfg),
+            )
+            await p.open()
+            self._pools[workload] = p
+        for i, replica_cfg in enumerate(self._config.replicas):
+            name = f"replica_{i}"
+            idle_check = pool.idle_check(replica_cfg.pool)
+            p = AsyncConnectionPool(
+                self._config.get_replica_dsn(replica_cfg),
+                open=False,
+                kwargs={"row_factory": rows.dict_row, "autocommit": True},
+                configure=self._configurer(name, replica_cfg.pool.min_size),
+                check=idle_check.check_async if idle_check is not None else None,
+                reset=idle_check.reset_async if idle_check is not None else None,
+                **pool.pool_kwargs(name, replica_cfg.pool),
+            )
+            await p.open()
+            self._replicas.add(name, p)
+
+    def workload(self, workload: config.Workload) -> "AsyncPgStorage":
+        view: AsyncPgStorage = copy.copy(self)
+        view._workload = workload
+        return view
+
+    def replica(self) -> "AsyncPgStorage":
+        view: AsyncPgStorage = copy.copy(self)
+        view._prefer_replica = True
+        return view
+
+    async def _choose_replica(self, read_only: bool) -> replicas.Replica[AsyncConnectionPool] | None:
+        if not (read_only or self._prefer_replica) or not self._replicas:
+            return None
+
+        for replica in self._replicas.claim_checks():
+            try:
+                async with (
+                    replica.pool.connection(timeout=replicas.CHECK_TIMEOUT_SECONDS) as c,
+                    c.cursor(row_factory=rows.tuple_row) as cursor,
+                ):
+                    status = await (await cursor.execute(replicas.STATUS_QUERY)).fetchone()
+                if status is None:
+                    raise RuntimeError("replica status query returned no rows")
+                in_recovery, lag_seconds = status
+                self._replicas.update(replica, bool(in_recovery), float(lag_seconds))
+            except (psycopg.Error, RuntimeError) as e:
+                self._replicas.mark_unhealthy(replica, str(e))
+
+        return self._replicas.choose()
+
+    async def _retry_stale_types[T](self, run: Callable[[], Awaitable[T]]) -> T:
+        """
+        Runs a statement that is safe to repeat, see `PgStorage._retry_stale_types`.
+        """
+        try:
+            return await run()
+        except psycopg.Error as e:
+            if not typeinfo.is_stale_type_error(e):
+                raise
+            self._logger.warning("stale type info, refreshing types", error=str(e))
+            await self.refresh_types()
+            return await run()
+
+    async def _run_pooled[T](self, run: Callable[[psycopg.AsyncConnection], Awaitable[T]]) -> T:
+        async def _run() -> T:
+            async with self.get_pool().connection() as c:
+                return await run(c)
+
+        return await self._retry_stale_types(_run)
+
+    async def _run_read[T](self, run: Callable[[psycopg.AsyncConnection], Awaitable[T]], read_only: bool) -> T:
+        return await self._retry_stale_types(lambda: self._run_read_once(run, read_only))
+
+    async def _run_read_once[T](self, run: Callable[[psycopg.AsyncConnection], Awaitable[T]], read_only: bool) -> T:
+        replica = await self._choose_replica(read_only)
+        if replica is not None:
+            try:
+                async with replica.pool.connection() as c:
+                    return await run(c)
+            except psycopg.Error as e:
+                if not replicas.should_fall_back(e):
+                    raise
+                self._replicas.mark_unhealthy(replica, str(e))
+
+        async with self.get_pool().connection() as c:
+            return await run(c)
+
+    def pool_stats(self) -> list[pool.PoolStats]:
+        stats = [
+            pool.pool_stats(workload.value, p, self._warmups.get(workload.value)) for workload, p in self._pools.items()
+        ]
+        return stats + [
+            pool.pool_stats(replica.name, replica.pool, self._warmups.get(replica.name))
+            for replica in self._replicas.replicas()
+        ]
+
+    def replica_status(self) -> list[replicas.Replica[AsyncConnectionPool]]:
+        return self._replicas.replicas()
+
+    def slow_queries(self) -> list[querylog.SlowQuery]:
+        return self._slow_queries.entries()
+
+    def query_stats(self) -> list[metrics.QueryStats]:
+        return self._query_metrics.stats()
+
+    def register_type(self, enum_type: type[enum.Enum], pg_type: str) -> None:
+        self._extra_enums.append((enum_type, pg_type))
+
+    async def refresh_types(self) -> None:
+        """
+        Drops the cached enum type info and replaces the pooled connections, see `PgStorage.refresh_types`.
+        """
+        self._enum_infos.clear()
+        for p in [*self._pools.values(), *(replica.pool for replica in self._replicas.replicas())]:
+            await p.drain()
+
+    def get_task_conn(self) -> psycopg.AsyncConnection | None:
+        return self._conn.get()
+
+    def set_task_conn(self, conn: psycopg.AsyncConnection | None) -> contextvars.Token:
+        return self._conn.set(conn)
+
+    def reset_task_conn(self, token: contextvars.Token) -> None:
+        self._conn.reset(token)
+
+    def get_pool(self) -> AsyncConnectionPool:
+        p = self._pools.get(self._workload) or self._pools.get(config.Workload.INTERACTIVE)
+        if p is None:
+            raise RuntimeError("connection pool is not initialized")
+        return p
+
+    def get_connection(self) -> psycopg.AsyncConnection:
+        conn = self.get_task_conn()
+        if conn is not None:
+            return conn
+        raise RuntimeError("no active transaction connection in this task")
+
+    async def disconnect(self) -> None:
+        if self._pools:
+            self._logger.debug("disconnecting from Postgres", endpoint=self._config.endpoint, port=self._config.port)
+        for p in self._pools.values():
+            await p.close()
+        self._pools.clear()
+        for replica in self._replicas.replicas():
+            await replica.pool.close()
+        self._replicas.clear()
+
+    async def query_str(self, query: str | sql.SQL | sql.Composed) -> str:
+        if isinstance(query, str):
+            return query
+        conn = self.get_task_conn()
+        if conn is not None:
+            return query.as_string(conn)
+        async with self.get_pool().connection() as c:
+            return query.as_string(c)
+
+    def _log_query(
+        self,
+        message: str,
+        conn: psycopg.AsyncConnection,
+        query: str | sql.SQL | sql.Composed,
+        params: Any,
+    ) -> None:
+        if log.is_enabled_for(logging.DEBUG):
+            query_text = query if isinstance(query, str) else query.as_string(conn)
+            log.debug(message, query=query_text.replace("\n", " "), args=params or [])
+
+    async def _observe(
+        self,
+        conn: psycopg.AsyncConnection,
+        query: str | sql.SQL | sql.Composed,
+        params: Any,
+        num_rows: int,
+        elapsed_seconds: float,
+        *,
+        num_bytes: int = 0,
+        explain: bool = False,
+        read_only: bool = False,
+    ) -> None:
+        is_slow = self._slow_queries.is_slow(elapsed_seconds)
+        if not is_slow and not self._query_metrics.enabled:
+            return
+
+        self._query_metrics.observe(query, num_rows, num_bytes, elapsed_seconds)
+        if not is_slow:
+            return
+
+        query_text = query if isinstance(query, str) else query.as_string(conn)
+        plan = None
+        # Explaining runs the statement again, which must not repeat the side effects of a write.
+        if (
+            explain
+            and self._slow_queries.wants_plan(elapsed_seconds)
+            and (read_only or querylog.is_read_query(query_text))
+        ):
+            plan = await self._explain(conn, query_text, params)
+        self._slow_queries.record(query_text, params, num_rows, elapsed_seconds, self._workload, plan)
+
+    async def _explain(self, conn: psycopg.AsyncConnection, query_text: str, params: Any) -> str | None:
+        try:
+            async with (
+                conn.transaction(force_rollback=True),
+                conn.cursor(row_factory=rows.tuple_row) as cursor,
+            ):
+                await cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {query_text}", params or None)
+                return "\n".join(str(row[0]) for row in await cursor.fetchall())
+        except psycopg.Error as e:
+            log.warning("unable to explain slow query", error=str(e))
+            return None
+
+    async def exec(self, query: str | sql.SQL | sql.Composed, *, params: list[Any] | None = None) -> None:
+        execute_params: list[Any] | None = params if params else None
+
+        async def _run(conn: psycopg.AsyncConnection) -> None:
+            self._log_query("SQL query", conn, query, params)
+            start = time.monotonic()
+            async with conn.cursor() as cursor:
+                await cursor.execute(query, execute_params)
+                num_rows = max(cursor.rowcount, 0)
+            await self._observe(conn, query, params, num_rows, time.monotonic() - start)
+
+        conn = self.get_task_conn()
+        if conn is not None:
+            await _run(conn)
+            return
+        await self._run_pooled(_run)
+
+    async def execute_batch(self, query: str, rows_data: Sequence[Sequence[Any]]) -> int:
+        log.debug("SQL execute batch", query=query.replace("\n", " "), num_rows=len(rows_data))
+
+        if not rows_data:
+            return 0
+
+        async def _run(conn: psycopg.AsyncConnection) -> int:
+            start = time.monotonic()
+            async with conn.cursor() as cur:
+                await cur.executemany(query, rows_data)
+                num_rows = cur.rowcount
+            await self._observe(conn, query, None, num_rows, time.monotonic() - start)
+            return num_rows
+
+        conn = self.get_task_conn()
+        if conn is not None:
+            return await _run(conn)
+        async with self.get_pool().connection() as c:
+            return await _run(c)
+
+    async def query(
+        self,
+        query: str | sql.SQL | sql.Composed,
+        *,
+        params: list[Any] | None = None,
+        timeout_seconds: float | None = None,
+        read_only: bool = False,
+    ) -> list[rows.DictRow]:
+        execute_params: list[Any] | None = params if params else None
+
+        async def _run(conn: psycopg.AsyncConnection) -> list[rows.DictRow]:
+            self._log_query("SQL query", conn, query, params)
+            start = time.monotonic()
+
+            async def _execute(cursor: psycopg.AsyncCursor) -> tuple[list[rows.DictRow], int]:
+                await cursor.execute(query, execute_params)
+                return await cursor.fetchall(), metrics.result_bytes(cursor.pgresult)
+
+            if timeout_seconds is None and not read_only:
+                async with conn.cursor() as cursor:
+                    result, num_bytes = await _execute(cursor)
+            else:
+                previous_read_only = conn.read_only
+                if read_only:
+                    await conn.set_read_only(True)
+                try:
+                    async with conn.transaction():
+                        async with conn.cursor() as cursor:
+                            if timeout_seconds is not None:
+                                timeout_ms = int(timeout_seconds * 1000)
+                                await cursor.execute(
+                                    sql.SQL("SET LOCAL statement_timeout = {}").format(sql.Literal(f"{timeout_ms}ms"))
+                                )
+                            result, num_bytes = await _execute(cursor)
+                finally:
+                    if read_only:
+                        await conn.set_read_only(previous_read_only)
+
+            elapsed = time.monotonic() - start
+            log.debug("SQL result", num_rows=len(result), elapsed_seconds=round(elapsed, 4))
+            await self._observe(
+                conn, query, params, len(result), elapsed, num_bytes=num_bytes, explain=True, read_only=read_only
+            )
+            return result
+
+        conn = self.get_task_conn()
+        if conn is not None:
+            return await _run(conn)
+        return await self._run_read(_run, read_only)
+
+    async def query_columns(
+        self,
+        query: str | sql.SQL | sql.Composed,
+        *,
+        params: list[Any] | None = None,
+        read_only: bool = False,
+    ) -> dict[str, np.ndarray]:
+        execute_params: list[Any] | None = params if params else None
+
+        async def _run(conn: psycopg.AsyncConnection) -> dict[str, np.ndarray]:
+            self._log_query("SQL query columns", conn, query, params)
+            start = time.monotonic()
+            previous_read_only = conn.read_only
+            if read_only:
+                await conn.set_read_only(True)
+            try:
+                async with conn.cursor(binary=True, row_factory=rows.tuple_row) as cursor:
+                    await cursor.execute(query, execute_params)
+                    num_bytes = metrics.result_bytes(cursor.pgresult)
+                    collector = columns.ColumnCollector(cursor.description, max(cursor.rowcount, 0))
+                    while batch := await cursor.fetchmany(columns.FETCH_BATCH_ROWS):
+                        collector.add(batch)
+            finally:
+                if read_only:
+                    await conn.set_read_only(previous_read_only)
+
+            result = collector.result()
+            elapsed = time.monotonic() - start
+            log.debug("SQL result", num_rows=cursor.rowcount, elapsed_seconds=round(elapsed, 4))
+            await self._observe(
+                conn, query, params, cursor.rowcount, elapsed, num_bytes=num_bytes, explain=True, read_only=read_only
+            )
+            return result
+
+        conn = self.get_task_conn()
+        if conn is not None:
+            return await _run(conn)
+        return await self._run_read(_run, read_only)
+
+    async def stream(
+        self,
+        query: str | sql.SQL | sql.Composed,
+        *,
+        params: list[Any] | None = None,
+        batch_rows: int = DEFAULT_STREAM_BATCH_ROWS,
+        timeout_seconds: float | None = None,
+        read_only: bool = False,
+    ) -> AsyncIterator[list[rows.DictRow]]:
+        execute_params: list[Any] | None = params if params else None
+
+        async def _batches(conn: psycopg.AsyncConnection, restore_timeout: bool) -> AsyncIterator[list[rows.DictRow]]:
+            self._log_query("SQL stream", conn, query, params)
+            start = time.monotonic()
+            num_rows = 0
+            num_bytes = 0
+
+            previous_timeout = None
+            if timeout_seconds is not None:
+                if restore_timeout:
+                    # SET LOCAL lasts until the end of the transaction even when set in a savepoint, so the timeout
+                    # of the caller's transaction is put back once the stream is done.
+                    async with conn.cursor(row_factory=rows.tuple_row) as cursor:
+                        row = await (await cursor.execute("SHOW statement_timeout")).fetchone()
+                    previous_timeout = row[0] if row is not None else None
+                timeout_ms = int(timeout_seconds * 1000)
+                await conn.execute(sql.SQL("SET LOCAL statement_timeout = {}").format(sql.Literal(f"{timeout_ms}ms")))
+
+            try:
+                async with conn.cursor(name=f"stream_{uuid.uuid4().hex}") as cursor:
+                    cursor.itersize = batch_rows
+                    await cursor.execute(query, execute_params)
+                    while batch := await cursor.fetchmany(batch_rows):
+                        num_rows += len(batch)
+                        num_bytes += metrics.result_bytes(cursor.pgresult)
+                        yield batch
+            finally:
+                # A failed transaction is rolled back, which discards the setting anyway.
+                if previous_timeout is not None and conn.info.transaction_status != pq.TransactionStatus.INERROR:
+                    await conn.execute("SELECT set_config('statement_timeout', %s, true)", [previous_timeout])
+
+            elapsed = time.monotonic() - start
+            log.debug("SQL stream result", num_rows=num_rows, elapsed_seconds=round(elapsed, 4))
+            await self._observe(conn, query, params, num_rows, elapsed, num_bytes=num_bytes)
+
+        async def _pooled_batches(p: AsyncConnectionPool) -> AsyncIterator[list[rows.DictRow]]:
+            async with p.connection() as c:
+                previous_read_only = c.read_only
+                if read_only:
+                    await c.set_read_only(True)
+                try:
+                    # Named cursors only live inside a transaction.
+                    async with c.transaction():
+                        async for batch in _batches(c, restore_timeout=False):
+                            yield batch
+                finally:
+                    if read_only:
+                        await c.set_read_only(previous_read_only)
+
+        conn = self.get_task_conn()
+        if conn is not None:
+            async for batch in _batches(conn, restore_timeout=True):
+                yield batch
+            return
+
+        replica = await self._choose_replica(read_only)
+        if replica is not None:
+            started = False
+            try:
+                async for batch in _pooled_batches(replica.pool):
+                    started = True
+                    yield batch
+                return
+            except psycopg.Error as e:
+                # Batches that were already handed out cannot be taken back.
+                if started or not replicas.should_fall_back(e):
+                    raise
+                self._replicas.mark_unhealthy(replica, str(e))
+
+        async for batch in _pooled_batches(self.get_pool()):
+            yield batch
+
+    async def query_one(self, query: str | sql.SQL | sql.Composed, *, params: list[Any] | None = None) -> rows.DictRow:
+        result = await self.query(query, params=params)
+
+        if len(result) != 1:
+            raise RuntimeError(f"was unable to fetch one value, got {len(result)} values")
+
+        return result[0]
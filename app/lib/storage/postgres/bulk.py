@@ -0,0 +1,104 @@
+import uuid
+from collections.abc import Callable, Sequence
+from decimal import Decimal
+from typing import Any
+
+from psycopg import Column, sql
+
+# Built-in Postgres types whose binary COPY dumpers accept the plain Python values repositories pass around.
+# Values are coerced to the expected Python type first, e.g. an integral float for an int8 column. Enums, json,
+# arrays and other types fall back to text COPY, where Postgres parses the value itself.
+_BINARY_COERCIONS: dict[int, Callable[[Any], Any]] = {
+    16: bool,  # bool
+    20: int,  # int8
+    21: int,  # int2
+    23: int,  # int4
+    25: str,  # text
+    700: float,  # float4
+    701: float,  # float8
+    1043: str,  # varchar
+    1700: lambda v: v if isinstance(v, Decimal) else Decimal(str(v)),  # numeric
+}
+
+
+def split_table(table: str) -> sql.Composed:
+    schema, relation = table.split(".", maxsplit=1)
+    return sql.SQL("{}.{}").format(sql.Identifier(schema), sql.Identifier(relation))
+
+
+def staging_table() -> sql.Identifier:
+    return sql.Identifier(f"bulk_staging_{uuid.uuid4().hex}")
+
+
+def binary_coercions(description: Sequence[Column]) -> list[Callable[[Any], Any]] | None:
+    """
+    Per-column coercions for a binary COPY into a relation with the given columns, or None if any of the
+    columns has to be sent as text.
+    """
+    coercions = [_BINARY_COERCIONS.get(col.type_code) for col in description]
+    if any(coercion is None for coercion in coercions):
+        return None
+    return [coercion for coercion in coercions if coercion is not None]
+
+
+def coerce_row(row: Sequence[Any], coercions: Sequence[Callable[[Any], Any]]) -> tuple[Any, ...]:
+    return tuple(None if value is None else coerce(value) for value, coerce in zip(row, coercions, strict=True))
+
+
+def upsert_query(
+    table: str,
+    staging: sql.Identifier,
+    columns: Sequence[str],
+    conflict_keys: Sequence[str] | None,
+    update_columns: Sequence[str],
+) -> sql.Composed:
+    column_idents = sql.SQL(", ").join(sql.Identifier(c) for c in columns)
+
+    if not conflict_keys:
+        return sql.SQL("INSERT INTO {} ({}) SELECT {} FROM {} ON CONFLICT DO NOTHING").format(
+            split_table(table), column_idents, column_idents, staging
+        )
+
+    conflict_idents = sql.SQL(", ").join(sql.Identifier(c) for c in conflict_keys)
+    if not update_columns:
+        return sql.SQL("INSERT INTO {} ({}) SELECT {} FROM {} ON CONFLICT ({}) DO NOTHING").format(
+            split_table(table), column_idents, column_idents, staging, conflict_idents
+        )
+
+    # DO UPDATE may not touch the same row twice, so only the last staged row for each key is kept.
+    # A freshly filled temp table keeps COPY order in ctid.
+    on_conflict = sql.SQL(", ").join(
+        sql.SQL("{} = EXCLUDED.{}").format(sql.Identifier(c), sql.Identifier(c)) for c in update_columns
+    )
+    return sql.SQL(
+        "INSERT INTO {} ({}) SELECT DISTINCT ON ({}) {} FROM {} ORDER BY {}, ctid DESC "
+        "ON CONFLICT ({}) DO UPDATE SET {}"
+    ).format(
+        split_table(table),
+        column_idents,
+        conflict_idents,
+        column_idents,
+        staging,
+        conflict_idents,
+        conflict_idents,
+        on_conflict,
+    )
+
+
+def update_query(
+    table: str,
+    staging: sql.Identifier,
+    keys: Sequence[str],
+    update_columns: Sequence[str],
+    condition: sql.Composable | None,
+) -> sql.Composed:
+    assignments = sql.SQL(", ").join(
+        sql.SQL("{} = s.{}").format(sql.Identifier(c), sql.Identifier(c)) for c in update_columns
+    )
+    conditions = [sql.SQL("t.{} = s.{}").format(sql.Identifier(k), sql.Identifier(k)) for k in keys]
+    if condition is not None:
+        conditions.append(condition)
+
+    return sql.SQL("UPDATE {} AS t SET {} FROM {} AS s WHERE {}").format(
+        split_table(table), assignments, staging, sql.SQL(" AND ").join(conditions)
+    )
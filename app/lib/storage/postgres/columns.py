@@ -0,0 +1,61 @@
+from collections.abc import Sequence
+from typing import Any
+
+import numpy as np
+from psycopg import Column
+
+# Postgres type OIDs that map onto native NumPy dtypes. Everything else is kept as an object column.
+_NUMPY_DTYPES: dict[int, np.dtype] = {
+    16: np.dtype(np.bool_),  # bool
+    20: np.dtype(np.int64),  # int8
+    21: np.dtype(np.int16),  # int2
+    23: np.dtype(np.int32),  # int4
+    700: np.dtype(np.float32),  # float4
+    701: np.dtype(np.float64),  # float8
+    1700: np.dtype(np.float64),  # numeric
+}
+
+FETCH_BATCH_ROWS = 10_000
+
+
+class ColumnCollector:
+    """
+    Fills preallocated per-column arrays from batches of tuple rows. Columns that contain NULLs are
+    returned as masked arrays.
+    """
+
+    def __init__(self, description: Sequence[Column] | None, num_rows: int) -> None:
+        description = description or []
+        self._names = [col.name for col in description]
+        self._values = [np.empty(num_rows, dtype=_NUMPY_DTYPES.get(col.type_code, object)) for col in description]
+        self._masks = [np.zeros(num_rows, dtype=bool) for _ in description]
+        self._filled = 0
+
+    def add(self, batch: Sequence[Sequence[Any]]) -> None:
+        if not batch:
+            return
+
+        start, end = self._filled, self._filled + len(batch)
+        for i, column in enumerate(zip(*batch, strict=True)):
+            values, mask = self._values[i], self._masks[i]
+            if values.dtype == object:
+                # Element-wise so that array-valued cells are not broadcast.
+                for j, v in enumerate(column, start=start):
+                    values[j] = v
+                    mask[j] = v is None
+                continue
+
+            nulls = [v is None for v in column]
+            if any(nulls):
+                mask[start:end] = nulls
+                column = tuple(0 if v is None else v for v in column)
+            values[start:end] = column
+
+        self._filled = end
+
+    def result(self) -> dict[str, np.ndarray]:
+        result: dict[str, np.ndarray] = {}
+        for name, values, mask in zip(self._names, self._values, self._masks, strict=True):
+            values, mask = values[: self._filled], mask[: self._filled]
+            result[name] = np.ma.MaskedArray(values, mask=mask) if mask.any() else values
+        return result
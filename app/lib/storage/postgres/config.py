@@ -1,8 +1,59 @@
+import enum
+
+import pydantic
 import pydantic_settings as settings
 
 from app.lib import config
 
 
+class Workload(enum.StrEnum):
+    INTERACTIVE = "interactive"
+    TAP = "tap"
+    BULK_WRITE = "bulk_write"
+    BACKGROUND = "background"
+
+
+class PoolConfig(pydantic.BaseModel):
+    min_size: int = 10
+    max_size: int = 50
+    # How long a caller may wait for a free connection before the checkout fails.
+    timeout_seconds: float = 30.0
+    max_idle_seconds: float = 600.0
+    max_lifetime_seconds: float = 3600.0
+    # Connections that sat in the pool for longer than this are pinged on checkout; recently used ones
+    # are handed out as is. None disables checkout checks altogether.
+    check_idle_seconds: float | None = 30.0
+
+
+class ReplicaConfig(pydantic.BaseModel):
+    """
+    Streaming replica of the primary. It is accessed with the primary's database name and credentials.
+    """
+
+    endpoint: str
+    port: int = 5432
+    pool: PoolConfig = pydantic.Field(default_factory=lambda: PoolConfig(min_size=1, max_size=20))
+
+
+class SlowQueryConfig(pydantic.BaseModel):
+    # Queries that take at least this long are written to the slow-query log. None disables it.
+    threshold_seconds: float | None = 1.0
+    # Read queries that take at least this long are re-run under EXPLAIN (ANALYZE, BUFFERS) in a rolled back
+    # transaction and the plan is attached to the log entry. Only queries run read-only or recognized as plain
+    # SELECTs are re-run. None disables plan capture.
+    explain_threshold_seconds: float | None = None
+    # Number of most recent slow queries kept in memory.
+    buffer_size: int = 100
+
+
+class QueryMetricsConfig(pydantic.BaseModel):
+    # Whether per-query latency histograms are collected.
+    enabled: bool = True
+    # Upper bound on the number of distinct query fingerprints tracked. Queries with new fingerprints beyond it
+    # are counted under a single overflow entry.
+    max_fingerprints: int = 500
+
+
 class PgStorageConfig(config.ConfigSettings):
     model_config = settings.SettingsConfigDict(env_prefix="STORAGE_")
 
@@ -11,7 +62,28 @@ class PgStorageConfig(config.ConfigSettings):
     dbname: str = "hyperleda"
     user: str = "hyperleda"
     password: str = "password"
+    connect_timeout_seconds: int = 10
+    # Dedicated pools per workload class. Workloads without an entry share the interactive pool.
+    pools: dict[Workload, PoolConfig] = pydantic.Field(default_factory=dict)
+    slow_queries: SlowQueryConfig = pydantic.Field(default_factory=SlowQueryConfig)
+    query_metrics: QueryMetricsConfig = pydantic.Field(default_factory=QueryMetricsConfig)
+    # Read-only queries and read-only repositories are load-balanced over healthy replicas and go to the primary
+    # when there are none.
+    replicas: list[ReplicaConfig] = pydantic.Field(default_factory=list)
+    # Replicas that replay WAL further behind than this are skipped until they catch up.
+    replica_max_lag_seconds: float = 30.0
+    # How often replica health and lag are re-checked. Replicas that failed are retried after the same interval.
+    replica_check_interval_seconds: float = 10.0
 
-    def get_dsn(self) -> str:
+    def get_dsn(self, endpoint: str | None = None, port: int | None = None) -> str:
         # TODO: SSL and other options like transaction timeout
-        return f"postgresql://{self.endpoint}:{self.port}/{self.dbname}?user={self.user}&password={self.password}"
+        return (
+            f"postgresql://{endpoint or self.endpoint}:{port or self.port}/{self.dbname}"
+            f"?user={self.user}&password={self.password}&connect_timeout={self.connect_timeout_seconds}"
+        )
+
+    def get_replica_dsn(self, replica: ReplicaConfig) -> str:
+        return self.get_dsn(replica.endpoint, replica.port)
+
+    def get_pool_configs(self) -> dict[Workload, PoolConfig]:
+        return {Workload.INTERACTIVE: PoolConfig(), **self.pools}
@@ -0,0 +1,152 @@
+import bisect
+import functools
+import threading
+from dataclasses import dataclass
+
+from psycopg import pq, sql
+
+from app.lib.storage.postgres import config, querylog
+
+_MAX_QUERY_LENGTH = 4000
+
+# Upper bounds of the latency buckets: from 0.1 ms to about 100 s, four buckets per doubling. Quantiles are
+# interpolated within a bucket, so they are accurate to roughly 20%.
+BUCKET_BOUNDS_SECONDS: tuple[float, ...] = tuple(1e-4 * 2 ** (i / 4) for i in range(81))
+
+# Fingerprint under which queries are counted once `max_fingerprints` distinct ones are tracked.
+OVERFLOW_FINGERPRINT = "other"
+
+# Number of rows inspected to estimate the size of a result.
+_BYTES_SAMPLE_ROWS = 64
+
+
+@functools.lru_cache(maxsize=2048)
+def _normalize(query_text: str) -> tuple[str, str]:
+    normalized = querylog.normalize_query(query_text)
+    return querylog.fingerprint(normalized), normalized[:_MAX_QUERY_LENGTH]
+
+
+def result_bytes(pgresult: pq.abc.PGresult | None) -> int:
+    """
+    Estimates the size of the values in a result from an evenly spaced sample of its rows.
+    """
+    if pgresult is None or pgresult.ntuples == 0 or pgresult.nfields == 0:
+        return 0
+
+    num_rows = pgresult.ntuples
+    sample_rows = min(num_rows, _BYTES_SAMPLE_ROWS)
+    step = num_rows // sample_rows
+    sampled = 0
+    for i in range(sample_rows):
+        for j in range(pgresult.nfields):
+            value = pgresult.get_value(i * step, j)
+            if value is not None:
+                sampled += len(value)
+    return sampled * num_rows // sample_rows
+
+
+@dataclass
+class QueryStats:
+    fingerprint: str
+    query: str
+    count: int
+    total_seconds: float
+    p50_seconds: float
+    p95_seconds: float
+    p99_seconds: float
+    max_seconds: float
+    rows: int
+    bytes: int
+
+
+class _Histogram:
+    def __init__(self, query: str) -> None:
+        self.query = query
+        self.buckets = [0] * (len(BUCKET_BOUNDS_SECONDS) + 1)
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.rows = 0
+        self.bytes = 0
+
+    def observe(self, elapsed_seconds: float, num_rows: int, num_bytes: int) -> None:
+        self.buckets[bisect.bisect_left(BUCKET_BOUNDS_SECONDS, elapsed_seconds)] += 1
+        self.count += 1
+        self.total_seconds += elapsed_seconds
+        self.max_seconds = max(self.max_seconds, elapsed_seconds)
+        self.rows += num_rows
+        self.bytes += num_bytes
+
+    def quantile(self, q: float) -> float:
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.buckets):
+            if bucket_count == 0 or seen + bucket_count < rank:
+                seen += bucket_count
+                continue
+            if i == len(BUCKET_BOUNDS_SECONDS):
+                return self.max_seconds
+            lower = BUCKET_BOUNDS_SECONDS[i - 1] if i > 0 else 0.0
+            upper = BUCKET_BOUNDS_SECONDS[i]
+            return min(lower + (upper - lower) * (rank - seen) / bucket_count, self.max_seconds)
+        return self.max_seconds
+
+    def stats(self, fingerprint: str) -> QueryStats:
+        return QueryStats(
+            fingerprint=fingerprint,
+            query=self.query,
+            count=self.count,
+            total_seconds=round(self.total_seconds, 4),
+            p50_seconds=round(self.quantile(0.5), 4),
+            p95_seconds=round(self.quantile(0.95), 4),
+            p99_seconds=round(self.quantile(0.99), 4),
+            max_seconds=round(self.max_seconds, 4),
+            rows=self.rows,
+            bytes=self.bytes,
+        )
+
+
+class QueryMetrics:
+    """
+    In-process latency histograms keyed by query fingerprint, shared by all views of a storage. Every query is
+    counted, so the totals show which query shapes dominate database time.
+    """
+
+    def __init__(self, cfg: config.QueryMetricsConfig) -> None:
+        self._cfg = cfg
+        self._histograms: dict[str, _Histogram] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self._cfg.enabled
+
+    def observe(self, query: str | sql.Composable, num_rows: int, num_bytes: int, elapsed_seconds: float) -> None:
+        """
+        Counts an executed query. Composed queries are fingerprinted by their template, so they are not rendered.
+        """
+        if not self._cfg.enabled:
+            return
+
+        fingerprint, normalized = _normalize(querylog.query_template(query))
+        with self._lock:
+            histogram = self._histograms.get(fingerprint)
+            if histogram is None:
+                if len(self._histograms) >= self._cfg.max_fingerprints:
+                    fingerprint, normalized = OVERFLOW_FINGERPRINT, ""
+                    histogram = self._histograms.get(fingerprint)
+                if histogram is None:
+                    histogram = self._histograms[fingerprint] = _Histogram(normalized)
+            histogram.observe(elapsed_seconds, num_rows, num_bytes)
+
+    def stats(self) -> list[QueryStats]:
+        """
+        Returns statistics for every tracked fingerprint, the ones with the largest total time first.
+        """
+        with self._lock:
+            result = [histogram.stats(fingerprint) for fingerprint, histogram in self._histograms.items()]
+        return sorted(result, key=lambda s: s.total_seconds, reverse=True)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
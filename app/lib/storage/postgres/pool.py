@@ -0,0 +1,130 @@
+import threading
+import time
+import weakref
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+import psycopg
+import structlog
+from psycopg_pool import AsyncConnectionPool, ConnectionPool
+
+from app.lib.storage.postgres import config
+
+log: structlog.stdlib.BoundLogger = structlog.get_logger()
+
+
+@dataclass
+class PoolStats:
+    # Workload the pool serves, or the name of the replica it connects to.
+    workload: str
+    min_size: int
+    max_size: int
+    size: int
+    available: int
+    waiting: int
+    checkouts: int
+    checkout_errors: int
+    wait_seconds_total: float
+    # Share of the maximum pool size that is currently checked out.
+    saturation: float
+    # Time it took the pool to open its minimum number of connections, None while it is still warming up.
+    warmup_seconds: float | None = None
+
+    @property
+    def wait_seconds_mean(self) -> float:
+        return self.wait_seconds_total / self.checkouts if self.checkouts else 0.0
+
+
+class Warmup:
+    """
+    Measures how long a pool takes from being opened to holding its minimum number of connections. The pool's
+    `configure` hook reports every new connection.
+    """
+
+    def __init__(self, name: str, min_size: int, clock: Callable[[], float] = time.monotonic) -> None:
+        self._name = name
+        self._min_size = min_size
+        self._clock = clock
+        self._started_at = clock()
+        self._connections = 0
+        self._lock = threading.Lock()
+        self.seconds: float | None = 0.0 if min_size == 0 else None
+
+    def connection_added(self) -> None:
+        with self._lock:
+            if self.seconds is not None:
+                return
+            self._connections += 1
+            if self._connections < self._min_size:
+                return
+            self.seconds = self._clock() - self._started_at
+
+        log.info("pool warmed up", pool=self._name, connections=self._min_size, seconds=round(self.seconds, 4))
+
+
+def pool_stats(name: str, pool: ConnectionPool | AsyncConnectionPool, warmup: Warmup | None = None) -> PoolStats:
+    stats = pool.get_stats()
+    size = stats.get("pool_size", 0)
+    available = stats.get("pool_available", 0)
+    max_size = stats.get("pool_max", pool.max_size)
+
+    return PoolStats(
+        workload=name,
+        min_size=stats.get("pool_min", pool.min_size),
+        max_size=max_size,
+        size=size,
+        available=available,
+        waiting=stats.get("requests_waiting", 0),
+        checkouts=stats.get("requests_num", 0),
+        checkout_errors=stats.get("requests_errors", 0),
+        wait_seconds_total=stats.get("requests_wait_ms", 0) / 1000,
+        saturation=(size - available) / max_size if max_size else 0.0,
+        warmup_seconds=warmup.seconds if warmup is not None else None,
+    )
+
+
+class IdleCheck:
+    """
+    Checkout health check that only pings connections that were idle for longer than the threshold.
+    The pool's `reset` hook records when each connection was returned.
+    """
+
+    def __init__(self, idle_seconds: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self._idle_seconds = idle_seconds
+        self._clock = clock
+        self._returned_at: weakref.WeakKeyDictionary[Any, float] = weakref.WeakKeyDictionary()
+
+    def needs_check(self, conn: Any) -> bool:
+        returned_at = self._returned_at.get(conn)
+        # Fresh connections have just been opened by the pool and do not need a ping.
+        return returned_at is not None and self._clock() - returned_at >= self._idle_seconds
+
+    def reset(self, conn: psycopg.Connection) -> None:
+        self._returned_at[conn] = self._clock()
+
+    def check(self, conn: psycopg.Connection) -> None:
+        if self.needs_check(conn):
+            ConnectionPool.check_connection(conn)
+
+    async def reset_async(self, conn: psycopg.AsyncConnection) -> None:
+        self._returned_at[conn] = self._clock()
+
+    async def check_async(self, conn: psycopg.AsyncConnection) -> None:
+        if self.needs_check(conn):
+            await AsyncConnectionPool.check_connection(conn)
+
+
+def idle_check(cfg: config.PoolConfig) -> IdleCheck | None:
+    return IdleCheck(cfg.check_idle_seconds) if cfg.check_idle_seconds is not None else None
+
+
+def pool_kwargs(name: str, cfg: config.PoolConfig) -> dict[str, Any]:
+    return {
+        "name": name,
+        "min_size": cfg.min_size,
+        "max_size": cfg.max_size,
+        "timeout": cfg.timeout_seconds,
+        "max_idle": cfg.max_idle_seconds,
+        "max_lifetime": cfg.max_lifetime_seconds,
+    }
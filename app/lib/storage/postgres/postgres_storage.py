@@ -1,16 +1,19 @@
+import copy
+import logging
 import threading
 import time
-from collections.abc import Sequence
+import uuid
+from collections.abc import Callable, Iterable, Iterator, Sequence
 from typing import Any
 
 import numpy as np
 import psycopg
 import structlog
-from psycopg import rows, sql
+from psycopg import pq, rows, sql
 from psycopg.types import enum, numeric
 from psycopg_pool import ConnectionPool
 
-from app.lib.storage.postgres import config
+from app.lib.storage.postgres import bulk, columns, config, metrics, pool, querylog, replicas, typeinfo
 
 log: structlog.stdlib.BoundLogger = structlog.get_logger()
 
@@ -35,6 +38,9 @@ DEFAULT_DUMPERS: list[tuple[type, type]] = [
 ]
 
 
+DEFAULT_STREAM_BATCH_ROWS = 10_000
+
+
 class PgStorage:
     def __init__(
         self,
@@ -43,19 +49,40 @@ class PgStorage:
         enum_registry: Sequence[tuple[type[enum.Enum], str]] = (),
     ) -> None:
         self._config = cfg
-        self._pool: ConnectionPool | None = None
+        self._pools: dict[config.Workload, ConnectionPool] = {}
+        self._workload = config.Workload.INTERACTIVE
         self._logger = logger
         self._local = threading.local()
         self._enum_registry: list[tuple[type[enum.Enum], str]] = list(enum_registry)
         self._extra_enums: list[tuple[type[enum.Enum], str]] = []
+        self._enum_infos = typeinfo.EnumInfoCache()
+        self._warmups: dict[str, pool.Warmup] = {}
+        self._slow_queries = querylog.SlowQueryLog(cfg.slow_queries)
+        self._query_metrics = metrics.QueryMetrics(cfg.query_metrics)
+        self._replicas: replicas.ReplicaSet[ConnectionPool] = replicas.ReplicaSet(
+            cfg.replica_max_lag_seconds, cfg.replica_check_interval_seconds
+        )
+        self._prefer_replica = False
+
+    def _configurer(self, name: str, min_size: int) -> Callable[[psycopg.Connection], None]:
+        warmup = self._warmups[name] = pool.Warmup(name, min_size)
+
+        def configure(conn: psycopg.Connection) -> None:
+            self._configure_connection(conn)
+            warmup.connection_added()
+
+        return configure
 
     def _configure_connection(self, conn: psycopg.Connection) -> None:
         for python_type, dumper in DEFAULT_DUMPERS:
             conn.adapters.register_dumper(python_type, dumper)
         for enum_type, pg_type in self._enum_registry + self._extra_enums:
-            type_info = enum.EnumInfo.fetch(conn, pg_type)
+            type_info = self._enum_infos.get(pg_type)
             if type_info is None:
-                raise RuntimeError(f"Unable to find enum {pg_type} in DB")
+                type_info = enum.EnumInfo.fetch(conn, pg_type)
+                if type_info is None:
+                    raise RuntimeError(f"Unable to find enum {pg_type} in DB")
+                self._enum_infos.put(pg_type, type_info)
             enum.register_enum(
                 type_info,
                 conn,
@@ -65,19 +92,140 @@ class PgStorage:
 
     def connect(self) -> None:
         self._logger.debug("connecting to Postgres", endpoint=self._config.endpoint, port=self._config.port)
-        self._pool = ConnectionPool(
-            self._config.get_dsn(),
-            min_size=10,
-            max_size=50,
-            open=True,
-            kwargs={"row_factory": rows.dict_row, "autocommit": True},
-            configure=self._configure_connection,
-            check=ConnectionPool.check_connection,
-        )
+        for workload, pool_cfg in self._config.get_pool_configs().items():
+            idle_check = pool.idle_check(pool_cfg)
+            self._pools[workload] = ConnectionPool(
+                self._config.get_dsn(),
+                open=True,
+                kwargs={"row_factory": rows.dict_row, "autocommit": True},
+                configure=self._configurer(workload.value, pool_cfg.min_size),
+                check=idle_check.check if idle_check is not None else None,
+                reset=idle_check.reset if idle_check is not None else None,
+                **pool.pool_kwargs(workload.value, pool_cfg),
+            )
+        for i, replica_cfg in enumerate(self._config.replicas):
+            name = f"replica_{i}"
+            idle_check = pool.idle_check(replica_cfg.pool)
+            self._replicas.add(
+                name,
+                ConnectionPool(
+                    self._config.get_replica_dsn(replica_cfg),
+                    open=True,
+                    kwargs={"row_factory": rows.dict_row, "autocommit": True},
+                    configure=self._configurer(name, replica_cfg.pool.min_size),
+                    check=idle_check.check if idle_check is not None else None,
+                    reset=idle_check.reset if idle_check is not None else None,
+                    **pool.pool_kwargs(name, replica_cfg.pool),
+                ),
+            )
+
+    def workload(self, workload: config.Workload) -> "PgStorage":
+        """
+        Returns a view of this storage that checks connections out of the pool dedicated to the given
+        workload. The view shares pools and the per-thread transaction connection with this storage.
+        """
+        view: PgStorage = copy.copy(self)
+        view._workload = workload
+        return view
+
+    def replica(self) -> "PgStorage":
+        """
+        Returns a view of this storage that sends every read outside of a transaction to a replica, as if it
+        was made with `read_only=True`. Meant for repositories that never write.
+        """
+        view: PgStorage = copy.copy(self)
+        view._prefer_replica = True
+        return view
+
+    def _choose_replica(self, read_only: bool) -> replicas.Replica[ConnectionPool] | None:
+        if not (read_only or self._prefer_replica) or not self._replicas:
+            return None
+
+        for replica in self._replicas.claim_checks():
+            try:
+                with (
+                    replica.pool.connection(timeout=replicas.CHECK_TIMEOUT_SECONDS) as c,
+                    c.cursor(row_factory=rows.tuple_row) as cursor,
+                ):
+                    status = cursor.execute(replicas.STATUS_QUERY).fetchone()
+                if status is None:
+                    raise RuntimeError("replica status query returned no rows")
+                in_recovery, lag_seconds = status
+                self._replicas.update(replica, bool(in_recovery), float(lag_seconds))
+            except (psycopg.Error, RuntimeError) as e:
+                self._replicas.mark_unhealthy(replica, str(e))
+
+        return self._replicas.choose()
+
+    def _retry_stale_types[T](self, run: Callable[[], T]) -> T:
+        """
+        Runs a statement that is safe to repeat, refreshing the enum types and retrying once if it failed because
+        of a stale type OID.
+        """
+        try:
+            return run()
+        except psycopg.Error as e:
+            if not typeinfo.is_stale_type_error(e):
+                raise
+            self._logger.warning("stale type info, refreshing types", error=str(e))
+            self.refresh_types()
+            return run()
+
+    def _run_pooled[T](self, run: Callable[[psycopg.Connection], T]) -> T:
+        def _run() -> T:
+            with self.get_pool().connection() as c:
+                return run(c)
+
+        return self._retry_stale_types(_run)
+
+    def _run_read[T](self, run: Callable[[psycopg.Connection], T], read_only: bool) -> T:
+        return self._retry_stale_types(lambda: self._run_read_once(run, read_only))
+
+    def _run_read_once[T](self, run: Callable[[psycopg.Connection], T], read_only: bool) -> T:
+        replica = self._choose_replica(read_only)
+        if replica is not None:
+            try:
+                with replica.pool.connection() as c:
+                    return run(c)
+            except psycopg.Error as e:
+                if not replicas.should_fall_back(e):
+                    raise
+                self._replicas.mark_unhealthy(replica, str(e))
+
+        with self.get_pool().connection() as c:
+            return run(c)
+
+    def pool_stats(self) -> list[pool.PoolStats]:
+        stats = [
+            pool.pool_stats(workload.value, p, self._warmups.get(workload.value)) for workload, p in self._pools.items()
+        ]
+        return stats + [
+            pool.pool_stats(replica.name, replica.pool, self._warmups.get(replica.name))
+            for replica in self._replicas.replicas()
+        ]
+
+    def replica_status(self) -> list[replicas.Replica[ConnectionPool]]:
+        return self._replicas.replicas()
+
+    def slow_queries(self) -> list[querylog.SlowQuery]:
+        return self._slow_queries.entries()
+
+    def query_stats(self) -> list[metrics.QueryStats]:
+        return self._query_metrics.stats()
 
     def register_type(self, enum_type: type[enum.Enum], pg_type: str) -> None:
         self._extra_enums.append((enum_type, pg_type))
 
+    def refresh_types(self) -> None:
+        """
+        Drops the cached enum type info and replaces the pooled connections, so that every connection registers
+        freshly fetched types. Called when a query fails because of a stale type OID, e.g. after an enum was
+        recreated.
+        """
+        self._enum_infos.clear()
+        for p in [*self._pools.values(), *(replica.pool for replica in self._replicas.replicas())]:
+            p.drain()
+
     def get_thread_conn(self) -> psycopg.Connection | None:
         return getattr(self._local, "conn", None)
 
@@ -85,9 +233,10 @@ class PgStorage:
         self._local.conn = conn
 
     def get_pool(self) -> ConnectionPool:
-        if self._pool is None:
+        p = self._pools.get(self._workload) or self._pools.get(config.Workload.INTERACTIVE)
+        if p is None:
             raise RuntimeError("connection pool is not initialized")
-        return self._pool
+        return p
 
     def get_connection(self) -> psycopg.Connection:
         conn = self.get_thread_conn()
@@ -96,31 +245,91 @@ class PgStorage:
         raise RuntimeError("no active transaction connection on this thread")
 
     def disconnect(self) -> None:
-        if self._pool is not None:
+        if self._pools:
             self._logger.debug("disconnecting from Postgres", endpoint=self._config.endpoint, port=self._config.port)
-            self._pool.close()
-
-    def query_str(self, query: str | sql.SQL | sql.Composed) -> str:
+        for p in self._pools.values():
+            p.close()
+        self._pools.clear()
+        for replica in self._replicas.replicas():
+            replica.pool.close()
+        self._replicas.clear()
+
+    def query_str(self, query: str | sql.SQL | sql.Composed, conn: psycopg.Connection | None = None) -> str:
         if isinstance(query, str):
             return query
-        conn = self.get_thread_conn()
+        conn = conn or self.get_thread_conn()
         if conn is not None:
             return query.as_string(conn)
         with self.get_pool().connection() as c:
             return query.as_string(c)
 
-    def exec(self, query: str | sql.SQL | sql.Composed, *, params: list[Any] | None = None) -> None:
-        log.debug("SQL query", query=self.query_str(query).replace("\n", " "), args=params or [])
+    def _log_query(
+        self,
+        message: str,
+        conn: psycopg.Connection,
+        query: str | sql.SQL | sql.Composed,
+        params: Any,
+    ) -> None:
+        # Rendering a composed query is not free, so it is only done when the line is going to be emitted.
+        if log.is_enabled_for(logging.DEBUG):
+            log.debug(message, query=self.query_str(query, conn).replace("\n", " "), args=params or [])
 
-        conn = self.get_thread_conn()
+    def _observe(
+        self,
+        conn: psycopg.Connection,
+        query: str | sql.SQL | sql.Composed,
+        params: Any,
+        num_rows: int,
+        elapsed_seconds: float,
+        *,
+        num_bytes: int = 0,
+        explain: bool = False,
+        read_only: bool = False,
+    ) -> None:
+        is_slow = self._slow_queries.is_slow(elapsed_seconds)
+        if not is_slow and not self._query_metrics.enabled:
+            return
+
+        self._query_metrics.observe(query, num_rows, num_bytes, elapsed_seconds)
+        if not is_slow:
+            return
+
+        query_text = self.query_str(query, conn)
+        plan = None
+        # Explaining runs the statement again, which must not repeat the side effects of a write.
+        if (
+            explain
+            and self._slow_queries.wants_plan(elapsed_seconds)
+            and (read_only or querylog.is_read_query(query_text))
+        ):
+            plan = self._explain(conn, query_text, params)
+        self._slow_queries.record(query_text, params, num_rows, elapsed_seconds, self._workload, plan)
+
+    def _explain(self, conn: psycopg.Connection, query_text: str, params: Any) -> str | None:
+        try:
+            with conn.transaction(force_rollback=True), conn.cursor(row_factory=rows.tuple_row) as cursor:
+                cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {query_text}", params or None)
+                return "\n".join(str(row[0]) for row in cursor.fetchall())
+        except psycopg.Error as e:
+            log.warning("unable to explain slow query", error=str(e))
+            return None
+
+    def exec(self, query: str | sql.SQL | sql.Composed, *, params: list[Any] | None = None) -> None:
         execute_params: list[Any] | None = params if params else None
-        if conn is not None:
+
+        def _run(conn: psycopg.Connection) -> None:
+            self._log_query("SQL query", conn, query, params)
+            start = time.monotonic()
             with conn.cursor() as cursor:
                 cursor.execute(query, execute_params)
-        else:
-            with self.get_pool().connection() as c:
-                with c.cursor() as cursor:
-                    cursor.execute(query, execute_params)
+                num_rows = max(cursor.rowcount, 0)
+            self._observe(conn, query, params, num_rows, time.monotonic() - start)
+
+        conn = self.get_thread_conn()
+        if conn is not None:
+            _run(conn)
+            return
+        self._run_pooled(_run)
 
     def execute_batch(self, query: str, rows_data: Sequence[Sequence[Any]]) -> int:
         log.debug("SQL execute batch", query=query.replace("\n", " "), num_rows=len(rows_data))
@@ -128,16 +337,19 @@ class PgStorage:
         if not rows_data:
             return 0
 
-        conn = self.get_thread_conn()
-        if conn is not None:
+        def _run(conn: psycopg.Connection) -> int:
+            start = time.monotonic()
             with conn.cursor() as cur:
                 cur.executemany(query, rows_data)
-                return cur.rowcount
+                num_rows = cur.rowcount
+            self._observe(conn, query, None, num_rows, time.monotonic() - start)
+            return num_rows
 
+        conn = self.get_thread_conn()
+        if conn is not None:
+            return _run(conn)
         with self.get_pool().connection() as c:
-            with c.cursor() as cur:
-                cur.executemany(query, rows_data)
-                return cur.rowcount
+            return _run(c)
 
     def query(
         self,
@@ -147,20 +359,19 @@ class PgStorage:
         timeout_seconds: float | None = None,
         read_only: bool = False,
     ) -> list[rows.DictRow]:
-        log.debug("SQL query", query=self.query_str(query).replace("\n", " "), args=params or [])
-
         execute_params: list[Any] | None = params if params else None
 
         def _run(conn: psycopg.Connection) -> list[rows.DictRow]:
+            self._log_query("SQL query", conn, query, params)
             start = time.monotonic()
 
-            def _execute(cursor: psycopg.Cursor) -> list[rows.DictRow]:
+            def _execute(cursor: psycopg.Cursor) -> tuple[list[rows.DictRow], int]:
                 cursor.execute(query, execute_params)
-                return cursor.fetchall()
+                return cursor.fetchall(), metrics.result_bytes(cursor.pgresult)
 
             if timeout_seconds is None and not read_only:
                 with conn.cursor() as cursor:
-                    result = _execute(cursor)
+                    result, num_bytes = _execute(cursor)
             else:
                 previous_read_only = conn.read_only
                 if read_only:
@@ -173,21 +384,260 @@ class PgStorage:
                                 cursor.execute(
                                     sql.SQL("SET LOCAL statement_timeout = {}").format(sql.Literal(f"{timeout_ms}ms"))
                                 )
-                            result = _execute(cursor)
+                            result, num_bytes = _execute(cursor)
                 finally:
                     if read_only:
                         conn.read_only = previous_read_only
 
             elapsed = time.monotonic() - start
             log.debug("SQL result", num_rows=len(result), elapsed_seconds=round(elapsed, 4))
+            self._observe(
+                conn, query, params, len(result), elapsed, num_bytes=num_bytes, explain=True, read_only=read_only
+            )
             return result
 
         conn = self.get_thread_conn()
         if conn is not None:
             return _run(conn)
-        with self.get_pool().connection() as c:
+        return self._run_read(_run, read_only)
+
+    def query_columns(
+        self,
+        query: str | sql.SQL | sql.Composed,
+        *,
+        params: list[Any] | None = None,
+        read_only: bool = False,
+    ) -> dict[str, np.ndarray]:
+        """
+        Runs the query with binary transfer and tuple rows and returns a mapping of column name to a NumPy
+        array. Columns that contain NULLs are masked arrays.
+        """
+        execute_params: list[Any] | None = params if params else None
+
+        def _run(conn: psycopg.Connection) -> dict[str, np.ndarray]:
+            self._log_query("SQL query columns", conn, query, params)
+            start = time.monotonic()
+            previous_read_only = conn.read_only
+            if read_only:
+                conn.read_only = True
+            try:
+                with conn.cursor(binary=True, row_factory=rows.tuple_row) as cursor:
+                    cursor.execute(query, execute_params)
+                    num_bytes = metrics.result_bytes(cursor.pgresult)
+                    collector = columns.ColumnCollector(cursor.description, max(cursor.rowcount, 0))
+                    while batch := cursor.fetchmany(columns.FETCH_BATCH_ROWS):
+                        collector.add(batch)
+            finally:
+                if read_only:
+                    conn.read_only = previous_read_only
+
+            result = collector.result()
+            elapsed = time.monotonic() - start
+            log.debug("SQL result", num_rows=cursor.rowcount, elapsed_seconds=round(elapsed, 4))
+            self._observe(
+                conn, query, params, cursor.rowcount, elapsed, num_bytes=num_bytes, explain=True, read_only=read_only
+            )
+            return result
+
+        conn = self.get_thread_conn()
+        if conn is not None:
+            return _run(conn)
+        return self._run_read(_run, read_only)
+
+    def _copy_to_staging(
+        self,
+        cur: psycopg.Cursor,
+        table: str,
+        columns: Sequence[str],
+        rows_data: Iterable[Sequence[Any]],
+    ) -> sql.Identifier:
+        """
+        Creates a temporary table with the given columns of `table` and copies the rows into it. Binary COPY is
+        used when every column is a built-in scalar type, text COPY otherwise.
+        """
+        staging = bulk.staging_table()
+        column_idents = sql.SQL(", ").join(sql.Identifier(c) for c in columns)
+        cur.execute(
+            sql.SQL("CREATE TEMP TABLE {} ON COMMIT DROP AS SELECT {} FROM {} WITH NO DATA").format(
+                staging, column_idents, bulk.split_table(table)
+            )
+        )
+        cur.execute(sql.SQL("SELECT {} FROM {} LIMIT 0").format(column_idents, staging))
+        coercions = bulk.binary_coercions(cur.description or [])
+
+        if coercions is None:
+            with cur.copy(sql.SQL("COPY {} ({}) FROM STDIN").format(staging, column_idents)) as copy:
+                for row in rows_data:
+                    copy.write_row(row)
+            return staging
+
+        with cur.copy(sql.SQL("COPY {} ({}) FROM STDIN (FORMAT BINARY)").format(staging, column_idents)) as copy:
+            copy.set_types([col.type_code for col in cur.description or []])
+            for row in rows_data:
+                copy.write_row(bulk.coerce_row(row, coercions))
+        return staging
+
+    def _run_bulk(
+        self,
+        table: str,
+        columns: Sequence[str],
+        rows_data: Iterable[Sequence[Any]],
+        statement: Callable[[sql.Identifier], sql.Composed],
+    ) -> int:
+        def _run(conn: psycopg.Connection) -> int:
+            start = time.monotonic()
+            with conn.cursor() as cur:
+                staging = self._copy_to_staging(cur, table, columns, rows_data)
+                query = statement(staging)
+                cur.execute(query)
+                affected = cur.rowcount
+                cur.execute(sql.SQL("DROP TABLE {}").format(staging))
+
+            elapsed = time.monotonic() - start
+            log.debug("SQL bulk write", table=table, num_rows=affected, elapsed_seconds=round(elapsed, 4))
+            self._observe(conn, query, None, affected, elapsed)
+            return affected
+
+        conn = self.get_thread_conn()
+        if conn is not None:
+            return _run(conn)
+        with self.get_pool().connection() as c, c.transaction():
             return _run(c)
 
+    def bulk_upsert(
+        self,
+        table: str,
+        columns: Sequence[str],
+        rows_data: Iterable[Sequence[Any]],
+        conflict_keys: Sequence[str] | None = None,
+        update_columns: Sequence[str] | None = None,
+    ) -> int:
+        """
+        Copies the rows into a staging table and inserts them into `table` with a single statement.
+
+        :param table: Target table as `schema.table`
+        :param columns: Columns in the order of values in each row
+        :param conflict_keys: Conflict target. Without it conflicting rows are skipped.
+        :param update_columns: Columns overwritten on conflict. Without them conflicting rows are skipped.
+            If a key is staged several times, the last row wins.
+        :return: Number of inserted or updated rows
+        """
+        return self._run_bulk(
+            table,
+            columns,
+            rows_data,
+            lambda staging: bulk.upsert_query(table, staging, columns, conflict_keys, update_columns or []),
+        )
+
+    def bulk_update(
+        self,
+        table: str,
+        columns: Sequence[str],
+        rows_data: Iterable[Sequence[Any]],
+        keys: Sequence[str],
+        condition: sql.Composable | None = None,
+    ) -> int:
+        """
+        Copies the rows into a staging table and runs a single `UPDATE ... FROM` that sets every column
+        except `keys` on the matching rows of `table`.
+
+        :param condition: Extra condition on the target rows. The target is aliased as `t` and the staged rows
+            as `s`.
+        :return: Number of updated rows
+        """
+        update_columns = [c for c in columns if c not in keys]
+        return self._run_bulk(
+            table,
+            columns,
+            rows_data,
+            lambda staging: bulk.update_query(table, staging, keys, update_columns, condition),
+        )
+
+    def stream(
+        self,
+        query: str | sql.SQL | sql.Composed,
+        *,
+        params: list[Any] | None = None,
+        batch_rows: int = DEFAULT_STREAM_BATCH_ROWS,
+        timeout_seconds: float | None = None,
+        read_only: bool = False,
+    ) -> Iterator[list[rows.DictRow]]:
+        """
+        Runs the query through a server-side cursor and yields batches of at most `batch_rows` rows,
+        so memory stays bounded regardless of the result size. Outside of a transaction the pool
+        connection is held until the generator is exhausted or closed.
+        """
+        execute_params: list[Any] | None = params if params else None
+
+        def _batches(conn: psycopg.Connection, restore_timeout: bool) -> Iterator[list[rows.DictRow]]:
+            self._log_query("SQL stream", conn, query, params)
+            start = time.monotonic()
+            num_rows = 0
+            num_bytes = 0
+
+            previous_timeout = None
+            if timeout_seconds is not None:
+                if restore_timeout:
+                    # SET LOCAL lasts until the end of the transaction even when set in a savepoint, so the timeout
+                    # of the caller's transaction is put back once the stream is done.
+                    with conn.cursor(row_factory=rows.tuple_row) as cursor:
+                        row = cursor.execute("SHOW statement_timeout").fetchone()
+                    previous_timeout = row[0] if row is not None else None
+                timeout_ms = int(timeout_seconds * 1000)
+                conn.execute(sql.SQL("SET LOCAL statement_timeout = {}").format(sql.Literal(f"{timeout_ms}ms")))
+
+            try:
+                with conn.cursor(name=f"stream_{uuid.uuid4().hex}") as cursor:
+                    cursor.itersize = batch_rows
+                    cursor.execute(query, execute_params)
+                    while batch := cursor.fetchmany(batch_rows):
+                        num_rows += len(batch)
+                        num_bytes += metrics.result_bytes(cursor.pgresult)
+                        yield batch
+            finally:
+                # A failed transaction is rolled back, which discards the setting anyway.
+                if previous_timeout is not None and conn.info.transaction_status != pq.TransactionStatus.INERROR:
+                    conn.execute("SELECT set_config('statement_timeout', %s, true)", [previous_timeout])
+
+            elapsed = time.monotonic() - start
+            log.debug("SQL stream result", num_rows=num_rows, elapsed_seconds=round(elapsed, 4))
+            # Includes the time the consumer spent between batches.
+            self._observe(conn, query, params, num_rows, elapsed, num_bytes=num_bytes)
+
+        def _pooled_batches(p: ConnectionPool) -> Iterator[list[rows.DictRow]]:
+            with p.connection() as c:
+                previous_read_only = c.read_only
+                if read_only:
+                    c.read_only = True
+                try:
+                    # Named cursors only live inside a transaction.
+                    with c.transaction():
+                        yield from _batches(c, restore_timeout=False)
+                finally:
+                    if read_only:
+                        c.read_only = previous_read_only
+
+        conn = self.get_thread_conn()
+        if conn is not None:
+            yield from _batches(conn, restore_timeout=True)
+            return
+
+        replica = self._choose_replica(read_only)
+        if replica is not None:
+            started = False
+            try:
+                for batch in _pooled_batches(replica.pool):
+                    started = True
+                    yield batch
+                return
+            except psycopg.Error as e:
+                # Batches that were already handed out cannot be taken back.
+                if started or not replicas.should_fall_back(e):
+                    raise
+                self._replicas.mark_unhealthy(replica, str(e))
+
+        yield from _pooled_batches(self.get_pool())
+
     def query_one(self, query: str | sql.SQL | sql.Composed, *, params: list[Any] | None = None) -> rows.DictRow:
         result = self.query(query, params=params)
 
@@ -0,0 +1,158 @@
+import collections
+import datetime
+import hashlib
+import re
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+import structlog
+from psycopg import sql
+
+from app.lib.storage.postgres import config
+
+log: structlog.stdlib.BoundLogger = structlog.get_logger()
+
+_MAX_QUERY_LENGTH = 4000
+
+_COMMENT = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\$\d+")
+# Names with a random suffix, e.g. staging tables.
+_GENERATED_NAME = re.compile(r"\b(\w+?)_[0-9a-f]{32}\b")
+_TUPLE = r"\(\s*\?(?:\s*,\s*\?)*\s*\)"
+_REPEATED_TUPLES = re.compile(rf"({_TUPLE})(?:\s*,\s*{_TUPLE})+")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)+\s*\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+_READ_STATEMENT = re.compile(r"\(*\s*(?:SELECT|WITH|VALUES|TABLE)\b", re.IGNORECASE)
+_WRITE_KEYWORD = re.compile(r"\b(?:INSERT|UPDATE|DELETE|MERGE|INTO|TRUNCATE|CALL)\b", re.IGNORECASE)
+
+
+def normalize_query(query: str) -> str:
+    """
+    Replaces literals and placeholders with `?` and collapses whitespace, repeated VALUES tuples and IN lists,
+    so that queries that only differ in their parameters share one normalized text.
+    """
+    query = _COMMENT.sub(" ", query)
+    query = _STRING.sub("?", query)
+    query = _PLACEHOLDER.sub("?", query)
+    query = _NUMBER.sub("?", query)
+    query = _GENERATED_NAME.sub(r"\1_?", query)
+    query = _WHITESPACE.sub(" ", query).strip()
+    query = _IN_LIST.sub("IN (?, ...)", query)
+    return _REPEATED_TUPLES.sub(r"\1, ...", query)
+
+
+def is_read_query(query: str) -> bool:
+    """
+    Whether the statement is a plain read: a SELECT, possibly with CTEs, that mentions none of the keywords of
+    writing statements, so running it again does no harm. Row locking reads and anything unrecognized count as
+    writes.
+    """
+    query = _STRING.sub("?", _COMMENT.sub(" ", query)).strip()
+    return _READ_STATEMENT.match(query) is not None and _WRITE_KEYWORD.search(query) is None
+
+
+def query_template(query: str | sql.Composable) -> str:
+    """
+    Text of a query with its literals replaced by `?`. Unlike rendering it with a connection, it adapts none of
+    the values, so it is cheap enough for every statement and normalizes to the same text for any of them.
+    """
+    if isinstance(query, str):
+        return query
+    if isinstance(query, sql.Composed):
+        return "".join(query_template(part) for part in query)
+    if isinstance(query, sql.Literal):
+        return "?"
+    return query.as_string(None)
+
+
+def fingerprint(normalized_query: str) -> str:
+    return hashlib.sha1(normalized_query.encode()).hexdigest()[:16]
+
+
+def params_digest(params: Any) -> str | None:
+    if not params:
+        return None
+    return hashlib.sha1(repr(params).encode()).hexdigest()[:16]
+
+
+@dataclass
+class SlowQuery:
+    recorded_at: datetime.datetime
+    fingerprint: str
+    query: str
+    params_digest: str | None
+    num_rows: int
+    elapsed_seconds: float
+    workload: str
+    plan: str | None = None
+
+
+class SlowQueryLog:
+    """
+    Collects queries that exceeded the configured threshold. Each one is logged and kept in a bounded
+    in-memory buffer that is shared by all views of a storage.
+    """
+
+    def __init__(
+        self,
+        cfg: config.SlowQueryConfig,
+        clock: Callable[[], datetime.datetime] = lambda: datetime.datetime.now(tz=datetime.UTC),
+    ) -> None:
+        self._cfg = cfg
+        self._clock = clock
+        self._entries: collections.deque[SlowQuery] = collections.deque(maxlen=cfg.buffer_size)
+        self._lock = threading.Lock()
+
+    def is_slow(self, elapsed_seconds: float) -> bool:
+        return self._cfg.threshold_seconds is not None and elapsed_seconds >= self._cfg.threshold_seconds
+
+    def wants_plan(self, elapsed_seconds: float) -> bool:
+        return (
+            self._cfg.explain_threshold_seconds is not None and elapsed_seconds >= self._cfg.explain_threshold_seconds
+        )
+
+    def record(
+        self,
+        query: str,
+        params: Any,
+        num_rows: int,
+        elapsed_seconds: float,
+        workload: config.Workload,
+        plan: str | None = None,
+    ) -> SlowQuery:
+        normalized = normalize_query(query)
+        entry = SlowQuery(
+            recorded_at=self._clock(),
+            fingerprint=fingerprint(normalized),
+            query=normalized[:_MAX_QUERY_LENGTH],
+            params_digest=params_digest(params),
+            num_rows=num_rows,
+            elapsed_seconds=round(elapsed_seconds, 4),
+            workload=workload.value,
+            plan=plan,
+        )
+        log.warning(
+            "slow query",
+            fingerprint=entry.fingerprint,
+            query=entry.query,
+            params_digest=entry.params_digest,
+            num_rows=entry.num_rows,
+            elapsed_seconds=entry.elapsed_seconds,
+            workload=entry.workload,
+            plan=entry.plan,
+        )
+
+        with self._lock:
+            self._entries.append(entry)
+        return entry
+
+    def entries(self) -> list[SlowQuery]:
+        """
+        Returns buffered slow queries, most recent first.
+        """
+        with self._lock:
+            return list(reversed(self._entries))
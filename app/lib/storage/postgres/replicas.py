@@ -0,0 +1,119 @@
+import itertools
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+import psycopg
+import structlog
+from psycopg import errors
+
+log: structlog.stdlib.BoundLogger = structlog.get_logger()
+
+# A replica that has replayed everything it received is not lagging even if the primary has been idle
+# for a while, so the replay timestamp is only taken into account while WAL is still being applied.
+STATUS_QUERY = """
+    SELECT
+        pg_is_in_recovery() AS in_recovery,
+        CASE
+            WHEN pg_last_wal_receive_lsn() IS NOT DISTINCT FROM pg_last_wal_replay_lsn() THEN 0
+            ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+        END::float AS lag_seconds
+"""
+
+# How long a health check may wait for a replica connection.
+CHECK_TIMEOUT_SECONDS = 2.0
+
+
+@dataclass
+class Replica[P]:
+    name: str
+    pool: P
+    healthy: bool = False
+    lag_seconds: float | None = None
+    checked_at: float | None = None
+
+
+class ReplicaSet[P]:
+    """
+    Health and lag bookkeeping for the replicas of one storage, plus round-robin selection among the
+    healthy ones. Storages run the actual checks against the replica pools and report the results back.
+    """
+
+    def __init__(
+        self,
+        max_lag_seconds: float,
+        check_interval_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._replicas: list[Replica[P]] = []
+        self._max_lag_seconds = max_lag_seconds
+        self._check_interval_seconds = check_interval_seconds
+        self._clock = clock
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def __bool__(self) -> bool:
+        return bool(self._replicas)
+
+    def replicas(self) -> list[Replica[P]]:
+        return list(self._replicas)
+
+    def add(self, name: str, p: P) -> None:
+        with self._lock:
+            self._replicas.append(Replica(name, p))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._replicas.clear()
+
+    def claim_checks(self) -> list[Replica[P]]:
+        """
+        Returns replicas that are due for a health check and marks them as checked, so that concurrent
+        callers do not check the same replica twice.
+        """
+        now = self._clock()
+        with self._lock:
+            due = [
+                replica
+                for replica in self._replicas
+                if replica.checked_at is None or now - replica.checked_at >= self._check_interval_seconds
+            ]
+            for replica in due:
+                replica.checked_at = now
+        return due
+
+    def update(self, replica: Replica[P], in_recovery: bool, lag_seconds: float) -> None:
+        replica.lag_seconds = lag_seconds
+        healthy = in_recovery and lag_seconds <= self._max_lag_seconds
+        if replica.healthy and not healthy:
+            log.warning(
+                "replica excluded from routing",
+                replica=replica.name,
+                in_recovery=in_recovery,
+                lag_seconds=lag_seconds,
+            )
+        replica.healthy = healthy
+
+    def mark_unhealthy(self, replica: Replica[P], reason: str) -> None:
+        if replica.healthy:
+            log.warning("replica excluded from routing", replica=replica.name, reason=reason)
+        replica.healthy = False
+        replica.checked_at = self._clock()
+
+    def choose(self) -> Replica[P] | None:
+        healthy = [replica for replica in self._replicas if replica.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._counter) % len(healthy)]
+
+
+def should_fall_back(e: psycopg.Error) -> bool:
+    """
+    Whether a read that failed on a replica should be retried on the primary: the replica could not be
+    reached or cancelled the query because of a conflict with WAL replay. Queries cancelled by a statement
+    timeout are not retried.
+    """
+    if isinstance(e, errors.SerializationFailure):
+        return True
+    return isinstance(e, psycopg.OperationalError) and not isinstance(e, errors.QueryCanceled)
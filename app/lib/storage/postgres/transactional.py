@@ -1,4 +1,7 @@
-from contextlib import contextmanager
+import contextlib
+from contextlib import asynccontextmanager, contextmanager
+
+import psycopg
 
 from app.lib.storage import postgres
 
@@ -8,11 +11,52 @@ class TransactionalPGRepository:
         self._storage = storage
 
     @contextmanager
-    def with_tx(self):
+    def with_tx(self, pipeline: bool = False):
+        """
+        Runs the storage queries of the block in one transaction on a dedicated connection.
+
+        :param pipeline: Send statements in pipeline mode. Statements whose results are not read are queued and
+            sent together with the next query that returns rows or at the end of the block, so errors they raise
+            surface there rather than at the statement itself.
+        """
         with self._storage.get_pool().connection() as conn:
             self._storage.set_thread_conn(conn)
             try:
-                with conn.transaction():
+                with _pipeline(conn, pipeline), conn.transaction():
                     yield
             finally:
                 self._storage.set_thread_conn(None)
+
+
+class AsyncTransactionalPGRepository:
+    def __init__(self, storage: postgres.AsyncPgStorage) -> None:
+        self._storage = storage
+
+    @asynccontextmanager
+    async def with_tx(self, pipeline: bool = False):
+        """
+        Runs the storage queries of the block in one transaction on a dedicated connection.
+
+        :param pipeline: Send statements in pipeline mode, see `TransactionalPGRepository.with_tx`.
+        """
+        async with self._storage.get_pool().connection() as conn:
+            token = self._storage.set_task_conn(conn)
+            try:
+                async with _async_pipeline(conn, pipeline), conn.transaction():
+                    yield
+            finally:
+                self._storage.reset_task_conn(token)
+
+
+def _pipeline(conn: psycopg.Connection, enabled: bool) -> contextlib.AbstractContextManager[psycopg.Pipeline | None]:
+    if enabled and psycopg.Pipeline.is_supported():
+        return conn.pipeline()
+    return contextlib.nullcontext()
+
+
+def _async_pipeline(
+    conn: psycopg.AsyncConnection, enabled: bool
+) -> contextlib.AbstractAsyncContextManager[psycopg.AsyncPipeline | None]:
+    if enabled and psycopg.AsyncPipeline.is_supported():
+        return conn.pipeline()
+    return contextlib.nullcontext()
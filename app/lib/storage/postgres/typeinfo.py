@@ -0,0 +1,40 @@
+import threading
+
+import psycopg
+from psycopg import errors
+from psycopg.types import enum
+
+
+def is_stale_type_error(e: psycopg.Error) -> bool:
+    """
+    Whether a query failed because it referenced a type OID that no longer exists, e.g. of an enum that a
+    migration recreated after its type info was cached.
+    """
+    message = e.diag.message_primary or str(e)
+    if isinstance(e, errors.InternalError_):
+        return message.startswith("cache lookup failed for type")
+    return isinstance(e, errors.UndefinedObject) and "type" in message
+
+
+class EnumInfoCache:
+    """
+    Enum type info shared by all connections of a storage, including replica connections. Each type is looked
+    up in the catalog once instead of on every new pooled connection. Clearing the cache makes the next
+    connection fetch the types again, e.g. after a migration recreated one of them.
+    """
+
+    def __init__(self) -> None:
+        self._infos: dict[str, enum.EnumInfo] = {}
+        self._lock = threading.Lock()
+
+    def get(self, pg_type: str) -> enum.EnumInfo | None:
+        with self._lock:
+            return self._infos.get(pg_type)
+
+    def put(self, pg_type: str, info: enum.EnumInfo) -> None:
+        with self._lock:
+            self._infos[pg_type] = info
+
+    def clear(self) -> None:
+        with self._lock:
+            self._infos.clear()
@@ -0,0 +1,42 @@
+import base64
+import binascii
+import json
+from collections.abc import Sequence
+from typing import Any
+
+from app.lib.web.errors import RuleValidationError
+
+
+def encode_cursor(kind: str, key: Sequence[Any]) -> str:
+    """
+    Builds an opaque continuation token from the sort key of the last item of a page. `kind` names the ordering
+    the key belongs to so that a token of one listing is not accepted by another.
+    """
+    payload = json.dumps([kind, list(key)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, kind: str, key_types: Sequence[type]) -> list[Any]:
+    """
+    Reads the sort key back from a token made by `encode_cursor`, checking that it was made for the same kind of
+    ordering and that its values have the expected types.
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise RuleValidationError("cursor is malformed") from exc
+
+    if not isinstance(payload, list) or len(payload) != 2 or not isinstance(payload[1], list):
+        raise RuleValidationError("cursor is malformed")
+
+    token_kind, key = payload
+    if token_kind != kind or len(key) != len(key_types):
+        raise RuleValidationError("cursor does not belong to this query")
+
+    result: list[Any] = []
+    for value, key_type in zip(key, key_types, strict=True):
+        if isinstance(value, bool) or not isinstance(value, (key_type, int) if key_type is float else key_type):
+            raise RuleValidationError("cursor is malformed")
+        result.append(key_type(value))
+
+    return result
@@ -1,9 +1,10 @@
 from app.lib.web.server.config import ServerConfig
-from app.lib.web.server.server import APIOkResponse, Route, WebServer
+from app.lib.web.server.server import APIOkResponse, Lifespan, Route, WebServer
 
 __all__ = [
     "WebServer",
     "Route",
     "APIOkResponse",
+    "Lifespan",
     "ServerConfig",
 ]
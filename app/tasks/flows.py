@@ -20,6 +20,7 @@ LAYER2_TASK_NAMES: tuple[str, ...] = (
     "layer2-import-icrs",
     "layer2-import-redshift",
     "layer2-import-nature",
+    "layer2-import-velocity",
     "layer2-orphan-cleanup",
 )
 
@@ -35,7 +36,7 @@ CLEANUP_ORPHANS_DESCRIPTION = (
     "Remove PGC objects that were left without corresponding records. "
     "Useful if any records were deleted or changed PGC numbers since the last update."
 )
-CATALOGS_DESCRIPTION = "Catalogs to import: designation, icrs, redshift, nature. If not set, imports all."
+CATALOGS_DESCRIPTION = "Catalogs to import: designation, icrs, redshift, nature, velocity. If not set, imports all."
 WRITE_ORPHANS_DESCRIPTION = (
     "If true, remove orphaned PGC objects from layer 2 tables. If false, only report how many orphans would be removed."
 )
@@ -119,7 +120,10 @@ def run_task(
 @flow(
     log_prints=False,
     name="Layer 2 import (all catalogs)",
-    description="Aggregates designation, ICRS, redshift, and nature from layer 1 into layer 2.",
+    description=(
+        "Aggregates designation, ICRS, redshift, and nature from layer 1 into layer 2 and computes velocities with "
+        "respect to the configured apexes."
+    ),
 )
 def layer2_import(params: Layer2ImportParams = DEFAULT_LAYER2_IMPORT_PARAMS) -> None:
     run_task(
@@ -196,6 +200,23 @@ def layer2_import_nature(params: Layer2CatalogTaskParams = DEFAULT_LAYER2_CATALO
     )
 
 
+@flow(
+    log_prints=False,
+    name="Layer 2 import — velocity",
+    description="Computes velocities with respect to the configured apexes from layer 2 positions and redshifts.",
+)
+def layer2_import_velocity(
+    params: Layer2CatalogTaskParams = DEFAULT_LAYER2_CATALOG_TASK_PARAMS,
+) -> None:
+    run_task(
+        "layer2-import-velocity",
+        batch_size=params.batch_size,
+        dry_run=params.dry_run,
+        since=params.since,
+        cleanup_orphans=params.cleanup_orphans,
+    )
+
+
 @flow(
     log_prints=False,
     name="Layer 2 orphan cleanup",
@@ -220,6 +241,7 @@ FLOWS_BY_NAME: dict[str, Flow] = {
     "layer2-import-icrs": layer2_import_icrs,
     "layer2-import-redshift": layer2_import_redshift,
     "layer2-import-nature": layer2_import_nature,
+    "layer2-import-velocity": layer2_import_velocity,
     "layer2-orphan-cleanup": layer2_orphan_cleanup,
 }
 
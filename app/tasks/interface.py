@@ -7,6 +7,9 @@ from app.lib.storage import postgres
 
 class Config(config.ConfigSettings):
     storage: postgres.PgStorageConfig = postgres.PgStorageConfig()
+    # Data API configuration whose `catalogs.velocity.apexes` layer 2 velocities are computed for. Required by the
+    # tasks that compute velocities.
+    apexes_config_path: str | None = None
 
 
 def parse_since(since: datetime.datetime | str | None) -> datetime.datetime | None:
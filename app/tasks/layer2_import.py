@@ -4,12 +4,15 @@ from typing import final
 
 import structlog
 
+from app.lib.astronomy import apex
 from app.tasks import (
+    interface,
     layer2_common,
     layer2_import_designation,
     layer2_import_icrs,
     layer2_import_nature,
     layer2_import_redshift,
+    layer2_import_velocity,
 )
 
 CATALOG_TASKS = {
@@ -17,9 +20,11 @@ CATALOG_TASKS = {
     "icrs": layer2_import_icrs.Layer2ImportICRSTask,
     "redshift": layer2_import_redshift.Layer2ImportRedshiftTask,
     "nature": layer2_import_nature.Layer2ImportNatureTask,
+    "velocity": layer2_import_velocity.Layer2ImportVelocityTask,
 }
 
-DEFAULT_CATALOGS: tuple[str, ...] = ("designation", "icrs", "redshift", "nature")
+# Velocities are computed from the positions and redshifts, so they come after both.
+DEFAULT_CATALOGS: tuple[str, ...] = ("designation", "icrs", "redshift", "nature", "velocity")
 
 
 @final
@@ -49,11 +54,17 @@ class Layer2ImportTask(layer2_common.Layer2CatalogImportTask):
             self.catalogs = list(catalogs)
         else:
             self.catalogs = list(DEFAULT_CATALOGS)
+        self.apexes: dict[str, apex.ApexConfig] = {}
 
     @classmethod
     def name(cls) -> str:
         return "layer2-import"
 
+    def prepare(self, config: interface.Config) -> None:
+        super().prepare(config)
+        if "velocity" in self.catalogs:
+            self.apexes = layer2_import_velocity.load_apexes(config.apexes_config_path)
+
     def run(self) -> None:
         for catalog in self.catalogs:
             task_cls = CATALOG_TASKS[catalog]
@@ -68,6 +79,8 @@ class Layer2ImportTask(layer2_common.Layer2CatalogImportTask):
             task.pg_storage = self.pg_storage
             task.layer1_repository = self.layer1_repository
             task.layer2_repository = self.layer2_repository
+            if isinstance(task, layer2_import_velocity.Layer2ImportVelocityTask):
+                task.apexes = self.apexes
             task.run()
 
         self.log.info("Layer 2 import completed", catalogs=self.catalogs)
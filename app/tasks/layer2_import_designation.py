@@ -65,6 +65,7 @@ class Layer2ImportDesignationTask(layer2_common.Layer2CatalogImportTask):
                 objects_to_save += len(agg)
                 if not self.dry_run:
                     self.layer2_repository.save("layer2.designation", agg)
+                    self.layer2_repository.replace_designation_keys(tbl)
             self.log.info(
                 "Processed batch",
                 last_pgc=offset,
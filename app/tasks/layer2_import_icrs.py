@@ -4,10 +4,11 @@ from typing import final
 import numpy as np
 import structlog
 from astropy import table
+from astropy import units as u
 
 from app.data import model
 from app.data.schema.layer2 import ICRS
-from app.lib import containers
+from app.lib import astronomy, containers
 from app.tasks import layer2_common, logging
 
 
@@ -22,13 +23,24 @@ def aggregate_icrs(tbl: table.QTable) -> table.QTable:
     grouped = work.group_by("pgc")
     sums = grouped["ra_w", "w_ra", "dec_w", "w_dec"].groups.aggregate(np.sum)
 
+    ra = sums["ra_w"] / sums["w_ra"]
+    dec = sums["dec_w"] / sums["w_dec"]
+    # Converted once here so that responses and filters read galactic and supergalactic coordinates from layer 2.
+    deg = u.Unit("deg")
+    glon, glat = astronomy.equatorial_to_lonlat_many(ra.to_value(deg), dec.to_value(deg), "galactic")
+    sgl, sgb = astronomy.equatorial_to_lonlat_many(ra.to_value(deg), dec.to_value(deg), "supergalactic")
+
     return table.QTable(
         {
             ICRS.PGC: grouped.groups.keys["pgc"],
-            ICRS.RA: sums["ra_w"] / sums["w_ra"],
+            ICRS.RA: ra,
             ICRS.E_RA: sums["w_ra"] ** (-0.5),
-            ICRS.DEC: sums["dec_w"] / sums["w_dec"],
+            ICRS.DEC: dec,
             ICRS.E_DEC: sums["w_dec"] ** (-0.5),
+            ICRS.GLON: glon * deg,
+            ICRS.GLAT: glat * deg,
+            ICRS.SGL: sgl * deg,
+            ICRS.SGB: sgb * deg,
         }
     )
 
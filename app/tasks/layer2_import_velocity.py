@@ -0,0 +1,181 @@
+import datetime
+from collections.abc import Mapping
+from pathlib import Path
+from typing import final
+
+import numpy as np
+import structlog
+import yaml
+from astropy import table
+from astropy import units as u
+
+from app.data import model
+from app.data.schema.layer2 import ApexVelocity
+from app.lib import astronomy, containers
+from app.lib.astronomy import apex
+from app.tasks import interface, layer2_common, logging
+
+# Time recorded for an apex while it is recomputed for all objects, so that the data API does not serve it meanwhile.
+RECOMPUTE_STARTED_AT = datetime.datetime.fromtimestamp(0, tz=datetime.UTC)
+
+
+def load_apexes(path: str | None) -> dict[str, apex.ApexConfig]:
+    """
+    Reads the apexes from `catalogs.velocity` of a data API configuration file.
+    """
+    if path is None:
+        raise ValueError("apexes_config_path has to be set to compute layer 2 velocities")
+    data = yaml.safe_load(Path(path).read_text())
+    return apex.VelocityCatalogConfig(**data["catalogs"]["velocity"]).apexes
+
+
+def compute_velocities(
+    cols: Mapping[str, np.ndarray], apexes: Mapping[str, apex.ApexConfig]
+) -> dict[str, table.QTable]:
+    """
+    Velocities of the objects read by `Layer2Repository.get_velocity_inputs` with respect to every apex. Galactic
+    coordinates that are not stored yet are converted from the equatorial ones.
+    """
+    ra, e_ra, dec, e_dec, cz, e_cz = (
+        np.asarray(cols[name], dtype=np.float64) for name in ("ra", "e_ra", "dec", "e_dec", "cz", "e_cz")
+    )
+    lon, lat = (np.ma.filled(np.ma.asarray(cols[name], dtype=np.float64), np.nan) for name in ("glon", "glat"))
+    missing = np.isnan(lon) | np.isnan(lat)
+    if missing.any():
+        lon[missing], lat[missing] = astronomy.equatorial_to_lonlat_many(ra[missing], dec[missing], "galactic")
+
+    # As in the responses, the errors of the position are assumed to be the same in the galactic frame.
+    velocity, velocity_err = apex.velocities_wr_apexes(cz, e_cz, lon, lat, e_ra, e_dec, apexes)
+
+    kms = u.Unit("km/s")
+    pgcs = np.asarray(cols["pgc"], dtype=np.int64)
+    return {
+        key: table.QTable({ApexVelocity.PGC: pgcs, ApexVelocity.V: values * kms, ApexVelocity.E_V: errors * kms})
+        for key, values, errors in zip(apexes, velocity, velocity_err, strict=True)
+    }
+
+
+@final
+class Layer2ImportVelocityTask(layer2_common.Layer2CatalogImportTask):
+    """
+    Computes velocities of the objects with respect to the configured apexes from layer 2 positions and redshifts,
+    so it has to run after the ICRS and redshift imports. Apexes that are new or whose parameters changed are
+    computed for all objects, the others only for objects modified since they were last brought up to date. Apexes
+    that are no longer configured are removed.
+    """
+
+    def __init__(
+        self,
+        logger: structlog.stdlib.BoundLogger,
+        batch_size: int = 100000,
+        dry_run: bool = False,
+        silent: bool = False,
+        since: datetime.datetime | str | None = None,
+        cleanup_orphans: bool = True,
+    ) -> None:
+        super().__init__(
+            logger,
+            batch_size=batch_size,
+            dry_run=dry_run,
+            silent=silent,
+            since=since,
+            cleanup_orphans=cleanup_orphans,
+        )
+        self.apexes: dict[str, apex.ApexConfig] = {}
+
+    @classmethod
+    def name(cls) -> str:
+        return "layer2-import-velocity"
+
+    def prepare(self, config: interface.Config) -> None:
+        super().prepare(config)
+        self.apexes = load_apexes(config.apexes_config_path)
+
+    def _modified_after(self, stored: Mapping[str, model.StoredApex]) -> dict[datetime.datetime | None, list[str]]:
+        """
+        Groups the apexes by the time after which modified objects have to be recomputed for them, None for all
+        objects, so that the objects of a group are read once.
+        """
+        groups: dict[datetime.datetime | None, list[str]] = {}
+        for key, config in self.apexes.items():
+            current = stored.get(key)
+            if current is None or current.parameters != config.parameters():
+                modified_after = None
+            elif self.since is not None:
+                modified_after = self.since
+            else:
+                modified_after = current.updated_at
+            groups.setdefault(modified_after, []).append(key)
+        return groups
+
+    def run(self) -> None:
+        stored = self.layer2_repository.get_apexes()
+        # Read before the inputs, so that an import finishing meanwhile makes the velocities stale rather than
+        # being recorded as reflected in them.
+        icrs_updated_at = self.layer2_repository.get_last_update_time(model.RawCatalog.ICRS)
+        redshift_updated_at = self.layer2_repository.get_last_update_time(model.RawCatalog.REDSHIFT)
+        groups = self._modified_after(stored)
+        recomputed = groups.get(None, [])
+        removed = sorted(set(stored) - set(self.apexes))
+
+        self.log.info(
+            "Starting Layer 2 velocity import",
+            apexes=list(self.apexes),
+            recomputed=recomputed,
+            removed=removed,
+            dry_run=self.dry_run,
+        )
+
+        if not self.dry_run:
+            self.layer2_repository.remove_apexes(removed)
+            for key in recomputed:
+                self.layer2_repository.save_apex(
+                    key, self.apexes[key].parameters(), RECOMPUTE_STARTED_AT, RECOMPUTE_STARTED_AT
+                )
+
+        objects_to_save = 0
+        for modified_after, keys in groups.items():
+            apexes = {key: self.apexes[key] for key in keys}
+            for offset, cols in containers.read_batches(
+                self.layer2_repository.get_velocity_inputs,
+                lambda data: len(data["pgc"]) == 0,
+                0,
+                lambda d, _: int(d["pgc"][-1]),
+                modified_after,
+                batch_size=self.batch_size,
+            ):
+                velocities = compute_velocities(cols, apexes)
+                objects_to_save += len(cols["pgc"])
+                if not self.dry_run:
+                    for key, tbl in velocities.items():
+                        self.layer2_repository.save_apex_velocities(key, tbl)
+                self.log.info(
+                    "Processed batch",
+                    last_pgc=offset,
+                    batch_size=len(cols["pgc"]),
+                    apexes=keys,
+                    total_processed=objects_to_save,
+                )
+
+            if not self.dry_run:
+                for key in keys:
+                    self.layer2_repository.save_apex(
+                        key, self.apexes[key].parameters(), icrs_updated_at, redshift_updated_at
+                    )
+
+        self.log.info(
+            "Layer 2 velocity import completed",
+            icrs_updated_at=icrs_updated_at.ctime(),
+            redshift_updated_at=redshift_updated_at.ctime(),
+        )
+
+        if not self.silent:
+            saved = "Objects to be saved" if self.dry_run else "Objects saved"
+            logging.print_table(
+                ("Description", "Count"),
+                [
+                    (saved, objects_to_save),
+                    ("Apexes computed for all objects", len(recomputed)),
+                    ("Apexes removed", len(removed)),
+                ],
+            )
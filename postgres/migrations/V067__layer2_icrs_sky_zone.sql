@@ -0,0 +1,57 @@
+/* pgmigrate-encoding: utf-8 */
+
+/*
+ * Sky pixelization of layer2.icrs for cone searches that scan a btree instead
+ * of the geography GiST index (icrs_geography_idx).
+ *
+ * The sky is cut into declination zones 0.1 degree high. A cone is covered by
+ * the zones it crosses and, within each of them, by a range of right
+ * ascension, so candidates are found by btree range scans on (zone, ra) and
+ * then refined by the exact great-circle distance.
+ *
+ * ICRSCoordinatesInZoneRadiusFilter builds its condition from the functions
+ * below. They are plain SQL so that the planner inlines them.
+ */
+BEGIN;
+
+CREATE OR REPLACE FUNCTION layer2.sky_zone(dec double precision) RETURNS integer
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+  SELECT floor((dec + 90) / 0.1)::integer
+$$;
+
+CREATE OR REPLACE FUNCTION layer2.sky_zones(dec double precision, radius double precision) RETURNS integer[]
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+  SELECT array(
+    SELECT generate_series(layer2.sky_zone(greatest(dec - radius, -90)), layer2.sky_zone(least(dec + radius, 90)))
+  )
+$$;
+
+-- Half of the right ascension range covered by a cone (Gray et al. 2007, "SQL Server zones algorithm"). A cone
+-- that reaches a pole covers every right ascension.
+CREATE OR REPLACE FUNCTION layer2.ra_half_width(dec double precision, radius double precision) RETURNS double precision
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+  SELECT CASE
+    WHEN abs(dec) + radius >= 90 THEN 180
+    ELSE degrees(atan(
+      sin(radians(radius)) / sqrt(abs(cos(radians(dec - radius)) * cos(radians(dec + radius))))
+    ))
+  END
+$$;
+
+-- Great-circle distance in degrees by the haversine formula, which stays accurate at small separations.
+CREATE OR REPLACE FUNCTION layer2.angular_distance(
+  ra1 double precision, dec1 double precision, ra2 double precision, dec2 double precision
+) RETURNS double precision
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+  SELECT degrees(2 * asin(least(1, sqrt(
+    sin(radians(dec2 - dec1) / 2) ^ 2 + cos(radians(dec1)) * cos(radians(dec2)) * sin(radians(ra2 - ra1) / 2) ^ 2
+  ))))
+$$;
+
+ALTER TABLE layer2.icrs
+  ADD COLUMN zone integer GENERATED ALWAYS AS (layer2.sky_zone(dec)) STORED;
+SELECT meta.setparams('layer2', 'icrs', 'zone', '{"description": "Declination zone of the object used by the cone search index"}'::json);
+
+CREATE INDEX icrs_zone_ra_idx ON layer2.icrs (zone, ra);
+
+COMMIT;
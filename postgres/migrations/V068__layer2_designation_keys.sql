@@ -0,0 +1,45 @@
+/* pgmigrate-encoding: utf-8 */
+
+/*
+ * Normalized designations for name resolution.
+ *
+ * layer2.designation_key folds case and whitespace and drops leading zeros of
+ * the number that follows the catalog prefix, so "NGC4486", "NGC 4486",
+ * "ngc 4486" and "NGC 04486" share the key "NGC4486". Names given to
+ * /v1/resolve are normalized by the same function.
+ *
+ * The table holds every designation of the objects in layer2.designation and
+ * is rewritten for the imported objects by the layer 2 designation import.
+ * Exact matches use the btree on the key, which compares with the "C"
+ * collation so that it also serves prefix ranges. Fuzzy matches use the
+ * trigram index.
+ */
+BEGIN;
+
+CREATE OR REPLACE FUNCTION layer2.designation_key(design text) RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+  SELECT regexp_replace(upper(regexp_replace(design, '\s+', '', 'g') COLLATE "C"), '^([A-Z]+)0+([0-9])', '\1\2')
+$$;
+
+CREATE TABLE layer2.designation_keys (
+  pgc integer NOT NULL REFERENCES layer2.designation (pgc) ON DELETE CASCADE
+, design text NOT NULL
+, key text COLLATE "C" GENERATED ALWAYS AS (layer2.designation_key(design)) STORED
+, PRIMARY KEY (pgc, design)
+);
+
+SELECT meta.setparams('layer2', 'designation_keys', '{"description": "Normalized designations of the objects used for name resolution"}'::json);
+SELECT meta.setparams('layer2', 'designation_keys', 'pgc', '{"description": "PGC number of the object"}'::json);
+SELECT meta.setparams('layer2', 'designation_keys', 'design', '{"description": "Designation of the object"}'::json);
+SELECT meta.setparams('layer2', 'designation_keys', 'key', '{"description": "Designation with case and whitespace folded and leading zeros of the number dropped"}'::json);
+
+INSERT INTO layer2.designation_keys (pgc, design)
+SELECT DISTINCT r.pgc, d.design
+FROM designation.data AS d
+  JOIN layer0.records AS r ON (d.record_id = r.id)
+  JOIN layer2.designation AS l2 ON (l2.pgc = r.pgc);
+
+CREATE INDEX designation_keys_key_idx ON layer2.designation_keys (key);
+CREATE INDEX designation_keys_key_trgm_idx ON layer2.designation_keys USING GIN (key gin_trgm_ops);
+
+COMMIT;
@@ -0,0 +1,62 @@
+/* pgmigrate-encoding: utf-8 */
+
+/*
+ * Galactic and supergalactic coordinates of layer2.icrs.
+ *
+ * Positions only change when layer2-import-icrs runs, so the import converts
+ * them to the other frames once and responses read the stored values instead
+ * of converting every object on every request. Rows saved before this
+ * migration are converted here with the same rotation matrices from ICRS as
+ * app.lib.astronomy.equatorial_to_lonlat_many, so that range filters on the
+ * columns see every object.
+ */
+BEGIN;
+
+ALTER TABLE layer2.icrs
+  ADD COLUMN glon double precision
+, ADD COLUMN glat double precision
+, ADD COLUMN sgl double precision
+, ADD COLUMN sgb double precision;
+
+SELECT meta.setparams('layer2', 'icrs', 'glon', '{"description": "Galactic longitude of the object", "unit": "deg"}'::json);
+SELECT meta.setparams('layer2', 'icrs', 'glat', '{"description": "Galactic latitude of the object", "unit": "deg"}'::json);
+SELECT meta.setparams('layer2', 'icrs', 'sgl', '{"description": "Supergalactic longitude of the object", "unit": "deg"}'::json);
+SELECT meta.setparams('layer2', 'icrs', 'sgb', '{"description": "Supergalactic latitude of the object", "unit": "deg"}'::json);
+
+UPDATE layer2.icrs AS i
+SET
+  glon = CASE WHEN c.glon >= 0 THEN c.glon WHEN c.glon + 360 < 360 THEN c.glon + 360 ELSE 0 END
+, glat = c.glat
+, sgl = CASE WHEN c.sgl >= 0 THEN c.sgl WHEN c.sgl + 360 < 360 THEN c.sgl + 360 ELSE 0 END
+, sgb = c.sgb
+FROM (
+  SELECT
+    v.pgc
+  , degrees(atan2(v.gy, v.gx)) AS glon
+  , degrees(atan2(v.gz, sqrt(v.gx * v.gx + v.gy * v.gy))) AS glat
+  , degrees(atan2(v.sy, v.sx)) AS sgl
+  , degrees(atan2(v.sz, sqrt(v.sx * v.sx + v.sy * v.sy))) AS sgb
+  FROM (
+    SELECT
+      u.pgc
+    , -0.054875657712591681 * u.x - 0.87343705195561627 * u.y - 0.48383507361671552 * u.z AS gx
+    , 0.49410943719272749 * u.x - 0.44482972122329517 * u.y + 0.7469821839866676 * u.z AS gy
+    , -0.86766613755965871 * u.x - 0.19807633727300075 * u.y + 0.45598381368730162 * u.z AS gz
+    , 0.37501555570303163 * u.x + 0.34135887185624753 * u.y + 0.8618801851683191 * u.z AS sx
+    , -0.89832043772761383 * u.x - 0.095727100248851366 * u.y + 0.42878516000301942 * u.z AS sy
+    , 0.2288749093754375 * u.x - 0.93504569026490691 * u.y + 0.27075049949244601 * u.z AS sz
+    FROM (
+      SELECT
+        pgc
+      , cos(radians(dec)) * cos(radians(ra)) AS x
+      , cos(radians(dec)) * sin(radians(ra)) AS y
+      , sin(radians(dec)) AS z
+      FROM layer2.icrs
+    ) AS u
+  ) AS v
+) AS c
+WHERE i.pgc = c.pgc;
+
+CREATE INDEX icrs_glat_idx ON layer2.icrs (glat);
+
+COMMIT;
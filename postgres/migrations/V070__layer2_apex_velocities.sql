@@ -0,0 +1,60 @@
+/* pgmigrate-encoding: utf-8 */
+
+/*
+ * Velocities of the objects with respect to the apexes configured for the
+ * data API.
+ *
+ * They only depend on layer2.icrs, layer2.cz and the apexes, so
+ * layer2-import-velocity computes them after the ICRS and redshift imports
+ * instead of every response computing them again. layer2.apexes keeps the
+ * parameters each apex was computed with and the times of the ICRS and the
+ * redshift imports reflected in its velocities. An apex whose parameters
+ * differ from the configured ones is recomputed for all objects, and the data
+ * API serves the stored velocities only while the parameters match its own
+ * configuration and neither catalog has been imported again since.
+ *
+ * Rows disappear together with the position or the redshift they were
+ * computed from, and with their apex.
+ */
+BEGIN;
+
+CREATE TABLE layer2.apexes (
+  apex text PRIMARY KEY
+, lon double precision NOT NULL
+, e_lon double precision NOT NULL
+, lat double precision NOT NULL
+, e_lat double precision NOT NULL
+, vel double precision NOT NULL
+, e_vel double precision NOT NULL
+, icrs_updated_at timestamp without time zone NOT NULL
+, redshift_updated_at timestamp without time zone NOT NULL
+);
+
+SELECT meta.setparams('layer2', 'apexes', '{"description": "Apexes the velocities in layer2.apex_velocities are computed with"}'::json);
+SELECT meta.setparams('layer2', 'apexes', 'apex', '{"description": "Name of the apex in the configuration"}'::json);
+SELECT meta.setparams('layer2', 'apexes', 'lon', '{"description": "Galactic longitude of the apex", "unit": "deg"}'::json);
+SELECT meta.setparams('layer2', 'apexes', 'e_lon', '{"description": "Error of the galactic longitude of the apex", "unit": "deg"}'::json);
+SELECT meta.setparams('layer2', 'apexes', 'lat', '{"description": "Galactic latitude of the apex", "unit": "deg"}'::json);
+SELECT meta.setparams('layer2', 'apexes', 'e_lat', '{"description": "Error of the galactic latitude of the apex", "unit": "deg"}'::json);
+SELECT meta.setparams('layer2', 'apexes', 'vel', '{"description": "Velocity of the apex", "unit": "km/s"}'::json);
+SELECT meta.setparams('layer2', 'apexes', 'e_vel', '{"description": "Error of the velocity of the apex", "unit": "km/s"}'::json);
+SELECT meta.setparams('layer2', 'apexes', 'icrs_updated_at', '{"description": "Time of the last ICRS import reflected in the velocities"}'::json);
+SELECT meta.setparams('layer2', 'apexes', 'redshift_updated_at', '{"description": "Time of the last redshift import reflected in the velocities"}'::json);
+
+CREATE TABLE layer2.apex_velocities (
+  pgc integer NOT NULL
+, apex text NOT NULL REFERENCES layer2.apexes (apex) ON DELETE CASCADE
+, v double precision NOT NULL
+, e_v double precision NOT NULL
+, PRIMARY KEY (pgc, apex)
+, FOREIGN KEY (pgc) REFERENCES layer2.icrs (pgc) ON DELETE CASCADE
+, FOREIGN KEY (pgc) REFERENCES layer2.cz (pgc) ON DELETE CASCADE
+);
+
+SELECT meta.setparams('layer2', 'apex_velocities', '{"description": "Velocities of the objects with respect to the configured apexes"}'::json);
+SELECT meta.setparams('layer2', 'apex_velocities', 'pgc', '{"description": "PGC number of the object"}'::json);
+SELECT meta.setparams('layer2', 'apex_velocities', 'apex', '{"description": "Name of the apex"}'::json);
+SELECT meta.setparams('layer2', 'apex_velocities', 'v', '{"description": "Velocity of the object with respect to the apex", "unit": "km/s"}'::json);
+SELECT meta.setparams('layer2', 'apex_velocities', 'e_v', '{"description": "Error of the velocity", "unit": "km/s"}'::json);
+
+COMMIT;
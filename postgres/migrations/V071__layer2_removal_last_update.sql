@@ -0,0 +1,8 @@
+/* pgmigrate-encoding: utf-8 */
+
+/*
+ * Time objects were last removed from layer 2, for example by the orphan
+ * cleanup. Removals do not import anything, so they do not touch the rows of
+ * the catalogs, but readers that cache layer 2 still have to see them.
+ */
+INSERT INTO layer2.last_update (dt, catalog) VALUES (to_timestamp(0), 'removal');
@@ -372,6 +372,24 @@ class GetRecordsTest(unittest.TestCase):
         self.assertEqual(call_kw["row_offset"], 20)
         self.assertEqual(call_kw["limit"], 10)
 
+    def test_get_records_cursor(self) -> None:
+        self.manager.layer0_repo.fetch_records.return_value = [
+            model.TableRecord(
+                id=f"rec{i}", original_data={}, pgc=None, triage_status="unprocessed", crossmatch_candidates=[]
+            )
+            for i in range(2)
+        ]
+
+        first = self.manager.get_records(presentation.GetRecordsRequest(table_name="t", page_size=2))
+        self.assertIsNone(self.manager.layer0_repo.fetch_records.call_args[1]["after_id"])
+        assert first.next_cursor is not None
+
+        self.manager.get_records(presentation.GetRecordsRequest(table_name="t", page_size=2, cursor=first.next_cursor))
+        self.assertEqual(self.manager.layer0_repo.fetch_records.call_args[1]["after_id"], "rec1")
+
+        last = self.manager.get_records(presentation.GetRecordsRequest(table_name="t", page_size=3))
+        self.assertIsNone(last.next_cursor)
+
     def test_get_records_pgc_none_when_missing(self) -> None:
         self.manager.layer0_repo.fetch_records.return_value = [
             model.TableRecord(
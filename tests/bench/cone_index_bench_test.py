@@ -0,0 +1,96 @@
+import asyncio
+import statistics
+import time
+import unittest
+
+import structlog
+from astropy import units as u
+
+from app.data import enums as data_enums
+from app.data import model, repositories
+from app.data.repositories import layer2
+from app.lib.storage import postgres
+from tests.bench import layer2_seed
+
+N_CONES = 300
+RADII_ARCMIN = (1.0, 10.0, 60.0)
+LIMIT = 1000
+MIN_RECALL = 0.999
+
+
+def _center(i: int) -> tuple[float, float]:
+    # Offset from the golden-angle sequence of the seeded objects so that centres do not sit on top of them.
+    return ((i * 222493) % 360000) / 1000, ((i * 381966) % 1000000) / 500000 * 180 - 90
+
+
+async def _run(
+    storage_config: postgres.PgStorageConfig, radius_arcmin: float
+) -> dict[str, tuple[list[float], list[set[int]]]]:
+    storage = postgres.AsyncPgStorage(storage_config, structlog.get_logger(), data_enums.PG_ENUM_REGISTRY)
+    repo = repositories.AsyncLayer2Repository(storage, structlog.get_logger())
+    radius = radius_arcmin * u.Unit("arcmin")
+
+    def geography(ra: u.Quantity, dec: u.Quantity) -> tuple[layer2.Filter, layer2.Ordering]:
+        return layer2.ICRSCoordinatesInRadiusFilter(radius), layer2.ICRSDistanceOrdering(ra, dec)
+
+    def zone(ra: u.Quantity, dec: u.Quantity) -> tuple[layer2.Filter, layer2.Ordering]:
+        return layer2.ICRSCoordinatesInZoneRadiusFilter(radius), layer2.ICRSAngularDistanceOrdering(ra, dec)
+
+    results: dict[str, tuple[list[float], list[set[int]]]] = {}
+    await storage.connect()
+    try:
+        for label, build in (("geography", geography), ("sky_zone", zone)):
+            timings: list[float] = []
+            found: list[set[int]] = []
+            for i in range(N_CONES):
+                ra, dec = (value * u.Unit("deg") for value in _center(i))
+                search_filter, ordering = build(ra, dec)
+                started = time.perf_counter()
+                objects = await repo.query_catalogs(
+                    [model.RawCatalog.ICRS],
+                    search_filter,
+                    layer2.ICRSSearchParams(ra, dec),
+                    LIMIT,
+                    0,
+                    ordering=ordering,
+                )
+                timings.append(time.perf_counter() - started)
+                found.append({obj.pgc for obj in objects})
+            results[label] = (sorted(timings), found)
+        return results
+    finally:
+        await storage.disconnect()
+
+
+class ConeIndexBenchTest(unittest.TestCase):
+    """
+    Compares cone searches through the geography GiST index against the btree over declination zones, in latency
+    and in recall with the geography results taken as the reference. Set BENCH_QUERY_N_OBJECTS=10000000 for the
+    large run.
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.pg_storage = layer2_seed.seed_query_simple_bench()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.pg_storage.clear()
+
+    def test_zone_against_geography(self) -> None:
+        for radius_arcmin in RADII_ARCMIN:
+            results = asyncio.run(_run(self.pg_storage.config, radius_arcmin))
+
+            reference = results["geography"][1]
+            total = sum(len(objects) for objects in reference)
+            for label, (timings, found) in results.items():
+                matched = sum(len(expected & got) for expected, got in zip(reference, found, strict=True))
+                recall = matched / total if total else 1.0
+                print(
+                    f"cone {radius_arcmin:g} arcmin via {label}: "
+                    f"median {statistics.median(timings) * 1000:.2f}ms, "
+                    f"p95 {timings[int(len(timings) * 0.95) - 1] * 1000:.2f}ms, "
+                    f"recall {recall:.4f} ({total} objects in {N_CONES} cones, {layer2_seed.N_OBJECTS} objects)"
+                )
+
+                self.assertGreaterEqual(recall, MIN_RECALL)
@@ -0,0 +1,73 @@
+import asyncio
+import statistics
+import time
+import unittest
+
+import structlog
+
+from app.data import enums as data_enums
+from app.data import repositories
+from app.dataapi.domain import designation_index
+from app.lib.storage import postgres
+from tests.bench import layer2_seed
+
+PREFIXES = ("N", "NGC 1", "ic 12", "UGC 1234", "PGC 99", layer2_seed.CLUSTER_NAME, "M 8")
+REPEATS = 20
+LIMIT = 10
+MIN_SPEEDUP = 10.0
+
+
+async def _timings(storage_config: postgres.PgStorageConfig) -> tuple[list[float], list[float]]:
+    storage = postgres.AsyncPgStorage(storage_config, structlog.get_logger(), data_enums.PG_ENUM_REGISTRY)
+    repo = repositories.AsyncLayer2Repository(storage, structlog.get_logger())
+    snapshot = designation_index.DesignationSnapshot(repo, 60.0, structlog.get_logger())
+
+    await storage.connect()
+    try:
+        await snapshot.load()
+        index = snapshot.index
+        if index is None:
+            raise RuntimeError("designation snapshot is not loaded")
+
+        database: list[float] = []
+        memory: list[float] = []
+        for prefix in PREFIXES * REPEATS:
+            started = time.perf_counter()
+            expected = await repo.suggest_designations(designation_index.prefix_key(prefix), LIMIT)
+            database.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            got = index.suggest(prefix, LIMIT)
+            memory.append(time.perf_counter() - started)
+
+            if got != expected:
+                raise AssertionError(f"suggestions for {prefix!r} differ: {got} != {expected}")
+        return sorted(database), sorted(memory)
+    finally:
+        await storage.disconnect()
+
+
+class DesignationSuggestBenchTest(unittest.TestCase):
+    """
+    Compares prefix suggestions answered by the btree on `layer2.designation_keys` against the in-memory index, and
+    checks that both return the same objects.
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.pg_storage = layer2_seed.seed_query_simple_bench()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.pg_storage.clear()
+
+    def test_index_against_database(self) -> None:
+        database, memory = asyncio.run(_timings(self.pg_storage.config))
+
+        for label, timings in (("database", database), ("index", memory)):
+            print(
+                f"designation suggest via {label}: median {statistics.median(timings) * 1e6:.0f}us, "
+                f"p95 {timings[int(len(timings) * 0.95) - 1] * 1e6:.0f}us ({layer2_seed.N_OBJECTS} objects)"
+            )
+
+        self.assertGreater(statistics.median(database), statistics.median(memory) * MIN_SPEEDUP)
@@ -0,0 +1,86 @@
+import asyncio
+import time
+import unittest
+
+import structlog
+
+from app.data import enums as data_enums
+from app.data import repositories
+from app.dataapi import command, domain
+from app.dataapi.domain import actions, parameterized_query
+from app.dataapi.presentation import interface
+from app.lib.storage import postgres
+from tests.bench import layer2_seed
+
+REQUESTS = 2000
+IN_FLIGHT = 50
+RADIUS_DEG = 1 / 60
+MIN_SPEEDUP = 2.0
+
+
+def _query(i: int) -> interface.QuerySimpleRequest:
+    # Every fourth request hits the dense cluster so that a part of the pages is full.
+    if i % 4 == 0:
+        return interface.QuerySimpleRequest(
+            ra=layer2_seed.CLUSTER_CENTER_RA, dec=layer2_seed.CLUSTER_CENTER_DEC, radius=RADIUS_DEG
+        )
+    return interface.QuerySimpleRequest(
+        ra=((i * 222493) % 360000) / 1000,
+        dec=((i * 381966) % 1000000) / 500000 * 180 - 90,
+        radius=RADIUS_DEG,
+    )
+
+
+async def _qps(storage_config: postgres.PgStorageConfig, use_snapshot: bool) -> float:
+    logger = structlog.get_logger()
+    config = command.parse_config("configs/dev/dataapi.yaml")
+    storage = postgres.AsyncPgStorage(storage_config, logger, data_enums.PG_ENUM_REGISTRY)
+    repo = repositories.AsyncLayer2Repository(storage, logger)
+    snapshot = domain.ICRSSnapshot(repo, 60.0, logger) if use_snapshot else None
+    manager = parameterized_query.ParameterizedQueryManager(
+        repo, actions.ENABLED_CATALOGS, config.catalogs, snapshot=snapshot
+    )
+    queries = [_query(i) for i in range(REQUESTS)]
+    semaphore = asyncio.Semaphore(IN_FLIGHT)
+
+    async def run(query: interface.QuerySimpleRequest) -> None:
+        async with semaphore:
+            await manager.query_simple(query)
+
+    await storage.connect()
+    try:
+        if snapshot is not None:
+            await snapshot.load()
+        await asyncio.gather(*(run(query) for query in queries[: layer2_seed.WARMUP_REQUESTS]))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(run(query) for query in queries))
+        return REQUESTS / (time.perf_counter() - started)
+    finally:
+        await storage.disconnect()
+
+
+class ICRSSnapshotBenchTest(unittest.TestCase):
+    """
+    Compares the throughput of 1 arcmin cone searches answered by PostGIS against the in-memory snapshot of
+    layer2.icrs, where only the objects of the page are read from the database.
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.pg_storage = layer2_seed.seed_query_simple_bench()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.pg_storage.clear()
+
+    def test_snapshot_against_postgis(self) -> None:
+        postgis = asyncio.run(_qps(self.pg_storage.config, use_snapshot=False))
+        snapshot = asyncio.run(_qps(self.pg_storage.config, use_snapshot=True))
+
+        print(
+            f"cone searches, {IN_FLIGHT} in flight: PostGIS {postgis:.1f} req/s, snapshot {snapshot:.1f} req/s "
+            f"({layer2_seed.N_OBJECTS} objects)"
+        )
+
+        self.assertGreater(snapshot, postgis * MIN_SPEEDUP)
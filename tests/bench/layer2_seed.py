@@ -4,9 +4,11 @@ import statistics
 import time
 from collections.abc import Callable
 
+import fastapi
 import structlog
 from fastapi import testclient
 
+from app.data import enums as data_enums
 from app.data import repositories
 from app.dataapi import command, domain, presentation
 from app.lib import auth
@@ -50,6 +52,7 @@ def seed_layer2(storage: postgres.PgStorage, n_objects: int) -> None:
         """,
         params=[CLUSTER_SIZE, CLUSTER_NAME, n_objects],
     )
+    storage.exec("INSERT INTO layer2.designation_keys (pgc, design) SELECT pgc, design FROM layer2.designation")
     # Cluster members sit on a small grid around the centre; everything else is spread over the
     # sphere by a golden-angle sequence in RA and an arcsine transform in declination, so the
     # distribution is uniform in area rather than piling up at the poles.
@@ -101,18 +104,20 @@ def seed_layer2(storage: postgres.PgStorage, n_objects: int) -> None:
         params=[n_objects],
     )
 
-    for table in ("designation", "icrs", "cz", "nature"):
+    for table in ("designation", "designation_keys", "icrs", "cz", "nature"):
         storage.exec(f"ANALYZE layer2.{table}")
 
 
-def build_client(storage: postgres.PgStorage) -> tuple[testclient.TestClient, str]:
+def build_app(storage_config: postgres.PgStorageConfig) -> tuple[fastapi.FastAPI, str]:
     logger = structlog.get_logger()
     # Only the catalogs block is taken from the dev config; storage comes from the test container.
     config = command.parse_config("configs/dev/dataapi.yaml")
+    storage = postgres.AsyncPgStorage(storage_config, logger, data_enums.PG_ENUM_REGISTRY)
     actions = domain.Actions(
-        layer2_repo=repositories.Layer2Repository(storage, logger),
+        layer2_repo=repositories.AsyncLayer2Repository(storage, logger),
         catalog_cfg=config.catalogs,
-        metadata_repo=repositories.MetadataRepository(storage),
+        metadata_repo=repositories.AsyncMetadataRepository(storage),
+        storage=storage,
     )
     server = presentation.Server(
         actions,
@@ -120,12 +125,21 @@ def build_client(storage: postgres.PgStorage) -> tuple[testclient.TestClient, st
         logger,
         auth.NoopAuthenticator(),
         auth_enabled=False,
+        lifespan=command.storage_lifespan(storage),
     )
 
-    return testclient.TestClient(server.app), f"{config.server.path_prefix}/v1/query/simple"
+    return server.app, f"{config.server.path_prefix}/v1/query/simple"
 
 
-def setup_query_simple_bench() -> tuple[lib.TestPostgresStorage, testclient.TestClient, str]:
+def build_client(storage_config: postgres.PgStorageConfig) -> tuple[testclient.TestClient, str]:
+    """
+    The returned client has to be entered as a context manager so that the storage pool is opened.
+    """
+    app, url = build_app(storage_config)
+    return testclient.TestClient(app), url
+
+
+def seed_query_simple_bench() -> lib.TestPostgresStorage:
     structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
     pg_storage = lib.TestPostgresStorage.get()
     storage = pg_storage.get_storage()
@@ -135,7 +149,12 @@ def setup_query_simple_bench() -> tuple[lib.TestPostgresStorage, testclient.Test
     seed_layer2(storage, N_OBJECTS)
     print(f"Seed completed in {time.perf_counter() - seed_started:.2f}s")
 
-    client, url = build_client(storage)
+    return pg_storage
+
+
+def setup_query_simple_bench() -> tuple[lib.TestPostgresStorage, testclient.TestClient, str]:
+    pg_storage = seed_query_simple_bench()
+    client, url = build_client(pg_storage.config)
     return pg_storage, client, url
 
 
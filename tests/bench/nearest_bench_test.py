@@ -0,0 +1,88 @@
+import asyncio
+import statistics
+import time
+import unittest
+
+import structlog
+from astropy import units as u
+
+from app.data import enums as data_enums
+from app.data import model, repositories
+from app.data.repositories import layer2
+from app.lib.storage import postgres
+from tests.bench import layer2_seed
+
+N_SEARCHES = 200
+NEAREST = (1, 10, 100)
+RADIUS = 5 * u.Unit("deg")
+
+
+def _center(i: int) -> tuple[float, float]:
+    # Offset from the golden-angle sequence of the seeded objects so that centres do not sit on top of them.
+    return ((i * 222493) % 360000) / 1000, ((i * 381966) % 1000000) / 500000 * 180 - 90
+
+
+async def _run(storage_config: postgres.PgStorageConfig, n: int) -> dict[str, tuple[list[float], list[list[int]]]]:
+    storage = postgres.AsyncPgStorage(storage_config, structlog.get_logger(), data_enums.PG_ENUM_REGISTRY)
+    repo = repositories.AsyncLayer2Repository(storage, structlog.get_logger())
+
+    def sorted_cone(ra: u.Quantity, dec: u.Quantity) -> tuple[layer2.Filter, layer2.Ordering]:
+        return layer2.ICRSCoordinatesInRadiusFilter(RADIUS), layer2.ICRSDistanceOrdering(ra, dec)
+
+    def knn(ra: u.Quantity, dec: u.Quantity) -> tuple[layer2.Filter, layer2.Ordering]:
+        return layer2.ICRSNearestFilter(ra, dec, RADIUS), layer2.ICRSNearestOrdering(ra, dec)
+
+    results: dict[str, tuple[list[float], list[list[int]]]] = {}
+    await storage.connect()
+    try:
+        for label, build in (("sorted_cone", sorted_cone), ("knn", knn)):
+            timings: list[float] = []
+            found: list[list[int]] = []
+            for i in range(N_SEARCHES):
+                ra, dec = (value * u.Unit("deg") for value in _center(i))
+                search_filter, ordering = build(ra, dec)
+                started = time.perf_counter()
+                objects = await repo.query_catalogs(
+                    [model.RawCatalog.ICRS],
+                    search_filter,
+                    layer2.ICRSSearchParams(ra, dec),
+                    n,
+                    0,
+                    ordering=ordering,
+                )
+                timings.append(time.perf_counter() - started)
+                found.append([obj.pgc for obj in objects])
+            results[label] = (sorted(timings), found)
+        return results
+    finally:
+        await storage.disconnect()
+
+
+class NearestBenchTest(unittest.TestCase):
+    """
+    Compares nearest neighbour searches through the `<->` ordering of the geography index against sorting every
+    object of a large cone by distance. Set BENCH_QUERY_N_OBJECTS=10000000 for the large run.
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.pg_storage = layer2_seed.seed_query_simple_bench()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.pg_storage.clear()
+
+    def test_knn_against_sorted_cone(self) -> None:
+        for n in NEAREST:
+            results = asyncio.run(_run(self.pg_storage.config, n))
+
+            for label, (timings, _) in results.items():
+                print(
+                    f"nearest {n} within {RADIUS} via {label}: "
+                    f"median {statistics.median(timings) * 1000:.2f}ms, "
+                    f"p95 {timings[int(len(timings) * 0.95) - 1] * 1000:.2f}ms "
+                    f"({N_SEARCHES} searches, {layer2_seed.N_OBJECTS} objects)"
+                )
+
+            # Both orderings break distance ties by PGC number, so they return the same objects in the same order.
+            self.assertEqual(results["knn"][1], results["sorted_cone"][1])
@@ -0,0 +1,73 @@
+import asyncio
+import statistics
+import time
+import unittest
+
+import structlog
+
+from app.data import enums as data_enums
+from app.data import repositories
+from app.dataapi import command, domain
+from app.dataapi.domain import actions, parameterized_query
+from app.dataapi.presentation import interface
+from app.lib.storage import postgres
+from tests.bench import layer2_seed
+
+HOT_PGCS = list(range(1, 26))
+REQUESTS = 1000
+MAX_MEDIAN_SECONDS = 0.001
+
+
+async def _run(storage_config: postgres.PgStorageConfig) -> tuple[float, list[float], domain.ObjectCache]:
+    logger = structlog.get_logger()
+    config = command.parse_config("configs/dev/dataapi.yaml")
+    storage = postgres.AsyncPgStorage(storage_config, logger, data_enums.PG_ENUM_REGISTRY)
+    cache = domain.ObjectCache(max_entries=1000)
+    manager = parameterized_query.ParameterizedQueryManager(
+        repositories.AsyncLayer2Repository(storage, logger), actions.ENABLED_CATALOGS, config.catalogs, cache
+    )
+    query = interface.QuerySimpleRequest(pgcs=HOT_PGCS, page_size=len(HOT_PGCS))
+
+    await storage.connect()
+    try:
+        started = time.perf_counter()
+        await manager.query_simple(query)
+        cold = time.perf_counter() - started
+
+        timings = []
+        for _ in range(REQUESTS):
+            started = time.perf_counter()
+            await manager.query_simple(query)
+            timings.append(time.perf_counter() - started)
+        return cold, sorted(timings), cache
+    finally:
+        await storage.disconnect()
+
+
+class ObjectCacheBenchTest(unittest.TestCase):
+    """
+    Measures server-side time of a page of hot objects once it is in the object cache, excluding HTTP and JSON
+    encoding.
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.pg_storage = layer2_seed.seed_query_simple_bench()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.pg_storage.clear()
+
+    def test_hot_page(self) -> None:
+        cold, timings, cache = asyncio.run(_run(self.pg_storage.config))
+
+        median = statistics.median(timings)
+        stats = cache.stats()
+        print(
+            f"query_simple hot page of {len(HOT_PGCS)} objects: cold {cold * 1000:.1f}ms, "
+            f"median {median * 1000:.3f}ms, p95 {timings[int(len(timings) * 0.95) - 1] * 1000:.3f}ms "
+            f"(hits {stats.hits}, misses {stats.misses})"
+        )
+
+        self.assertEqual(stats.misses, len(HOT_PGCS))
+        self.assertLess(median, MAX_MEDIAN_SECONDS)
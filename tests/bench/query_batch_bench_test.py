@@ -0,0 +1,62 @@
+import json
+import time
+import unittest
+
+from tests.bench import layer2_seed
+
+N_ENTRIES = 5000
+N_SINGLE_REQUESTS = 200
+RADIUS_DEG = 1 / 60
+MIN_SPEEDUP = 10.0
+
+
+def _entry(i: int) -> dict[str, object]:
+    # Spread the cones over the same golden-angle sequence that places the seeded objects.
+    return {
+        "id": f"e{i}",
+        "ra": ((i * 137508) % 360000) / 1000,
+        "dec": ((i * 618034) % 1000000) / 500000 * 180 - 90,
+        "radius": RADIUS_DEG,
+    }
+
+
+class QueryBatchBenchTest(unittest.TestCase):
+    """
+    Compares the throughput of cone searches sent in one batch request against the same searches sent one
+    request at a time to `/v1/query/simple`.
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.pg_storage, client, cls.url = layer2_seed.setup_query_simple_bench()
+        cls.client = cls.enterClassContext(client)
+        cls.batch_url = cls.url.replace("/v1/query/simple", "/v1/query/batch")
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.pg_storage.clear()
+
+    def test_batch_against_single_requests(self) -> None:
+        entries = [_entry(i) for i in range(N_ENTRIES)]
+
+        started = time.perf_counter()
+        for entry in entries[:N_SINGLE_REQUESTS]:
+            response = self.client.get(
+                self.url, params={"ra": entry["ra"], "dec": entry["dec"], "radius": entry["radius"]}
+            )
+            self.assertEqual(response.status_code, 200)
+        single_rate = N_SINGLE_REQUESTS / (time.perf_counter() - started)
+
+        started = time.perf_counter()
+        response = self.client.post(self.batch_url, json={"entries": entries})
+        lines = response.text.splitlines()
+        batch_rate = N_ENTRIES / (time.perf_counter() - started)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([json.loads(line)["id"] for line in lines], [entry["id"] for entry in entries])
+        print(
+            f"cone searches: {single_rate:.1f} entries/s one per request, "
+            f"{batch_rate:.1f} entries/s in a batch of {N_ENTRIES} ({layer2_seed.N_OBJECTS} objects)"
+        )
+
+        self.assertGreater(batch_rate, single_rate * MIN_SPEEDUP)
@@ -0,0 +1,79 @@
+import asyncio
+import statistics
+import time
+import unittest
+
+import structlog
+
+from app.data import enums as data_enums
+from app.data import model, repositories
+from app.lib.storage import postgres
+from tests.bench import layer2_seed
+
+CATALOGS = [
+    model.RawCatalog.DESIGNATION,
+    model.RawCatalog.ICRS,
+    model.RawCatalog.REDSHIFT,
+    model.RawCatalog.NATURE,
+]
+PAGE_SIZE = 25
+IN_FLIGHT = 200
+MAX_P95_SECONDS = 30.0
+
+
+def _pgcs(request_number: int) -> list[int]:
+    start = (request_number * 7919) % (layer2_seed.N_OBJECTS - PAGE_SIZE) + 1
+    return list(range(start, start + PAGE_SIZE))
+
+
+async def _run(storage_config: postgres.PgStorageConfig, single_statement: bool) -> tuple[list[float], float]:
+    storage = postgres.AsyncPgStorage(storage_config, structlog.get_logger(), data_enums.PG_ENUM_REGISTRY)
+    repo = repositories.AsyncLayer2Repository(
+        storage, structlog.get_logger(), single_statement_pgc_query=single_statement
+    )
+
+    async def timed(request_number: int) -> float:
+        started = time.perf_counter()
+        objects = await repo.query_pgc(CATALOGS, _pgcs(request_number), PAGE_SIZE)
+        assert len(objects) == PAGE_SIZE
+        return time.perf_counter() - started
+
+    await storage.connect()
+    try:
+        await asyncio.gather(*(timed(i) for i in range(layer2_seed.WARMUP_REQUESTS)))
+
+        started = time.perf_counter()
+        timings = await asyncio.gather(*(timed(i) for i in range(IN_FLIGHT)))
+        return sorted(timings), time.perf_counter() - started
+    finally:
+        await storage.disconnect()
+
+
+class QueryPGCBenchTest(unittest.TestCase):
+    """
+    Compares fetching four catalogs for a page of PGC numbers with one query per catalog against a single
+    statement, with many requests in flight so that both compete for pool connections.
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.pg_storage = layer2_seed.seed_query_simple_bench()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.pg_storage.clear()
+
+    def test_single_statement_against_fan_out(self) -> None:
+        for label, single_statement in (("per catalog", False), ("single statement", True)):
+            timings, wall = asyncio.run(_run(self.pg_storage.config, single_statement))
+
+            p95 = timings[int(len(timings) * 0.95) - 1]
+            print(
+                f"query_pgc {label}, {IN_FLIGHT} in flight: "
+                f"{IN_FLIGHT / wall:.1f} req/s, "
+                f"median {statistics.median(timings) * 1000:.1f}ms, "
+                f"p95 {p95 * 1000:.1f}ms "
+                f"({layer2_seed.N_OBJECTS} objects)"
+            )
+
+            self.assertLess(p95, MAX_P95_SECONDS)
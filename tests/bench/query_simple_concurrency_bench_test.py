@@ -0,0 +1,76 @@
+import asyncio
+import statistics
+import time
+import unittest
+
+import httpx
+
+from tests.bench import layer2_seed
+
+PARAMS = {
+    "ra": layer2_seed.CLUSTER_CENTER_RA,
+    "dec": layer2_seed.CLUSTER_CENTER_DEC,
+    "eq_epoch": "J2000",
+    "radius": 1 / 60,
+    "page": 0,
+    "page_size": 25,
+}
+IN_FLIGHT_LEVELS = [50, 200, 1000]
+MAX_P95_SECONDS = 30.0
+
+
+async def _timed_get(client: httpx.AsyncClient, url: str) -> tuple[int, float]:
+    started = time.perf_counter()
+    response = await client.get(url, params=PARAMS)
+    return response.status_code, time.perf_counter() - started
+
+
+async def _run_levels(app, url: str) -> dict[int, tuple[list[int], list[float], float]]:
+    results: dict[int, tuple[list[int], list[float], float]] = {}
+    transport = httpx.ASGITransport(app=app)
+
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            await asyncio.gather(*(_timed_get(client, url) for _ in range(layer2_seed.WARMUP_REQUESTS)))
+
+            for in_flight in IN_FLIGHT_LEVELS:
+                started = time.perf_counter()
+                responses = await asyncio.gather(*(_timed_get(client, url) for _ in range(in_flight)))
+                wall = time.perf_counter() - started
+                results[in_flight] = ([status for status, _ in responses], [t for _, t in responses], wall)
+
+    return results
+
+
+class QuerySimpleConcurrencyBenchTest(unittest.TestCase):
+    """
+    Fires batches of simultaneous coordinate queries at the data API to show how throughput
+    scales with the number of in-flight requests on the async storage.
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.pg_storage = layer2_seed.seed_query_simple_bench()
+        cls.app, cls.url = layer2_seed.build_app(cls.pg_storage.config)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.pg_storage.clear()
+
+    def test_concurrent_coordinate_queries(self) -> None:
+        results = asyncio.run(_run_levels(self.app, self.url))
+
+        for in_flight, (statuses, timings, wall) in results.items():
+            self.assertTrue(all(status == 200 for status in statuses))
+
+            timings.sort()
+            p95 = timings[int(len(timings) * 0.95) - 1]
+            print(
+                f"query/simple concurrency {in_flight}: "
+                f"{in_flight / wall:.1f} req/s, "
+                f"median {statistics.median(timings) * 1000:.1f}ms, "
+                f"p95 {p95 * 1000:.1f}ms "
+                f"({layer2_seed.N_OBJECTS} objects)"
+            )
+
+            self.assertLess(p95, MAX_P95_SECONDS)
@@ -16,7 +16,8 @@ MAX_MEDIAN_SECONDS = 1.0
 class QuerySimpleCoordinatesBenchTest(unittest.TestCase):
     @classmethod
     def setUpClass(cls) -> None:
-        cls.pg_storage, cls.client, cls.url = layer2_seed.setup_query_simple_bench()
+        cls.pg_storage, client, cls.url = layer2_seed.setup_query_simple_bench()
+        cls.client = cls.enterClassContext(client)
 
     @classmethod
     def tearDownClass(cls) -> None:
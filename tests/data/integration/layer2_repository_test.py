@@ -7,6 +7,7 @@ from astropy import units as u
 
 from app.data import model, repositories
 from app.data.repositories import layer2
+from app.data.repositories.layer2 import repository as layer2_repository
 from tests import lib
 
 
@@ -173,6 +174,28 @@ class Layer2RepositoryTest(unittest.TestCase):
 
         lib.assert_layer2_catalog_objects_equal(self, actual, expected)
 
+    def test_pgc_list_with_cone(self):
+        objects: list[model.Layer2CatalogObject] = [
+            model.Layer2CatalogObject(1, [model.ICRSCatalogObject(ra=10, dec=10, e_ra=0.1, e_dec=0.1)]),
+            model.Layer2CatalogObject(2, [model.ICRSCatalogObject(ra=40, dec=40, e_ra=0.1, e_dec=0.1)]),
+            model.Layer2CatalogObject(3, [model.ICRSCatalogObject(ra=11, dec=11, e_ra=0.1, e_dec=0.1)]),
+        ]
+
+        self.common_repo.register_pgcs([1, 2, 3])
+        self._save_layer2_data(objects)
+
+        # The PGC list is the most selective filter, so the cone is checked only for its objects.
+        actual = self.layer2_repo.query_catalogs(
+            [model.RawCatalog.ICRS],
+            layer2.AndFilter([layer2.PGCOneOfFilter([1, 2]), layer2.ICRSCoordinatesInRadiusFilter(10 * u.Unit("deg"))]),
+            layer2.ICRSSearchParams(12 * u.Unit("deg"), 12 * u.Unit("deg")),
+            10,
+            0,
+        )
+        expected = [model.Layer2CatalogObject(1, [model.ICRSCatalogObject(ra=10, dec=10, e_ra=0.1, e_dec=0.1)])]
+
+        lib.assert_layer2_catalog_objects_equal(self, actual, expected)
+
     def test_pagination(self):
         objects: list[model.Layer2CatalogObject] = [
             model.Layer2CatalogObject(1, [model.ICRSCatalogObject(ra=10, dec=10, e_ra=0.1, e_dec=0.1)]),
@@ -267,6 +290,40 @@ class Layer2RepositoryTest(unittest.TestCase):
 
         self.assertEqual({obj.pgc for obj in actual}, {1, 2})
 
+    def test_zone_cone_search_matches_geography(self):
+        objects: list[model.Layer2CatalogObject] = [
+            model.Layer2CatalogObject(1, [model.ICRSCatalogObject(ra=359.99, dec=0, e_ra=0.1, e_dec=0.1)]),
+            model.Layer2CatalogObject(2, [model.ICRSCatalogObject(ra=0.01, dec=0.02, e_ra=0.1, e_dec=0.1)]),
+            model.Layer2CatalogObject(3, [model.ICRSCatalogObject(ra=100, dec=80, e_ra=0.1, e_dec=0.1)]),
+            model.Layer2CatalogObject(4, [model.ICRSCatalogObject(ra=102, dec=80, e_ra=0.1, e_dec=0.1)]),
+            model.Layer2CatalogObject(5, [model.ICRSCatalogObject(ra=280, dec=89.8, e_ra=0.1, e_dec=0.1)]),
+            model.Layer2CatalogObject(6, [model.ICRSCatalogObject(ra=10, dec=89.9, e_ra=0.1, e_dec=0.1)]),
+            model.Layer2CatalogObject(7, [model.ICRSCatalogObject(ra=180, dec=0, e_ra=0.1, e_dec=0.1)]),
+        ]
+
+        self.common_repo.register_pgcs([obj.pgc for obj in objects])
+        self._save_layer2_data(objects)
+
+        for ra, dec, radius in ((0.0, 0.0, 0.05), (100.0, 80.0, 0.5), (0.0, 90.0, 0.3), (180.0, 0.0, 1.0)):
+            with self.subTest(ra=ra, dec=dec, radius=radius):
+                zone = self.layer2_repo.query_catalogs(
+                    [model.RawCatalog.ICRS],
+                    layer2.ICRSCoordinatesInZoneRadiusFilter(radius * u.Unit("deg")),
+                    layer2.ICRSSearchParams(ra * u.Unit("deg"), dec * u.Unit("deg")),
+                    10,
+                    0,
+                    ordering=layer2.ICRSAngularDistanceOrdering(ra * u.Unit("deg"), dec * u.Unit("deg")),
+                )
+                geography = self._query_icrs_in_radius(
+                    ra=ra,
+                    dec=dec,
+                    radius=radius,
+                    ordering=layer2.ICRSDistanceOrdering(ra * u.Unit("deg"), dec * u.Unit("deg")),
+                )
+
+                self.assertGreater(len(zone), 0)
+                self.assertEqual([obj.pgc for obj in zone], [obj.pgc for obj in geography])
+
     def test_distance_ordering_sorts_by_true_angular_separation(self):
         # pgc 1 is 2.0 degrees away and pgc 2 is 2.5 degrees away. Swapping ra and dec in the
         # ordering expression would reverse this, so the order pins down the argument order.
@@ -287,6 +344,37 @@ class Layer2RepositoryTest(unittest.TestCase):
 
         self.assertEqual([obj.pgc for obj in actual], [1, 2])
 
+    def test_keyset_pages_follow_distance_ordering(self):
+        # pgc 2 and 3 are at the same distance from the centre, so the page boundary falls between equal distances.
+        objects: list[model.Layer2CatalogObject] = [
+            model.Layer2CatalogObject(1, [model.ICRSCatalogObject(ra=10, dec=11, e_ra=0.1, e_dec=0.1)]),
+            model.Layer2CatalogObject(2, [model.ICRSCatalogObject(ra=10, dec=12, e_ra=0.1, e_dec=0.1)]),
+            model.Layer2CatalogObject(3, [model.ICRSCatalogObject(ra=10, dec=8, e_ra=0.1, e_dec=0.1)]),
+            model.Layer2CatalogObject(4, [model.ICRSCatalogObject(ra=10, dec=13, e_ra=0.1, e_dec=0.1)]),
+        ]
+
+        self.common_repo.register_pgcs([1, 2, 3, 4])
+        self._save_layer2_data(objects)
+
+        pages: list[list[int]] = []
+        after = None
+        while True:
+            page = self.layer2_repo.query_catalogs(
+                [model.RawCatalog.ICRS],
+                layer2.ICRSCoordinatesInRadiusFilter(5 * u.Unit("deg")),
+                layer2.ICRSSearchParams(10 * u.Unit("deg"), 10 * u.Unit("deg")),
+                2,
+                0,
+                ordering=layer2.ICRSDistanceOrdering(10 * u.Unit("deg"), 10 * u.Unit("deg")),
+                after=after,
+            )
+            if not page:
+                break
+            pages.append([obj.pgc for obj in page])
+            after = page[-1].sort_key
+
+        self.assertEqual(pages, [[1, 2], [3, 4]])
+
     def test_coordinate_filter_when_icrs_catalog_not_requested(self):
         objects = [
             model.Layer2CatalogObject(
@@ -453,6 +541,16 @@ class Layer2RepositoryTest(unittest.TestCase):
             [model.Layer2CatalogObject(2, [model.DesignationCatalogObject(design="d2")])],
         )
 
+    def test_remove_pgcs_updates_removal_time(self) -> None:
+        query = "SELECT dt FROM layer2.last_update WHERE catalog = %s"
+        storage = self.pg_storage.get_storage()
+        before = storage.query_one(query, params=[layer2_repository.REMOVAL_LAST_UPDATE])["dt"]
+
+        self.layer2_repo.remove_pgcs([model.RawCatalog.DESIGNATION], [1])
+
+        after = storage.query_one(query, params=[layer2_repository.REMOVAL_LAST_UPDATE])["dt"]
+        self.assertGreater(after, before)
+
     def test_query_photometry_total(self) -> None:
         self._get_table("phot_table")
         self.layer0_repo.register_records("phot_table", ["r1"])
@@ -482,3 +580,29 @@ class Layer2RepositoryTest(unittest.TestCase):
         self.assertIsNotNone(measurement.e_mag)
         assert measurement.e_mag is not None
         self.assertAlmostEqual(measurement.e_mag, 0.1)
+
+    def test_query_pgc_single_statement_matches_per_catalog_queries(self) -> None:
+        objects = [
+            model.Layer2CatalogObject(
+                1,
+                [
+                    model.ICRSCatalogObject(ra=10, dec=10, e_ra=0.1, e_dec=0.1),
+                    model.DesignationCatalogObject(design="test1"),
+                    model.RedshiftCatalogObject(cz=100, e_cz=1),
+                ],
+            ),
+            model.Layer2CatalogObject(2, [model.DesignationCatalogObject(design="test2")]),
+        ]
+        self.common_repo.register_pgcs([1, 2, 3])
+        self._save_layer2_data(objects)
+        single_statement_repo = repositories.Layer2Repository(
+            self.pg_storage.get_storage(), structlog.get_logger(), single_statement_pgc_query=True
+        )
+        catalogs = [model.RawCatalog.DESIGNATION, model.RawCatalog.ICRS, model.RawCatalog.REDSHIFT]
+
+        expected = self.layer2_repo.query_pgc(catalogs, [1, 2, 3], limit=10)
+        actual = single_statement_repo.query_pgc(catalogs, [1, 2, 3], limit=10)
+
+        self.assertEqual(actual, expected)
+        self.assertIsNotNone(actual[0].catalogs.redshift)
+        self.assertIsNone(actual[1].catalogs.icrs)
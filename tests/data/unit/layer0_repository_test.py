@@ -9,7 +9,6 @@ from psycopg import sql
 
 from app.data.repositories import Layer0Repository
 from app.lib.storage import enums
-from tests import lib
 
 
 def normalize_query(s: str | sql.Composable) -> str:
@@ -53,10 +52,10 @@ class Layer0RepositoryTest(unittest.TestCase):
         ]
     )
     def test_fetch_raw_data(self, _: str, kwargs: dict, expected_query: str):
-        lib.returns(self.storage_mock.query, {"haha": [1, 2]})
+        self.storage_mock.stream.return_value = iter([[{"haha": 1}, {"haha": 2}]])
 
         self.repo.fetch_raw_data("ironman", **kwargs)
-        args, _ = self.storage_mock.query.call_args
+        args, _ = self.storage_mock.stream.call_args
 
         actual = normalize_query(args[0])
         expected = normalize_query(expected_query)
@@ -1,11 +1,14 @@
+import math
 import re
 import unittest
 from unittest import mock
 
+import numpy as np
 from astropy import units as u
 
 from app.data import model
 from app.data.repositories import layer2
+from app.data.repositories.layer2 import planner, queries, stats
 
 
 class QueryCatalogsJoinTest(unittest.TestCase):
@@ -53,6 +56,30 @@ class QueryCatalogsJoinTest(unittest.TestCase):
             query,
         )
 
+    def test_zone_filter_drives_join(self):
+        search_filter = layer2.ICRSCoordinatesInZoneRadiusFilter(1 * u.Unit("arcmin"))
+        query = self._query_for(
+            [model.RawCatalog.DESIGNATION, model.RawCatalog.ICRS],
+            search_filter,
+            layer2.CombinedSearchParams([layer2.ICRSSearchParams(10 * u.Unit("deg"), 10 * u.Unit("deg"))]),
+        )
+
+        self.assertIn("CROSS JOIN layer2.icrs LEFT JOIN layer2.designation USING (pgc)", query)
+        self.assertIn("layer2.icrs.zone = ANY(layer2.sky_zones(", query)
+        self.assertEqual(search_filter.get_query().count("%s"), len(search_filter.get_params()))
+        self.assertAlmostEqual(search_filter.get_params()[0], 1 / 60)
+
+    def test_table_stats_are_read_once(self):
+        for _ in range(2):
+            self._query_for(
+                [model.RawCatalog.ICRS],
+                layer2.ICRSCoordinatesInRadiusFilter(1 * u.Unit("arcmin")),
+                layer2.CombinedSearchParams([layer2.ICRSSearchParams(10 * u.Unit("deg"), 10 * u.Unit("deg"))]),
+            )
+
+        queries_run = [call.args[0] for call in self.storage.query.call_args_list]
+        self.assertEqual(queries_run.count(stats.TABLE_STATS_QUERY), 1)
+
     def test_pgc_filter_keeps_full_join(self):
         query = self._query_for(
             [model.RawCatalog.DESIGNATION, model.RawCatalog.ICRS],
@@ -103,3 +130,341 @@ class QueryCatalogsJoinTest(unittest.TestCase):
 
         self.assertIn("CROSS JOIN layer2.designations LEFT JOIN layer2.cz USING (pgc)", query)
         self.assertNotIn('"designation|design"', query)
+
+
+class QueryPlannerTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.stats = stats.TableStats({"layer2.icrs": 5_000_000, "layer2.designations": 10_000_000})
+
+    def _construct(self, search_filter: layer2.Filter, search_params: layer2.SearchParams) -> tuple[str, list]:
+        search_types = {search_params.name(): search_filter}
+        plan = planner.plan(search_types, {"obj": search_params}, self.stats)
+        query, params = queries.construct_batch_query(
+            [model.RawCatalog.DESIGNATION, model.RawCatalog.ICRS],
+            search_types,
+            {"obj": search_params},
+            25,
+            0,
+            plan=plan,
+        )
+        return re.sub(r"\s+", " ", query), params
+
+    def _name_and_cone(self, radius: u.Quantity) -> tuple[layer2.Filter, layer2.SearchParams]:
+        return layer2.AndFilter(
+            [layer2.ICRSCoordinatesInRadiusFilter(radius), layer2.DesignationLikeFilter()]
+        ), layer2.CombinedSearchParams(
+            [
+                layer2.ICRSSearchParams(10 * u.Unit("deg"), 10 * u.Unit("deg")),
+                layer2.DesignationSearchParams("IC 1440"),
+            ]
+        )
+
+    def test_small_cone_provides_candidates_for_name(self):
+        search_filter, search_params = self._name_and_cone(1 * u.Unit("arcmin"))
+
+        plan = planner.plan({"icrs_designation": search_filter}, {"obj": search_params}, self.stats)
+        query, params = self._construct(search_filter, search_params)
+
+        self.assertTrue(plan.two_phase)
+        self.assertIsInstance(plan.candidates, layer2.ICRSCoordinatesInRadiusFilter)
+        self.assertIn("candidates AS MATERIALIZED ( SELECT DISTINCT sp.record_id, pgc", query)
+        self.assertIn("CROSS JOIN layer2.icrs WHERE sp.search_type = 'icrs_designation' AND", query)
+        self.assertIn(
+            "CROSS JOIN candidates LEFT JOIN layer2.designation USING (pgc) LEFT JOIN layer2.icrs USING (pgc) "
+            "LEFT JOIN layer2.designations USING (pgc) WHERE candidates.record_id = sp.record_id AND",
+            query,
+        )
+        self.assertNotIn("FULL JOIN", query)
+        self.assertEqual(query.count("%s"), len(params))
+
+    def test_specific_name_provides_candidates_for_large_cone(self):
+        search_filter, search_params = self._name_and_cone(20 * u.Unit("deg"))
+
+        plan = planner.plan({"icrs_designation": search_filter}, {"obj": search_params}, self.stats)
+        query, _ = self._construct(search_filter, search_params)
+
+        self.assertIsInstance(plan.candidates, layer2.DesignationLikeFilter)
+        self.assertIn("CROSS JOIN layer2.designations WHERE sp.search_type", query)
+        self.assertEqual(
+            [estimate["filter"] for estimate in plan.describe()["estimates"]],
+            ["ICRSCoordinatesInRadiusFilter", "DesignationLikeFilter"],
+        )
+
+    def test_short_pgc_list_provides_candidates(self):
+        plan = planner.plan(
+            {
+                "icrs": layer2.AndFilter(
+                    [layer2.ICRSCoordinatesInRadiusFilter(5 * u.Unit("deg")), layer2.PGCOneOfFilter([1, 2, 3])]
+                )
+            },
+            {"obj": layer2.ICRSSearchParams(10 * u.Unit("deg"), 10 * u.Unit("deg"))},
+            self.stats,
+        )
+
+        self.assertIsInstance(plan.candidates, layer2.PGCOneOfFilter)
+        self.assertEqual(plan.estimated_rows, 3)
+        self.assertEqual(plan.describe()["candidates"], "common.pgc AS pgc_list(pgc)")
+
+    def test_single_table_stays_single_phase(self):
+        plan = planner.plan(
+            {"designation": layer2.DesignationLikeFilter()},
+            {"obj": layer2.DesignationSearchParams("IC 1440")},
+            self.stats,
+        )
+
+        self.assertFalse(plan.two_phase)
+        self.assertEqual(plan.driving_table, "layer2.designations")
+        self.assertEqual(plan.describe()["strategy"], "single_phase")
+
+    def test_cone_estimate_follows_sky_density(self):
+        radius = 1 * u.Unit("deg")
+        estimate = layer2.ICRSCoordinatesInRadiusFilter(radius).estimate_rows({}, self.stats)
+
+        # A 1 degree cone covers about 3.14 of the 41253 square degrees of the sky.
+        self.assertIsNotNone(estimate)
+        self.assertAlmostEqual((estimate or 0) / 5_000_000, math.pi / 41253, places=6)
+
+
+class GalacticRangeFilterTest(unittest.TestCase):
+    def test_latitude_band(self):
+        search_filter = layer2.GalacticRangeFilter(lat_min=20 * u.Unit("deg"))
+
+        self.assertEqual(search_filter.get_query(), "layer2.icrs.glat >= %s")
+        self.assertEqual(search_filter.get_params(), [20.0])
+        self.assertEqual(search_filter.driving_table(), "layer2.icrs")
+
+    def test_longitude_range_wraps_around_zero(self):
+        search_filter = layer2.GalacticRangeFilter(lon_min=350 * u.Unit("deg"), lon_max=10 * u.Unit("deg"))
+
+        self.assertEqual(search_filter.get_query(), "(layer2.icrs.glon >= %s OR layer2.icrs.glon <= %s)")
+        self.assertEqual(search_filter.get_params(), [350.0, 10.0])
+
+    def test_estimate_follows_sky_area(self):
+        table_stats = stats.TableStats({"layer2.icrs": 1000.0})
+        northern = layer2.GalacticRangeFilter(lat_min=0 * u.Unit("deg"))
+        wrapped = layer2.GalacticRangeFilter(lon_min=350 * u.Unit("deg"), lon_max=10 * u.Unit("deg"))
+
+        self.assertAlmostEqual(northern.estimate_rows({}, table_stats) or 0, 500.0)
+        self.assertAlmostEqual(wrapped.estimate_rows({}, table_stats) or 0, 1000.0 * 20 / 360)
+
+
+class KeysetPaginationTest(unittest.TestCase):
+    def test_after_seeks_past_sort_key(self):
+        ordering = layer2.ICRSDistanceOrdering(10 * u.Unit("deg"), 20 * u.Unit("deg"))
+        query, params = queries.construct_batch_query(
+            [model.RawCatalog.ICRS],
+            {"icrs": layer2.ICRSCoordinatesInRadiusFilter(1 * u.Unit("arcmin"))},
+            {"obj": layer2.ICRSSearchParams(10 * u.Unit("deg"), 20 * u.Unit("deg"))},
+            25,
+            0,
+            ordering=ordering,
+            after=[0.5, 7],
+        )
+        query = re.sub(r"\s+", " ", query)
+
+        self.assertIn("json_build_array(ST_Distance(", query)
+        self.assertIn("), pgc) > (%s, %s) ORDER BY", query)
+        self.assertEqual(query.count("%s"), len(params))
+        self.assertEqual(params[-8:], [10.0, 20.0, 0.5, 7, 10.0, 20.0, 25, 0])
+
+    def test_nearest_is_ordered_by_index_distance(self):
+        center = (10 * u.Unit("deg"), 20 * u.Unit("deg"))
+        query, params = queries.construct_batch_query(
+            [model.RawCatalog.ICRS],
+            {"icrs": layer2.ICRSNearestFilter(*center, radius=1 * u.Unit("deg"))},
+            {"obj": layer2.ICRSSearchParams(*center)},
+            5,
+            0,
+            ordering=layer2.ICRSNearestOrdering(*center),
+        )
+        query = re.sub(r"\s+", " ", query)
+
+        self.assertIn("ORDER BY ST_MakePoint(layer2.icrs.ra, layer2.icrs.dec)::geography <-> ST_MakePoint(", query)
+        self.assertIn("CROSS JOIN layer2.icrs", query)
+        self.assertEqual(query.count("%s"), len(params))
+        self.assertEqual(params[-4:], [10.0, 20.0, 5, 0])
+
+    def test_after_requires_ordering(self):
+        with self.assertRaises(ValueError):
+            queries.construct_batch_query(
+                [model.RawCatalog.DESIGNATION],
+                {"designation": layer2.DesignationLikeFilter()},
+                {"obj": layer2.DesignationSearchParams("NGC")},
+                25,
+                0,
+                after=[1],
+            )
+
+    def test_sort_key_is_attached_to_objects(self):
+        records = [
+            {
+                "record_id": "obj",
+                "pgc": 3,
+                "designation|design": "NGC 3",
+                "designation|_present": True,
+                "sort_key": [3],
+            }
+        ]
+
+        objects = queries.group_batch_records(records)["obj"]
+
+        self.assertEqual(objects[0].sort_key, [3])
+        self.assertEqual(len(objects[0].data), 1)
+
+    def test_pgc_page_after(self):
+        self.assertEqual(queries.pgc_page([5, 1, 3, 9, 7], 2, 0, after=3), [5, 7])
+        self.assertEqual(queries.pgc_page([5, 1, 3], 2, 0, after=9), [])
+
+
+class PerRecordQueryTest(unittest.TestCase):
+    def test_entries_are_limited_independently(self):
+        query, params = queries.construct_per_record_query(
+            [model.RawCatalog.DESIGNATION],
+            layer2.ICRSCoordinatesInSearchRadiusFilter(),
+            {
+                "a": layer2.ICRSConeSearchParams(10.0, 20.0, 0.1),
+                "b": layer2.ICRSConeSearchParams(30.0, -40.0, 0.2),
+            },
+            5,
+            layer2.SearchCenterDistanceOrdering(),
+        )
+        query = re.sub(r"\s+", " ", query)
+
+        self.assertIn("FROM unnest(%s::text[], %s::jsonb[]) AS sp(record_id, params)", query)
+        self.assertIn("CROSS JOIN LATERAL", query)
+        self.assertIn("FROM layer2.icrs LEFT JOIN layer2.designation USING (pgc)", query)
+        self.assertIn("LIMIT %s", query)
+        self.assertNotIn("OFFSET", query)
+        self.assertEqual(query.count("%s"), len(params))
+        self.assertEqual(params[0], ["a", "b"])
+        self.assertEqual(params[-1], 5)
+
+
+class QueryPGCColumnsTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.storage = mock.Mock()
+        self.repo = layer2.Layer2Repository(self.storage, mock.Mock())
+
+    def test_null_coordinates_are_skipped(self):
+        self.storage.query_columns.return_value = {
+            "pgc": np.array([1, 2], dtype=np.int32),
+            "ra": np.array([10.0, 20.0]),
+            "e_ra": np.ma.MaskedArray([0.1, 0.0], mask=[False, True]),
+            "dec": np.array([-5.0, 5.0]),
+            "e_dec": np.array([0.1, 0.1]),
+            "glon": np.array([100.0, 110.0]),
+            "glat": np.array([-60.0, -50.0]),
+            "sgl": np.array([200.0, 210.0]),
+            "sgb": np.array([30.0, 40.0]),
+        }
+
+        result = self.repo.query_pgc([model.RawCatalog.ICRS], [1, 2], limit=10)
+
+        self.assertEqual([obj.pgc for obj in result], [1, 2])
+        icrs = result[0].catalogs.icrs
+        assert icrs is not None
+        self.assertEqual((icrs.ra, icrs.e_ra), (10.0, 0.1))
+        self.assertEqual((icrs.glon, icrs.glat, icrs.sgl, icrs.sgb), (100.0, -60.0, 200.0, 30.0))
+        self.assertIsNone(result[1].catalogs.icrs)
+
+    def test_frames_saved_before_precomputation_are_none(self):
+        null = np.ma.MaskedArray([0.0], mask=[True])
+        self.storage.query_columns.return_value = {
+            "pgc": np.array([1], dtype=np.int32),
+            "ra": np.array([10.0]),
+            "e_ra": np.array([0.1]),
+            "dec": np.array([-5.0]),
+            "e_dec": np.array([0.1]),
+            "glon": null,
+            "glat": null,
+            "sgl": null,
+            "sgb": null,
+        }
+
+        (result,) = self.repo.query_pgc([model.RawCatalog.ICRS], [1], limit=10)
+
+        icrs = result.catalogs.icrs
+        assert icrs is not None
+        self.assertEqual((icrs.glon, icrs.glat, icrs.sgl, icrs.sgb), (None, None, None, None))
+
+    def test_photometry_enums_read_as_bytes(self):
+        magsys = np.ma.MaskedArray(np.array([None, b"Vega"], dtype=object), mask=[True, False])
+        self.storage.query_columns.return_value = {
+            "pgc": np.array([1, 1], dtype=np.int32),
+            "band": np.array(["B", "V"], dtype=object),
+            "magsys": magsys,
+            "method": np.array([b"psf", memoryview(b"visual")], dtype=object),
+            "wavelength": np.array([4400.0, 5500.0]),
+            "mag": np.array([13.0, 12.5]),
+            "e_mag": np.array([0.1, 0.2], dtype=object),
+        }
+
+        (result,) = self.repo.query_pgc([model.RawCatalog.PHOTOMETRY__TOTAL], [1], limit=10)
+
+        photometry = result.catalogs.photometry_total
+        assert photometry is not None
+        self.assertEqual([(m.magsys, m.method) for m in photometry.measurements], [(None, "psf"), ("Vega", "visual")])
+
+
+class QueryPGCSingleStatementTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.storage = mock.Mock()
+        self.repo = layer2.Layer2Repository(self.storage, mock.Mock(), single_statement_pgc_query=True)
+
+    def test_all_catalogs_in_one_query(self):
+        self.storage.query.return_value = []
+
+        self.repo.query_pgc([model.RawCatalog.ICRS, model.RawCatalog.NOTE], [3, 1, 3], limit=10)
+
+        self.storage.query.assert_called_once()
+        self.storage.query_columns.assert_not_called()
+        query = self.storage.query.call_args.args[0]
+        self.assertIn("FROM layer2.icrs AS t", query)
+        self.assertIn("FROM layer2.notes AS t", query)
+        self.assertEqual(self.storage.query.call_args.kwargs["params"], [[1, 3]])
+
+    def test_decoding(self):
+        self.storage.query.return_value = [
+            {
+                "pgc": 1,
+                "icrs": [{"ra": 10, "e_ra": 0.1, "dec": -5.0, "e_dec": 0.1}],
+                "photometry_total": [
+                    {"band": "B", "magsys": None, "method": "psf", "wavelength": 4400.0, "mag": 13, "e_mag": None},
+                    {"band": "V", "magsys": "Vega", "method": "psf", "wavelength": 5500.0, "mag": 12.5, "e_mag": 0.1},
+                ],
+            },
+            {"pgc": 2, "icrs": [{"ra": 20.0, "e_ra": None, "dec": 5.0, "e_dec": 0.1}], "photometry_total": None},
+        ]
+
+        result = self.repo.query_pgc([model.RawCatalog.ICRS, model.RawCatalog.PHOTOMETRY__TOTAL], [1, 2], limit=10)
+
+        self.assertEqual([obj.pgc for obj in result], [1, 2])
+        icrs = result[0].catalogs.icrs
+        assert icrs is not None
+        self.assertEqual((icrs.ra, icrs.e_ra), (10.0, 0.1))
+        self.assertIsNone(result[1].catalogs.icrs)
+        photometry = result[0].catalogs.photometry_total
+        assert photometry is not None
+        self.assertEqual([m.band for m in photometry.measurements], ["B", "V"])
+        self.assertIsNone(photometry.measurements[0].e_mag)
+        self.assertEqual(photometry.measurements[1].e_mag, 0.1)
+        self.assertIsNone(result[1].catalogs.photometry_total)
+
+
+class ResolveDesignationsTest(unittest.IsolatedAsyncioTestCase):
+    async def test_object_is_listed_once_with_best_match(self):
+        storage = mock.AsyncMock()
+        storage.query.return_value = [
+            {"name": "M87", "pgc": 41, "design": "M 87", "similarity": 1.0, "exact": True},
+            {"name": "NGC 447", "pgc": 42, "design": "NGC 4472", "similarity": 0.5, "exact": False},
+            {"name": "NGC 447", "pgc": 41, "design": "NGC 4486", "similarity": 0.4, "exact": False},
+            {"name": "NGC 447", "pgc": 42, "design": "NGC4472", "similarity": 0.6, "exact": False},
+        ]
+        repo = layer2.AsyncLayer2Repository(storage, mock.Mock())
+
+        actual = await repo.resolve_designations(["M87", "NGC 447"], fuzzy=True, max_fuzzy_matches=5)
+
+        self.assertEqual([(m.pgc, m.exact) for m in actual["M87"]], [(41, True)])
+        self.assertEqual([(m.pgc, m.design) for m in actual["NGC 447"]], [(42, "NGC4472"), (41, "NGC 4486")])
+        self.assertEqual(storage.query.call_args.kwargs["params"], [["M87", "NGC 447"], 5, True])
+        self.assertEqual(queries.RESOLVE_DESIGNATIONS_QUERY.count("%s"), 3)
@@ -0,0 +1,34 @@
+import unittest
+from unittest import mock
+
+from app.data import repositories
+
+
+class MetadataRepositoryStreamTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.storage = mock.MagicMock()
+        self.repo = repositories.MetadataRepository(self.storage)
+
+    def test_batches_are_merged_in_order(self):
+        self.storage.stream.return_value = iter(
+            [
+                [{"a": 1, "b": None}, {"a": 2, "b": None}],
+                [{"a": 3, "b": "x"}],
+            ]
+        )
+
+        result = self.repo.query_with_metadata("SELECT a, b FROM t;", 10)
+
+        self.assertEqual(result.rows, [[1, None], [2, None], [3, "x"]])
+        self.assertEqual([(c.column_name, c.sample_value) for c in result.columns], [("a", 1), ("b", "x")])
+        query = self.storage.stream.call_args.args[0]
+        self.assertIn("LIMIT 10", query)
+        self.assertTrue(self.storage.stream.call_args.kwargs["read_only"])
+
+    def test_empty_result(self):
+        self.storage.stream.return_value = iter([])
+
+        result = self.repo.query_with_metadata("SELECT 1", 10)
+
+        self.assertEqual(result.columns, [])
+        self.assertEqual(result.rows, [])
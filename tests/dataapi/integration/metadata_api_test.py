@@ -33,6 +33,7 @@ class MetadataAPITest(unittest.TestCase):
         )
         cls.reader_storage = postgres.PgStorage(reader_config, cls.log, data_enums.PG_ENUM_REGISTRY)
         cls.reader_storage.connect()
+        cls.async_reader_storage = postgres.AsyncPgStorage(reader_config, cls.log, data_enums.PG_ENUM_REGISTRY)
 
     @classmethod
     def tearDownClass(cls) -> None:
@@ -41,13 +42,19 @@ class MetadataAPITest(unittest.TestCase):
     def setUp(self) -> None:
         self.pg = self.pg_storage.get_storage()
         self.actions = domain.Actions(
-            layer2_repo=repositories.Layer2Repository(self.reader_storage, self.log),
+            layer2_repo=repositories.AsyncLayer2Repository(self.async_reader_storage, self.log),
             catalog_cfg=self.cfg.catalogs,
-            metadata_repo=repositories.MetadataRepository(self.reader_storage),
+            metadata_repo=repositories.AsyncMetadataRepository(self.async_reader_storage),
+            storage=self.async_reader_storage,
         )
-        self.client = testclient.TestClient(
-            Server(self.actions, self.cfg.server, self.log, auth.NoopAuthenticator()).app
+        server = Server(
+            self.actions,
+            self.cfg.server,
+            self.log,
+            auth.NoopAuthenticator(),
+            lifespan=dataapi_command.storage_lifespan(self.async_reader_storage),
         )
+        self.client = self.enterContext(testclient.TestClient(server.app))
 
     def tearDown(self) -> None:
         self.pg_storage.clear()
@@ -0,0 +1,173 @@
+import datetime
+import unittest
+from unittest import mock
+
+import numpy as np
+import structlog
+
+from app.data import model
+from app.dataapi import presentation
+from app.dataapi.domain import actions, designation_index
+
+
+def _index(rows: list[tuple[int, str]]) -> designation_index.DesignationIndex:
+    return designation_index.DesignationIndex.build(
+        np.array([pgc for pgc, _ in rows]),
+        np.array([design for _, design in rows], dtype=object),
+        np.array([designation_index.designation_key(design) for _, design in rows], dtype=object),
+    )
+
+
+def _suggest(index: designation_index.DesignationIndex, prefix: str, limit: int = 10) -> list[tuple[int, str]]:
+    return [(suggestion.pgc, suggestion.design) for suggestion in index.suggest(prefix, limit)]
+
+
+class DesignationKeyTest(unittest.TestCase):
+    def test_matches_database_normalization(self):
+        cases = [
+            ("NGC 4486", "NGC4486"),
+            ("ngc  04486", "NGC4486"),
+            ("M 87", "M87"),
+            ("PGC 000041361", "PGC41361"),
+            ("NGC 0", "NGC0"),
+            ("2MASX J12304942+1223279", "2MASXJ12304942+1223279"),
+            ("Virgo A", "VIRGOA"),
+        ]
+        for design, key in cases:
+            with self.subTest(design=design):
+                self.assertEqual(designation_index.designation_key(design), key)
+
+    def test_prefix_drops_trailing_zeros_of_number(self):
+        self.assertEqual(designation_index.prefix_key("ngc 0"), "NGC")
+        self.assertEqual(designation_index.prefix_key("NGC 04"), "NGC4")
+
+
+class DesignationIndexTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.index = _index(
+            [
+                (1, "NGC 4486"),
+                (1, "M 87"),
+                (2, "NGC 4472"),
+                (3, "NGC 448"),
+                (4, "NGC 44"),
+                (5, "NGC 4486A"),
+                (6, "MCG +02-32-105"),
+            ]
+        )
+
+    def test_prefix_search_prefers_short_keys(self):
+        self.assertEqual(
+            _suggest(self.index, "ngc 44"),
+            [(4, "NGC 44"), (3, "NGC 448"), (2, "NGC 4472"), (1, "NGC 4486"), (5, "NGC 4486A")],
+        )
+
+    def test_limit(self):
+        self.assertEqual(_suggest(self.index, "NGC 044", 2), [(4, "NGC 44"), (3, "NGC 448")])
+
+    def test_object_is_listed_once(self):
+        index = _index([(1, "NGC 4486"), (1, "NGC4486"), (1, "NGC 04486"), (2, "NGC 4487")])
+
+        self.assertEqual(_suggest(index, "NGC 448", 2), [(1, "NGC 4486"), (2, "NGC 4487")])
+
+    def test_no_matches(self):
+        self.assertEqual(_suggest(self.index, "UGC"), [])
+        self.assertEqual(_suggest(self.index, "   "), [])
+        self.assertEqual(_suggest(self.index, "NGC 45"), [])
+
+    def test_matches_brute_force(self):
+        rng = np.random.default_rng(7)
+        rows = [
+            (int(rng.integers(1, 500)), f"{rng.choice(['NGC', 'IC', 'UGC'])} {rng.integers(0, 3000)}")
+            for _ in range(2000)
+        ]
+        index = _index(rows)
+
+        for prefix in ("NGC 1", "IC 12", "UGC 299", "U"):
+            with self.subTest(prefix=prefix):
+                key = designation_index.prefix_key(prefix)
+                matching = sorted(
+                    (len(designation_index.designation_key(design)), designation_index.designation_key(design), pgc)
+                    for pgc, design in rows
+                    if designation_index.designation_key(design).startswith(key)
+                )
+                expected = list(dict.fromkeys(pgc for _, _, pgc in matching))[:20]
+
+                self.assertEqual([pgc for pgc, _ in _suggest(index, prefix, 20)], expected)
+
+    def test_update_replaces_modified_objects(self):
+        updated = self.index.updated(
+            np.array([1, 4, 7]),
+            np.array([1, 7]),
+            np.array(["NGC 4486", "NGC 4400"], dtype=object),
+            np.array(["NGC4486", "NGC4400"], dtype=object),
+        )
+
+        self.assertEqual(len(updated), 6)
+        self.assertEqual(_suggest(updated, "M"), [(6, "MCG +02-32-105")])
+        self.assertEqual(
+            _suggest(updated, "NGC 44"),
+            [(3, "NGC 448"), (7, "NGC 4400"), (2, "NGC 4472"), (1, "NGC 4486"), (5, "NGC 4486A")],
+        )
+
+
+class DesignationSnapshotTest(unittest.IsolatedAsyncioTestCase):
+    async def test_updates_only_modified_objects(self):
+        first = datetime.datetime(2026, 1, 1, tzinfo=datetime.UTC)
+        repo = mock.AsyncMock()
+        repo.get_last_update_time.return_value = first
+        repo.get_designation_keys.return_value = {
+            "pgc": np.array([1]),
+            "design": np.array(["NGC 4486"], dtype=object),
+            "key": np.array(["NGC4486"], dtype=object),
+        }
+        snapshot = designation_index.DesignationSnapshot(repo, 1.0, structlog.get_logger())
+
+        await snapshot.poll()
+        await snapshot.poll()
+        repo.get_designation_keys.assert_called_once_with()
+
+        repo.get_last_update_time.return_value = datetime.datetime(2026, 1, 2, tzinfo=datetime.UTC)
+        repo.get_modified_pgcs.return_value = np.array([2])
+        repo.get_designation_keys.return_value = {
+            "pgc": np.array([2]),
+            "design": np.array(["NGC 4472"], dtype=object),
+            "key": np.array(["NGC4472"], dtype=object),
+        }
+        await snapshot.poll()
+
+        repo.get_designation_keys.assert_called_with(first)
+        repo.get_modified_pgcs.assert_called_once_with(first)
+        repo.get_last_update_time.assert_called_with(model.RawCatalog.DESIGNATION)
+        self.assertIsNotNone(snapshot.index)
+        if snapshot.index is not None:
+            self.assertEqual(_suggest(snapshot.index, "NGC"), [(2, "NGC 4472"), (1, "NGC 4486")])
+
+
+class SuggestDesignationsTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.layer2_repo = mock.AsyncMock()
+        self.designations = designation_index.DesignationSnapshot(self.layer2_repo, 1.0, structlog.get_logger())
+        self.actions = actions.Actions(
+            layer2_repo=self.layer2_repo,
+            catalog_cfg=mock.Mock(),
+            metadata_repo=mock.AsyncMock(),
+            storage=mock.Mock(),
+            designations=self.designations,
+        )
+
+    async def test_served_from_index(self):
+        self.designations.index = _index([(1, "NGC 4486"), (2, "NGC 4472")])
+
+        response = await self.actions.suggest_designations(presentation.SuggestDesignationsRequest(prefix="ngc 4486"))
+
+        self.assertEqual(response.suggestions, [presentation.DesignationSuggestion(pgc=1, design="NGC 4486")])
+        self.layer2_repo.suggest_designations.assert_not_called()
+
+    async def test_nothing_is_suggested_before_load(self):
+        response = await self.actions.suggest_designations(
+            presentation.SuggestDesignationsRequest(prefix="ngc 0448", limit=3)
+        )
+
+        self.assertEqual(response.suggestions, [])
+        self.layer2_repo.suggest_designations.assert_not_called()
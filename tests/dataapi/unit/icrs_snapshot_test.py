@@ -0,0 +1,127 @@
+import datetime
+import unittest
+from unittest import mock
+
+import numpy as np
+import structlog
+
+from app.data import model
+from app.data.model import layer2 as layer2_model
+from app.dataapi.domain import icrs_snapshot, parameterized_query
+from app.dataapi.presentation import interface
+
+
+def _brute_force_distances(ra: np.ndarray, dec: np.ndarray, center_ra: float, center_dec: float) -> np.ndarray:
+    ra1, dec1, ra2, dec2 = map(np.radians, (ra, dec, center_ra, center_dec))
+    haversine = np.sin((dec2 - dec1) / 2) ** 2 + np.cos(dec1) * np.cos(dec2) * np.sin((ra2 - ra1) / 2) ** 2
+    return np.degrees(2 * np.arcsin(np.sqrt(haversine)))
+
+
+class SkyIndexTest(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(42)
+        n = 20000
+        self.pgc = np.arange(1, n + 1)
+        self.ra = rng.uniform(0, 360, n)
+        self.dec = np.degrees(np.arcsin(rng.uniform(-1, 1, n)))
+        self.index = icrs_snapshot.SkyIndex(self.pgc, self.ra, self.dec)
+
+    def test_cone_matches_brute_force(self):
+        cones = [(10.0, 20.0, 2.0), (0.2, 0.0, 3.0), (359.5, -30.0, 2.5), (45.0, 89.0, 4.0), (200.0, -88.5, 2.0)]
+        for ra, dec, radius in cones:
+            with self.subTest(ra=ra, dec=dec, radius=radius):
+                distances = _brute_force_distances(self.ra, self.dec, ra, dec)
+                expected = self.pgc[distances <= radius]
+
+                pgcs, got_distances = self.index.cone(ra, dec, radius)
+
+                self.assertGreater(len(expected), 0)
+                self.assertEqual(sorted(pgcs.tolist()), sorted(expected.tolist()))
+                self.assertTrue(np.all(np.diff(got_distances) >= 0))
+
+    def test_nearest_matches_brute_force(self):
+        distances = _brute_force_distances(self.ra, self.dec, 123.0, -45.0)
+
+        pgcs, _ = self.index.nearest(123.0, -45.0, 7)
+
+        self.assertEqual(pgcs.tolist(), self.pgc[np.argsort(distances)[:7]].tolist())
+
+    def test_nearest_returns_everything_from_small_index(self):
+        index = icrs_snapshot.SkyIndex(np.array([1, 2]), np.array([10.0, 190.0]), np.array([0.0, 0.0]))
+
+        pgcs, _ = index.nearest(10.0, 0.0, 5)
+
+        self.assertEqual(pgcs.tolist(), [1, 2])
+
+
+class ICRSSnapshotTest(unittest.IsolatedAsyncioTestCase):
+    async def test_reloads_when_icrs_is_imported(self):
+        repo = mock.AsyncMock()
+        repo.get_last_update_time.return_value = datetime.datetime(2026, 1, 1, tzinfo=datetime.UTC)
+        repo.get_icrs_positions.return_value = {"pgc": np.array([1]), "ra": np.array([10.0]), "dec": np.array([0.0])}
+        snapshot = icrs_snapshot.ICRSSnapshot(repo, 1.0, structlog.get_logger())
+
+        await snapshot.poll()
+        await snapshot.poll()
+        self.assertEqual(repo.get_icrs_positions.call_count, 1)
+
+        repo.get_last_update_time.return_value = datetime.datetime(2026, 1, 2, tzinfo=datetime.UTC)
+        await snapshot.poll()
+        self.assertEqual(repo.get_icrs_positions.call_count, 2)
+        repo.get_last_update_time.assert_called_with(model.RawCatalog.ICRS)
+
+
+class QuerySimpleSnapshotTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.layer2_repo = mock.AsyncMock()
+        self.layer2_repo.query_pgc.side_effect = lambda _catalogs, pgcs, _limit: [
+            layer2_model.Layer2Object(pgc=pgc, catalogs=layer2_model.Catalogs()) for pgc in sorted(pgcs)
+        ]
+        snapshot = icrs_snapshot.ICRSSnapshot(self.layer2_repo, 1.0, structlog.get_logger())
+        # pgc 3 is the closest to the centre and pgc 2 lies outside of the cone.
+        snapshot.index = icrs_snapshot.SkyIndex(
+            np.array([1, 2, 3, 4]), np.array([10.3, 20.0, 10.1, 10.2]), np.array([0.0, 0.0, 0.0, 0.0])
+        )
+        self.manager = parameterized_query.ParameterizedQueryManager(
+            layer2_repo=self.layer2_repo,
+            enabled_catalogs=[model.RawCatalog.DESIGNATION],
+            catalog_cfg=mock.Mock(),
+            snapshot=snapshot,
+        )
+
+    async def test_cone_pages_follow_distance(self):
+        first = await self.manager.query_simple(interface.QuerySimpleRequest(ra=10.0, dec=0.0, radius=1.0, page_size=2))
+        self.assertEqual([obj.pgc for obj in first.objects], [3, 4])
+        self.assertIsNotNone(first.next_cursor)
+
+        last = await self.manager.query_simple(
+            interface.QuerySimpleRequest(ra=10.0, dec=0.0, radius=1.0, page_size=2, cursor=first.next_cursor)
+        )
+        self.assertEqual([obj.pgc for obj in last.objects], [1])
+        self.assertIsNone(last.next_cursor)
+        self.layer2_repo.query_catalogs.assert_not_called()
+
+    async def test_nearest_objects_are_ordered_by_distance(self):
+        response = await self.manager.query_simple(interface.QuerySimpleRequest(ra=10.0, dec=0.0, nearest=3))
+        self.assertEqual([obj.pgc for obj in response.objects], [3, 4, 1])
+        self.assertIsNone(response.next_cursor)
+
+        bounded = await self.manager.query_simple(
+            interface.QuerySimpleRequest(ra=10.0, dec=0.0, nearest=3, radius=0.25)
+        )
+        self.assertEqual([obj.pgc for obj in bounded.objects], [3, 4])
+        self.layer2_repo.query_catalogs.assert_not_called()
+
+    async def test_galactic_range_goes_to_database(self):
+        self.layer2_repo.query_catalogs.return_value = []
+
+        await self.manager.query_simple(interface.QuerySimpleRequest(ra=10.0, dec=0.0, radius=1.0, glat_min=-60.0))
+
+        self.layer2_repo.query_catalogs.assert_called_once()
+
+    async def test_name_search_goes_to_database(self):
+        self.layer2_repo.query_catalogs.return_value = []
+
+        await self.manager.query_simple(interface.QuerySimpleRequest(ra=10.0, dec=0.0, radius=1.0, name="NGC"))
+
+        self.layer2_repo.query_catalogs.assert_called_once()
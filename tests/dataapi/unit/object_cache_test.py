@@ -0,0 +1,94 @@
+import datetime
+import unittest
+from unittest import mock
+
+import structlog
+
+from app.data import model
+from app.data.model import layer2 as layer2_model
+from app.dataapi.domain import object_cache, parameterized_query
+from app.dataapi.presentation import interface
+
+
+def _object(pgc: int) -> interface.PGCObject:
+    return interface.PGCObject(pgc=pgc, catalogs=interface.Catalogs())
+
+
+class ObjectCacheTest(unittest.TestCase):
+    def test_hits_and_misses(self):
+        cache = object_cache.ObjectCache(max_entries=10)
+        cache.put("scope", [_object(1)], cache.generation)
+
+        self.assertEqual(cache.get("scope", 1), _object(1))
+        self.assertIsNone(cache.get("scope", 2))
+        self.assertIsNone(cache.get("other", 1))
+
+        stats = cache.stats()
+        self.assertEqual((stats.hits, stats.misses, stats.size), (1, 2, 1))
+
+    def test_evicts_least_recently_used(self):
+        cache = object_cache.ObjectCache(max_entries=2)
+        cache.put("scope", [_object(1), _object(2)], cache.generation)
+        cache.get("scope", 1)
+        cache.put("scope", [_object(3)], cache.generation)
+
+        self.assertIsNotNone(cache.get("scope", 1))
+        self.assertIsNone(cache.get("scope", 2))
+        self.assertIsNotNone(cache.get("scope", 3))
+        self.assertEqual(cache.stats().evictions, 1)
+
+    def test_put_after_invalidation_is_dropped(self):
+        cache = object_cache.ObjectCache(max_entries=10)
+        generation = cache.generation
+        cache.invalidate()
+        cache.put("scope", [_object(1)], generation)
+
+        self.assertIsNone(cache.get("scope", 1))
+        self.assertEqual(cache.stats().invalidations, 1)
+
+
+class LastUpdateWatcherTest(unittest.IsolatedAsyncioTestCase):
+    async def test_invalidates_when_last_update_advances(self):
+        cache = object_cache.ObjectCache(max_entries=10)
+        repo = mock.AsyncMock()
+        repo.get_latest_update_time.return_value = datetime.datetime(2026, 1, 1, tzinfo=datetime.UTC)
+        watcher = object_cache.LastUpdateWatcher(cache, repo, 1.0, structlog.get_logger())
+
+        await watcher.poll()
+        cache.put("scope", [_object(1)], cache.generation)
+        await watcher.poll()
+        self.assertIsNotNone(cache.get("scope", 1))
+
+        repo.get_latest_update_time.return_value = datetime.datetime(2026, 1, 2, tzinfo=datetime.UTC)
+        await watcher.poll()
+        self.assertIsNone(cache.get("scope", 1))
+
+
+class QuerySimpleCacheTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.layer2_repo = mock.AsyncMock()
+        self.layer2_repo.query_pgc.side_effect = lambda _catalogs, pgcs, _limit: [
+            layer2_model.Layer2Object(pgc=pgc, catalogs=layer2_model.Catalogs()) for pgc in pgcs
+        ]
+        self.cache = object_cache.ObjectCache(max_entries=100)
+        self.manager = parameterized_query.ParameterizedQueryManager(
+            layer2_repo=self.layer2_repo,
+            enabled_catalogs=[model.RawCatalog.DESIGNATION],
+            catalog_cfg=mock.Mock(),
+            cache=self.cache,
+        )
+
+    async def test_fetches_only_missing_pgcs(self):
+        await self.manager.query_simple(interface.QuerySimpleRequest(pgcs=[3, 1], catalogs=["designation"]))
+        response = await self.manager.query_simple(
+            interface.QuerySimpleRequest(pgcs=[2, 3, 1], catalogs=["designation"])
+        )
+
+        self.assertEqual([obj.pgc for obj in response.objects], [1, 2, 3])
+        self.assertEqual(self.layer2_repo.query_pgc.call_args_list[1].args[1], [2])
+
+    async def test_catalog_sets_are_cached_separately(self):
+        await self.manager.query_simple(interface.QuerySimpleRequest(pgcs=[1], catalogs=["designation"]))
+        await self.manager.query_simple(interface.QuerySimpleRequest(pgcs=[1], catalogs=["icrs"]))
+
+        self.assertEqual(self.layer2_repo.query_pgc.call_count, 2)
@@ -6,7 +6,9 @@ from astropy import units as u
 from astropy.time import Time
 
 from app.data import model
+from app.data.model import layer2 as model_layer2
 from app.data.repositories import layer2
+from app.dataapi import command
 from app.dataapi.domain import parameterized_query
 from app.dataapi.presentation import interface
 from app.lib.web import errors
@@ -59,9 +61,9 @@ class ResolveQueryCatalogsTest(unittest.TestCase):
             )
 
 
-class QuerySimpleCoordinateConversionTest(unittest.TestCase):
+class QuerySimpleCoordinateConversionTest(unittest.IsolatedAsyncioTestCase):
     def setUp(self) -> None:
-        self.layer2_repo = mock.Mock()
+        self.layer2_repo = mock.AsyncMock()
         self.layer2_repo.query_catalogs.return_value = []
         self.manager = parameterized_query.ParameterizedQueryManager(
             layer2_repo=self.layer2_repo,
@@ -75,7 +77,7 @@ class QuerySimpleCoordinateConversionTest(unittest.TestCase):
     def _ordering(self) -> layer2.Ordering | None:
         return self.layer2_repo.query_catalogs.call_args.kwargs.get("ordering")
 
-    def test_coordinate_search_defaults_to_j2000(self):
+    async def test_coordinate_search_defaults_to_j2000(self):
         ra_fk5, dec_fk5 = 10.0, 20.0
         expected = coords.SkyCoord(
             ra=ra_fk5 * u.Unit("deg"),
@@ -86,7 +88,7 @@ class QuerySimpleCoordinateConversionTest(unittest.TestCase):
         query = interface.QuerySimpleRequest(ra=ra_fk5, dec=dec_fk5, radius=0.1)
         with mock.patch("app.dataapi.responders.StructuredResponder") as responder_cls:
             responder_cls.return_value.build_response_from_catalog.return_value = mock.Mock()
-            self.manager.query_simple(query)
+            await self.manager.query_simple(query)
 
         got = self._search_params().get_params()
         self.assertAlmostEqual(got["ra"], expected.ra.deg, places=10)
@@ -96,33 +98,91 @@ class QuerySimpleCoordinateConversionTest(unittest.TestCase):
         assert ordering is not None
         self.assertEqual(ordering.get_params(), [expected.ra.deg, expected.dec.deg])
 
-    def test_name_search_has_no_distance_ordering(self):
+    async def test_coordinate_search_uses_requested_index(self):
+        query = interface.QuerySimpleRequest(ra=10.0, dec=20.0, radius=0.1, cone_index="sky_zone")
+        with mock.patch("app.dataapi.responders.StructuredResponder") as responder_cls:
+            responder_cls.return_value.build_response_from_catalog.return_value = mock.Mock()
+            await self.manager.query_simple(query)
+
+        search_filter = self.layer2_repo.query_catalogs.call_args.args[1]
+        self.assertIsInstance(search_filter, layer2.AndFilter)
+        self.assertEqual(search_filter.driving_table(), "layer2.icrs")
+        self.assertIn("layer2.sky_zones", search_filter.get_query())
+        self.assertIsInstance(self._ordering(), layer2.ICRSAngularDistanceOrdering)
+
+    async def test_name_search_is_ordered_by_pgc(self):
         query = interface.QuerySimpleRequest(name="NGC")
         with mock.patch("app.dataapi.responders.StructuredResponder") as responder_cls:
             responder_cls.return_value.build_response_from_catalog.return_value = mock.Mock()
-            self.manager.query_simple(query)
+            await self.manager.query_simple(query)
 
-        self.assertIsNone(self._ordering())
+        self.assertIsInstance(self._ordering(), layer2.PGCOrdering)
 
-    def test_page_is_converted_to_offset(self):
+    async def test_page_is_converted_to_offset(self):
         query = interface.QuerySimpleRequest(name="NGC", page=2, page_size=25)
         with mock.patch("app.dataapi.responders.StructuredResponder") as responder_cls:
             responder_cls.return_value.build_response_from_catalog.return_value = mock.Mock()
-            self.manager.query_simple(query)
+            await self.manager.query_simple(query)
 
         self.assertEqual(self.layer2_repo.query_catalogs.call_args.args[3], 25)
         self.assertEqual(self.layer2_repo.query_catalogs.call_args.args[4], 50)
 
-    def test_pgc_page_is_converted_to_offset(self):
+    async def test_nearest_search_is_ordered_by_index_distance(self):
+        query = interface.QuerySimpleRequest(ra=10.0, dec=20.0, nearest=5, radius=2.0)
+        with mock.patch("app.dataapi.responders.StructuredResponder") as responder_cls:
+            responder_cls.return_value.build_response_from_catalog.return_value = mock.Mock()
+            await self.manager.query_simple(query)
+
+        (search_filter,) = self.layer2_repo.query_catalogs.call_args.args[1].conjuncts()
+        self.assertIsInstance(search_filter, layer2.ICRSNearestFilter)
+        self.assertEqual(len(search_filter.get_params()), 3)
+        self.assertIsInstance(self._ordering(), layer2.ICRSNearestOrdering)
+        self.assertEqual(self.layer2_repo.query_catalogs.call_args.args[3], 5)
+        self.assertEqual(self.layer2_repo.query_catalogs.call_args.args[4], 0)
+
+    async def test_nearest_search_without_radius_is_unbounded(self):
+        query = interface.QuerySimpleRequest(ra=10.0, dec=20.0, nearest=3)
+        with mock.patch("app.dataapi.responders.StructuredResponder") as responder_cls:
+            responder_cls.return_value.build_response_from_catalog.return_value = mock.Mock()
+            await self.manager.query_simple(query)
+
+        (search_filter,) = self.layer2_repo.query_catalogs.call_args.args[1].conjuncts()
+        self.assertIsInstance(search_filter, layer2.ICRSNearestFilter)
+        self.assertEqual(search_filter.get_params(), [])
+
+    def test_nearest_needs_coordinates(self):
+        with self.assertRaises(ValueError):
+            interface.QuerySimpleRequest(name="NGC", nearest=3)
+
+    def test_nearest_cannot_be_paginated(self):
+        with self.assertRaises(ValueError):
+            interface.QuerySimpleRequest(ra=10.0, dec=20.0, nearest=3, page=1)
+
+    async def test_galactic_range_is_combined_with_cone(self):
+        query = interface.QuerySimpleRequest(ra=10.0, dec=20.0, radius=1.0, glat_min=-30.0, glat_max=-10.0)
+        with mock.patch("app.dataapi.responders.StructuredResponder") as responder_cls:
+            responder_cls.return_value.build_response_from_catalog.return_value = mock.Mock()
+            await self.manager.query_simple(query)
+
+        cone, galactic_range = self.layer2_repo.query_catalogs.call_args.args[1].conjuncts()
+        self.assertIsInstance(cone, layer2.ICRSCoordinatesInRadiusFilter)
+        self.assertIsInstance(galactic_range, layer2.GalacticRangeFilter)
+        self.assertEqual(galactic_range.get_params(), [-30.0, -10.0])
+
+    def test_galactic_latitude_bounds_are_ordered(self):
+        with self.assertRaises(ValueError):
+            interface.QuerySimpleRequest(glat_min=10.0, glat_max=-10.0)
+
+    async def test_pgc_page_is_converted_to_offset(self):
         query = interface.QuerySimpleRequest(pgcs=[1, 2, 3], page=1, page_size=10)
         with mock.patch("app.dataapi.responders.StructuredResponder") as responder_cls:
             responder_cls.return_value.build_response.return_value = mock.Mock()
-            self.manager.query_simple(query)
+            await self.manager.query_simple(query)
 
         self.assertEqual(self.layer2_repo.query_pgc.call_args.args[2], 10)
         self.assertEqual(self.layer2_repo.query_pgc.call_args.args[3], 10)
 
-    def test_coordinate_search_precesses_b1950(self):
+    async def test_coordinate_search_precesses_b1950(self):
         ra_j2000, dec_j2000 = 187.70593, 12.39112
         b1950 = coords.SkyCoord(
             ra=ra_j2000 * u.Unit("deg"),
@@ -138,13 +198,13 @@ class QuerySimpleCoordinateConversionTest(unittest.TestCase):
         )
         with mock.patch("app.dataapi.responders.StructuredResponder") as responder_cls:
             responder_cls.return_value.build_response_from_catalog.return_value = mock.Mock()
-            self.manager.query_simple(query)
+            await self.manager.query_simple(query)
 
         got = self._search_params().get_params()
         self.assertAlmostEqual(got["ra"], ra_j2000, places=5)
         self.assertAlmostEqual(got["dec"], dec_j2000, places=5)
 
-    def test_galactic_coordinate_search_converts_to_icrs(self):
+    async def test_galactic_coordinate_search_converts_to_icrs(self):
         ra_j2000, dec_j2000 = 187.70593, 12.39112
         galactic = coords.SkyCoord(
             ra=ra_j2000 * u.Unit("deg"),
@@ -159,13 +219,13 @@ class QuerySimpleCoordinateConversionTest(unittest.TestCase):
         )
         with mock.patch("app.dataapi.responders.StructuredResponder") as responder_cls:
             responder_cls.return_value.build_response_from_catalog.return_value = mock.Mock()
-            self.manager.query_simple(query)
+            await self.manager.query_simple(query)
 
         got = self._search_params().get_params()
         self.assertAlmostEqual(got["ra"], ra_j2000, places=5)
         self.assertAlmostEqual(got["dec"], dec_j2000, places=5)
 
-    def test_supergalactic_coordinate_search_converts_to_icrs(self):
+    async def test_supergalactic_coordinate_search_converts_to_icrs(self):
         ra_j2000, dec_j2000 = 187.70593, 12.39112
         sg = coords.SkyCoord(
             ra=ra_j2000 * u.Unit("deg"),
@@ -180,8 +240,185 @@ class QuerySimpleCoordinateConversionTest(unittest.TestCase):
         )
         with mock.patch("app.dataapi.responders.StructuredResponder") as responder_cls:
             responder_cls.return_value.build_response_from_catalog.return_value = mock.Mock()
-            self.manager.query_simple(query)
+            await self.manager.query_simple(query)
 
         got = self._search_params().get_params()
         self.assertAlmostEqual(got["ra"], ra_j2000, places=5)
         self.assertAlmostEqual(got["dec"], dec_j2000, places=5)
+
+
+class QuerySimpleCursorTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.layer2_repo = mock.AsyncMock()
+        self.manager = parameterized_query.ParameterizedQueryManager(
+            layer2_repo=self.layer2_repo,
+            enabled_catalogs=DEFAULT,
+            catalog_cfg=mock.Mock(),
+        )
+
+    async def _query(self, query: interface.QuerySimpleRequest) -> mock.Mock:
+        with mock.patch("app.dataapi.responders.StructuredResponder") as responder_cls:
+            response = mock.Mock(next_cursor=None)
+            responder_cls.return_value.build_response.return_value = response
+            responder_cls.return_value.build_response_from_catalog.return_value = response
+            await self.manager.query_simple(query)
+        return response
+
+    async def test_pgc_pages_follow_cursor(self):
+        first = await self._query(interface.QuerySimpleRequest(pgcs=[5, 1, 3], page_size=2))
+        self.assertIsNotNone(first.next_cursor)
+
+        last = await self._query(interface.QuerySimpleRequest(pgcs=[5, 1, 3], page_size=2, cursor=first.next_cursor))
+
+        self.assertEqual(self.layer2_repo.query_pgc.call_args.kwargs["after"], 3)
+        self.assertIsNone(last.next_cursor)
+
+    async def test_search_cursor_is_built_from_last_sort_key(self):
+        self.layer2_repo.query_catalogs.return_value = [model.Layer2CatalogObject(7, [], sort_key=[0.25, 7])]
+
+        first = await self._query(interface.QuerySimpleRequest(ra=10.0, dec=20.0, radius=0.1))
+        await self._query(interface.QuerySimpleRequest(ra=10.0, dec=20.0, radius=0.1, cursor=first.next_cursor))
+
+        self.assertEqual(self.layer2_repo.query_catalogs.call_args.kwargs["after"], [0.25, 7])
+
+    async def test_cursor_of_other_ordering_is_rejected(self):
+        self.layer2_repo.query_catalogs.return_value = [model.Layer2CatalogObject(7, [], sort_key=[7])]
+        first = await self._query(interface.QuerySimpleRequest(name="NGC"))
+
+        with self.assertRaises(errors.RuleValidationError):
+            await self._query(interface.QuerySimpleRequest(ra=10.0, dec=20.0, radius=0.1, cursor=first.next_cursor))
+
+    async def test_nearest_search_has_no_cursor(self):
+        self.layer2_repo.query_catalogs.return_value = [model.Layer2CatalogObject(7, [], sort_key=[0.25, 7])]
+
+        response = await self._query(interface.QuerySimpleRequest(ra=10.0, dec=20.0, nearest=1))
+
+        self.assertIsNone(response.next_cursor)
+
+    def test_cursor_and_page_are_exclusive(self):
+        with self.assertRaises(ValueError):
+            interface.QuerySimpleRequest(name="NGC", page=1, cursor="abc")
+
+
+class QueryBatchTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.layer2_repo = mock.AsyncMock()
+        self.manager = parameterized_query.ParameterizedQueryManager(
+            layer2_repo=self.layer2_repo,
+            enabled_catalogs=DEFAULT,
+            catalog_cfg=mock.Mock(),
+        )
+
+    async def _query(self, request: interface.QueryBatchRequest) -> list[interface.QueryBatchResult]:
+        with mock.patch("app.dataapi.responders.StructuredResponder") as responder_cls:
+            responder_cls.return_value.build_objects_from_catalog.side_effect = lambda objects, _stored=None: [
+                interface.PGCObject(pgc=obj.pgc, catalogs=interface.Catalogs()) for obj in objects
+            ]
+            return [result async for result in await self.manager.query_batch(request)]
+
+    async def test_results_follow_request_order(self):
+        async def query(_catalogs, search_filter, *_args):
+            if isinstance(search_filter, layer2.DesignationLikeFilter):
+                return {"n": [model.Layer2CatalogObject(2, [])]}
+            return {"c": [model.Layer2CatalogObject(1, [])]}
+
+        self.layer2_repo.query_catalogs_per_record.side_effect = query
+        request = interface.QueryBatchRequest(
+            entries=[
+                interface.QueryBatchEntry(id="empty", ra=1.0, dec=2.0, radius=0.1),
+                interface.QueryBatchEntry(id="n", name="NGC 1"),
+                interface.QueryBatchEntry(id="c", ra=10.0, dec=20.0, radius=0.1),
+            ]
+        )
+
+        results = await self._query(request)
+
+        self.assertEqual([r.id for r in results], ["empty", "n", "c"])
+        self.assertEqual([[o.pgc for o in r.objects] for r in results], [[], [2], [1]])
+
+    async def test_entries_are_chunked(self):
+        self.layer2_repo.query_catalogs_per_record.return_value = {}
+        entries = [
+            interface.QueryBatchEntry(id=str(i), ra=1.0, dec=2.0, radius=0.1)
+            for i in range(parameterized_query.BATCH_CHUNK_SIZE + 1)
+        ]
+
+        results = await self._query(interface.QueryBatchRequest(entries=entries))
+
+        self.assertEqual(len(results), len(entries))
+        cone_calls = [
+            call
+            for call in self.layer2_repo.query_catalogs_per_record.call_args_list
+            if isinstance(call.args[1], layer2.ICRSCoordinatesInSearchRadiusFilter)
+        ]
+        self.assertEqual([len(call.args[2]) for call in cone_calls], [parameterized_query.BATCH_CHUNK_SIZE, 1])
+
+    def test_entry_needs_cone_or_name(self):
+        with self.assertRaises(ValueError):
+            interface.QueryBatchEntry(id="a", ra=1.0, dec=2.0)
+
+    def test_ids_are_unique(self):
+        with self.assertRaises(ValueError):
+            interface.QueryBatchRequest(
+                entries=[interface.QueryBatchEntry(id="a", name="NGC 1"), interface.QueryBatchEntry(id="a", name="M 1")]
+            )
+
+
+class StoredVelocitiesTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.layer2_repo = mock.AsyncMock()
+        self.layer2_repo.query_catalogs.return_value = [
+            model.Layer2CatalogObject(1, []),
+            model.Layer2CatalogObject(2, []),
+        ]
+        self.stored = {1: {"local_group": model_layer2.ApexVelocity(v=1.0, e_v=0.1)}}
+        self.layer2_repo.get_apex_velocities.return_value = self.stored
+        self.catalogs = command.parse_config("configs/dev/dataapi.yaml").catalogs
+
+    def _manager(self, stored_velocities: bool) -> parameterized_query.ParameterizedQueryManager:
+        return parameterized_query.ParameterizedQueryManager(
+            layer2_repo=self.layer2_repo,
+            enabled_catalogs=DEFAULT,
+            catalog_cfg=self.catalogs,
+            stored_velocities=stored_velocities,
+        )
+
+    async def test_stored_velocities_are_passed_to_responder(self):
+        with mock.patch("app.dataapi.responders.StructuredResponder") as responder_cls:
+            await self._manager(True).query_simple(interface.QuerySimpleRequest(name="NGC 1"))
+
+        pgcs, apexes = self.layer2_repo.get_apex_velocities.call_args.args
+        self.assertEqual(pgcs, [1, 2])
+        self.assertEqual(apexes, {key: apex.parameters() for key, apex in self.catalogs.velocity.apexes.items()})
+        responder_cls.return_value.build_response_from_catalog.assert_called_once_with(
+            self.layer2_repo.query_catalogs.return_value, self.stored
+        )
+
+    async def test_batch_reads_velocities_once_per_chunk(self):
+        self.layer2_repo.query_catalogs_per_record.side_effect = lambda _catalogs, _filter, params, *_args: {
+            key: [model.Layer2CatalogObject(int(key) % 3, []), model.Layer2CatalogObject(5, [])] for key in params
+        }
+        request = interface.QueryBatchRequest(
+            entries=[interface.QueryBatchEntry(id=str(i), ra=1.0, dec=2.0, radius=0.1) for i in range(4)]
+        )
+
+        with mock.patch("app.dataapi.responders.StructuredResponder") as responder_cls:
+            results = [result async for result in await self._manager(True).query_batch(request)]
+
+        self.assertEqual(len(results), 4)
+        self.layer2_repo.get_apex_velocities.assert_called_once()
+        self.assertEqual(self.layer2_repo.get_apex_velocities.call_args.args[0], [0, 1, 2, 5])
+        for call in responder_cls.return_value.build_objects_from_catalog.call_args_list:
+            self.assertIs(call.args[1], self.stored)
+
+    async def test_velocities_are_computed_by_default(self):
+        with mock.patch("app.dataapi.responders.StructuredResponder"):
+            await self._manager(False).query_simple(interface.QuerySimpleRequest(name="NGC 1"))
+
+        self.layer2_repo.get_apex_velocities.assert_not_called()
+
+    async def test_velocities_need_position_and_redshift(self):
+        with mock.patch("app.dataapi.responders.StructuredResponder"):
+            await self._manager(True).query_simple(interface.QuerySimpleRequest(name="NGC 1", catalogs=["icrs"]))
+
+        self.layer2_repo.get_apex_velocities.assert_not_called()
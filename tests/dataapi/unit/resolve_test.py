@@ -0,0 +1,36 @@
+import unittest
+from unittest import mock
+
+from app.data import model
+from app.dataapi.domain import actions
+from app.dataapi.presentation import interface
+
+
+class ResolveTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.layer2_repo = mock.AsyncMock()
+        self.actions = actions.Actions(
+            layer2_repo=self.layer2_repo,
+            catalog_cfg=mock.Mock(),
+            metadata_repo=mock.Mock(),
+            storage=mock.Mock(),
+        )
+
+    async def test_results_follow_request_order(self):
+        self.layer2_repo.resolve_designations.return_value = {
+            "M 87": [model.DesignationMatch(pgc=41, design="M 87", similarity=1.0, exact=True)],
+            "NGC 4473": [model.DesignationMatch(pgc=42, design="NGC 4472", similarity=0.6, exact=False)],
+        }
+
+        response = await self.actions.resolve(
+            interface.ResolveRequest(names=["NGC 4473", "unknown", "M 87", "NGC 4473"])
+        )
+
+        self.assertEqual([r.name for r in response.results], ["NGC 4473", "unknown", "M 87"])
+        self.assertEqual(response.results[0].matches[0].match, interface.MatchKind.FUZZY)
+        self.assertEqual(response.results[1].matches, [])
+        self.assertEqual(response.results[2].matches[0].match, interface.MatchKind.EXACT)
+
+    def test_names_are_limited(self):
+        with self.assertRaises(ValueError):
+            interface.ResolveRequest(names=["NGC 1"] * (interface.MAX_RESOLVE_NAMES + 1))
@@ -0,0 +1,98 @@
+import datetime
+import unittest
+import warnings
+from unittest import mock
+
+import structlog
+from fastapi import testclient
+
+from app.data import model, repositories
+from app.data.repositories import metadata
+from app.dataapi import command, domain, presentation, responders
+from app.dataapi.presentation import interface
+from app.lib import auth
+from app.lib.web import server
+
+
+class FastJSONTest(unittest.TestCase):
+    """
+    Responses rendered without the response models have to match the ones FastAPI renders through them.
+    """
+
+    def setUp(self) -> None:
+        warnings.filterwarnings("ignore", message="Using UFloat objects with std_dev==0 may give unexpected results")
+        catalog_cfg = command.parse_config("configs/dev/dataapi.yaml").catalogs
+        objects = [
+            model.Layer2CatalogObject(
+                1,
+                [
+                    model.DesignationCatalogObject("NGC 4486"),
+                    model.ICRSCatalogObject(187.70592, 12.39111, 1e-4, 2e-4),
+                    model.RedshiftCatalogObject(1284.0, 5.0),
+                    model.NatureCatalogObject("G"),
+                ],
+            ),
+            model.Layer2CatalogObject(2, [model.ICRSCatalogObject(10.68471, 41.26875, 1e-4, 1e-4)]),
+            model.Layer2CatalogObject(3, [model.DesignationCatalogObject("PGC 3")]),
+        ]
+        query_response = responders.StructuredResponder(catalog_cfg).build_response_from_catalog(objects)
+        query_response.next_cursor = "cursor"
+
+        metadata_repo = mock.AsyncMock(spec=repositories.AsyncMetadataRepository)
+        metadata_repo.query_with_metadata.return_value = metadata.QueryWithMetadataResult(
+            columns=[
+                metadata.QueryColumnMetadata("pgc", 1),
+                metadata.QueryColumnMetadata("name", "NGC 4486"),
+                metadata.QueryColumnMetadata("ra", 187.70592),
+                metadata.QueryColumnMetadata("modification_time", datetime.datetime(2024, 1, 1, tzinfo=datetime.UTC)),
+                metadata.QueryColumnMetadata("confirmed", True),
+            ],
+            rows=[
+                [1, "NGC 4486", 187.70592, datetime.datetime(2024, 1, 1, tzinfo=datetime.UTC), True],
+                [2, None, float("nan"), None, False],
+            ],
+        )
+        tap_actions = domain.Actions(
+            layer2_repo=mock.AsyncMock(),
+            catalog_cfg=catalog_cfg,
+            metadata_repo=metadata_repo,
+            storage=mock.Mock(),
+        )
+
+        self.actions = mock.AsyncMock(spec=interface.Actions)
+        self.actions.query_simple.return_value = query_response
+        self.actions.tap_sync.side_effect = tap_actions.tap_sync
+
+    def _server(self, fast_json: bool) -> presentation.Server:
+        return presentation.Server(
+            self.actions,
+            server.ServerConfig(port=8000, host="127.0.0.1"),
+            mock.Mock(spec=structlog.stdlib.BoundLogger),
+            auth.NoopAuthenticator(),
+            auth_enabled=False,
+            fast_json=fast_json,
+        )
+
+    def _client(self, fast_json: bool) -> testclient.TestClient:
+        return testclient.TestClient(self._server(fast_json).app)
+
+    def test_query_simple(self):
+        default = self._client(fast_json=False).get("/api/v1/query/simple", params={"pgcs": [1, 2, 3]})
+        fast = self._client(fast_json=True).get("/api/v1/query/simple", params={"pgcs": [1, 2, 3]})
+
+        self.assertEqual(fast.status_code, 200)
+        self.assertEqual(fast.headers["content-type"], default.headers["content-type"])
+        self.assertEqual(fast.json(), default.json())
+        self.assertEqual(len(fast.json()["data"]["objects"]), 3)
+
+    def test_tap_sync(self):
+        params = {"query": "SELECT 1"}
+        default = self._client(fast_json=False).get("/api/v1/tap/sync", params=params)
+        fast = self._client(fast_json=True).get("/api/v1/tap/sync", params=params)
+
+        self.assertEqual(fast.status_code, 200)
+        self.assertEqual(fast.json(), default.json())
+        self.assertEqual(fast.json()["data"]["resource"]["table"]["data"][1], [2, None, None, None, False])
+
+    def test_openapi_is_unchanged(self):
+        self.assertEqual(self._server(fast_json=True).app.openapi(), self._server(fast_json=False).app.openapi())
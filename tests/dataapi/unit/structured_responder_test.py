@@ -0,0 +1,133 @@
+import unittest
+import warnings
+
+from astropy import units as u
+
+from app.data import model
+from app.data.model import layer2
+from app.dataapi import command, responders
+from app.dataapi import presentation as dataapi
+from app.lib import astronomy
+
+
+class StructuredResponderTest(unittest.TestCase):
+    def setUp(self) -> None:
+        warnings.filterwarnings("ignore", message="Using UFloat objects with std_dev==0 may give unexpected results")
+        self.config = command.parse_config("configs/dev/dataapi.yaml").catalogs
+        self.responder = responders.StructuredResponder(self.config)
+
+    def test_page_matches_per_object_conversion(self):
+        positions = [(187.70592, 12.39111), (10.68471, 41.26875), (0.0, -89.5), (359.99, 0.0)]
+        objects = [
+            model.Layer2CatalogObject(
+                i,
+                [model.ICRSCatalogObject(ra, dec, 1e-4, 2e-4), model.RedshiftCatalogObject(1000.0 + i, 10.0)],
+            )
+            for i, (ra, dec) in enumerate(positions)
+        ]
+        # Objects without redshift or coordinates have no velocities.
+        objects.append(model.Layer2CatalogObject(10, [model.ICRSCatalogObject(50.0, 50.0, 1e-4, 1e-4)]))
+        objects.append(model.Layer2CatalogObject(11, [model.RedshiftCatalogObject(500.0, 5.0)]))
+
+        built = self.responder.build_objects_from_catalog(objects)
+
+        for obj, (ra, dec) in zip(built, positions, strict=False):
+            coordinates = obj.catalogs.coordinates
+            self.assertIsNotNone(coordinates)
+            if coordinates is None:
+                continue
+            lon, lat, e_lon, e_lat = astronomy.equatorial_to_lonlat(ra, dec, 1e-4, 2e-4, "galactic")
+            sg_lon, sg_lat, _, _ = astronomy.equatorial_to_lonlat(ra, dec, 1e-4, 2e-4, "supergalactic")
+            self.assertAlmostEqual(coordinates.galactic.lon, lon, places=9)
+            self.assertAlmostEqual(coordinates.galactic.lat, lat, places=9)
+            self.assertAlmostEqual(coordinates.galactic.e_lon, e_lon)
+            self.assertAlmostEqual(coordinates.galactic.e_lat, e_lat)
+            self.assertAlmostEqual(coordinates.supergalactic.lon, sg_lon, places=9)
+            self.assertAlmostEqual(coordinates.supergalactic.lat, sg_lat, places=9)
+            self.assertAlmostEqual(coordinates.equatorial.e_ra, 0.36)
+
+            velocity = obj.catalogs.velocity
+            self.assertIsNotNone(velocity)
+            if velocity is None:
+                continue
+            self.assertEqual(set(velocity), set(self.config.velocity.apexes))
+            for key, apex in self.config.velocity.apexes.items():
+                expected, expected_err = astronomy.velocity_wr_apex(
+                    vel=(1000.0 + obj.pgc) * u.Unit("km/s"),
+                    lon=lon * u.Unit("deg"),
+                    lat=lat * u.Unit("deg"),
+                    vel_apex=apex.vel.value * u.Unit("km/s"),
+                    lon_apex=apex.lon.value * u.Unit("deg"),
+                    lat_apex=apex.lat.value * u.Unit("deg"),
+                    vel_err=10.0 * u.Unit("km/s"),
+                    lon_err=e_lon * u.Unit("arcsec"),
+                    lat_err=e_lat * u.Unit("arcsec"),
+                    vel_apex_err=apex.vel.error * u.Unit("km/s"),
+                    lon_apex_err=apex.lon.error * u.Unit("deg"),
+                    lat_apex_err=apex.lat.error * u.Unit("deg"),
+                )
+                self.assertAlmostEqual(velocity[key].v, expected.value, places=6)
+                self.assertAlmostEqual(velocity[key].e_v, expected_err.value, places=6)
+
+        self.assertIsNone(built[4].catalogs.velocity)
+        self.assertIsNone(built[5].catalogs.coordinates)
+        self.assertIsNone(built[5].catalogs.velocity)
+
+    def test_layer2_objects_are_built_like_catalog_objects(self):
+        catalog_object = model.Layer2CatalogObject(
+            1, [model.ICRSCatalogObject(10.0, 20.0, 1e-4, 1e-4), model.RedshiftCatalogObject(1000.0, 10.0)]
+        )
+        layer2_object = layer2.Layer2Object(
+            pgc=1,
+            catalogs=layer2.Catalogs(
+                icrs=layer2.ICRSCatalog(ra=10.0, e_ra=1e-4, dec=20.0, e_dec=1e-4),
+                redshift=layer2.RedshiftCatalog(cz=1000.0, e_cz=10.0),
+            ),
+        )
+
+        self.assertEqual(
+            self.responder.build_object(layer2_object), self.responder.build_object_from_catalog(catalog_object)
+        )
+
+    def test_stored_frames_are_served(self):
+        stored = model.ICRSCatalogObject(10.0, 20.0, 1e-4, 1e-4, glon=1.0, glat=2.0, sgl=3.0, sgb=4.0)
+        converted = model.ICRSCatalogObject(10.0, 20.0, 1e-4, 1e-4)
+
+        first, second = self.responder.build_objects_from_catalog(
+            [model.Layer2CatalogObject(1, [stored]), model.Layer2CatalogObject(2, [converted])]
+        )
+
+        assert first.catalogs.coordinates is not None and second.catalogs.coordinates is not None
+        galactic, supergalactic = first.catalogs.coordinates.galactic, first.catalogs.coordinates.supergalactic
+        self.assertEqual((galactic.lon, galactic.lat, supergalactic.lon, supergalactic.lat), (1.0, 2.0, 3.0, 4.0))
+        lon, lat, _, _ = astronomy.equatorial_to_lonlat(10.0, 20.0, 1e-4, 1e-4, "galactic")
+        self.assertAlmostEqual(second.catalogs.coordinates.galactic.lon, lon, places=9)
+        self.assertAlmostEqual(second.catalogs.coordinates.galactic.lat, lat, places=9)
+
+    def test_stored_velocities_are_served(self):
+        objects = [
+            model.Layer2CatalogObject(
+                pgc, [model.ICRSCatalogObject(10.0, 20.0, 1e-4, 1e-4), model.RedshiftCatalogObject(1000.0, 10.0)]
+            )
+            for pgc in (1, 2, 3)
+        ]
+        stored = {
+            1: {key: layer2.ApexVelocity(v=float(i), e_v=0.5) for i, key in enumerate(self.config.velocity.apexes)},
+            # Objects missing some of the apexes get all of them computed.
+            2: {"local_group": layer2.ApexVelocity(v=-1.0, e_v=0.5)},
+        }
+
+        first, second, third = self.responder.build_objects_from_catalog(objects, stored)
+
+        self.assertEqual(
+            first.catalogs.velocity,
+            {key: dataapi.AbsoluteVelocity(v=float(i), e_v=0.5) for i, key in enumerate(self.config.velocity.apexes)},
+        )
+        self.assertEqual(second.catalogs.velocity, third.catalogs.velocity)
+        self.assertEqual(
+            second.catalogs.velocity, self.responder.build_object_from_catalog(objects[0]).catalogs.velocity
+        )
+
+    def test_empty_page(self):
+        self.assertEqual(self.responder.build_objects([]), [])
+        self.assertEqual(self.responder.build_objects_from_catalog([]), [])
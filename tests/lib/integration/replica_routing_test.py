@@ -0,0 +1,42 @@
+import unittest
+
+import structlog
+
+from app.lib.storage import postgres
+from tests import lib
+
+
+class ReplicaFallbackTest(unittest.TestCase):
+    """
+    A second Postgres that is not in recovery, or one that cannot be reached, must never serve reads.
+    Pointing `replicas` at a real streaming replica of the primary routes read-only queries to it instead.
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.primary_config = lib.TestPostgresStorage.get().config
+
+    def _storage(self, replicas: list[postgres.ReplicaConfig]) -> postgres.PgStorage:
+        cfg = self.primary_config.model_copy(update={"replicas": replicas})
+        storage = postgres.PgStorage(cfg, structlog.get_logger())
+        storage.connect()
+        self.addCleanup(storage.disconnect)
+        return storage
+
+    def test_primary_is_not_used_as_replica(self):
+        storage = self._storage(
+            [postgres.ReplicaConfig(endpoint=self.primary_config.endpoint, port=self.primary_config.port)]
+        )
+
+        result = storage.query("SELECT pg_is_in_recovery() AS in_recovery", read_only=True)
+
+        self.assertFalse(result[0]["in_recovery"])
+        self.assertFalse(any(replica.healthy for replica in storage.replica_status()))
+
+    def test_unreachable_replica_falls_back_to_primary(self):
+        storage = self._storage([postgres.ReplicaConfig(endpoint="localhost", port=lib.find_free_port())])
+
+        result = storage.query("SELECT 1 AS one", read_only=True)
+
+        self.assertEqual(result[0]["one"], 1)
+        self.assertFalse(any(replica.healthy for replica in storage.replica_status()))
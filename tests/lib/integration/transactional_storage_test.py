@@ -1,5 +1,7 @@
 import unittest
 
+from psycopg import sql
+
 from app.lib.storage.postgres import transactional
 from tests import lib
 
@@ -54,3 +56,100 @@ class TransactionalRepositoryTest(unittest.TestCase):
 
         with self.assertRaises(Exception):
             self.pg_storage.get_storage().query_one("SELECT id FROM test_table4 LIMIT 1")
+
+    def test_pipeline(self):
+        repo = transactional.TransactionalPGRepository(self.pg_storage.get_storage())
+        with repo.with_tx(pipeline=True):
+            self.pg_storage.get_storage().exec("CREATE TABLE test_table5 (id INTEGER)")
+            self.pg_storage.get_storage().execute_batch("INSERT INTO test_table5 VALUES (%s)", [[1], [2], [3]])
+            result = self.pg_storage.get_storage().query("SELECT id FROM test_table5 ORDER BY id")
+
+        self.assertEqual([row["id"] for row in result], [1, 2, 3])
+
+    def test_pipeline_rollback(self):
+        repo = transactional.TransactionalPGRepository(self.pg_storage.get_storage())
+        with self.assertRaises(Exception), repo.with_tx(pipeline=True):
+            self.pg_storage.get_storage().exec("CREATE TABLE test_table6 (id INTEGER)")
+            self.pg_storage.get_storage().exec("INSERT INTO test_table6 VALUES ('totally not integer')")
+            self.pg_storage.get_storage().exec("INSERT INTO test_table6 VALUES (42)")
+
+        with self.assertRaises(Exception):
+            self.pg_storage.get_storage().query_one("SELECT id FROM test_table6 LIMIT 1")
+
+
+class StreamTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.pg_storage = lib.TestPostgresStorage.get()
+
+    def test_stream_yields_bounded_batches(self):
+        batches = list(
+            self.pg_storage.get_storage().stream("SELECT generate_series(1, 25) AS id", batch_rows=10),
+        )
+
+        self.assertEqual([len(batch) for batch in batches], [10, 10, 5])
+        self.assertEqual([row["id"] for batch in batches for row in batch], list(range(1, 26)))
+
+    def test_stream_inside_transaction(self):
+        storage = self.pg_storage.get_storage()
+        repo = transactional.TransactionalPGRepository(storage)
+        with repo.with_tx():
+            storage.exec("CREATE TABLE test_stream_table (id INTEGER)")
+            storage.exec("INSERT INTO test_stream_table SELECT generate_series(1, 3)")
+            batches = list(storage.stream("SELECT id FROM test_stream_table ORDER BY id", batch_rows=2))
+
+        self.assertEqual([[row["id"] for row in batch] for batch in batches], [[1, 2], [3]])
+
+    def test_stream_timeout_does_not_outlive_it_in_transaction(self):
+        storage = self.pg_storage.get_storage()
+        repo = transactional.TransactionalPGRepository(storage)
+        with repo.with_tx():
+            storage.exec("SET LOCAL statement_timeout = '7s'")
+            batches = list(storage.stream("SELECT 1 AS id", timeout_seconds=1))
+            timeout = storage.query_one("SHOW statement_timeout")["statement_timeout"]
+
+        self.assertEqual(len(batches), 1)
+        self.assertEqual(timeout, "7s")
+
+
+class BulkWriteTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.pg_storage = lib.TestPostgresStorage.get()
+
+    def test_bulk_upsert_updates_conflicting_rows(self):
+        storage = self.pg_storage.get_storage()
+        storage.exec("CREATE TABLE public.test_bulk_upsert (id TEXT PRIMARY KEY, value DOUBLE PRECISION, note JSONB)")
+        storage.exec("INSERT INTO public.test_bulk_upsert VALUES ('a', 1, '{}')")
+
+        affected = storage.bulk_upsert(
+            "public.test_bulk_upsert",
+            ["id", "value", "note"],
+            [("a", 2.0, '{"x": 1}'), ("b", 3.0, None), ("b", 4.0, None)],
+            conflict_keys=["id"],
+            update_columns=["value", "note"],
+        )
+        result = storage.query("SELECT id, value, note FROM public.test_bulk_upsert ORDER BY id")
+
+        self.assertEqual(affected, 2)
+        self.assertEqual(
+            [(row["id"], row["value"], row["note"]) for row in result],
+            [("a", 2.0, {"x": 1}), ("b", 4.0, None)],
+        )
+
+    def test_bulk_update_with_condition(self):
+        storage = self.pg_storage.get_storage()
+        storage.exec("CREATE TABLE public.test_bulk_update (id TEXT PRIMARY KEY, pgc INTEGER)")
+        storage.exec("INSERT INTO public.test_bulk_update VALUES ('a', NULL), ('b', 7)")
+
+        affected = storage.bulk_update(
+            "public.test_bulk_update",
+            ["id", "pgc"],
+            [("a", 1), ("b", 2)],
+            keys=["id"],
+            condition=sql.SQL("t.pgc IS NULL"),
+        )
+        result = storage.query("SELECT id, pgc FROM public.test_bulk_update ORDER BY id")
+
+        self.assertEqual(affected, 1)
+        self.assertEqual([(row["id"], row["pgc"]) for row in result], [("a", 1), ("b", 7)])
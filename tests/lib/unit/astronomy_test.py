@@ -2,6 +2,7 @@ import unittest
 import warnings
 
 import numpy as np
+from astropy import coordinates as coords
 from astropy import units as u
 from parameterized import param, parameterized
 from uncertainties import ufloat
@@ -153,3 +154,73 @@ class AstronomyTest(unittest.TestCase):
     def test_parse_coordinate_epoch_invalid(self):
         with self.assertRaisesRegex(ValueError, "Invalid coordinate epoch"):
             astronomy.parse_coordinate_epoch("not-an-epoch")
+
+    def test_lonlat_many_matches_astropy(self):
+        rng = np.random.default_rng(3)
+        ra = np.concatenate((rng.uniform(0, 360, 200), [0.0, 359.999999, 192.85948]))
+        dec = np.concatenate((np.degrees(np.arcsin(rng.uniform(-1, 1, 200))), [90.0, -90.0, 27.12825]))
+
+        for frame in ("galactic", "supergalactic"):
+            lon, lat = astronomy.equatorial_to_lonlat_many(ra, dec, frame)
+            expected = coords.SkyCoord(ra=ra * u.Unit("deg"), dec=dec * u.Unit("deg")).transform_to(frame)
+
+            with self.subTest(frame=frame):
+                np.testing.assert_allclose(lat, np.asarray(expected.spherical.lat.deg), atol=1e-9)
+                # Longitude is undefined at the poles of the frame.
+                defined = np.abs(lat) < 89.9999
+                lon_diff = (lon - expected.spherical.lon.deg + 180) % 360 - 180
+                np.testing.assert_allclose(lon_diff[defined], 0, atol=1e-9)
+                self.assertTrue(np.all((lon >= 0) & (lon < 360)))
+
+    def test_apex_velocity_many_matches_scalar(self):
+        rng = np.random.default_rng(5)
+        n = 50
+        vel, lon, lat = rng.uniform(-500, 15000, n), rng.uniform(0, 360, n), rng.uniform(-90, 90, n)
+        vel_err, lon_err, lat_err = rng.uniform(0, 100, n), rng.uniform(0, 0.01, n), rng.uniform(0, 0.01, n)
+        # The last apex has no uncertainties at all.
+        apexes = np.array(
+            [[316.0, 264.14, 48.26, 5.0, 0.5, 0.5], [-200.0, 10.0, -30.0, 0.0, 2.0, 0.0], [1, 2, 3, 0, 0, 0]]
+        )
+        vel_apex, lon_apex, lat_apex, vel_apex_err, lon_apex_err, lat_apex_err = apexes.T[:, :, np.newaxis]
+
+        velocity, velocity_err = astronomy.velocity_wr_apex_many(
+            vel,
+            lon,
+            lat,
+            vel_apex,
+            lon_apex,
+            lat_apex,
+            vel_err,
+            lon_err,
+            lat_err,
+            vel_apex_err,
+            lon_apex_err,
+            lat_apex_err,
+        )
+
+        self.assertEqual(velocity.shape, (len(apexes), n))
+        for k, i in np.ndindex(velocity.shape):
+            expected, expected_err = astronomy.velocity_wr_apex(
+                vel=vel[i] * u.Unit("km/s"),
+                lon=lon[i] * u.Unit("deg"),
+                lat=lat[i] * u.Unit("deg"),
+                vel_apex=apexes[k, 0] * u.Unit("km/s"),
+                lon_apex=apexes[k, 1] * u.Unit("deg"),
+                lat_apex=apexes[k, 2] * u.Unit("deg"),
+                vel_err=vel_err[i] * u.Unit("km/s"),
+                lon_err=lon_err[i] * u.Unit("deg"),
+                lat_err=lat_err[i] * u.Unit("deg"),
+                vel_apex_err=apexes[k, 3] * u.Unit("km/s"),
+                lon_apex_err=apexes[k, 4] * u.Unit("deg"),
+                lat_apex_err=apexes[k, 5] * u.Unit("deg"),
+            )
+            self.assertAlmostEqual(velocity[k, i], expected.value, places=9)
+            self.assertAlmostEqual(velocity_err[k, i], expected_err.value, places=9)
+
+    def test_apex_velocity_many_without_errors(self):
+        velocity, velocity_err = astronomy.velocity_wr_apex_many(
+            np.array([100.0, 100.0]), np.array([147.0, 147.0]), np.array([50.0, 0.0]), 40.0, 147.0, 50.0
+        )
+
+        np.testing.assert_allclose(velocity, [60.0, 100 - 40 * np.cos(np.radians(50))])
+        np.testing.assert_array_equal(velocity_err, [0.0, 0.0])
@@ -0,0 +1,35 @@
+import base64
+import unittest
+
+from app.lib.web import errors, pagination
+
+
+class CursorTest(unittest.TestCase):
+    def test_round_trip(self):
+        token = pagination.encode_cursor("icrs_distance", [0.1 + 0.2, 42])
+
+        self.assertEqual(pagination.decode_cursor(token, "icrs_distance", (float, int)), [0.1 + 0.2, 42])
+
+    def test_integer_distance_is_read_as_float(self):
+        token = pagination.encode_cursor("icrs_distance", [0, 42])
+
+        key = pagination.decode_cursor(token, "icrs_distance", (float, int))
+
+        self.assertIsInstance(key[0], float)
+
+    def test_other_kind_is_rejected(self):
+        token = pagination.encode_cursor("pgc", [42])
+
+        with self.assertRaisesRegex(errors.RuleValidationError, "does not belong"):
+            pagination.decode_cursor(token, "icrs_distance", (float, int))
+
+    def test_wrong_type_is_rejected(self):
+        token = pagination.encode_cursor("pgc", ["42"])
+
+        with self.assertRaisesRegex(errors.RuleValidationError, "malformed"):
+            pagination.decode_cursor(token, "pgc", (int,))
+
+    def test_garbage_is_rejected(self):
+        for token in ["not a cursor", base64.urlsafe_b64encode(b'{"a": 1}').decode()]:
+            with self.subTest(token=token), self.assertRaisesRegex(errors.RuleValidationError, "malformed"):
+                pagination.decode_cursor(token, "pgc", (int,))
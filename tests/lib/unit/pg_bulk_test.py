@@ -0,0 +1,54 @@
+import unittest
+from decimal import Decimal
+from types import SimpleNamespace
+
+from psycopg import sql
+
+from app.lib.storage.postgres import bulk
+
+
+def _column(type_code: int) -> SimpleNamespace:
+    return SimpleNamespace(name="c", type_code=type_code)
+
+
+def _as_string(query: sql.Composable) -> str:
+    return query.as_string(None)
+
+
+class BinaryCoercionTest(unittest.TestCase):
+    def test_scalar_columns_are_sent_as_binary(self):
+        coercions = bulk.binary_coercions([_column(20), _column(701), _column(25), _column(1700)])
+        assert coercions is not None
+
+        self.assertEqual(bulk.coerce_row([3.0, 1, 5, 1.5], coercions), (3, 1.0, "5", Decimal("1.5")))
+        self.assertEqual(bulk.coerce_row([None, None, None, None], coercions), (None, None, None, None))
+
+    def test_other_columns_fall_back_to_text(self):
+        # jsonb
+        self.assertIsNone(bulk.binary_coercions([_column(25), _column(3802)]))
+
+
+class BulkQueryTest(unittest.TestCase):
+    staging = sql.Identifier("staging")
+
+    def test_insert_skips_conflicts_without_keys(self):
+        query = _as_string(bulk.upsert_query("rawdata.t", self.staging, ["a", "b"], None, []))
+
+        self.assertEqual(
+            query, 'INSERT INTO "rawdata"."t" ("a", "b") SELECT "a", "b" FROM "staging" ON CONFLICT DO NOTHING'
+        )
+
+    def test_upsert_keeps_last_row_per_key(self):
+        query = _as_string(bulk.upsert_query("layer0.records", self.staging, ["id", "table_id"], ["id"], ["table_id"]))
+
+        self.assertIn('SELECT DISTINCT ON ("id") "id", "table_id" FROM "staging" ORDER BY "id", ctid DESC', query)
+        self.assertIn('ON CONFLICT ("id") DO UPDATE SET "table_id" = EXCLUDED."table_id"', query)
+
+    def test_update_from_staging(self):
+        query = _as_string(bulk.update_query("layer0.records", self.staging, ["id"], ["pgc"], sql.SQL("t.pgc IS NULL")))
+
+        self.assertEqual(
+            query,
+            'UPDATE "layer0"."records" AS t SET "pgc" = s."pgc" FROM "staging" AS s '
+            'WHERE t."id" = s."id" AND t.pgc IS NULL',
+        )
@@ -0,0 +1,46 @@
+import unittest
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.lib.storage.postgres import columns
+
+
+def _column(name: str, type_code: int) -> SimpleNamespace:
+    return SimpleNamespace(name=name, type_code=type_code)
+
+
+class ColumnCollectorTest(unittest.TestCase):
+    def test_numeric_columns_use_native_dtypes(self):
+        collector = columns.ColumnCollector([_column("pgc", 23), _column("ra", 701)], 3)
+        collector.add([(1, 10.0), (2, 20.0)])
+        collector.add([(3, 30.0)])
+
+        result = collector.result()
+
+        self.assertEqual(result["pgc"].dtype, np.int32)
+        self.assertEqual(result["ra"].dtype, np.float64)
+        np.testing.assert_array_equal(result["pgc"], [1, 2, 3])
+        self.assertNotIsInstance(result["ra"], np.ma.MaskedArray)
+
+    def test_nulls_are_masked(self):
+        collector = columns.ColumnCollector([_column("e_cz", 701), _column("name", 25)], 3)
+        collector.add([(1.5, "a"), (None, None), (2.5, "c")])
+
+        result = collector.result()
+
+        self.assertEqual(result["e_cz"].tolist(), [1.5, None, 2.5])
+        self.assertEqual(result["name"].tolist(), ["a", None, "c"])
+
+    def test_array_cells_are_kept_whole(self):
+        collector = columns.ColumnCollector([_column("author", 1009)], 2)
+        collector.add([(["A", "B"],), (["C", "D"],)])
+
+        self.assertEqual(collector.result()["author"].tolist(), [["A", "B"], ["C", "D"]])
+
+    def test_empty_result_keeps_columns(self):
+        collector = columns.ColumnCollector([_column("pgc", 23)], 0)
+
+        result = collector.result()
+
+        self.assertEqual(len(result["pgc"]), 0)
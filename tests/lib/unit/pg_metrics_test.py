@@ -0,0 +1,84 @@
+import unittest
+
+from app.lib.storage import postgres
+from app.lib.storage.postgres import metrics
+
+
+class FakeResult:
+    def __init__(self, values: list[list[bytes | None]]) -> None:
+        self.values = values
+        self.ntuples = len(values)
+        self.nfields = len(values[0]) if values else 0
+
+    def get_value(self, row_number: int, column_number: int) -> bytes | None:
+        return self.values[row_number][column_number]
+
+
+class QueryMetricsTest(unittest.TestCase):
+    def test_queries_with_different_parameters_share_a_fingerprint(self):
+        query_metrics = metrics.QueryMetrics(postgres.QueryMetricsConfig())
+
+        query_metrics.observe("SELECT * FROM t WHERE pgc IN (1, 2)", num_rows=2, num_bytes=16, elapsed_seconds=0.01)
+        query_metrics.observe("SELECT * FROM t WHERE pgc IN (3, 4, 5)", num_rows=3, num_bytes=24, elapsed_seconds=0.03)
+
+        stats = query_metrics.stats()
+        self.assertEqual(len(stats), 1)
+        self.assertEqual(stats[0].query, "SELECT * FROM t WHERE pgc IN (?, ...)")
+        self.assertEqual(stats[0].count, 2)
+        self.assertEqual(stats[0].rows, 5)
+        self.assertEqual(stats[0].bytes, 40)
+        self.assertAlmostEqual(stats[0].total_seconds, 0.04)
+        self.assertEqual(stats[0].max_seconds, 0.03)
+
+    def test_quantiles(self):
+        query_metrics = metrics.QueryMetrics(postgres.QueryMetricsConfig())
+
+        for i in range(1, 101):
+            query_metrics.observe("SELECT 1", num_rows=1, num_bytes=0, elapsed_seconds=i / 100)
+
+        stats = query_metrics.stats()[0]
+        # Buckets are about 20% wide.
+        self.assertAlmostEqual(stats.p50_seconds, 0.5, delta=0.1)
+        self.assertAlmostEqual(stats.p95_seconds, 0.95, delta=0.19)
+        self.assertAlmostEqual(stats.p99_seconds, 0.99, delta=0.2)
+        self.assertLessEqual(stats.p99_seconds, stats.max_seconds)
+        self.assertLessEqual(stats.p50_seconds, stats.p95_seconds)
+
+    def test_sorted_by_total_time(self):
+        query_metrics = metrics.QueryMetrics(postgres.QueryMetricsConfig())
+
+        query_metrics.observe("SELECT a FROM t", num_rows=0, num_bytes=0, elapsed_seconds=0.1)
+        query_metrics.observe("SELECT b FROM t", num_rows=0, num_bytes=0, elapsed_seconds=1.0)
+
+        self.assertEqual([s.query for s in query_metrics.stats()], ["SELECT b FROM t", "SELECT a FROM t"])
+
+    def test_overflow(self):
+        query_metrics = metrics.QueryMetrics(postgres.QueryMetricsConfig(max_fingerprints=2))
+
+        for column in ("a", "b", "c", "d"):
+            query_metrics.observe(f"SELECT {column} FROM t", num_rows=0, num_bytes=0, elapsed_seconds=0.1)
+
+        stats = {s.fingerprint: s for s in query_metrics.stats()}
+        self.assertEqual(len(stats), 3)
+        self.assertEqual(stats[metrics.OVERFLOW_FINGERPRINT].count, 2)
+
+    def test_disabled(self):
+        query_metrics = metrics.QueryMetrics(postgres.QueryMetricsConfig(enabled=False))
+
+        query_metrics.observe("SELECT 1", num_rows=1, num_bytes=0, elapsed_seconds=0.1)
+
+        self.assertEqual(query_metrics.stats(), [])
+
+
+class ResultBytesTest(unittest.TestCase):
+    def test_run(self):
+        tests = [
+            ("no result", None, 0),
+            ("empty", FakeResult([]), 0),
+            ("nulls", FakeResult([[b"abcd", None], [b"ab", b"cd"]]), 8),
+            ("sampled", FakeResult([[b"x" * 10]] * 1000), 10_000),
+        ]
+
+        for name, result, expected in tests:
+            with self.subTest(name):
+                self.assertEqual(metrics.result_bytes(result), expected)
@@ -0,0 +1,84 @@
+import unittest
+from unittest import mock
+
+from app.lib.storage import postgres
+from app.lib.storage.postgres import pool
+
+
+class IdleCheckTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.now = 100.0
+        self.idle_check = pool.IdleCheck(30.0, clock=lambda: self.now)
+        self.conn = mock.Mock()
+
+    def test_fresh_connection_is_not_checked(self):
+        self.assertFalse(self.idle_check.needs_check(self.conn))
+
+    def test_recently_returned_connection_is_not_checked(self):
+        self.idle_check.reset(self.conn)
+        self.now += 29
+
+        self.assertFalse(self.idle_check.needs_check(self.conn))
+
+    def test_idle_connection_is_checked(self):
+        self.idle_check.reset(self.conn)
+        self.now += 30
+
+        with mock.patch.object(pool.ConnectionPool, "check_connection") as check_connection:
+            self.idle_check.check(self.conn)
+
+        check_connection.assert_called_once_with(self.conn)
+
+
+class PoolConfigTest(unittest.TestCase):
+    def test_interactive_pool_is_always_present(self):
+        cfg = postgres.PgStorageConfig(pools={postgres.Workload.TAP: postgres.PoolConfig(max_size=5)})
+
+        pools = cfg.get_pool_configs()
+
+        self.assertEqual(set(pools), {postgres.Workload.INTERACTIVE, postgres.Workload.TAP})
+        self.assertEqual(pools[postgres.Workload.TAP].max_size, 5)
+
+    def test_pool_stats(self):
+        p = mock.Mock(min_size=2, max_size=10)
+        p.get_stats.return_value = {
+            "pool_min": 2,
+            "pool_max": 10,
+            "pool_size": 6,
+            "pool_available": 1,
+            "requests_num": 40,
+            "requests_wait_ms": 2000,
+        }
+
+        stats = pool.pool_stats(postgres.Workload.TAP.value, p)
+
+        self.assertEqual(stats.workload, "tap")
+        self.assertEqual(stats.checkouts, 40)
+        self.assertAlmostEqual(stats.wait_seconds_total, 2.0)
+        self.assertAlmostEqual(stats.wait_seconds_mean, 0.05)
+        self.assertAlmostEqual(stats.saturation, 0.5)
+
+
+class WarmupTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.now = 10.0
+
+    def test_warm_after_min_size_connections(self):
+        warmup = pool.Warmup("interactive", 2, clock=lambda: self.now)
+
+        self.now += 1
+        warmup.connection_added()
+        self.assertIsNone(warmup.seconds)
+
+        self.now += 2
+        warmup.connection_added()
+        self.assertEqual(warmup.seconds, 3.0)
+
+        self.now += 5
+        warmup.connection_added()
+        self.assertEqual(warmup.seconds, 3.0)
+
+    def test_empty_pool_is_warm(self):
+        warmup = pool.Warmup("replica_0", 0, clock=lambda: self.now)
+
+        self.assertEqual(warmup.seconds, 0.0)
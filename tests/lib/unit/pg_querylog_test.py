@@ -0,0 +1,101 @@
+import datetime
+import unittest
+
+from psycopg import sql
+
+from app.lib.storage import postgres
+from app.lib.storage.postgres import querylog
+
+
+class NormalizeQueryTest(unittest.TestCase):
+    def test_run(self):
+        tests = [
+            ("literals", "SELECT * FROM t WHERE a = 'x' AND b > 10.5", "SELECT * FROM t WHERE a = ? AND b > ?"),
+            ("placeholders", "SELECT *\n  FROM t\n  WHERE a = %s -- comment", "SELECT * FROM t WHERE a = ?"),
+            ("identifiers", 'SELECT t0.a AS "icrs|ra" FROM t0', 'SELECT t0.a AS "icrs|ra" FROM t0'),
+            ("values", "VALUES (%s, %s), (%s, %s), (%s, %s)", "VALUES (?, ?), ..."),
+            ("in list", "SELECT * FROM t WHERE pgc IN (%s, %s, %s)", "SELECT * FROM t WHERE pgc IN (?, ...)"),
+            (
+                "generated names",
+                "DROP TABLE bulk_staging_0123456789abcdef0123456789abcdef",
+                "DROP TABLE bulk_staging_?",
+            ),
+        ]
+
+        for name, query, expected in tests:
+            with self.subTest(name):
+                self.assertEqual(querylog.normalize_query(query), expected)
+
+    def test_fingerprint_ignores_parameters(self):
+        first = querylog.fingerprint(querylog.normalize_query("SELECT 1 FROM t WHERE pgc = ANY(%s) LIMIT 10"))
+        second = querylog.fingerprint(querylog.normalize_query("SELECT 1 FROM t WHERE pgc = ANY(%s) LIMIT 25"))
+
+        self.assertEqual(first, second)
+
+
+class IsReadQueryTest(unittest.TestCase):
+    def test_run(self):
+        tests = [
+            ("select", "SELECT * FROM t WHERE a = 'insert into'", True),
+            ("cte", "-- comment\n WITH x AS (SELECT 1) SELECT * FROM x", True),
+            ("parenthesized", "(SELECT 1) UNION (SELECT 2)", True),
+            ("column names", "SELECT last_update, update_time FROM t", True),
+            ("insert returning", "INSERT INTO t (a) VALUES (1) RETURNING id", False),
+            ("update", "UPDATE t SET a = 1 RETURNING a", False),
+            ("writing cte", "WITH d AS (DELETE FROM t RETURNING id) SELECT * FROM d", False),
+            ("select into", "SELECT * INTO t2 FROM t", False),
+            ("row lock", "SELECT * FROM t FOR UPDATE", False),
+        ]
+
+        for name, query, expected in tests:
+            with self.subTest(name):
+                self.assertEqual(querylog.is_read_query(query), expected)
+
+
+class QueryTemplateTest(unittest.TestCase):
+    def test_run(self):
+        composed = sql.SQL("SELECT {} FROM {} WHERE pgc = ANY({}) AND a = %s").format(
+            sql.Identifier("ra"), sql.Identifier("layer2", "icrs"), sql.Literal([1, 2, 3])
+        )
+        tests = [
+            ("string", "SELECT 1", "SELECT 1"),
+            ("composed", composed, 'SELECT "ra" FROM "layer2"."icrs" WHERE pgc = ANY(?) AND a = %s'),
+            ("nested", sql.SQL("{} LIMIT {}").format(composed, sql.Literal(10)), None),
+        ]
+
+        for name, query, expected in tests:
+            with self.subTest(name):
+                if expected is None:
+                    expected = querylog.query_template(composed) + " LIMIT ?"
+                self.assertEqual(querylog.query_template(query), expected)
+
+
+class SlowQueryLogTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.now = datetime.datetime(2024, 1, 1, tzinfo=datetime.UTC)
+        self.log = querylog.SlowQueryLog(
+            postgres.SlowQueryConfig(threshold_seconds=1.0, explain_threshold_seconds=5.0, buffer_size=2),
+            clock=lambda: self.now,
+        )
+
+    def test_thresholds(self):
+        self.assertFalse(self.log.is_slow(0.5))
+        self.assertTrue(self.log.is_slow(1.0))
+        self.assertFalse(self.log.wants_plan(4.0))
+        self.assertTrue(self.log.wants_plan(5.0))
+
+    def test_buffer_keeps_most_recent_entries(self):
+        for i in range(3):
+            self.log.record(f"SELECT {i}", [i], num_rows=i, elapsed_seconds=1.5, workload=postgres.Workload.TAP)
+
+        entries = self.log.entries()
+
+        self.assertEqual([entry.num_rows for entry in entries], [2, 1])
+        self.assertEqual(entries[0].query, "SELECT ?")
+        self.assertEqual(entries[0].workload, "tap")
+        self.assertNotEqual(entries[0].params_digest, entries[1].params_digest)
+
+    def test_disabled(self):
+        log = querylog.SlowQueryLog(postgres.SlowQueryConfig(threshold_seconds=None))
+
+        self.assertFalse(log.is_slow(100))
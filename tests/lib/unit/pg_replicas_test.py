@@ -0,0 +1,89 @@
+import unittest
+from unittest import mock
+
+import psycopg
+
+from app.lib.storage import postgres
+from app.lib.storage.postgres import postgres_storage, replicas
+
+
+class ReplicaSetTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.now = 0.0
+        self.replica_set: replicas.ReplicaSet[str] = replicas.ReplicaSet(
+            max_lag_seconds=5, check_interval_seconds=10, clock=lambda: self.now
+        )
+        self.replica_set.add("first", "pool-1")
+        self.replica_set.add("second", "pool-2")
+        self.first, self.second = self.replica_set.replicas()
+
+    def test_unchecked_replicas_are_not_chosen(self):
+        self.assertIsNone(self.replica_set.choose())
+
+    def test_round_robin_over_healthy_replicas(self):
+        self.replica_set.update(self.first, in_recovery=True, lag_seconds=0)
+        self.replica_set.update(self.second, in_recovery=True, lag_seconds=1)
+
+        chosen = [self.replica_set.choose() for _ in range(4)]
+
+        self.assertEqual([r.name for r in chosen if r is not None], ["first", "second", "first", "second"])
+
+    def test_lagging_or_promoted_replicas_are_skipped(self):
+        self.replica_set.update(self.first, in_recovery=True, lag_seconds=6)
+        self.replica_set.update(self.second, in_recovery=False, lag_seconds=0)
+
+        self.assertIsNone(self.replica_set.choose())
+
+    def test_checks_are_claimed_once_per_interval(self):
+        self.assertEqual(len(self.replica_set.claim_checks()), 2)
+        self.assertEqual(self.replica_set.claim_checks(), [])
+
+        self.now += 10
+
+        self.assertEqual(len(self.replica_set.claim_checks()), 2)
+
+
+def _pool(result: list[dict], status: tuple[bool, float] = (True, 0.0)) -> mock.MagicMock:
+    p = mock.MagicMock()
+    cursor = p.connection.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value
+    cursor.fetchall.return_value = result
+    cursor.pgresult = None
+    cursor.execute.return_value.fetchone.return_value = status
+    return p
+
+
+class ReplicaRoutingTest(unittest.TestCase):
+    def _storage(self, replica_pool: mock.MagicMock) -> postgres.PgStorage:
+        self.primary_pool = _pool([{"server": "primary"}])
+        cfg = postgres.PgStorageConfig(replicas=[postgres.ReplicaConfig(endpoint="replica")])
+        storage = postgres.PgStorage(cfg, mock.Mock())
+        with mock.patch.object(postgres_storage, "ConnectionPool", side_effect=[self.primary_pool, replica_pool]):
+            storage.connect()
+        return storage
+
+    def test_read_only_queries_go_to_replica(self):
+        storage = self._storage(_pool([{"server": "replica"}]))
+
+        self.assertEqual(storage.query("SELECT 1", read_only=True), [{"server": "replica"}])
+        self.assertEqual(storage.query("SELECT 1"), [{"server": "primary"}])
+
+    def test_replica_view_routes_all_reads(self):
+        storage = self._storage(_pool([{"server": "replica"}]))
+
+        self.assertEqual(storage.replica().query("SELECT 1"), [{"server": "replica"}])
+
+    def test_lagging_replica_falls_back_to_primary(self):
+        storage = self._storage(_pool([{"server": "replica"}], status=(True, 3600.0)))
+
+        self.assertEqual(storage.query("SELECT 1", read_only=True), [{"server": "primary"}])
+
+    def test_failing_replica_falls_back_to_primary(self):
+        replica_pool = _pool([{"server": "replica"}])
+        storage = self._storage(replica_pool)
+        storage.query("SELECT 1", read_only=True)
+
+        replica_pool.connection.side_effect = psycopg.OperationalError("connection refused")
+
+        self.assertEqual(storage.query("SELECT 1", read_only=True), [{"server": "primary"}])
+        self.assertEqual(storage.query("SELECT 1", read_only=True), [{"server": "primary"}])
+        self.assertEqual(replica_pool.connection.call_count, 3)
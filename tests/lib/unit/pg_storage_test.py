@@ -0,0 +1,214 @@
+import enum
+import unittest
+from unittest import mock
+
+from psycopg import errors, pq, sql
+
+from app.lib.storage import postgres
+from app.lib.storage.postgres import postgres_storage
+
+
+class QueryObservationTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.conn = mock.MagicMock()
+        self.conn.cursor.return_value.__enter__.return_value.rowcount = 3
+        self.query = mock.MagicMock(spec=sql.Composed)
+        self.query.as_string.return_value = "UPDATE t SET a = 1 WHERE id = %s"
+        self.query.__iter__.side_effect = lambda: iter([sql.SQL("UPDATE t SET a = 1 WHERE id = %s")])
+
+    def _storage(self, threshold_seconds: float | None, metrics_enabled: bool = True) -> postgres.PgStorage:
+        cfg = postgres.PgStorageConfig(
+            slow_queries=postgres.SlowQueryConfig(threshold_seconds=threshold_seconds),
+            query_metrics=postgres.QueryMetricsConfig(enabled=metrics_enabled),
+        )
+        storage = postgres.PgStorage(cfg, mock.Mock())
+        storage.set_thread_conn(self.conn)
+        return storage
+
+    def test_query_is_not_rendered_when_debug_is_disabled(self):
+        storage = self._storage(threshold_seconds=None, metrics_enabled=False)
+
+        with mock.patch.object(postgres_storage, "log") as log:
+            log.is_enabled_for.return_value = False
+            storage.exec(self.query, params=[1])
+
+        self.query.as_string.assert_not_called()
+        log.debug.assert_not_called()
+
+    def test_slow_query_is_recorded(self):
+        storage = self._storage(threshold_seconds=0)
+
+        storage.exec(self.query, params=["id"])
+
+        entries = storage.slow_queries()
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(entries[0].query, "UPDATE t SET a = ? WHERE id = ?")
+        self.assertEqual(entries[0].num_rows, 3)
+        self.assertEqual(entries[0].workload, "interactive")
+
+    def test_only_reads_are_explained(self):
+        cfg = postgres.PgStorageConfig(
+            slow_queries=postgres.SlowQueryConfig(threshold_seconds=0, explain_threshold_seconds=0),
+        )
+        storage = postgres.PgStorage(cfg, mock.Mock())
+        storage.set_thread_conn(self.conn)
+        cursor = self.conn.cursor.return_value.__enter__.return_value
+        cursor.fetchall.return_value = []
+        cursor.pgresult = None
+
+        with mock.patch.object(storage, "_explain", return_value="plan") as explain:
+            storage.query("INSERT INTO t (a) VALUES (%s) RETURNING id", params=[1])
+            storage.query("SELECT * FROM t WHERE a = %s", params=[1])
+            storage.query("SELECT f(%s)", params=[1], read_only=True)
+
+        self.assertEqual(
+            [call.args[1] for call in explain.call_args_list], ["SELECT * FROM t WHERE a = %s", "SELECT f(%s)"]
+        )
+        self.assertEqual(
+            {entry.query: entry.plan for entry in storage.slow_queries()},
+            {
+                "INSERT INTO t (a) VALUES (?) RETURNING id": None,
+                "SELECT * FROM t WHERE a = ?": "plan",
+                "SELECT f(?)": "plan",
+            },
+        )
+
+    def test_workload_views_share_the_log(self):
+        storage = self._storage(threshold_seconds=0)
+        view = storage.workload(postgres.Workload.TAP)
+
+        view.exec(self.query)
+
+        self.assertEqual([entry.workload for entry in storage.slow_queries()], ["tap"])
+
+    def test_query_stats_are_collected(self):
+        storage = self._storage(threshold_seconds=None)
+        view = storage.workload(postgres.Workload.TAP)
+
+        with (
+            mock.patch.object(postgres_storage, "log") as log,
+            mock.patch.object(storage, "query_str") as query_str,
+            mock.patch.object(view, "query_str") as view_query_str,
+        ):
+            log.is_enabled_for.return_value = False
+            for value, view_or_storage in ((1, storage), (2, view)):
+                query = sql.SQL("UPDATE {} SET a = {} WHERE id = %s").format(sql.Identifier("t"), sql.Literal(value))
+                view_or_storage.exec(query, params=[1])
+
+        # Queries that are not logged are not rendered to be counted.
+        query_str.assert_not_called()
+        view_query_str.assert_not_called()
+        stats = storage.query_stats()
+        self.assertEqual(len(stats), 1)
+        self.assertEqual(stats[0].query, 'UPDATE "t" SET a = ? WHERE id = ?')
+        self.assertEqual(stats[0].count, 2)
+        self.assertEqual(stats[0].rows, 6)
+
+
+class StreamTimeoutTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.conn = mock.MagicMock()
+        self.conn.info.transaction_status = pq.TransactionStatus.INTRANS
+        cursor = self.conn.cursor.return_value.__enter__.return_value
+        cursor.execute.return_value.fetchone.return_value = ("7s",)
+        cursor.fetchmany.side_effect = [[{"id": 1}], []]
+        cursor.pgresult = None
+        self.storage = postgres.PgStorage(postgres.PgStorageConfig(), mock.Mock())
+
+    def test_timeout_of_callers_transaction_is_restored(self):
+        self.storage.set_thread_conn(self.conn)
+
+        batches = list(self.storage.stream("SELECT 1", timeout_seconds=1))
+
+        self.assertEqual(batches, [[{"id": 1}]])
+        executed = [call.args for call in self.conn.execute.call_args_list]
+        self.assertEqual(executed[-1], ("SELECT set_config('statement_timeout', %s, true)", ["7s"]))
+
+    def test_failed_transaction_is_left_alone(self):
+        self.storage.set_thread_conn(self.conn)
+        self.conn.info.transaction_status = pq.TransactionStatus.INERROR
+
+        list(self.storage.stream("SELECT 1", timeout_seconds=1))
+
+        self.assertEqual(len(self.conn.execute.call_args_list), 1)
+
+
+class PgEnum(enum.Enum):
+    A = "a"
+
+
+class EnumInfoCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        cfg = postgres.PgStorageConfig(pools={postgres.Workload.TAP: postgres.PoolConfig(min_size=1)})
+        self.storage = postgres.PgStorage(cfg, mock.Mock(), [(PgEnum, "pg_enum")])
+        with mock.patch.object(postgres_storage, "ConnectionPool") as pool_cls:
+            self.storage.connect()
+        self.pool = pool_cls.return_value
+        self.configure = [call.kwargs["configure"] for call in pool_cls.call_args_list]
+
+    def test_type_info_is_fetched_once(self):
+        with (
+            mock.patch.object(postgres_storage.enum.EnumInfo, "fetch") as fetch,
+            mock.patch.object(postgres_storage.enum, "register_enum") as register_enum,
+        ):
+            for configure in self.configure:
+                configure(mock.MagicMock())
+                configure(mock.MagicMock())
+
+        fetch.assert_called_once()
+        self.assertEqual(register_enum.call_count, 4)
+
+    def test_refresh_types(self):
+        with (
+            mock.patch.object(postgres_storage.enum.EnumInfo, "fetch") as fetch,
+            mock.patch.object(postgres_storage.enum, "register_enum"),
+        ):
+            self.configure[0](mock.MagicMock())
+            self.storage.refresh_types()
+            self.configure[0](mock.MagicMock())
+
+        self.assertEqual(fetch.call_count, 2)
+
+    def test_stale_type_is_refreshed_and_retried(self):
+        cursor = self.pool.connection.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value
+        cursor.execute.side_effect = [errors.InternalError_("cache lookup failed for type 16384"), None]
+        cursor.rowcount = 1
+
+        self.storage.exec("UPDATE t SET status = %s", params=[PgEnum.A])
+
+        self.assertEqual(cursor.execute.call_count, 2)
+        self.pool.drain.assert_called()
+
+    def test_other_errors_are_not_retried(self):
+        cursor = self.pool.connection.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value
+        cursor.execute.side_effect = errors.UndefinedColumn('column "status" does not exist')
+
+        with self.assertRaises(errors.UndefinedColumn):
+            self.storage.exec("UPDATE t SET status = %s", params=[PgEnum.A])
+
+        cursor.execute.assert_called_once()
+        self.pool.drain.assert_not_called()
+
+    def test_replica_connections_are_checked(self):
+        cfg = postgres.PgStorageConfig(replicas=[postgres.ReplicaConfig(endpoint="replica")])
+        storage = postgres.PgStorage(cfg, mock.Mock())
+        with mock.patch.object(postgres_storage, "ConnectionPool") as pool_cls:
+            storage.connect()
+
+        replica_kwargs = [call.kwargs for call in pool_cls.call_args_list if call.kwargs["name"] == "replica_0"]
+        self.assertEqual(len(replica_kwargs), 1)
+        self.assertIsNotNone(replica_kwargs[0]["check"])
+        self.assertIsNotNone(replica_kwargs[0]["reset"])
+
+    def test_warmup_is_reported(self):
+        with (
+            mock.patch.object(postgres_storage.enum.EnumInfo, "fetch"),
+            mock.patch.object(postgres_storage.enum, "register_enum"),
+            mock.patch.object(postgres_storage.pool, "pool_stats") as pool_stats,
+        ):
+            self.configure[1](mock.MagicMock())
+            self.storage.pool_stats()
+
+        warmups = {call.args[0]: call.args[2] for call in pool_stats.call_args_list}
+        self.assertIsNone(warmups["interactive"].seconds)
+        self.assertIsNotNone(warmups["tap"].seconds)
@@ -66,6 +66,61 @@ class ServerTest(unittest.TestCase):
         self.assertEqual(response.status_code, 400)
 
 
+class MockDefaultsResponse(pydantic.BaseModel):
+    name: str = "default"
+    value: float | None = None
+    alias_: str = pydantic.Field(alias="alias")
+    items: list[object]
+
+
+class FastJSONTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.config = ServerConfig(port=8000, host="127.0.0.1")
+        self.logger = Mock(spec=structlog.stdlib.BoundLogger)
+
+        def response(request: MockRequest) -> APIOkResponse[MockDefaultsResponse]:
+            return APIOkResponse(
+                data=MockDefaultsResponse(alias=request.message, value=None, items=[1, None, "x", float("nan")])
+            )
+
+        async def default_handler(request: MockRequest) -> APIOkResponse[MockDefaultsResponse]:
+            return response(request)
+
+        async def fast_handler(request: MockRequest) -> APIOkResponse[MockDefaultsResponse]:
+            return response(request)
+
+        self.routes = [
+            Route(path="/default", method=http.HTTPMethod.POST, handler=default_handler, summary="default"),
+            Route(path="/fast", method=http.HTTPMethod.POST, handler=fast_handler, summary="fast", fast_json=True),
+        ]
+
+    def test_same_output_as_response_model(self) -> None:
+        server = WebServer(self.routes, self.config, self.logger, auth.NoopAuthenticator())
+        client = testclient.TestClient(server.app)
+
+        default = client.post("/api/default", json={"message": "m"})
+        fast = client.post("/api/fast", json={"message": "m"})
+
+        self.assertEqual(fast.status_code, 200)
+        self.assertEqual(fast.headers["content-type"], "application/json")
+        self.assertEqual(fast.json(), default.json())
+        self.assertEqual(fast.json(), {"data": {"alias": "m", "items": [1, None, "x", None]}})
+
+    def test_request_is_validated(self) -> None:
+        server = WebServer(self.routes, self.config, self.logger, auth.NoopAuthenticator())
+        client = testclient.TestClient(server.app)
+
+        self.assertEqual(client.post("/api/fast", json={"invalid_field": "value"}).status_code, 400)
+
+    def test_response_model_is_documented(self) -> None:
+        server = WebServer(self.routes, self.config, self.logger, auth.NoopAuthenticator())
+        paths = server.app.openapi()["paths"]
+
+        self.assertEqual(
+            paths["/api/fast"]["post"]["responses"]["200"], paths["/api/default"]["post"]["responses"]["200"]
+        )
+
+
 class _FakeAuthenticator(auth.Authenticator):
     def __init__(self, by_token: dict[str, tuple[auth.User, bool]]) -> None:
         self._by_token = by_token
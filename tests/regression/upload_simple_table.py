@@ -522,7 +522,7 @@ def layer2_import():
         log,
         {"batch_size": OBJECTS_NUM // 5, "silent": True},
     )
-    cfg = tasks.Config()
+    cfg = tasks.Config(apexes_config_path="configs/test/dataapi.yaml")
     task.prepare(cfg)
     try:
         task.run()
@@ -1,11 +1,16 @@
+import asyncio
+import datetime
 import unittest
+from collections.abc import Awaitable, Callable
 
 import structlog
 
 from app import tasks
+from app.data import enums as data_enums
 from app.data import model, repositories
 from app.data.repositories import layer2
-from app.tasks import layer2_import
+from app.lib.storage import postgres
+from app.tasks import layer2_import, layer2_import_velocity
 from tests import lib
 
 
@@ -20,7 +25,7 @@ class Layer2ImportTest(unittest.TestCase):
         cls.layer2_repo = repositories.Layer2Repository(cls.pg_storage.get_storage(), structlog.get_logger())
 
         cls.task = layer2_import.Layer2ImportTask(structlog.get_logger())
-        cls.task.prepare(tasks.Config(storage=cls.pg_storage.config))
+        cls.task.prepare(tasks.Config(storage=cls.pg_storage.config, apexes_config_path="configs/dev/dataapi.yaml"))
 
     def tearDown(self):
         self.pg_storage.clear()
@@ -71,6 +76,63 @@ class Layer2ImportTest(unittest.TestCase):
         self.assertEqual(len(actual), 1)
         lib.assert_layer2_catalog_objects_equal(self, actual, [expected])
 
+    def _with_async_repo[T](self, call: Callable[[repositories.AsyncLayer2Repository], Awaitable[T]]) -> T:
+        async def run() -> T:
+            storage = postgres.AsyncPgStorage(
+                self.pg_storage.config, structlog.get_logger(), data_enums.PG_ENUM_REGISTRY
+            )
+            await storage.connect()
+            try:
+                return await call(repositories.AsyncLayer2Repository(storage, structlog.get_logger()))
+            finally:
+                await storage.disconnect()
+
+        return asyncio.run(run())
+
+    def _resolve(self, names: list[str]) -> dict[str, list[model.DesignationMatch]]:
+        return self._with_async_repo(lambda repo: repo.resolve_designations(names, fuzzy=True, max_fuzzy_matches=5))
+
+    def test_designation_keys_resolve_names(self):
+        _ = self._get_table("test_designation_keys_resolve_names")
+        self.layer0_repo.register_records("test_designation_keys_resolve_names", ["1", "2", "3"])
+        self.common_repo.register_pgcs([41, 42])
+        self.layer0_repo.upsert_pgc({"1": 41, "2": 41, "3": 42})
+        self.layer1_repo.save_structured_data(
+            "designation.data",
+            ["design"],
+            ["1", "2", "3"],
+            [["NGC 4486"], ["M 87"], ["NGC 4472"]],
+            conflict_keys=model.DesignationCatalogObject.layer1_primary_keys(),
+        )
+
+        self.task.run()
+        actual = self._resolve(["ngc4486", "M087", "NGC 4486", "NGC 4473"])
+
+        self.assertEqual([(m.pgc, m.exact) for m in actual["ngc4486"]], [(41, True)])
+        self.assertEqual([(m.pgc, m.design) for m in actual["M087"]], [(41, "M 87")])
+        self.assertEqual([m.pgc for m in actual["NGC 4486"]], [41])
+        self.assertIn(42, [m.pgc for m in actual["NGC 4473"] if not m.exact])
+
+    def test_designation_suggestions(self):
+        _ = self._get_table("test_designation_suggestions")
+        self.layer0_repo.register_records("test_designation_suggestions", ["1", "2", "3", "4"])
+        self.common_repo.register_pgcs([41, 42, 43])
+        self.layer0_repo.upsert_pgc({"1": 41, "2": 41, "3": 42, "4": 43})
+        self.layer1_repo.save_structured_data(
+            "designation.data",
+            ["design"],
+            ["1", "2", "3", "4"],
+            [["NGC 4486"], ["NGC 4486A"], ["NGC 4472"], ["UGC 7654"]],
+            conflict_keys=model.DesignationCatalogObject.layer1_primary_keys(),
+        )
+
+        self.task.run()
+        suggestions = self._with_async_repo(lambda repo: repo.suggest_designations("NGC44", 10))
+        keys = self._with_async_repo(lambda repo: repo.get_designation_keys())
+
+        self.assertEqual([(s.pgc, s.design) for s in suggestions], [(42, "NGC 4472"), (41, "NGC 4486")])
+        self.assertEqual(sorted(keys["key"].tolist()), ["NGC4472", "NGC4486", "NGC4486A", "UGC7654"])
+
     def test_updated_objects(self):
         self.test_import_two_catalogs()
         _ = self._get_table("test_updated_objects")
@@ -135,3 +197,37 @@ class Layer2ImportTest(unittest.TestCase):
         self.assertEqual(len(actual), 1)
         self.assertEqual(len(actual[0].data), 1)
         lib.assert_catalog_object_equal(self, actual[0].data[0], expected)
+
+    def test_apex_velocities(self) -> None:
+        _ = self._get_table("test_apex_velocities")
+        self.layer0_repo.register_records("test_apex_velocities", ["1", "2"])
+        self.common_repo.register_pgcs([51, 52])
+        self.layer0_repo.upsert_pgc({"1": 51, "2": 52})
+        self.layer1_repo.save_structured_data(
+            "icrs.data", ["ra", "e_ra", "dec", "e_dec"], ["1", "2"], [[12, 0.2, 13, 0.2], [14, 0.2, 15, 0.2]]
+        )
+        self.layer1_repo.save_structured_data("cz.data", ["cz", "e_cz"], ["1"], [[1000.0, 10.0]])
+
+        self.task.run()
+
+        apexes = layer2_import_velocity.load_apexes("configs/dev/dataapi.yaml")
+        parameters = {key: config.parameters() for key, config in apexes.items()}
+        stored = self._with_async_repo(lambda repo: repo.get_apex_velocities([51, 52], parameters))
+
+        # Objects without a redshift have no velocities.
+        self.assertEqual(list(stored), [51])
+        self.assertEqual(set(stored[51]), set(apexes))
+        self.assertAlmostEqual(stored[51]["heliocentric"].v, 1000.0)
+
+        # Velocities of apexes with other parameters are not served.
+        changed = parameters | {"heliocentric": (1.0, 0.0, 0.0, 0.0, 0.0, 0.0)}
+        stored = self._with_async_repo(lambda repo: repo.get_apex_velocities([51], changed))
+        self.assertEqual(set(stored[51]), set(apexes) - {"heliocentric"})
+
+        # Once one of the catalogs is imported again on its own, the velocities may reflect its old values.
+        redshift_updated_at = self.layer2_repo.get_last_update_time(model.RawCatalog.REDSHIFT)
+        self.layer2_repo.update_last_update_time(
+            redshift_updated_at + datetime.timedelta(seconds=1), model.RawCatalog.REDSHIFT
+        )
+        stored = self._with_async_repo(lambda repo: repo.get_apex_velocities([51], parameters))
+        self.assertEqual(stored, {})
@@ -2,17 +2,23 @@ import datetime
 import unittest
 from unittest import mock
 
+import numpy as np
 import structlog
 from astropy import table
 from astropy import units as u
 
+from app.data import model
+from app.lib import astronomy
+from app.lib.astronomy import apex
 from app.tasks import (
     interface,
+    layer2_common,
     layer2_import,
     layer2_import_designation,
     layer2_import_icrs,
     layer2_import_nature,
     layer2_import_redshift,
+    layer2_import_velocity,
 )
 
 
@@ -87,6 +93,29 @@ class AggregateIcrsTest(unittest.TestCase):
         self.assertAlmostEqual(float(agg["ra"][by_pgc[1]].to_value(deg)), 10.0)
         self.assertAlmostEqual(float(agg["ra"][by_pgc[2]].to_value(deg)), 12.0)
 
+    def test_galactic_and_supergalactic_coordinates(self) -> None:
+        deg = u.Unit("deg")
+        tbl = table.QTable(
+            {
+                "pgc": [1, 2],
+                "ra": [187.70593, 10.68471] * deg,
+                "e_ra": [1.0, 1.0] * deg,
+                "dec": [12.39112, 41.26875] * deg,
+                "e_dec": [1.0, 1.0] * deg,
+                "datatype": ["regular", "regular"],
+            }
+        )
+        agg = layer2_import_icrs.aggregate_icrs(tbl)
+
+        for i in range(len(agg)):
+            ra, dec = float(agg["ra"][i].to_value(deg)), float(agg["dec"][i].to_value(deg))
+            glon, glat, _, _ = astronomy.equatorial_to_lonlat(ra, dec, 0, 0, "galactic")
+            sgl, sgb, _, _ = astronomy.equatorial_to_lonlat(ra, dec, 0, 0, "supergalactic")
+            self.assertAlmostEqual(float(agg["glon"][i].to_value(deg)), glon, places=9)
+            self.assertAlmostEqual(float(agg["glat"][i].to_value(deg)), glat, places=9)
+            self.assertAlmostEqual(float(agg["sgl"][i].to_value(deg)), sgl, places=9)
+            self.assertAlmostEqual(float(agg["sgb"][i].to_value(deg)), sgb, places=9)
+
 
 class AggregateRedshiftTest(unittest.TestCase):
     def test_weighted_mean_cz(self) -> None:
@@ -176,6 +205,141 @@ class AggregateDesignationTest(unittest.TestCase):
         self.assertEqual(by_pgc[2], "NGC 598")
 
 
+def _apex(lon: float, lat: float, vel: float) -> apex.ApexConfig:
+    return apex.ApexConfig(
+        lon=apex.ValueWithUncertainty(value=lon, error=0.5),
+        lat=apex.ValueWithUncertainty(value=lat, error=0.5),
+        vel=apex.ValueWithUncertainty(value=vel, error=3.0),
+    )
+
+
+class ComputeVelocitiesTest(unittest.TestCase):
+    def test_matches_scalar_computation(self) -> None:
+        cols = {
+            "pgc": np.array([1, 2]),
+            "ra": np.array([187.70593, 10.68471]),
+            "e_ra": np.array([1e-4, 2e-4], dtype=np.float32),
+            "dec": np.array([12.39112, 41.26875]),
+            "e_dec": np.array([3e-4, 4e-4], dtype=np.float32),
+            # The second object was saved before the galactic coordinates were stored.
+            "glon": np.ma.MaskedArray([283.77763, 0.0], mask=[False, True]),
+            "glat": np.ma.MaskedArray([74.49108, 0.0], mask=[False, True]),
+            "cz": np.array([1284.0, -300.0]),
+            "e_cz": np.array([5.0, 4.0], dtype=np.float32),
+        }
+        apexes = {"local_group": _apex(94.0, -2.7, 301.0), "cmb": _apex(263.99, 48.26, 370.06)}
+
+        velocities = layer2_import_velocity.compute_velocities(cols, apexes)
+
+        self.assertEqual(list(velocities), ["local_group", "cmb"])
+        kms, deg = u.Unit("km/s"), u.Unit("deg")
+        glon, glat, _, _ = astronomy.equatorial_to_lonlat(10.68471, 41.26875, 0, 0, "galactic")
+        positions = [(283.77763, 74.49108), (glon, glat)]
+        for key, config in apexes.items():
+            tbl = velocities[key]
+            self.assertEqual(tbl["pgc"].tolist(), [1, 2])
+            for i, (lon, lat) in enumerate(positions):
+                expected, expected_err = astronomy.velocity_wr_apex(
+                    vel=float(cols["cz"][i]) * kms,
+                    lon=lon * deg,
+                    lat=lat * deg,
+                    vel_apex=config.vel.value * kms,
+                    lon_apex=config.lon.value * deg,
+                    lat_apex=config.lat.value * deg,
+                    vel_err=float(cols["e_cz"][i]) * kms,
+                    lon_err=float(cols["e_ra"][i]) * deg,
+                    lat_err=float(cols["e_dec"][i]) * deg,
+                    vel_apex_err=config.vel.error * kms,
+                    lon_apex_err=config.lon.error * deg,
+                    lat_apex_err=config.lat.error * deg,
+                )
+                self.assertAlmostEqual(float(tbl["v"][i].to_value(kms)), expected.value, places=5)
+                self.assertAlmostEqual(float(tbl["e_v"][i].to_value(kms)), expected_err.value, places=5)
+
+    def test_load_apexes_from_dataapi_config(self) -> None:
+        apexes = layer2_import_velocity.load_apexes("configs/dev/dataapi.yaml")
+        self.assertIn("local_group", apexes)
+        self.assertEqual(apexes["local_group"].parameters(), (94.0, 0.7, -2.7, 0.3, 301.0, 3.0))
+
+
+class Layer2ImportVelocityTaskTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.icrs_updated_at = datetime.datetime(2026, 1, 2, tzinfo=datetime.UTC)
+        self.redshift_updated_at = datetime.datetime(2026, 1, 3, tzinfo=datetime.UTC)
+        self.task = layer2_import_velocity.Layer2ImportVelocityTask(structlog.get_logger(), batch_size=10, silent=True)
+        self.task.apexes = {
+            "unchanged": _apex(1.0, 2.0, 3.0),
+            "changed": _apex(4.0, 5.0, 6.0),
+            "new": _apex(7.0, 8.0, 9.0),
+        }
+        self.repo = mock.Mock()
+        self.repo.get_last_update_time.side_effect = lambda catalog: (
+            self.icrs_updated_at if catalog == model.RawCatalog.ICRS else self.redshift_updated_at
+        )
+        stored_at = datetime.datetime(2025, 1, 1, tzinfo=datetime.UTC)
+        self.repo.get_apexes.return_value = {
+            # Only the objects modified since the older of the two imports are recomputed.
+            "unchanged": model.StoredApex(
+                _apex(1.0, 2.0, 3.0).parameters(), stored_at, datetime.datetime(2025, 6, 1, tzinfo=datetime.UTC)
+            ),
+            "changed": model.StoredApex(_apex(4.0, 5.0, 600.0).parameters(), stored_at, stored_at),
+            "removed": model.StoredApex(_apex(0.0, 0.0, 0.0).parameters(), stored_at, stored_at),
+        }
+        batch = {name: np.array([5.0]) for name in ("ra", "e_ra", "dec", "e_dec", "glon", "glat", "cz", "e_cz")} | {
+            "pgc": np.array([5])
+        }
+        empty = {name: values[:0] for name, values in batch.items()}
+        self.repo.get_velocity_inputs.side_effect = lambda modified_after, limit, offset: (
+            batch if offset == 0 else empty
+        )
+        self.task.layer2_repository = self.repo
+
+    def test_recomputes_changed_apexes_for_all_objects(self) -> None:
+        self.task.run()
+
+        modified_after = [call.args[0] for call in self.repo.get_velocity_inputs.call_args_list]
+        self.assertEqual(
+            modified_after,
+            [
+                datetime.datetime(2025, 1, 1, tzinfo=datetime.UTC),
+                datetime.datetime(2025, 1, 1, tzinfo=datetime.UTC),
+                None,
+                None,
+            ],
+        )
+        self.repo.remove_apexes.assert_called_once_with(["removed"])
+        saved = [call.args[0] for call in self.repo.save_apex_velocities.call_args_list]
+        self.assertEqual(sorted(saved), ["changed", "new", "unchanged"])
+        started = layer2_import_velocity.RECOMPUTE_STARTED_AT
+        times = (self.icrs_updated_at, self.redshift_updated_at)
+        self.repo.save_apex.assert_has_calls(
+            [
+                mock.call("changed", self.task.apexes["changed"].parameters(), started, started),
+                mock.call("new", self.task.apexes["new"].parameters(), started, started),
+                mock.call("unchanged", self.task.apexes["unchanged"].parameters(), *times),
+                mock.call("changed", self.task.apexes["changed"].parameters(), *times),
+                mock.call("new", self.task.apexes["new"].parameters(), *times),
+            ]
+        )
+
+    def test_since_overrides_stored_time_of_unchanged_apexes(self) -> None:
+        self.task.since = datetime.datetime(2024, 1, 1, tzinfo=datetime.UTC)
+
+        self.task.run()
+
+        modified_after = {call.args[0] for call in self.repo.get_velocity_inputs.call_args_list}
+        self.assertEqual(modified_after, {self.task.since, None})
+
+    def test_dry_run_writes_nothing(self) -> None:
+        self.task.dry_run = True
+
+        self.task.run()
+
+        self.repo.remove_apexes.assert_not_called()
+        self.repo.save_apex.assert_not_called()
+        self.repo.save_apex_velocities.assert_not_called()
+
+
 class ParseSinceTest(unittest.TestCase):
     def test_none(self) -> None:
         self.assertIsNone(interface.parse_since(None))
@@ -236,3 +400,13 @@ class Layer2ImportTaskParamsTest(unittest.TestCase):
             cleanup_orphans=False,
         )
         child.run.assert_called_once_with()
+
+    def test_prepare_loads_apexes_only_for_velocity(self) -> None:
+        task = layer2_import.Layer2ImportTask(structlog.get_logger(), catalogs=["icrs"])
+        with mock.patch.object(layer2_common.postgres, "PgStorage"):
+            task.prepare(interface.Config())
+        self.assertEqual(task.apexes, {})
+
+        task = layer2_import.Layer2ImportTask(structlog.get_logger(), catalogs=["icrs", "velocity"])
+        with mock.patch.object(layer2_common.postgres, "PgStorage"), self.assertRaises(ValueError):
+            task.prepare(interface.Config())
@@ -24,7 +24,7 @@ class ServeTasksTest(unittest.TestCase):
 
     def test_build_deployments_without_schedules(self) -> None:
         deployments = flows.build_deployments({})
-        self.assertEqual(len(deployments), 6)
+        self.assertEqual(len(deployments), 7)
         self.assertEqual(
             [d.name for d in deployments],
             list(flows.LAYER2_TASK_NAMES),